@@ -0,0 +1,161 @@
+#
+#   BackgroundTask
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Moved the cancel token and running programs to ProcessUtils.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Requests can give a function to call when they get cancelled.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   Run slow work like the Apertium tools and synthesis off of the GUI thread so the window
+#   doesn't freeze. Each request gets a cancel token. When a new request is made, the one
+#   that is running gets cancelled and its results are thrown away, so only the results of
+#   the newest request are shown. Requests run one at a time because they share files.
+#   External programs started with ProcessUtils.runProcess get killed when their request is cancelled.
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from ProcessUtils import CancelToken, CancelledError
+
+class TaskSignals(QObject):
+
+    finished = pyqtSignal(int, object) # request id, result
+    failed = pyqtSignal(int, str) # request id, error message
+    cancelled = pyqtSignal(int) # request id
+
+class Task(QRunnable):
+
+    def __init__(self, requestId, func, cancelToken, signals):
+        QRunnable.__init__(self)
+
+        self.requestId = requestId
+        self.func = func
+        self.cancelToken = cancelToken
+        self.signals = signals
+
+    def run(self):
+
+        try:
+            self.cancelToken.check()
+            result = self.func(self.cancelToken)
+            self.cancelToken.check()
+
+        except CancelledError:
+
+            self.signals.cancelled.emit(self.requestId)
+            return
+
+        except Exception as e:
+
+            self.signals.failed.emit(self.requestId, str(e))
+            return
+
+        self.signals.finished.emit(self.requestId, result)
+
+# Runs requests in a background thread. Results come back on the GUI thread. A new request
+# cancels the one before it and only the newest request's result handler gets called.
+class LatestRequestRunner(QObject):
+
+    busyChanged = pyqtSignal(bool)
+    errorOccurred = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        QObject.__init__(self, parent)
+
+        self.__pool = QThreadPool(self)
+        self.__pool.setMaxThreadCount(1)
+        self.__requestId = 0
+        self.__cancelToken = None
+        self.__resultFunc = None
+        self.__cancelFunc = None
+        self.__numUnfinished = 0
+        self.numCancelled = 0
+
+        # These signals get emitted from the background thread. Since this object lives in the GUI thread the slots run there.
+        self.__signals = TaskSignals(self)
+        self.__signals.finished.connect(self.__taskFinished)
+        self.__signals.failed.connect(self.__taskFailed)
+        self.__signals.cancelled.connect(self.__taskCancelled)
+
+    # func gets called with a cancel token in the background thread. resultFunc gets called with what func returns.
+    # cancelFunc, if given, gets called right away when the request gets cancelled or replaced by a newer one before its result was shown.
+    def submit(self, func, resultFunc, cancelFunc=None):
+
+        self.cancel()
+
+        self.__requestId += 1
+        self.__cancelToken = CancelToken()
+        self.__resultFunc = resultFunc
+        self.__cancelFunc = cancelFunc
+        self.__numUnfinished += 1
+
+        if self.__numUnfinished == 1:
+            self.busyChanged.emit(True)
+
+        self.__pool.start(Task(self.__requestId, func, self.__cancelToken, self.__signals))
+
+        return self.__requestId
+
+    def cancel(self):
+
+        if self.__cancelToken and not self.__cancelToken.isCancelled():
+            self.__cancelToken.cancel()
+
+            # Call this here rather than when the task stops so it has happened before a new request gets made
+            if self.__cancelFunc:
+                self.__cancelFunc()
+                self.__cancelFunc = None
+
+    def isBusy(self):
+
+        return self.__numUnfinished > 0
+
+    # Cancel what is running and wait for it to stop. Use this before changing files a request might be using.
+    def cancelAndWait(self, msecs=-1):
+
+        self.cancel()
+
+        return self.__pool.waitForDone(msecs)
+
+    def waitForDone(self, msecs=-1):
+
+        return self.__pool.waitForDone(msecs)
+
+    def __taskDone(self):
+
+        self.__numUnfinished -= 1
+
+        if self.__numUnfinished == 0:
+            self.busyChanged.emit(False)
+
+    def __taskFinished(self, requestId, result):
+
+        if requestId == self.__requestId and not self.__cancelToken.isCancelled():
+            self.__cancelFunc = None
+            self.__resultFunc(result)
+        else:
+            self.numCancelled += 1
+
+        self.__taskDone()
+
+    def __taskFailed(self, requestId, errMsg):
+
+        if requestId == self.__requestId and not self.__cancelToken.isCancelled():
+            self.__cancelFunc = None
+            self.errorOccurred.emit(errMsg)
+        else:
+            self.numCancelled += 1
+
+        self.__taskDone()
+
+    def __taskCancelled(self, requestId):
+
+        self.numCancelled += 1
+        self.__taskDone()
@@ -0,0 +1,151 @@
+#
+#   BilingualIndex
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Remove each entry from its section after it is read so the empty entries don't pile up.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   A compact index of the bilingual lexicon for looking up the targets of a source lemma. For
+#   each source lemma we keep a list of (source tags, target lemma, target tags). The .dix file
+#   is read with iterparse one entry at a time, so the whole XML tree is never in memory. The
+#   index is saved next to the .dix file along with the file's modification time and size.
+#   Next time, if the .dix file hasn't changed, the saved index is loaded instead.
+
+import os
+import json
+import xml.etree.ElementTree as ET
+
+import Utils
+from Testbed import getXMLEntryText
+
+INDEX_FILE_SUFFIX = '.index.json'
+INDEX_FORMAT_VERSION = 1
+
+# Something that changes when the .dix file gets rebuilt
+def getFileKey(dixPath):
+
+    stat = os.stat(dixPath)
+
+    return [stat.st_mtime_ns, stat.st_size]
+
+# Most entries have one of a few tag sequences, so the same tuple gets shared to save memory
+def getTags(node, tagsMap):
+
+    tags = tuple(s.attrib['n'] for s in node.iter('s') if 'n' in s.attrib)
+
+    return tagsMap.setdefault(tags, tags)
+
+class BilingualIndex():
+
+    def __init__(self, entryMap, loadedFromFile=False):
+
+        self.__entryMap = entryMap # source lemma -> list of (source tags, target lemma, target tags)
+        self.loadedFromFile = loadedFromFile
+
+    def __len__(self):
+
+        return len(self.__entryMap)
+
+    def __contains__(self, lemma):
+
+        return lemma in self.__entryMap
+
+    # Returns a list of (source tags, target lemma, target tags) or None. The target lemma is None if
+    # the source sense was linked to nothing.
+    def getTargets(self, lemma):
+
+        return self.__entryMap.get(lemma)
+
+    def save(self, indexPath, fileKey):
+
+        with Utils.openFileAtomically(indexPath) as f:
+
+            json.dump({'version': INDEX_FORMAT_VERSION, 'key': fileKey, 'entries': self.__entryMap}, f, ensure_ascii=False)
+
+# Read the bilingual lexicon into an index. Raises the same errors as ET.parse for a missing or bad file.
+def buildIndex(dixPath):
+
+    entryMap = {}
+    tagsMap = {}
+    parentList = [] # the elements we are inside of
+
+    for event, entry in ET.iterparse(dixPath, events=('start', 'end')):
+
+        if event == 'start':
+
+            parentList.append(entry)
+            continue
+
+        parentList.pop()
+
+        if entry.tag != 'e':
+            continue
+
+        ## <e> (entry) should either have <p><l>abc</l><r>xyz</r></p>) or <i> (p = pair, l = left, r = right)
+        left = entry.find('p/l')
+
+        # If we can't find it, it must be an <i> (identity), skip it
+        if left is not None:
+
+            right = entry.find('p/r')
+            key = getXMLEntryText(left)
+            target = (getTags(left, tagsMap), right.text and getXMLEntryText(right), getTags(right, tagsMap))
+
+            # See if we have the source entry already
+            if key not in entryMap:
+
+                entryMap[key] = [target]
+
+            elif target[0] == entryMap[key][0][0]:
+
+                # The current entry has the same source language tags
+                # as the first entry with this lemma in the file,
+                # so it's a replacement, and we should use the later one.
+                entryMap[key][0] = target
+            else:
+                entryMap[key].append(target)
+
+        # We are done with this entry, take it out of its section and free it
+        if parentList:
+            parentList[-1].remove(entry)
+
+        entry.clear()
+
+    return BilingualIndex(entryMap)
+
+# Load the saved index for the .dix file if the file hasn't changed since it was saved, otherwise build it and save it.
+def loadIndex(dixPath):
+
+    indexPath = dixPath + INDEX_FILE_SUFFIX
+    fileKey = getFileKey(dixPath)
+
+    try:
+        with open(indexPath, encoding='utf-8') as f:
+
+            data = json.load(f)
+
+        if data['version'] == INDEX_FORMAT_VERSION and data['key'] == fileKey:
+
+            tagsMap = {}
+            getTuple = lambda tags: tagsMap.setdefault(tuple(tags), tuple(tags))
+
+            return BilingualIndex({lemma: [(getTuple(srcTags), target, getTuple(tgtTags)) for srcTags, target, tgtTags in targetList]
+                                   for lemma, targetList in data['entries'].items()}, loadedFromFile=True)
+    except:
+        pass # no saved index or it is corrupt
+
+    bilingIndex = buildIndex(dixPath)
+
+    # The index is just to save time, if it can't be saved it gets built again next time
+    try:
+        bilingIndex.save(indexPath, fileKey)
+    except OSError:
+        pass
+
+    return bilingIndex
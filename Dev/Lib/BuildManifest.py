@@ -0,0 +1,133 @@
+#
+#   BuildManifest
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   Keep track of what went into and came out of each stage of the Translate Text pipeline.
+#   For each stage we store a hash of every input (files, project fingerprints and settings)
+#   and of every output file in a manifest in the Build folder. When a stage is about to be
+#   run again and none of its inputs have changed and its outputs are still the same as what
+#   it produced last time, the stage can be skipped.
+
+import os
+import json
+import hashlib
+
+import FTPaths
+
+MANIFEST_FILE = 'pipeline_manifest.json'
+HASH_BLOCK_SIZE = 1 << 20
+MISSING_FILE_HASH = 'missing'
+
+# Hash the contents of a file. A file that doesn't exist gets a special value.
+def hashFile(path):
+
+    if not path or not os.path.isfile(path):
+        return MISSING_FILE_HASH
+
+    myHash = hashlib.sha1()
+
+    with open(path, 'rb') as f:
+
+        while block := f.read(HASH_BLOCK_SIZE):
+
+            myHash.update(block)
+
+    return myHash.hexdigest()
+
+# Hash a list of values (e.g. settings), lists inside are fine too.
+def hashValues(valueList):
+
+    return hashlib.sha1(json.dumps(valueList, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+# Hash the values of the given settings
+def hashConfigValues(configMap, keyList):
+
+    return hashValues([[key, configMap.get(key)] for key in keyList])
+
+# Something that changes whenever the FLEx project changes. We use the name and the date last modified.
+def projectFingerprint(DB):
+
+    if DB is None:
+        return MISSING_FILE_HASH
+
+    return hashValues([DB.ProjectName(), str(DB.GetDateLastModified())])
+
+class BuildManifest():
+
+    def __init__(self, manifestPath=None):
+
+        if manifestPath is None:
+
+            manifestPath = os.path.join(FTPaths.BUILD_DIR, MANIFEST_FILE)
+
+        self.__path = manifestPath
+        self.__stageMap = {}
+
+        try:
+            with open(self.__path, encoding='utf-8') as f:
+
+                self.__stageMap = json.load(f).get('stages', {})
+        except:
+            self.__stageMap = {} # no manifest yet or it is corrupt, start over
+
+    def getPath(self):
+        return self.__path
+
+    # A stage is up to date if it has the same inputs as last time and its output files haven't changed.
+    def isUpToDate(self, stageName, inputMap, outputPathList):
+
+        if stageName not in self.__stageMap:
+            return False
+
+        stageInfo = self.__stageMap[stageName]
+
+        if stageInfo['inputs'] != inputMap:
+            return False
+
+        if sorted(stageInfo['outputs']) != sorted(outputPathList):
+            return False
+
+        for path, myHash in stageInfo['outputs'].items():
+
+            if myHash == MISSING_FILE_HASH or hashFile(path) != myHash:
+                return False
+
+        return True
+
+    # Save the inputs that were used and hash the output files that were just produced.
+    def recordStage(self, stageName, inputMap, outputPathList):
+
+        self.__stageMap[stageName] = {'inputs': inputMap,
+                                      'outputs': {path: hashFile(path) for path in outputPathList}}
+
+    # Remove a stage, e.g. because it's about to be rerun and it may fail.
+    def forgetStage(self, stageName):
+
+        self.__stageMap.pop(stageName, None)
+
+    # Our own changes to a project (e.g. inserting the translated text) shouldn't make the stages that
+    # depend on the project out of date. Replace the old fingerprint with the new one wherever it occurs.
+    def updateFingerprint(self, oldFingerprint, newFingerprint):
+
+        for stageInfo in self.__stageMap.values():
+
+            for key, value in stageInfo['inputs'].items():
+
+                if value == oldFingerprint:
+
+                    stageInfo['inputs'][key] = newFingerprint
+
+    def save(self):
+
+        try:
+            with open(self.__path, 'w', encoding='utf-8') as f:
+
+                json.dump({'stages': self.__stageMap}, f, indent=4)
+        except:
+            pass # not being able to save the manifest just means the stages get rerun next time
@@ -5,6 +5,18 @@
 #   SIL International
 #   5/3/22
 #
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Use the Paratext book index to find book files and chapter positions.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Export several texts of the same book with one read and one write of the book.
+#    Chapters get put in using the chapter offsets in the book instead of a regex per chapter.
+#    The book gets written atomically. Added a book name to abbreviation map.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Build the strings for all paragraphs up front with the writing system props made once
+#    and create the paragraphs in batches, showing progress.
+#
 #   Version 3.15.1 - 2/11/26 - Ron Lockwood
 #    Fixes #1149. Support alternate Paratext folder setting.
 #
@@ -86,6 +98,7 @@ import ClusterUtils
 from ComboBox import CheckableComboBox
 import FTPaths
 import Utils
+import ParatextBookIndex
 from SIL.LCModel.Core.Text import TsStringUtils         # type: ignore
 
 # Define _translate for convenience
@@ -94,6 +107,7 @@ _translate = QCoreApplication.translate
 PTXIMPORT_SETTINGS_FILE = 'ParatextImportSettings.json'
 EXP_SHRINK_WINDOW_PIXELS = 120
 FROM_FLEX_EXP_PIXELS = 33
+PARAGRAPH_BATCH_SIZE = 500
 
 bookChapterPattern = re.compile(r'^(?P<book>.+?) (?P<chap1>\d{2})(?:-(?P<chap2>\d{2}))?(?: - Copy(?: \(\d{1,2}\))?)?$')
 
@@ -162,18 +176,8 @@ class ChapterSelection(object):
         else:
             ptxFolder = os.path.join(self.paratextPath, projectAbbrev)
 
-        # First try .SFM
-        pattern = '*' + self.bookAbbrev + projectAbbrev + '.SFM'
-        path = os.path.join(ptxFolder, pattern)
-        fileList = glob.glob(path)
-
-        # If none found, try .USFM
-        if not fileList:
-            pattern = '*' + self.bookAbbrev + projectAbbrev + '.USFM'
-            path = os.path.join(ptxFolder, pattern)
-            fileList = glob.glob(path)
-
-        return fileList[0] if fileList else ''
+        # The book index remembers where each book file is so we don't have to search the folder each time
+        return ParatextBookIndex.getBookIndex().findBookPath(ptxFolder, self.bookAbbrev + projectAbbrev)
 
 # Split the text into sfm marker (or ref) and non-sfm marker (or ref), i.e. text content. The sfm marker or reference will later get marked as analysis lang. so it doesn't
 # have to be interlinearized. Always put the marker + ref with dash before the plain marker + ref. \\w+* catches all end markers and \\w+ catches everything else (it needs to be at the end)
@@ -215,54 +219,94 @@ def convertFigSyntax(importText):
     return re.sub(r'\\fig ([^\\|]*)\|([^\\|]*)\|([^\\|]*)\|([^\\|]*)\|([^\\|]*)\|([^\\|]*)\|([^\\|]*)\\fig\*', 
                   r'\\fig \6|alt="\1" src="\2" size="\3" loc="\4" copy="\5" ref="\7"\\fig*', importText)
 
-def insertParagraphs(DB, inputStr, m_stTxtParaFactory, stText):
+# Either an sfm marker or a verse ref should get marked as Analysis WS
+analysisSegPattern = re.compile(r'\\|\d+[.:]\d+')
+
+# Split the text into paragraphs. A new paragraph starts at every line feed. Each paragraph is a list of 
+# (text, isAnalysis) runs where runs next to each other always have different writing systems.
+def getParagraphRuns(inputStr):
 
     # Fix any sfms that are split across two lines. E.g. kanqa>>.\[newline]x + \xo ...
     # put the \ after the newline
     inputStr = re.sub(r'\\\n', r'\n\\', inputStr)
 
-    segs = splitSFMs(inputStr)
-
-    # Create 1st paragraph object
-    stTxtPara = m_stTxtParaFactory.Create()
-    
-    # Add it to the stText object
-    stText.ParagraphsOS.Add(stTxtPara)    
-    bldr = TsStringUtils.MakeStrBldr()
+    parList = []
+    runList = []
 
-    # Start a new paragraph at every line feed
-    newPar = r'\n' 
-    
-    for _, seg in enumerate(segs):
+    for seg in splitSFMs(inputStr):
         
         if not (seg is None or len(seg) == 0 or seg == '\n'):
-            
-            # Either an sfm marker or a verse ref should get marked as Analysis WS
-            if re.search(r'\\|\d+[.:]\d+', seg):
-                
-                # make this in the Analysis WS
-                tss = TsStringUtils.MakeString(re.sub(r'\n','', seg), DB.project.DefaultAnalWs)
-                bldr.ReplaceTsString(bldr.Length, bldr.Length, tss)
-                
+
+            isAnalysis = analysisSegPattern.search(seg) is not None
+            segText = seg.replace('\n', '')
+
+            # Add on to the last run if it's the same writing system
+            if runList and runList[-1][1] == isAnalysis:
+
+                runList[-1] = (runList[-1][0] + segText, isAnalysis)
             else:
-                # make this in the Vernacular WS
-                tss = TsStringUtils.MakeString(re.sub(r'\n','', seg), DB.project.DefaultVernWs)
-                bldr.ReplaceTsString(bldr.Length, bldr.Length, tss)
+                runList.append((segText, isAnalysis))
         
-        if seg and re.search(newPar, seg): # or first segment if not blank
+        if seg and '\n' in seg:
         
-            # Save the built up string to the Contents member
-            stTxtPara.Contents = bldr.GetString()
-            
-            # Create paragraph object
-            stTxtPara = m_stTxtParaFactory.Create()
-            
-            # Add it to the stText object
-            stText.ParagraphsOS.Add(stTxtPara)  
+            parList.append(runList)
+            runList = []
         
+    parList.append(runList)
+
+    return parList
+
+# Build the TsStrings for all the paragraphs up front. The text props for the two writing systems only get made once.
+def makeParagraphStrings(DB, inputStr):
+
+    analWs = DB.project.DefaultAnalWs
+    vernWs = DB.project.DefaultVernWs
+    propsMap = {True: TsStringUtils.MakeProps(None, analWs), False: TsStringUtils.MakeProps(None, vernWs)}
+    emptyTss = TsStringUtils.EmptyString(vernWs)
+    tssList = []
+
+    for runList in getParagraphRuns(inputStr):
+
+        if not runList:
+
+            tssList.append(emptyTss)
+
+        # Most paragraphs are a single run, e.g. a marker on its own line, so we don't need a builder
+        elif len(runList) == 1:
+
+            segText, isAnalysis = runList[0]
+            tssList.append(TsStringUtils.MakeString(segText, analWs if isAnalysis else vernWs))
+        else:
             bldr = TsStringUtils.MakeStrBldr()
-        
-    stTxtPara.Contents = bldr.GetString()
+
+            for segText, isAnalysis in runList:
+
+                bldr.Replace(bldr.Length, bldr.Length, segText, propsMap[isAnalysis])
+
+            tssList.append(bldr.GetString())
+
+    return tssList
+
+# Insert the text as paragraphs while marking sfms as analysis writing system. The strings are all made first,
+# then the paragraphs get created in batches with progress shown after each batch if we have a report.
+def insertParagraphs(DB, inputStr, m_stTxtParaFactory, stText, report=None):
+
+    tssList = makeParagraphStrings(DB, inputStr)
+
+    if report:
+        report.ProgressStart(len(tssList))
+
+    for batchStart in range(0, len(tssList), PARAGRAPH_BATCH_SIZE):
+
+        for tss in tssList[batchStart:batchStart+PARAGRAPH_BATCH_SIZE]:
+
+            # Create the paragraph object and add it to the stText object
+            stTxtPara = m_stTxtParaFactory.Create()
+            stText.ParagraphsOS.Add(stTxtPara)
+            stTxtPara.Contents = tss
+
+        if report:
+            report.ProgressUpdate(min(batchStart + PARAGRAPH_BATCH_SIZE, len(tssList)))
 
 def setTextMetaData(DB, text):
 
@@ -585,24 +629,101 @@ def getScriptureText(report, textTitles):
 
     return sorted(filteredTitles)
 
+# Split text into its chapters. Returns a list of (chapter number, chapter text) in the order found.
+# If there is introductory material (\ip) before chapter 1, it goes with chapter 1.
+def splitTextIntoChapters(textContents):
+
+    chapterList = []
+
+    # Split the contents into chapter chunks
+    synContentsList = re.split(r'(\\c (\d+))', textContents) # gives us [pre, \c 1, 1, \s ..., \c 2, 2, \s ..., ...]
+
+    for n in range(1, len(synContentsList), 3): # the zeroth one will be whatever is before the first \c, possibly the empty string
+
+        wholeChStr = synContentsList[n] + synContentsList[n+2]
+
+        # If we have chapter 1, and before chapter 1 is some intro stuff, add intro portion before chapter 1 marker and text
+        if n == 1 and synContentsList[n] == '\\c 1' and re.search(r'\\ip', synContentsList[0]):
+
+            wholeChStr = synContentsList[0] + wholeChStr
+
+        chapterList.append((int(synContentsList[n+1]), wholeChStr))
+
+    return chapterList
+
+# Put the given chapters into the book contents. A chapter that is in the book replaces everything from its chapter 
+# marker up to the next chapter marker. Chapter 1 with intro material replaces from the main title on. A chapter that
+# isn't in the book goes in before the next higher chapter or at the end. All the chapters go in in one pass.
+# The chapter positions come from the book's index entry.
+def spliceChapters(bookContents, chapterList, bookEntry=None):
+
+    if bookEntry is None:
+
+        bookEntry = ParatextBookIndex.BookEntry.fromContents('', 0, 0, bookContents)
+
+    offsetList = bookEntry.getChapterOffsets()
+    editList = []
+
+    # Later texts of the same chapter win
+    for chapNum, wholeChStr in sorted(dict(chapterList).items()):
+
+        if bookEntry.hasChapter(chapNum):
+
+            start, end = bookEntry.getChapterSpan(chapNum)
+
+            # If we have intro stuff to put in chapter 1, start at the main title if it exists.
+            if chapNum == 1 and not wholeChStr.startswith('\\c 1') and 0 <= bookEntry.mainTitleOffset < start:
+
+                start = bookEntry.mainTitleOffset
+        else:
+            # Find the next chapter # in the book, if there isn't one, just append
+            start = end = next((offset for ptxChapNum, offset in offsetList if chapNum < ptxChapNum), len(bookContents))
+
+        editList.append((start, end, wholeChStr))
+
+    partList = []
+    pos = 0
+
+    # The edits are in chapter order which is also book order
+    for start, end, wholeChStr in editList:
+
+        partList.append(bookContents[pos:start])
+        partList.append(wholeChStr)
+        pos = max(pos, end)
+
+    partList.append(bookContents[pos:])
+
+    return ''.join(partList)
+
+def getChapterRangeStr(chapNumList):
+
+    if len(chapNumList) > 1:
+
+        return 'chapters', f'{min(chapNumList)}-{max(chapNumList)}'
+    else:
+        return 'chapter', str(chapNumList[0])
+
 def doExport(textContents, report, chapSelectObj, parent):
+
+    return doExportMultiple([textContents], report, chapSelectObj, parent)
+
+# Export the contents of one or more texts that all belong to the same book. The book gets read once, 
+# all the chapters get put in, then the book gets written once.
+def doExportMultiple(textContentsList, report, chapSelectObj, parent):
     
-    # Find all the chapter #s
-    myChapList = re.findall(r'\\c (\d+)', textContents, flags=re.RegexFlag.DOTALL)
+    chapterList = []
+
+    for textContents in textContentsList:
+
+        chapterList.extend(splitTextIntoChapters(textContents))
     
     # Check that we have chapters in the syn. file
-    if len(myChapList) < 1: 
+    if len(chapterList) < 1: 
         
         report.Error(_translate("ChapterSelection", "No chapters found in the text."))
         return None
-    
-    elif len(myChapList) > 1:
-    
-        chapStr = 'chapters'
-        digitsStr = myChapList[0]+'-'+myChapList[-1]
-    else:
-        chapStr = 'chapter'
-        digitsStr = myChapList[0]
+
+    chapStr, digitsStr = getChapterRangeStr([chapNum for chapNum, _ in chapterList])
 
     # Prompt the user to be sure they want to replace these chapters.
     if not chapSelectObj.dontShowWarning:
@@ -644,84 +765,29 @@ def doExport(textContents, report, chapSelectObj, parent):
     copyfile(bookPath, bookPath+'.bak')
     
     # Read the Paratext file
-    with open(bookPath, encoding='utf-8') as f:
+    bookIndex = ParatextBookIndex.getBookIndex()
+    bookContents, bookEntry = bookIndex.readBook(bookPath)
     
-        bookContents = f.read()
-    
-    # Find all the chapter #s
-    ptxChapList = re.findall(r'\\c (\d+)', bookContents, flags=re.RegexFlag.DOTALL)
-    
-    # Split the synthesis contents into chapter chunks
-    synContentsList = re.split(r'(\\c \d+)', textContents, flags=re.RegexFlag.DOTALL) # gives us [\c 1, \s ..., \c 2, \s ..., ...]
-    haveIntro = False
-
-    # Loop through each synthesis chapter and splice it into the paratext chapter contents
-    for n in range(1, len(synContentsList), 2): # the zeroth one will be whatever is before the first \c, possibly the empty string
+    bookContents = spliceChapters(bookContents, chapterList, bookEntry)
         
-        # If we have chapter 1, and before chapter 1 is some intro stuff, add intro portion before chapter 1 marker and text
-        if n == 1 and synContentsList[n] == '\\c 1' and re.search(r'\\ip', synContentsList[0]):
-
-            haveIntro = True
-            wholeChStr = synContentsList[0] + synContentsList[n] + synContentsList[n+1]
-        else:
-            wholeChStr = synContentsList[n] + synContentsList[n+1]
-        
-        # Check the corresponding chapter in the synthesis chapter list
-        if myChapList[n//2] in ptxChapList:
-            
-            # If we have intro stuff to put in chapter 1, start the regex at \mt if it exists.
-            if n == 1 and haveIntro:
-
-                begRE = r'(\\mt.+\\c 1|\\c 1)'
-            else:
-                begRE = r'\\c ' + myChapList[n//2]
-            
-            # See if this is the last paratext chapter
-            if myChapList[n//2] == ptxChapList[-1]:
-                
-                endRE = r'\s.+'
-                replExtra = ''
-            else:
-                endRE = r'\s.+?\\c' # non-greedy match
-                replExtra = '\\c'
-        else:
-            found = False
-            
-            # Find the next chapter # in the list
-            for i, ptxCh in enumerate(ptxChapList):
-                
-                if int(myChapList[n//2]) < int(ptxCh):
-                    
-                    found = True
-                    break
-            if found:
-                
-                begRE = r'\\c ' + ptxCh
-                replExtra = '\\c ' + ptxCh
-                endRE = ''
-                
-            # No next chapter found, just append
-            else: 
-                
-                bookContents += wholeChStr
-                continue
-        
-        # Escape each backslash
-        wholeChStr = re.sub(r'\\', r'\\\\', wholeChStr + replExtra)    
-        
-        bookContents = re.sub(begRE + endRE, wholeChStr, bookContents, flags=re.RegexFlag.DOTALL)
-        
-    # Write the ptx file
-    f = open(bookPath, 'w', encoding='utf-8')
-    f.write(bookContents)
-    
-    # Close files
-    f.close()
+    # Write the ptx file. Write to a temporary file first so the book is never left half written.
+    Utils.writeFileAtomically(bookPath, bookContents)
+    bookIndex.bookWritten(bookPath, bookContents)
+    bookIndex.save()
 
     # Report what got exported
     report.Info(_translate("ChapterSelection", "{chapStr} {digitsStr} of {bookName} exported to the {projAbbrev} project.").format(chapStr=chapStr.capitalize(), digitsStr=digitsStr, bookName=bookMap[chapSelectObj.bookAbbrev], projAbbrev=chapSelectObj.exportProjectAbbrev))
     return 1
 
+# Get the book abbreviation for a book string that is either an abbreviation or a full book name. '' if it's neither.
+def getBookAbbrev(bookStr):
+
+    if bookStr in bookMap:
+
+        return bookStr
+
+    return bookNameMap.get(bookStr, '')
+
 translators = []
 app = QApplication.instance()
 
@@ -841,5 +907,8 @@ bookMap = {
     'GLO': _translate("ChapterSelection", "Glossary"),
 }
 
+# Book names to abbreviations
+bookNameMap = {bookName: bookAbbrev for bookAbbrev, bookName in bookMap.items()}
+
 #app.quit()
 #del app
\ No newline at end of file
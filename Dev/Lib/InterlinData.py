@@ -5,6 +5,17 @@
 #   SIL International
 #   3/23/25
 #
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Give the unknown word warnings in writeInterlinData even when processing was stopped by an error.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Time the main loop when Translate Text is recording a performance report.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Split the main loop of getInterlinData into a generator that yields each sentence as it
+#    gets finished. Added writeInterlinData which writes each sentence to a file as it is
+#    finished and then drops it, so memory stays flat for big texts.
+#
 #   Version 3.14.1 - 9/19/25 - Ron Lockwood
 #    Fixes #1074. Support inflection on the first element of a complex form.
 #    Converted interlinParams to a dataclass.
@@ -45,6 +56,7 @@ from PyQt5.QtCore import QCoreApplication
 
 import Utils
 import ReadConfig
+import PerfReport
 from TextClasses import TextEntirety, TextParagraph, TextSentence, TextWord
 
 from SIL.LCModel import ( # type: ignore
@@ -87,6 +99,7 @@ class interlinInfo:
     numSpaces: int
     analysisOccurance: object
     DB: object
+    aborted: bool = False
 
 @dataclass
 class interlinParamsClass:
@@ -547,13 +560,77 @@ def processPunctuation(report, myInfo, analysisOccurance, reSplitPuncObj):
 # the complex form's components.
 def getInterlinData(DB, report, params):
 
-    prevEndOffset = 0
-    currSegNum = 0
-    initProgress(params.contents, report)
+    myInfo = initInterlinInfo(DB)
 
-    # Save a regex for splitting on sentence punctuation so we can clump sentence-final and sentence-non-final together
-    # For the string "xy.'):\\" this would produce ['xy', ".'", ')', ':', '\\'] assuming :'. are in sentPunct
-    reSplitPuncObj = re.compile(rf"([{''.join(params.sentPunct)}]+)")
+    mySpan = PerfReport.startSpan('getInterlinData')
+
+    # Build up the whole text object, nothing to do with each finished sentence
+    for _ in iterInterlinSentences(DB, report, params, myInfo):
+        pass
+
+    PerfReport.endSpan(mySpan, sentences=myInfo.myText.getSentCount(), words=myInfo.myText.getWordCount())
+
+    if myInfo.aborted:
+        return myInfo.myText
+
+    # Don't warn for sfm markers, but warn once for others
+    if myInfo.myText.warnForUnknownWords(params.noWarningProperNoun) == True:
+        report.Warning(_translate("InterlinData", "One or more unknown words occurred multiple times."))
+
+    # Substitute a complex form when its components are found contiguous in the text
+    myInfo.myText.processComplexForms(params.typesInfl1stList, params.typesInfl2ndList)
+
+    # Substitute a complex form when its components are found discontiguous in the text
+    if len(params.discontigTypesList) > 0 and len(params.discontigPOSList) > 0 and (len(params.typesInfl1stList) > 0 or len(params.typesInfl2ndList) > 0):
+        
+        myInfo.myText.processDiscontiguousComplexForms(params.typesInfl1stList, params.typesInfl2ndList, params.discontigTypesList, params.discontigPOSList)
+
+    return myInfo.myText
+
+# Streaming version of getInterlinData for when the whole text isn't needed, i.e. no TreeTran sorting
+# and no complex form substitution. Each sentence gets written to fOut as soon as it is finished and is 
+# then dropped from the text object so that memory doesn't grow with the size of the text. The text 
+# object is returned so the caller can get counts.
+def writeInterlinData(DB, report, params, fOut):
+
+    myInfo = initInterlinInfo(DB)
+    unknownWordMap = {}
+    multipleUnknownWords = False
+    prevPar = None
+    sentCount = wordCount = 0
+    mySpan = PerfReport.startSpan('writeInterlinData')
+
+    for mySent, myPar in iterInterlinSentences(DB, report, params, myInfo):
+
+        # A sentence in a different paragraph means the previous paragraph is done
+        if prevPar is not None and myPar is not prevPar:
+
+            fOut.write('\n')
+
+        prevPar = myPar
+
+        # Don't warn for sfm markers, but warn once for others. This is done for the sentences that got
+        # finished before an error stopped processing too since they have already been written out.
+        if mySent.warnForUnknownWords(unknownWordMap, params.noWarningProperNoun) == True:
+
+            multipleUnknownWords = True
+
+        mySent.write(fOut)
+        sentCount += 1
+        wordCount += mySent.getWordCount()
+        myPar.releaseSentence(mySent)
+
+    # End the last paragraph
+    fOut.write('\n')
+
+    PerfReport.endSpan(mySpan, sentences=sentCount, words=wordCount)
+
+    if multipleUnknownWords:
+        report.Warning(_translate("InterlinData", "One or more unknown words occurred multiple times."))
+
+    return myInfo.myText
+
+def initInterlinInfo(DB):
 
     myInfo = interlinInfo(myWord = None,
                           mySent = None,
@@ -572,11 +649,39 @@ def getInterlinData(DB, report, params):
     # Add the first paragraph
     myInfo.myText.addParagraph(myInfo.myPar)
 
+    return myInfo
+
+# Go through the interlinear text building up the text object in myInfo and yield each sentence (with
+# its paragraph) as soon as it is finished. A sentence is finished when the next one gets started or
+# when the end of the text is reached. If an error stops processing, myInfo.aborted gets set and the
+# sentence in progress is yielded as is.
+def iterInterlinSentences(DB, report, params, myInfo):
+
+    prevEndOffset = 0
+    currSegNum = 0
+    initProgress(params.contents, report)
+
+    # Save a regex for splitting on sentence punctuation so we can clump sentence-final and sentence-non-final together
+    # For the string "xy.'):\\" this would produce ['xy', ".'", ')', ':', '\\'] assuming :'. are in sentPunct
+    reSplitPuncObj = re.compile(rf"([{''.join(params.sentPunct)}]+)")
+
+    pendingSent = None
+    pendingPar = None
+
     # Loop through each thing in the text
     ss = SegmentServices.StTextAnnotationNavigator(params.contents)
 
     for progressCount, analysisOccurance in enumerate(ss.GetAnalysisOccurrencesAdvancingInStText()):
 
+        # If the last time through started a new sentence, the one before it is finished
+        if myInfo.mySent is not pendingSent:
+
+            if pendingSent:
+                yield pendingSent, pendingPar
+
+            pendingSent = myInfo.mySent
+            pendingPar = myInfo.myPar
+
         # Do some initial details
         report.ProgressUpdate(progressCount)
         begOffset, endOffset = setFlagsAndSpaces(myInfo, analysisOccurance, prevEndOffset, currSegNum)
@@ -641,7 +746,8 @@ def getInterlinData(DB, report, params):
 
                 if checkForValidChars(DB, report, Utils.as_string(bundle.SenseRA.Gloss), tempEntry) == False:
 
-                    return myInfo.myText
+                    myInfo.aborted = True
+                    break
                 
                 myInfo.myWord.addAffix(bundle.SenseRA.Gloss)
 
@@ -663,7 +769,8 @@ def getInterlinData(DB, report, params):
 
                 if checkForValidChars(DB, report, Utils.getHeadwordStr(tempEntry), tempEntry) == False:
 
-                    return myInfo.myText
+                    myInfo.aborted = True
+                    break
 
                 # Add the entry object and inflection features to the word object
                 myInfo.myWord.addEntry(tempEntry)
@@ -677,6 +784,9 @@ def getInterlinData(DB, report, params):
                     myInfo.myWord.addSense(None)
                     report.Warning(_translate("InterlinData", "Couldn't find the sense for source headword: ") + Utils.getHeadwordStr(tempEntry))
 
+        if myInfo.aborted:
+            break
+
         # If after going through all the bundles, we don't have a root, give a warning
         if myInfo.myWord.getLemma(0) == '':
 
@@ -693,19 +803,17 @@ def getInterlinData(DB, report, params):
     ## Done with all the words in the text. Now we need to do some final things.
 
     # Handle any final punctuation text at the end of the text in its own paragraph
-    if len(myInfo.savedPrePunc) > 0:
+    if not myInfo.aborted and len(myInfo.savedPrePunc) > 0:
         myInfo.myWord.addFinalPunc('\n' + myInfo.savedPrePunc)
 
-    # Don't warn for sfm markers, but warn once for others
-    if myInfo.myText.warnForUnknownWords(params.noWarningProperNoun) == True:
-        report.Warning(_translate("InterlinData", "One or more unknown words occurred multiple times."))
+    # Now the last sentence (and the one before if it was just started) is finished
+    if myInfo.mySent is not pendingSent:
 
-    # Substitute a complex form when its components are found contiguous in the text
-    myInfo.myText.processComplexForms(params.typesInfl1stList, params.typesInfl2ndList)
+        if pendingSent:
+            yield pendingSent, pendingPar
 
-    # Substitute a complex form when its components are found discontiguous in the text
-    if len(params.discontigTypesList) > 0 and len(params.discontigPOSList) > 0 and (len(params.typesInfl1stList) > 0 or len(params.typesInfl2ndList) > 0):
-        
-        myInfo.myText.processDiscontiguousComplexForms(params.typesInfl1stList, params.typesInfl2ndList, params.discontigTypesList, params.discontigPOSList)
+        pendingSent = myInfo.mySent
+        pendingPar = myInfo.myPar
 
-    return myInfo.myText
\ No newline at end of file
+    if pendingSent:
+        yield pendingSent, pendingPar
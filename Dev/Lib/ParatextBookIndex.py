@@ -0,0 +1,213 @@
+#
+#   ParatextBookIndex
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   An index of Paratext book files. For each book we keep where the \c and \v markers are so
+#   that chapters can be taken out of a book or put into it by slicing instead of searching
+#   the whole book with a regex. The path of each book file in a Paratext project is kept too
+#   so the project folder doesn't have to be searched every time. A book's entry is keyed by
+#   the file's path, modification time and size and gets rebuilt when the book changes. The
+#   index is saved in the Build folder.
+#
+#   Offsets are character offsets into the contents of the book as read in text mode.
+
+import os
+import glob
+import json
+import regex as re
+
+import FTPaths
+
+BOOK_INDEX_FILE = 'paratext_book_index.json'
+
+chapterPattern = re.compile(r'\\c (\d+)')
+versePattern = re.compile(r'\\v (\S+)')
+
+class BookEntry():
+
+    def __init__(self, path, mtime, size, length, chapterList, mainTitleOffset):
+
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.length = length # in characters
+        self.chapterList = chapterList # list of (chapter #, offset of \c, list of (verse, offset of \v)) in book order
+        self.mainTitleOffset = mainTitleOffset # offset of the first \mt or -1
+        self.__chapterIndexMap = {}
+
+        # If a chapter number is in the book twice, the first one is the one we use
+        for i, (chapNum, _, _) in enumerate(chapterList):
+
+            self.__chapterIndexMap.setdefault(chapNum, i)
+
+    @classmethod
+    def fromContents(cls, path, mtime, size, bookContents):
+
+        chapterList = []
+        chapMatchList = list(chapterPattern.finditer(bookContents))
+
+        for i, matchObj in enumerate(chapMatchList):
+
+            end = chapMatchList[i+1].start() if i+1 < len(chapMatchList) else len(bookContents)
+            verseList = [(verseObj.group(1), verseObj.start()) for verseObj in versePattern.finditer(bookContents, matchObj.end(), end)]
+            chapterList.append((int(matchObj.group(1)), matchObj.start(), verseList))
+
+        return cls(path, mtime, size, len(bookContents), chapterList, bookContents.find('\\mt'))
+
+    @classmethod
+    def fromDict(cls, data):
+
+        return cls(data['path'], data['mtime'], data['size'], data['length'],
+                   [(chapNum, offset, [tuple(verse) for verse in verseList]) for chapNum, offset, verseList in data['chapters']], data['mainTitle'])
+
+    def toDict(self):
+
+        return {'path': self.path, 'mtime': self.mtime, 'size': self.size, 'length': self.length,
+                'chapters': self.chapterList, 'mainTitle': self.mainTitleOffset}
+
+    def isCurrent(self, mtime, size):
+
+        return self.mtime == mtime and self.size == size
+
+    # Chapter numbers in book order
+    def getChapterNums(self):
+
+        return [chapNum for chapNum, _, _ in self.chapterList]
+
+    def hasChapter(self, chapNum):
+
+        return chapNum in self.__chapterIndexMap
+
+    # Offsets of the chapter markers in book order
+    def getChapterOffsets(self):
+
+        return [(chapNum, offset) for chapNum, offset, _ in self.chapterList]
+
+    # Where the chapter starts and ends. The end is the start of the next chapter or the end of the book.
+    def getChapterSpan(self, chapNum):
+
+        i = self.__chapterIndexMap[chapNum]
+        end = self.chapterList[i+1][1] if i+1 < len(self.chapterList) else self.length
+
+        return self.chapterList[i][1], end
+
+    def getChapterStart(self, chapNum):
+
+        return self.chapterList[self.__chapterIndexMap[chapNum]][1]
+
+    def getVerseOffsets(self, chapNum):
+
+        return self.chapterList[self.__chapterIndexMap[chapNum]][2]
+
+class ParatextBookIndex():
+
+    def __init__(self, indexPath=None):
+
+        if indexPath is None:
+
+            indexPath = os.path.join(FTPaths.BUILD_DIR, BOOK_INDEX_FILE)
+
+        self.__path = indexPath
+        self.__bookPathMap = {} # project folder + book file name pattern -> book path
+        self.__bookMap = {} # book path -> BookEntry
+        self.__changed = False
+
+        try:
+            with open(self.__path, encoding='utf-8') as f:
+
+                data = json.load(f)
+
+            self.__bookPathMap = data['paths']
+            self.__bookMap = {path: BookEntry.fromDict(entryData) for path, entryData in data['books'].items()}
+        except:
+            self.__bookPathMap = {} # no index yet or it is corrupt, start over
+            self.__bookMap = {}
+
+    # Find the book file for a book in a Paratext project folder. It can end in .SFM or .USFM. '' if not found.
+    def findBookPath(self, ptxFolder, bookFileName):
+
+        key = os.path.join(ptxFolder, bookFileName)
+        bookPath = self.__bookPathMap.get(key)
+
+        if bookPath and os.path.isfile(bookPath):
+
+            return bookPath
+
+        # First try .SFM
+        fileList = glob.glob(os.path.join(ptxFolder, '*' + bookFileName + '.SFM'))
+
+        # If none found, try .USFM
+        if not fileList:
+
+            fileList = glob.glob(os.path.join(ptxFolder, '*' + bookFileName + '.USFM'))
+
+        if not fileList:
+
+            return ''
+
+        self.__bookPathMap[key] = fileList[0]
+        self.__changed = True
+
+        return fileList[0]
+
+    # Read the book and get its index entry. The entry gets rebuilt if the book changed since it was indexed.
+    def readBook(self, bookPath):
+
+        with open(bookPath, encoding='utf-8') as f:
+
+            bookContents = f.read()
+
+        fileStat = os.stat(bookPath)
+        entry = self.__bookMap.get(bookPath)
+
+        if entry is None or not entry.isCurrent(fileStat.st_mtime, fileStat.st_size) or entry.length != len(bookContents):
+
+            entry = self.__indexContents(bookPath, bookContents, fileStat)
+
+        return bookContents, entry
+
+    # Index the contents we just wrote to a book so the next read doesn't have to
+    def bookWritten(self, bookPath, bookContents):
+
+        return self.__indexContents(bookPath, bookContents, os.stat(bookPath))
+
+    def __indexContents(self, bookPath, bookContents, fileStat):
+
+        entry = BookEntry.fromContents(bookPath, fileStat.st_mtime, fileStat.st_size, bookContents)
+        self.__bookMap[bookPath] = entry
+        self.__changed = True
+
+        return entry
+
+    def save(self):
+
+        if not self.__changed:
+            return
+
+        try:
+            with open(self.__path, 'w', encoding='utf-8') as f:
+
+                json.dump({'paths': self.__bookPathMap, 'books': {path: entry.toDict() for path, entry in self.__bookMap.items()}}, f)
+
+            self.__changed = False
+        except:
+            pass # not being able to save the index just means the books get indexed again next time
+
+# The index for this session, loaded the first time it's needed
+_bookIndex = None
+
+def getBookIndex():
+
+    global _bookIndex
+
+    if _bookIndex is None:
+
+        _bookIndex = ParatextBookIndex()
+
+    return _bookIndex
@@ -0,0 +1,246 @@
+#
+#   PerfReport
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   Timing spans for finding out where a Translate Text run spends its time.
+#   A span records wall time, CPU time, the peak memory use of the process when the span
+#   ended, counts of things processed (entries, words, LUs, etc.) and the sizes of files.
+#   Spans can be nested. Modules mark their inner loops with startSpan/endSpan or the span
+#   context manager. These do nothing unless a report has been started, so they cost
+#   nothing when a module is run on its own. The report gets saved as JSON in the Build
+#   folder so results can be compared across FLExTrans versions.
+
+import os
+import sys
+import json
+import time
+import platform
+from contextlib import contextmanager
+
+import FTPaths
+
+PERF_REPORT_FILE = 'translate_text_perf.json'
+
+# The report currently being recorded to, if any
+_activeReport = None
+
+# Get the peak memory use (resident set size) of this process in bytes, or None if we can't find out.
+def getPeakRSS():
+
+    try:
+        if sys.platform == 'win32':
+
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD),
+                            ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t),
+                            ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t),
+                            ('PeakPagefileUsage', ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            getProcessMemoryInfo = ctypes.windll.psapi.GetProcessMemoryInfo
+            getProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+
+            if getProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize
+            return None
+        else:
+            import resource
+
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            # Mac gives bytes, Linux gives kilobytes
+            return peak if sys.platform == 'darwin' else peak * 1024
+    except:
+        return None
+
+class PerfSpan():
+
+    def __init__(self, name, path):
+
+        self.name = name
+        self.path = path
+        self.counts = {}
+        self.fileSizes = {}
+        self.wallTime = self.cpuTime = 0.0
+        self.peakRSS = None
+        self.__startWall = time.perf_counter()
+        self.__startCPU = time.process_time()
+
+    def addCount(self, kind, num):
+
+        self.counts[kind] = self.counts.get(kind, 0) + num
+
+    def addFile(self, filePath):
+
+        if filePath and os.path.isfile(filePath):
+
+            self.fileSizes[filePath] = os.path.getsize(filePath)
+
+    def stop(self):
+
+        self.wallTime = time.perf_counter() - self.__startWall
+        self.cpuTime = time.process_time() - self.__startCPU
+        self.peakRSS = getPeakRSS()
+
+    def toDict(self):
+
+        return {'name': self.path, 'wallSeconds': round(self.wallTime, 4), 'cpuSeconds': round(self.cpuTime, 4),
+                'peakRSS': self.peakRSS, 'counts': self.counts, 'fileSizes': self.fileSizes}
+
+class PerfReport():
+
+    def __init__(self, title, version=''):
+
+        self.title = title
+        self.version = version
+        self.spanList = [] # finished spans in the order they finished
+        self.__openSpans = []
+        self.__started = None
+        self.__totalSpan = PerfSpan(title, title)
+
+    # Make this the report that spans get recorded to
+    def start(self):
+
+        global _activeReport
+
+        _activeReport = self
+        self.__started = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.__totalSpan = PerfSpan(self.title, self.title)
+
+    def stop(self):
+
+        global _activeReport
+
+        # Close anything left open, e.g. by an early return
+        while self.__openSpans:
+            self.endSpan(self.__openSpans[-1])
+
+        self.__totalSpan.stop()
+
+        if _activeReport is self:
+            _activeReport = None
+
+    def startSpan(self, name):
+
+        path = '/'.join([mySpan.name for mySpan in self.__openSpans] + [name])
+        mySpan = PerfSpan(name, path)
+        self.__openSpans.append(mySpan)
+
+        return mySpan
+
+    # End the given span. Spans nested inside it that are still open get ended too.
+    def endSpan(self, mySpan):
+
+        if mySpan not in self.__openSpans:
+            return
+
+        while self.__openSpans:
+
+            lastSpan = self.__openSpans.pop()
+            lastSpan.stop()
+            self.spanList.append(lastSpan)
+
+            if lastSpan is mySpan:
+                break
+
+    def currentSpan(self):
+
+        return self.__openSpans[-1] if self.__openSpans else None
+
+    # The top-level spans, i.e. the stages
+    def getStageSpans(self):
+
+        return [mySpan for mySpan in self.spanList if mySpan.path == mySpan.name]
+
+    def toDict(self):
+
+        return {'title': self.title,
+                'version': self.version,
+                'started': self.__started,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'total': self.__totalSpan.toDict(),
+                'spans': [mySpan.toDict() for mySpan in self.spanList]}
+
+    def save(self, reportPath=None):
+
+        if reportPath is None:
+
+            reportPath = os.path.join(FTPaths.BUILD_DIR, PERF_REPORT_FILE)
+
+        try:
+            with open(reportPath, 'w', encoding='utf-8') as f:
+
+                json.dump(self.toDict(), f, indent=4)
+        except:
+            return None
+
+        return reportPath
+
+    # One line giving the time for each stage, the total time and the peak memory use.
+    def summary(self):
+
+        partList = [f'{mySpan.name} {mySpan.wallTime:.1f}s' for mySpan in self.getStageSpans()]
+        partList.append(f'total {self.__totalSpan.wallTime:.1f}s')
+
+        if self.__totalSpan.peakRSS:
+
+            partList.append(f'peak memory {self.__totalSpan.peakRSS / (1024*1024):.0f} MB')
+
+        return ', '.join(partList)
+
+## Functions modules use to mark their inner loops. They do nothing when no report is active.
+
+def startSpan(name):
+
+    if _activeReport:
+        return _activeReport.startSpan(name)
+
+    return None
+
+def endSpan(mySpan, **counts):
+
+    if _activeReport and mySpan:
+
+        for kind, num in counts.items():
+            mySpan.addCount(kind, num)
+
+        _activeReport.endSpan(mySpan)
+
+@contextmanager
+def span(name):
+
+    mySpan = startSpan(name)
+
+    try:
+        yield mySpan
+    finally:
+        endSpan(mySpan)
+
+# Add to a count for the innermost open span
+def addCount(kind, num):
+
+    if _activeReport and (mySpan := _activeReport.currentSpan()):
+        mySpan.addCount(kind, num)
+
+# Record the size of a file for the innermost open span
+def addFile(filePath):
+
+    if _activeReport and (mySpan := _activeReport.currentSpan()):
+        mySpan.addFile(filePath)
@@ -0,0 +1,76 @@
+#
+#   ProcessUtils
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version. Moved from BackgroundTask so modules that run programs don't need PyQt's thread classes.
+#
+#   Cancel tokens and running external programs so they can be stopped part way. A cancel token gets
+#   cancelled from one thread and checked by the work running in another. A program started with
+#   runProcess gets killed when its token is cancelled.
+
+import sys
+import threading
+import subprocess
+
+# How often a running program is checked to see if its request was cancelled
+POLL_SECONDS = 0.05
+
+class CancelledError(Exception):
+    pass
+
+class CancelToken():
+
+    def __init__(self):
+
+        self.__event = threading.Event()
+
+    def cancel(self):
+
+        self.__event.set()
+
+    def isCancelled(self):
+
+        return self.__event.is_set()
+
+    # Call this between steps to stop if the request was cancelled
+    def check(self):
+
+        if self.__event.is_set():
+            raise CancelledError()
+
+# Kill a program and any programs it started. On Windows a batch file runs make which runs
+# the Apertium tools, so killing cmd.exe alone would leave them running.
+def killProcessTree(proc):
+
+    if sys.platform == 'win32':
+        subprocess.call(['taskkill', '/F', '/T', '/PID', str(proc.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        proc.kill()
+
+    proc.wait()
+
+# Run a program and return its exit code like subprocess.call. If the token gets cancelled
+# the program is killed and CancelledError is raised.
+def runProcess(cmdList, cancelToken=None, **kwargs):
+
+    if cancelToken is None:
+        return subprocess.call(cmdList, **kwargs)
+
+    cancelToken.check()
+    proc = subprocess.Popen(cmdList, **kwargs)
+
+    while True:
+
+        try:
+            return proc.wait(timeout=POLL_SECONDS)
+
+        except subprocess.TimeoutExpired:
+
+            if cancelToken.isCancelled():
+
+                killProcessTree(proc)
+                raise CancelledError()
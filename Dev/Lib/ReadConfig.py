@@ -5,6 +5,18 @@
 #   University of Washington, SIL International
 #   12/4/14
 #
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Added a setting to apply the Text Out rules to the whole synthesis file at once.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Added a setting to also write the testbed results in the old single-file format.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Added a setting to run all the testbed tests even if they haven't been affected by changes.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Added a setting for a batch of source texts to extract.
+#
 #   Version 3.14.5 - 12/15/25 - Ron Lockwood
 #    Fixes #1149. Support alternate Paratext folder setting.
 #    Also check for absolute paths using pathlib. Instead of looking for ':'.
@@ -99,6 +111,7 @@ SOURCE_DISCONTIG_TYPES = 'SourceDiscontigousComplexTypes'
 SOURCE_DISCONTIG_SKIPPED = 'SourceDiscontigousComplexFormSkippedWordGrammaticalCategories'
 SOURCE_MORPHNAMES = 'SourceMorphNamesCountedAsRoots'
 SOURCE_TEXT_NAME = 'SourceTextName'
+SOURCE_TEXT_BATCH_LIST = 'SourceTextBatchList'
 REBUILD_BILING_LEX_BY_DEFAULT = 'RebuildBilingualLexiconByDefaultInSenseLinker'
 RULE_ASSISTANT_FILE = 'RuleAssistantRulesFile'
 SYNTHESIS_TEST_LIMIT_POS = 'SynthesisTestLimitPOS'
@@ -119,7 +132,10 @@ TARGET_XAMPLE_CUSTOM_ENTRY_FIELD = 'TargetXampleCustomEntryField'
 TARGET_XAMPLE_CUSTOM_ALLOMORPH_FIELD = 'TargetXampleCustomAllomorphField'
 TESTBED_FILE = 'TestbedFile'
 TESTBED_RESULTS_FILE = 'TestbedResultsFile'
+TESTBED_RUN_ALL_TESTS = 'TestbedRunAllTests'
+TESTBED_WRITE_SINGLE_RESULTS_FILE = 'TestbedWriteSingleResultsFile'
 TEXT_OUT_RULES_FILE = 'TextOutRulesFile'
+TEXT_OUT_RULES_WHOLE_FILE = 'TextOutRulesWholeFile'
 TEXT_IN_RULES_FILE = 'TextInRulesFile'
 TRANSFER_RESULTS_FILE = 'TargetTranferResultsFile'
 TRANSFER_RULES_FILE = 'TransferRulesFile'
@@ -0,0 +1,98 @@
+#
+#   SourceTextBatch
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version. Moved from ExtractSourceText so the batch helpers can be tested without FLEx.
+#
+#   Helpers for extracting a batch of source texts. Choosing the texts that match the titles or
+#   wildcard patterns of the Source Text Batch List setting, naming an output file for each text
+#   and writing the manifest that lists them all.
+
+import os
+import re
+import json
+import fnmatch
+
+import ReadConfig
+
+BATCH_MANIFEST_SUFFIX = '_manifest.json'
+
+# Get the list of text titles or wildcard patterns (e.g. Matthew*) for batch extraction. None if there is no batch.
+def getBatchTextPatterns(configMap, report):
+
+    batchStr = ReadConfig.getConfigVal(configMap, ReadConfig.SOURCE_TEXT_BATCH_LIST, report, giveError=False)
+
+    if not batchStr:
+        return None
+
+    patternList = [pattern.strip() for pattern in batchStr.split(',') if pattern.strip()]
+
+    return patternList if patternList else None
+
+# Find the texts that match the patterns, keeping the order of the patterns and not repeating a text.
+# The texts that match one pattern are sorted by name. Returns a list of indexes into the text list
+# and a list of the patterns that didn't match anything.
+def selectBatchTexts(sourceTextList, textPatternList):
+
+    indexList = []
+    unmatchedList = []
+
+    for pattern in textPatternList:
+
+        matches = [i for i, textName in enumerate(sourceTextList) if fnmatch.fnmatchcase(textName, pattern) and i not in indexList]
+
+        if not matches:
+
+            unmatchedList.append(pattern)
+
+        indexList.extend(sorted(matches, key=lambda i: sourceTextList[i].casefold()))
+
+    return indexList, unmatchedList
+
+# Build an output file name for one text of a batch from the Analyzed Text Output File. E.g. source_text-aper_Matthew 01.txt
+def getBatchOutputPath(fullPathTextOutputFile, textName):
+
+    base, ext = os.path.splitext(fullPathTextOutputFile)
+    safeName = re.sub(r'[\\/:*?"<>|]', '_', textName)
+
+    return f'{base}_{safeName}{ext}'
+
+# Build the output file names for all the texts of a batch. Texts whose names would give the same file
+# (e.g. Luke 1:1 and Luke 1/1, or Luke and luke since Windows ignores case) get a number added so
+# that one doesn't overwrite the other. E.g. source_text-aper_Luke 1_1 (2).txt
+def getBatchOutputPaths(fullPathTextOutputFile, textNameList):
+
+    pathList = []
+    usedSet = set()
+
+    for textName in textNameList:
+
+        outputPath = getBatchOutputPath(fullPathTextOutputFile, textName)
+        base, ext = os.path.splitext(outputPath)
+        num = 1
+
+        while outputPath.casefold() in usedSet:
+
+            num += 1
+            outputPath = f'{base} ({num}){ext}'
+
+        usedSet.add(outputPath.casefold())
+        pathList.append(outputPath)
+
+    return pathList
+
+# Write the manifest next to the Analyzed Text Output File. Each item of the list is a (text name, output
+# file, sentence count) tuple. Returns the manifest path.
+def writeBatchManifest(fullPathTextOutputFile, manifestList):
+
+    manifestPath = os.path.splitext(fullPathTextOutputFile)[0] + BATCH_MANIFEST_SUFFIX
+
+    with open(manifestPath, 'w', encoding='utf-8') as f:
+
+        json.dump({'texts': [{'text': textName, 'file': outputPath, 'sentences': sentCount} for textName, outputPath, sentCount in manifestList]}, f, indent=4)
+
+    return manifestPath
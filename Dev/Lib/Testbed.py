@@ -5,6 +5,32 @@
 #   SIL International
 #   12/24/2022
 #
+#   Version 3.15.7 - 10/18/26 - Ron Lockwood
+#    Only write the results file in the old single-file format when the Write Single Testbed
+#    Results File setting is on. Writing it every time copies the whole history again.
+#
+#   Version 3.15.6 - 10/18/26 - Ron Lockwood
+#    Keep the results file in the old single-file format up to date each time a run gets saved,
+#    for tools that still read it.
+#
+#   Version 3.15.5 - 10/18/26 - Ron Lockwood
+#    Color a bilingual entry from its lemma and symbols, for the Live Rule Tester's bilingual index.
+#
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Return the run id when the newest run gets written so the run can be added to the trend index.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    When validating, reuse a test's saved result unless a lexicon value it uses changed.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Keep the testbed results history in a store with one file per run and an index
+#    that only gets added to. The old single results file gets imported the first time.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Don't rewrite the testbed file when reading it, normalize and parse it in memory.
+#    Write the testbed in one pass, normalizing as it goes, with the DOCTYPE included,
+#    to a temporary file that then replaces the testbed file.
+#
 #   Version 3.14.1 - 7/23/25 - Ron Lockwood
 #    Fixes #1016. Repeat the expected result in the actual result column.
 #
@@ -43,6 +69,8 @@
 
 import re
 import os
+import json
+import shutil
 import xml.etree.ElementTree as ET
 import uuid
 import unicodedata
@@ -122,6 +150,12 @@ NOT_FOUND_COLOR = 'FF0000' #red
 # 50% as big as it normally would be (which is already smaller than normal text)
 SUBSCRIPT_SIZE_PERCENTAGE = '60'
 
+NORMALIZE_BLOCK_SIZE = 1 << 16
+RESULTS_STORE_DIR_SUFFIX = '_runs'
+RESULTS_INDEX_FILE = 'index.jsonl'
+RESULTS_SEGMENT_FILE = 'run_{runId:06d}.xml'
+TESTBED_DOCTYPE = '<!DOCTYPE FLExTransTestbed PUBLIC "-//XMLmind//DTD FLExTransTestbed//EN" "FLExTransTestbed.dtd">\n'
+
 def getXMLEntryText(node):
 
     # Start with nodeText as the text part of the left node
@@ -600,20 +634,40 @@ class TestbedTestXMLObject():
         else:
             prevInvalidFlag = False
 
-        for lu in self.__luList:
+        # Use the result from the last validation if none of the lexicon values this test uses changed
+        luString = self.getLUString()
+        savedResult = myValidator.getSavedResult(luString, self.__luList)
+        
+        if savedResult is not None:
             
-            # any one invalid lexical unit means the test is invalid
-            if myValidator.isValid(lu) == False:
-                
-                # get the reason it was invalid
-                reason = myValidator.getInvalidReason()
+            valid, reason = savedResult
+            
+            if not valid:
                 
                 # see if the reason it was invalid changed
                 if reason != self.getInvalidReason():
                     reasonChanged = True
                     
                 markInvalid = True
-                break
+        else:
+            reason = ''
+            
+            for lu in self.__luList:
+                
+                # any one invalid lexical unit means the test is invalid
+                if myValidator.isValid(lu) == False:
+                    
+                    # get the reason it was invalid
+                    reason = myValidator.getInvalidReason()
+                    
+                    # see if the reason it was invalid changed
+                    if reason != self.getInvalidReason():
+                        reasonChanged = True
+                        
+                    markInvalid = True
+                    break
+            
+            myValidator.saveResult(luString, not markInvalid, reason)
         
         # See if we have a different value from before
         if markInvalid == prevInvalidFlag or reasonChanged:
@@ -779,6 +833,8 @@ class FLExTransTestbedXMLObject():
             testXMLObj.validate(myValidator)
             if testXMLObj.didTestChange() == True:
                 self.__testbedChanged = True
+        
+        myValidator.saveResults()
     
     def didTestbedChange(self):
         return self.__testbedChanged
@@ -851,28 +907,7 @@ class FlexTransTestbedFile():
             myRoot = self.__XMLObject.getRoot()
             self.__testbedTree = ET.ElementTree(myRoot)
         else:
-            try:
-                # Open the testbed file
-                f = open(self.__testbedPath, encoding='utf-8')
-                lines = f.readlines()
-                f.close()
-                
-                # Convert the file to decomposed form. All the FLEx values are decomposed so standardize on NFD when we read it in.
-                for i in range(0, len(lines)):
-                    
-                    lines[i] = unicodedata.normalize('NFD', lines[i])
-                        
-                f = open(self.__testbedPath, 'w', encoding='utf-8')
-                f.writelines(lines)
-                f.close()
-                
-            except:
-                raise ValueError(_translate("Testbed", "The testbed file: {filePath} could not be read or written.").format(filePath=self.__testbedPath))
-            
-            try:
-                self.__testbedTree = ET.parse(self.__testbedPath)
-            except:
-                raise ValueError(_translate("Testbed", "The testbed file: {filePath} is invalid.").format(filePath=self.__testbedPath))
+            self.__testbedTree = readTestbedTree(self.__testbedPath)
 
             self.__XMLObject = FLExTransTestbedXMLObject(self.__testbedTree.getroot(), direction)
     
@@ -895,27 +930,66 @@ class FlexTransTestbedFile():
             self.write()
 
     def write(self):
-        self.__testbedTree.write(self.__testbedPath, encoding='utf-8', xml_declaration=True)
-        
-        # Re-open the testbed file
-        f = open(self.__testbedPath, encoding='utf-8')
-        lines = f.readlines()
-        f.close()
-        
-        # Convert the file to composed or decomposed as set in the config file.
-        for i in range(0, len(lines)):
-            
-            if self.composed == True:
-                
-                lines[i] = unicodedata.normalize('NFC', lines[i])
-            else:
-                lines[i] = unicodedata.normalize('NFD', lines[i])
-                
-        # Add the DOCTYPE declaration
-        lines.insert(1, '<!DOCTYPE FLExTransTestbed PUBLIC "-//XMLmind//DTD FLExTransTestbed//EN" "FLExTransTestbed.dtd">\n')
-        f = open(self.__testbedPath, 'w', encoding='utf-8')
-        f.writelines(lines)
-        f.close()
+
+        writeTestbedTree(self.__testbedTree, self.__testbedPath, self.composed)
+
+# Read the testbed file and parse it. All the FLEx values are decomposed so standardize on NFD when we read it in.
+# This is done in memory, the file itself is left alone.
+def readTestbedTree(testbedPath):
+
+    try:
+        with open(testbedPath, encoding='utf-8') as f:
+
+            testbedStr = unicodedata.normalize('NFD', f.read())
+    except:
+        raise ValueError(_translate("Testbed", "The testbed file: {filePath} could not be read or written.").format(filePath=testbedPath))
+    
+    try:
+        return ET.ElementTree(ET.fromstring(testbedStr))
+    except:
+        raise ValueError(_translate("Testbed", "The testbed file: {filePath} is invalid.").format(filePath=testbedPath))
+
+# Passes what the XML writer gives it on to a file converted to composed or decomposed form. It collects 
+# the pieces into blocks and only ends a block after a tag so that a character and its combining marks 
+# always get normalized together.
+class NormalizingWriter():
+
+    def __init__(self, f, form):
+
+        self.__f = f
+        self.__form = form
+        self.__pieceList = []
+        self.__pendingSize = 0
+
+    def write(self, text):
+
+        self.__pieceList.append(text)
+        self.__pendingSize += len(text)
+
+        if self.__pendingSize >= NORMALIZE_BLOCK_SIZE and text.endswith('>'):
+
+            self.flush()
+
+    def flush(self):
+
+        if self.__pieceList:
+
+            self.__f.write(unicodedata.normalize(self.__form, ''.join(self.__pieceList)))
+            self.__pieceList = []
+            self.__pendingSize = 0
+
+# Write the testbed in one pass with the DOCTYPE declaration in composed or decomposed form as set in the config file.
+# It goes to a temporary file first which then replaces the testbed file.
+def writeTestbedTree(testbedTree, testbedPath, composed):
+
+    with Utils.openFileAtomically(testbedPath) as f:
+
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        f.write(TESTBED_DOCTYPE)
+
+        myWriter = NormalizingWriter(f, 'NFC' if composed else 'NFD')
+        testbedTree.write(myWriter, encoding='unicode')
+        myWriter.flush()
 
 # Models the result part of the XML structure for a results log
 # It contains a list of FLExTransTestbedXMLObject's
@@ -1080,10 +1154,153 @@ class FLExTransTestbedResultsXMLObject():
                 return True
         return False
 
-# Models the results log XML file.
-# It creates the XML file if it doesn't exist.
+# Stores the testbed results history as one segment file per run plus an index. The index has one JSON line
+# per change to a run with the run id, segment file, start and end times and the number of tests, failed
+# tests and invalid tests. A later line for the same run replaces an earlier one. New runs get a new segment
+# and a line added to the index, so old runs are never rewritten. The store lives in a folder next to the
+# results file named in the config file. If that folder doesn't exist yet and there is a results file in the
+# old single-file format, the runs in it get imported. If the setting for it is on, that file also gets
+# written after a run is saved for tools that read it.
+class TestbedResultsStore():
+
+    def __init__(self, resultsPath):
+
+        self.__resultsPath = resultsPath
+        self.__storeDir = getResultsStoreDir(resultsPath)
+        self.__indexPath = os.path.join(self.__storeDir, RESULTS_INDEX_FILE)
+        self.__runMap = {} # run id -> index entry
+
+        if not os.path.isdir(self.__storeDir):
+
+            os.makedirs(self.__storeDir)
+
+            if os.path.exists(resultsPath):
+
+                # Don't leave a partial store behind if the import fails so it gets tried again next time
+                try:
+                    self.importLegacyFile(resultsPath)
+                except:
+                    shutil.rmtree(self.__storeDir, ignore_errors=True)
+                    raise
+        else:
+            self.__readIndex()
+
+    def __readIndex(self):
+
+        if not os.path.exists(self.__indexPath):
+            return
+
+        with open(self.__indexPath, encoding='utf-8') as f:
+
+            for line in f:
+
+                try:
+                    entry = json.loads(line)
+                except:
+                    continue # a line left half written, the run's segment is still there
+
+                self.__runMap[entry['id']] = entry
+
+    def getStoreDir(self):
+
+        return self.__storeDir
+
+    # Run ids, newest first
+    def getRunIds(self):
+
+        return sorted(self.__runMap, reverse=True)
+
+    def getNumRuns(self):
+
+        return len(self.__runMap)
+
+    # Index entries, newest first
+    def getRunSummaries(self):
+
+        return [self.__runMap[runId] for runId in self.getRunIds()]
+
+    def getSegmentPath(self, runId):
+
+        return os.path.join(self.__storeDir, self.__runMap[runId]['segment'])
+
+    # Parse a run's segment and return the <testbedResult> element
+    def loadRunNode(self, runId):
+
+        try:
+            return ET.parse(self.getSegmentPath(runId)).getroot()
+        except:
+            raise ValueError(_translate("Testbed", "The testbed results file: {resultsPath} is invalid.").format(resultsPath=self.getSegmentPath(runId)))
+
+    # Write a run's segment and add its line to the index. A run id of None means this is a new run.
+    def saveRun(self, resultXMLObj, runId=None):
+
+        if runId is None:
+
+            runId = max(self.__runMap, default=0) + 1
+
+        resultNode = resultXMLObj.getRoot()
+        failed, invalid = resultXMLObj.getFailedAndInvalid()
+        entry = {'id': runId,
+                 'segment': RESULTS_SEGMENT_FILE.format(runId=runId),
+                 'start': resultNode.attrib.get(START_DATE_TIME, ''),
+                 'end': resultNode.attrib.get(END_DATE_TIME, ''),
+                 'numTests': resultXMLObj.getNumTests(),
+                 'failed': failed,
+                 'invalid': invalid,
+                 'rtl': resultXMLObj.isRTL()}
+
+        self.__runMap[runId] = entry
+
+        with Utils.openFileAtomically(self.getSegmentPath(runId)) as f:
+
+            ET.ElementTree(resultNode).write(f, encoding='unicode', xml_declaration=False)
+
+        with open(self.__indexPath, 'a', encoding='utf-8') as f:
+
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+        return runId
+
+    # Import the runs from a results file in the old single-file format. The newest run is first in the file.
+    def importLegacyFile(self, legacyPath):
+
+        try:
+            legacyRoot = ET.parse(legacyPath).getroot()
+        except:
+            raise ValueError(_translate("Testbed", "The testbed results file: {resultsPath} is invalid.").format(resultsPath=legacyPath))
+
+        for resultNode in reversed(list(legacyRoot)):
+
+            self.saveRun(TestbedResultXMLObject(None, resultNode))
+
+    # Write all the runs to a results file in the old single-file format
+    def exportLegacyFile(self, legacyPath):
+
+        with Utils.openFileAtomically(legacyPath) as f:
+
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n<" + FLEXTRANS_TESTBED_RESULTS + ">")
+
+            for runId in self.getRunIds():
+
+                with open(self.getSegmentPath(runId), encoding='utf-8') as segFile:
+
+                    f.write(segFile.read())
+
+            f.write("</" + FLEXTRANS_TESTBED_RESULTS + ">")
+
+def getResultsStoreDir(resultsPath):
+
+    return os.path.splitext(resultsPath)[0] + RESULTS_STORE_DIR_SUFFIX
+
+# See if there are any testbed results, either in a results store or in an old style results file
+def testbedResultsExist(resultsPath):
+
+    return os.path.isdir(getResultsStoreDir(resultsPath)) or os.path.exists(resultsPath)
+
+# Models the testbed results.
+# The runs come from the results store. Either all of them get loaded or just the latest one.
 class FlexTransTestbedResultsFile():
-    def __init__(self, report):
+    def __init__(self, report, latestOnly=False):
 
         configMap = ReadConfig.readConfig(report)
         if not configMap:
@@ -1093,26 +1310,56 @@ class FlexTransTestbedResultsFile():
         if not resultsPath:
             raise ValueError()
         
+        self.__report = report
         self.__resultsPath = resultsPath
+        self.__writeSingleFile = ReadConfig.getConfigVal(configMap, ReadConfig.TESTBED_WRITE_SINGLE_RESULTS_FILE, report, giveError=False) == 'y'
+        self.__store = TestbedResultsStore(resultsPath)
 
-        if os.path.exists(resultsPath) == False:
-            
-            self.__XMLObject = FLExTransTestbedResultsXMLObject()
-            myRoot = self.__XMLObject.getRoot()
-            self.__testbedResultsTree  = ET.ElementTree(myRoot)
-        else:
-            try:
-                self.__testbedResultsTree = ET.parse(resultsPath)
-            except:
-                raise ValueError(_translate("Testbed", "The testbed results file: {resultsPath} is invalid.").format(resultsPath=resultsPath))
+        runIdList = self.__store.getRunIds()
+
+        if latestOnly:
+
+            runIdList = runIdList[:1]
+
+        # Put the runs under a results element, newest first, like the old single-file format
+        myRoot = ET.Element(FLEXTRANS_TESTBED_RESULTS)
+        self.__runIdMap = {}
+
+        for runId in runIdList:
 
-            self.__XMLObject = FLExTransTestbedResultsXMLObject(self.__testbedResultsTree.getroot())
+            resultNode = self.__store.loadRunNode(runId)
+            myRoot.append(resultNode)
+            self.__runIdMap[id(resultNode)] = runId
+
+        self.__XMLObject = FLExTransTestbedResultsXMLObject(myRoot)
     
     def getResultsXMLObj(self):
         return self.__XMLObject
     
+    def getStore(self):
+        return self.__store
+    
+    # Only the newest run can have changed, so that's the only one that gets saved. Returns its run id.
+    # If the user asked for it, the results file in the old single-file format also gets written for tools that read it.
     def write(self):
-        self.__testbedResultsTree.write(self.__resultsPath, encoding='utf-8', xml_declaration=True)
+
+        resultObjList = self.__XMLObject.getTestbedResultXMLObjectList()
+
+        if not resultObjList:
+            return None
+
+        resultXMLObj = resultObjList[0]
+        runId = self.__store.saveRun(resultXMLObj, self.__runIdMap.get(id(resultXMLObj.getRoot())))
+        self.__runIdMap[id(resultXMLObj.getRoot())] = runId
+
+        if self.__writeSingleFile:
+
+            try:
+                self.__store.exportLegacyFile(self.__resultsPath)
+            except OSError:
+                self.__report.Warning(_translate("Testbed", "The testbed results file: {resultsPath} could not be written.").format(resultsPath=self.__resultsPath))
+
+        return runId
 
 # Create a span element and set the color and text
 def outputLUSpan(parent, color, text_str, rtl):
@@ -1401,9 +1648,6 @@ def convertXMLEntryToColoredString(entryElement, isRtl):
     
     fullLemma = getXMLEntryText(entryElement)
     
-    # Create a <p> html element
-    paragraph_element = ET.Element('p')
-    
     # Collect all the symbols
     symbols = []
     for symbol in entryElement.findall('s'):
@@ -1413,6 +1657,14 @@ def convertXMLEntryToColoredString(entryElement, isRtl):
             
             symbols.append(symbol.attrib['n'])
 
+    return convertEntryToColoredString(fullLemma, symbols, isRtl)
+
+# Same as above, but for a lemma and symbols that have already been taken out of the entry
+def convertEntryToColoredString(fullLemma, symbols, isRtl):
+
+    # Create a <p> html element
+    paragraph_element = ET.Element('p')
+
     colorInnerLU(fullLemma, symbols, paragraph_element, isRtl, show_unk=True)
     
     retStr = '<p>'
@@ -0,0 +1,369 @@
+#
+#   TestbedImpact
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   Work out which testbed tests need to be run again. For each test we record which rules
+#   in the first transfer rules file fired and which bilingual lexicon lemmas it looked up,
+#   along with a hash of each of those rules and entries and the test's synthesis result.
+#   On the next run a test whose rules and entries still have the same hashes doesn't need
+#   to be run again and its last result gets used.
+#
+#   Some things can affect any test, e.g. the rule patterns, macros, variables, the 2nd and
+#   3rd rules files, the symbol definitions in the bilingual lexicon, the target project and
+#   the settings. These go into one global key. When it changes, all the tests get run.
+#   Rules that set variables or can reject themselves go into the global key too, since they
+#   can change what happens in other rules.
+
+import os
+import json
+import hashlib
+import unicodedata
+import regex as re
+import xml.etree.ElementTree as ET
+
+import BuildManifest
+import Testbed
+import Utils
+
+IMPACT_FILE = 'impact.json'
+IMPACT_REPORT_FILE = 'testbed_impact_report.txt'
+IMPACT_FORMAT_VERSION = 1
+
+# Key for the hash of all the rules, used by tests we couldn't tell which rules fired for
+ALL_RULES_KEY = '*'
+
+# Reasons a test gets run again
+REASON_FORCED = 'all tests run'
+REASON_GLOBAL = 'rule patterns, macros, symbols, target project or settings changed'
+REASON_NEW = 'new or changed test'
+REASON_RULE = 'rule {rule} changed'
+REASON_ALL_RULES = 'a rule changed and the rules this test uses are not known'
+REASON_ENTRY = 'bilingual entry {lemma} changed'
+
+TRANSFER_TRACE_PREFIX = 'apertium-transfer:'
+
+lexUnitPattern = re.compile(r'\^((?:[^\\$]|\\.)*)\$')
+appliedRulePattern = re.compile(r'Applied rule (\d+) line \d+ (.+)')
+
+# The lemma part of a lexical unit, without escapes
+def getLemma(luStr):
+
+    return unicodedata.normalize('NFD', re.sub(r'\\(.)', r'\1', re.split(r'(?<!\\)<', luStr, 1)[0]))
+
+# Lexical unit strings without escapes for comparing what the transfer trace shows with the dump
+def normalizeLexUnit(luStr):
+
+    return unicodedata.normalize('NFD', re.sub(r'\\(.)', r'\1', luStr.strip()))
+
+# The lexical units in a line of the testbed dump
+def getDumpLexUnits(dumpLine):
+
+    return lexUnitPattern.findall(dumpLine)
+
+def hashNode(node):
+
+    return hashlib.sha1(ET.tostring(node, encoding='utf-8')).hexdigest()
+
+def hashTest(dumpLine):
+
+    return hashlib.sha1(dumpLine.rstrip('\n').encode('utf-8')).hexdigest()
+
+# Rules that write to variables or can reject themselves change what other rules do
+def ruleAffectsOthers(ruleNode):
+
+    if ruleNode.find('.//reject-current-rule') is not None:
+        return True
+
+    for elemName in ['let', 'append', 'modify-case']:
+
+        for elem in ruleNode.iter(elemName):
+
+            if len(elem) and elem[0].tag == 'var':
+                return True
+
+    return False
+
+# Hash each rule in a rules file. Returns (global hash, map of rule # -> hash). Rules are numbered from 1 like
+# in the transfer trace. Everything but the rule actions goes into the global hash.
+def hashRulesFile(rulesPath):
+
+    try:
+        rulesTree = ET.parse(rulesPath)
+    except:
+        return BuildManifest.hashFile(rulesPath), {}
+
+    globalList = []
+    ruleHashMap = {}
+
+    for child in rulesTree.getroot():
+
+        if child.tag != 'section-rules':
+
+            globalList.append(hashNode(child))
+            continue
+
+        for ruleNum, ruleNode in enumerate(child.findall('rule'), 1):
+
+            patternNode = ruleNode.find('pattern')
+            globalList.append(hashNode(patternNode) if patternNode is not None else '')
+
+            if ruleAffectsOthers(ruleNode):
+
+                globalList.append(hashNode(ruleNode))
+
+            actionNode = ruleNode.find('action')
+            ruleHashMap[str(ruleNum)] = hashNode(actionNode) if actionNode is not None else ''
+
+    return BuildManifest.hashValues(globalList), ruleHashMap
+
+# Hash the entries of the bilingual lexicon by their left lemma. Returns (global hash, map of lemma -> hash).
+# The symbol definitions and paradigms go into the global hash.
+def hashBilingualLexicon(dictionaryPath):
+
+    try:
+        dictTree = ET.parse(dictionaryPath)
+    except:
+        return BuildManifest.hashFile(dictionaryPath), {}
+
+    globalList = []
+    entryListMap = {}
+
+    for child in dictTree.getroot():
+
+        if child.tag != 'section':
+
+            globalList.append(hashNode(child))
+            continue
+
+        for entryNode in child.iter('e'):
+
+            leftNode = entryNode.find('.//l')
+
+            if leftNode is None:
+                leftNode = entryNode.find('.//i')
+
+            if leftNode is None or leftNode.text is None:
+
+                globalList.append(hashNode(entryNode))
+                continue
+
+            lemma = unicodedata.normalize('NFD', Testbed.getXMLEntryText(leftNode))
+            entryListMap.setdefault(lemma, []).append(hashNode(entryNode))
+
+    return BuildManifest.hashValues(globalList), {lemma: BuildManifest.hashValues(hashList) for lemma, hashList in entryListMap.items()}
+
+# Get the rules that fired from the first transfer stage's trace. Returns a list of (rule #, list of source lexical units).
+def readTransferTrace(logPath):
+
+    ruleList = []
+
+    try:
+        with open(logPath, encoding='utf-8') as f:
+
+            for line in f:
+
+                if not line.startswith(TRANSFER_TRACE_PREFIX):
+                    continue
+
+                matchObj = appliedRulePattern.search(line)
+
+                if not matchObj:
+                    continue
+
+                # The lexical units look like: cat1.1<n><m>/gato1.1<n><m> my1.1<nprop>/mi1.1<nprop>
+                luStrList = re.sub(r'> ', '>\t', matchObj.group(2).strip()).split('\t')
+                ruleList.append((matchObj.group(1), [normalizeLexUnit(luStr.split('/')[0]) for luStr in luStrList]))
+    except:
+        return None
+
+    return ruleList
+
+# Work out which rules fired for each test. The trace is in test order so we look for each rule's
+# lexical units from where the last rule's ones were. Returns a list with a set of rule #s for each
+# test. If the trace can't be matched to the tests the tests from there on get None.
+def alignRulesToTests(dumpLineList, traceList):
+
+    flatList = [] # (test index, lexical unit)
+
+    for testIndex, dumpLine in enumerate(dumpLineList):
+
+        flatList.extend((testIndex, normalizeLexUnit(luStr)) for luStr in getDumpLexUnits(dumpLine))
+
+    testRulesList = [set() for _ in dumpLineList]
+    luList = [luStr for _, luStr in flatList]
+    pos = 0
+
+    for ruleNum, ruleLUList in traceList:
+
+        numLUs = len(ruleLUList)
+        found = -1
+
+        for i in range(pos, len(luList) - numLUs + 1):
+
+            if luList[i:i+numLUs] == ruleLUList:
+
+                found = i
+                break
+
+        if found < 0:
+
+            # We don't know which rules fired from here on
+            startTest = flatList[pos][0] if pos < len(flatList) else len(dumpLineList)
+
+            for testIndex in range(startTest, len(dumpLineList)):
+
+                testRulesList[testIndex] = None
+
+            break
+
+        for testIndex, _ in flatList[found:found+numLUs]:
+
+            testRulesList[testIndex].add(ruleNum)
+
+        pos = found + numLUs
+
+    return testRulesList
+
+class TestSelection():
+
+    def __init__(self, numTests):
+
+        self.rerunList = [] # (test index, reason)
+        self.carriedList = [] # test indexes
+        self.numTests = numTests
+
+    def getRerunIndexes(self):
+
+        return [testIndex for testIndex, _ in self.rerunList]
+
+    def allRerun(self):
+
+        return len(self.rerunList) == self.numTests
+
+class TestbedImpact():
+
+    def __init__(self, storeDir):
+
+        self.__path = os.path.join(storeDir, IMPACT_FILE)
+        self.__globalKey = None
+        self.__testMap = {} # test hash -> {'rules': {rule #: hash}, 'entries': {lemma: hash}, 'result': synthesis line}
+
+        try:
+            with open(self.__path, encoding='utf-8') as f:
+
+                data = json.load(f)
+
+            if data['version'] == IMPACT_FORMAT_VERSION:
+
+                self.__globalKey = data['globalKey']
+                self.__testMap = data['tests']
+        except:
+            self.__globalKey = None # nothing recorded yet or it is corrupt, everything gets run
+            self.__testMap = {}
+
+        self.__newGlobalKey = None
+        self.__ruleHashMap = {}
+        self.__entryHashMap = {}
+
+    # Hash the current rules and bilingual lexicon. extraValueList has other things that affect all tests.
+    def hashInputs(self, rulesPath, otherRulesPathList, dictionaryPath, extraValueList):
+
+        rulesGlobalHash, self.__ruleHashMap = hashRulesFile(rulesPath)
+        dictGlobalHash, self.__entryHashMap = hashBilingualLexicon(dictionaryPath)
+
+        self.__ruleHashMap[ALL_RULES_KEY] = BuildManifest.hashValues(sorted(self.__ruleHashMap.items()))
+        self.__newGlobalKey = BuildManifest.hashValues([IMPACT_FORMAT_VERSION, rulesGlobalHash, dictGlobalHash,
+                                                        [BuildManifest.hashFile(path) for path in otherRulesPathList]] + list(extraValueList))
+
+    def getEntryHash(self, lemma):
+
+        return self.__entryHashMap.get(lemma, BuildManifest.MISSING_FILE_HASH)
+
+    def getRuleHash(self, ruleNum):
+
+        return self.__ruleHashMap.get(ruleNum, BuildManifest.MISSING_FILE_HASH)
+
+    # Why a test needs to be run, or None if its last result can be used
+    def getRerunReason(self, dumpLine):
+
+        if self.__globalKey != self.__newGlobalKey:
+            return REASON_GLOBAL
+
+        testInfo = self.__testMap.get(hashTest(dumpLine))
+
+        if testInfo is None:
+            return REASON_NEW
+
+        for ruleNum, myHash in testInfo['rules'].items():
+
+            if self.getRuleHash(ruleNum) != myHash:
+
+                return REASON_ALL_RULES if ruleNum == ALL_RULES_KEY else REASON_RULE.format(rule=ruleNum)
+
+        for lemma, myHash in testInfo['entries'].items():
+
+            if self.getEntryHash(lemma) != myHash:
+                return REASON_ENTRY.format(lemma=lemma)
+
+        return None
+
+    def selectTests(self, dumpLineList, forceAll=False):
+
+        selection = TestSelection(len(dumpLineList))
+
+        for testIndex, dumpLine in enumerate(dumpLineList):
+
+            reason = REASON_FORCED if forceAll else self.getRerunReason(dumpLine)
+
+            if reason:
+                selection.rerunList.append((testIndex, reason))
+            else:
+                selection.carriedList.append(testIndex)
+
+        return selection
+
+    def getSavedResult(self, dumpLine):
+
+        return self.__testMap[hashTest(dumpLine)]['result']
+
+    # Record what the tests that were just run depend on and what they gave. testRulesList has the
+    # set of rules that fired for each of these tests or None if it isn't known.
+    def recordTests(self, dumpLineList, testRulesList, resultList):
+
+        for dumpLine, ruleSet, result in zip(dumpLineList, testRulesList, resultList):
+
+            ruleNumList = [ALL_RULES_KEY] if ruleSet is None else sorted(ruleSet, key=int)
+            lemmaSet = {getLemma(luStr) for luStr in getDumpLexUnits(dumpLine)}
+
+            self.__testMap[hashTest(dumpLine)] = {'rules': {ruleNum: self.getRuleHash(ruleNum) for ruleNum in ruleNumList},
+                                                  'entries': {lemma: self.getEntryHash(lemma) for lemma in sorted(lemmaSet)},
+                                                  'result': result}
+
+    # Save the records of the tests that are still in the testbed
+    def save(self, dumpLineList):
+
+        testKeySet = {hashTest(dumpLine) for dumpLine in dumpLineList}
+
+        os.makedirs(os.path.dirname(self.__path), exist_ok=True)
+
+        with Utils.openFileAtomically(self.__path) as f:
+
+            json.dump({'version': IMPACT_FORMAT_VERSION, 'globalKey': self.__newGlobalKey,
+                       'tests': {key: info for key, info in self.__testMap.items() if key in testKeySet}}, f, ensure_ascii=False)
+
+# Write a report of which tests were run again and why and which ones were skipped
+def writeReport(reportPath, dumpLineList, selection):
+
+    lineList = [f'{len(selection.rerunList)} of {selection.numTests} tests run, {len(selection.carriedList)} skipped.', '', 'Tests run:']
+
+    lineList += [f'  {testIndex+1}: {dumpLineList[testIndex].rstrip()} -- {reason}' for testIndex, reason in selection.rerunList]
+    lineList += ['', 'Tests skipped (last result used):']
+    lineList += [f'  {testIndex+1}: {dumpLineList[testIndex].rstrip()}' for testIndex in selection.carriedList]
+
+    Utils.writeFileAtomically(reportPath, '\n'.join(lineList) + '\n')
@@ -0,0 +1,163 @@
+#
+#   TestbedRunner
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Keep the path of each shard's Apertium log so the logs can be joined.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   Run the testbed in shards. Each test is on its own line in the dump file and stays on its
+#   own line through transfer and synthesis, so the dump file can be cut into chunks of lines
+#   that get run at the same time. Each shard has its own folder under a temporary folder in
+#   the Build folder. The Apertium tools, STAMP and HermitCrab are separate programs, so each
+#   shard's step is run from its own thread and the programs for the shards run in parallel.
+#   When the steps are done the shard outputs get joined back together in test order.
+
+import os
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import Utils
+
+# Don't bother splitting the tests into shards smaller than this
+MIN_TESTS_PER_SHARD = 25
+MAX_TESTBED_SHARDS = 8
+
+SHARD_FOLDER = 'shard_{num:02d}'
+SHARD_SOURCE_FILE = 'source_text.txt'
+SHARD_TRANSFER_RESULTS_FILE = 'target_text.txt'
+SHARD_ANA_FILE = 'target_text.ana'
+SHARD_HC_MASTER_FILE = 'target_words-HC.txt'
+SHARD_HC_PARSES_FILE = 'target_words-parses.txt'
+SHARD_HC_SURFACE_FORMS_FILE = 'target_words-surface.txt'
+SHARD_SYNTHESIS_FILE = 'target_text-syn.txt'
+
+# The Makefile writes the transfer trace to this file in the folder it runs in
+APERTIUM_LOG_FILE = 'apertium_log.txt'
+
+# Build folder files each shard needs for running the Makefile
+SHARD_BUILD_FILES = ['Makefile', 'tr.t1x', 'tr.t2x', 'tr.t3x', 'bilingual.bin', 'transfer_rules.t1x.bin', 'transfer_rules.t2x.bin', 'transfer_rules.t3x.bin']
+
+class TestbedShard():
+
+    def __init__(self, num, folder, startTest, numTests):
+
+        self.num = num
+        self.folder = folder
+        self.startTest = startTest # index of the first test in this shard
+        self.numTests = numTests
+        self.sourcePath = os.path.join(folder, SHARD_SOURCE_FILE)
+        self.transferResultsPath = os.path.join(folder, SHARD_TRANSFER_RESULTS_FILE)
+        self.anaPath = os.path.join(folder, SHARD_ANA_FILE)
+        self.masterPath = os.path.join(folder, SHARD_HC_MASTER_FILE)
+        self.parsesPath = os.path.join(folder, SHARD_HC_PARSES_FILE)
+        self.surfaceFormsPath = os.path.join(folder, SHARD_HC_SURFACE_FORMS_FILE)
+        self.synthesisPath = os.path.join(folder, SHARD_SYNTHESIS_FILE)
+        self.logPath = os.path.join(folder, APERTIUM_LOG_FILE)
+        self.stepTimes = {} # step name -> seconds
+
+    def getTotalTime(self):
+
+        return sum(self.stepTimes.values())
+
+    # A line like: 2: tests 101-200, transfer 1.20s, conversion 0.40s, synthesis 3.10s
+    def getTimingStr(self):
+
+        stepStr = ', '.join(f'{step} {seconds:.2f}s' for step, seconds in self.stepTimes.items())
+
+        return f'{self.num}: tests {self.startTest+1}-{self.startTest+self.numTests}, {stepStr}'
+
+# How many shards to use for this many tests. 1 means run the testbed the normal way.
+def getNumShards(numTests, maxShards=None):
+
+    if maxShards is None:
+
+        maxShards = min(os.cpu_count() or 1, MAX_TESTBED_SHARDS)
+
+    return max(1, min(maxShards, numTests // MIN_TESTS_PER_SHARD))
+
+# Cut the dump file into numShards files of about the same number of lines, one in each shard's folder
+def splitDumpFile(dumpPath, numShards, parentFolder):
+
+    with open(dumpPath, encoding='utf-8') as f:
+
+        lineList = f.readlines()
+
+    shardList = []
+    startTest = 0
+
+    for i in range(numShards):
+
+        # Spread the remainder over the first shards
+        numTests = len(lineList) // numShards + (1 if i < len(lineList) % numShards else 0)
+
+        folder = os.path.join(parentFolder, SHARD_FOLDER.format(num=i+1))
+        os.makedirs(folder, exist_ok=True)
+
+        shard = TestbedShard(i+1, folder, startTest, numTests)
+
+        with open(shard.sourcePath, 'w', encoding='utf-8') as f:
+
+            f.writelines(lineList[startTest:startTest+numTests])
+
+        shardList.append(shard)
+        startTest += numTests
+
+    return shardList
+
+# Copy what the Makefile needs from the Build folder. Modification times are kept so make doesn't rebuild anything.
+def prepareShardBuildFolder(shard, buildFolder):
+
+    for fileName in SHARD_BUILD_FILES:
+
+        path = os.path.join(buildFolder, fileName)
+
+        if os.path.exists(path):
+
+            shutil.copy2(path, shard.folder)
+
+# Run a step for all the shards at once. stepFunc gets called with each shard from its own thread.
+# The results are returned in shard order. How long the step took for each shard gets saved in the shard.
+def runShardStep(shardList, stepName, stepFunc):
+
+    def timedStep(shard):
+
+        startTime = time.perf_counter()
+
+        try:
+            return stepFunc(shard)
+        finally:
+            shard.stepTimes[stepName] = time.perf_counter() - startTime
+
+    # One shard is just run here
+    if len(shardList) == 1:
+
+        return [timedStep(shardList[0])]
+
+    with ThreadPoolExecutor(max_workers=len(shardList)) as executor:
+
+        return list(executor.map(timedStep, shardList))
+
+# Join one of the outputs of the shards into one file in test order
+def mergeShardFiles(shardList, attrName, outPath):
+
+    with Utils.openFileAtomically(outPath) as fOut:
+
+        for shard in shardList:
+
+            with open(getattr(shard, attrName), encoding='utf-8') as f:
+
+                shardText = f.read()
+
+            # Make sure the next shard's first test starts on a new line
+            if shardText and not shardText.endswith('\n'):
+
+                shardText += '\n'
+
+            fOut.write(shardText)
@@ -0,0 +1,230 @@
+#
+#   TestbedTrends
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   An index of how each test came out in each testbed run. A test is keyed by its origin and
+#   a hash of its lexical units. For each test we keep a string with one character per run:
+#   P for passed, F for failed, I for invalid and - if the test wasn't in the run. With this,
+#   the tests that changed between two runs can be found without reading the runs.
+#
+#   The index is kept in the results store folder. End Testbed adds each new run to it. If
+#   runs are missing from the index (e.g. the first time) they are read from the store once.
+
+import os
+import json
+import hashlib
+
+import Testbed
+import Utils
+
+TRENDS_FILE = 'trends.json'
+TRENDS_FORMAT_VERSION = 1
+
+PASSED = 'P'
+FAILED = 'F'
+INVALID = 'I'
+NOT_RUN = '-'
+
+# A test that went between passing and failing at least this many times is flapping
+FLAP_MIN_CHANGES = 2
+
+def getTestKey(origin, luString):
+
+    return hashlib.sha1(f'{origin}\n{luString}'.encode('utf-8')).hexdigest()[:16]
+
+def getOutcome(test):
+
+    if not test.isValid():
+        return INVALID
+
+    if test.getExpectedResult() != test.getActualResult():
+        return FAILED
+
+    return PASSED
+
+# The number of times a test went from passing to failing or back in a list of outcomes
+def countChanges(outcomes):
+
+    outcomes = [outcome for outcome in outcomes if outcome in (PASSED, FAILED)]
+
+    return sum(1 for i in range(1, len(outcomes)) if outcomes[i] != outcomes[i-1])
+
+class TestTrend():
+
+    def __init__(self, key, origin, luString, outcomes):
+
+        self.key = key
+        self.origin = origin
+        self.luString = luString
+        self.outcomes = outcomes # one character per run in the index
+
+class RunDiff():
+
+    def __init__(self, fromRunId, toRunId):
+
+        self.fromRunId = fromRunId
+        self.toRunId = toRunId
+        self.newlyFailing = [] # passed in the first run, failed in the second
+        self.newlyPassing = [] # failed in the first run, passed in the second
+        self.flapping = [] # went back and forth in between
+        self.added = [] # not in the first run
+        self.removed = [] # not in the second run
+
+    def hasChanges(self):
+
+        return any([self.newlyFailing, self.newlyPassing, self.flapping, self.added, self.removed])
+
+class TrendIndex():
+
+    def __init__(self, storeDir):
+
+        self.__path = os.path.join(storeDir, TRENDS_FILE)
+        self.__runIdList = [] # oldest first
+        self.__testMap = {} # test key -> TestTrend
+
+        try:
+            with open(self.__path, encoding='utf-8') as f:
+
+                data = json.load(f)
+
+            if data['version'] == TRENDS_FORMAT_VERSION:
+
+                self.__runIdList = data['runs']
+                self.__testMap = {key: TestTrend(key, origin, luString, outcomes) for key, (origin, luString, outcomes) in data['tests'].items()}
+        except:
+            self.__runIdList = [] # no index yet or it is corrupt, it gets rebuilt from the store
+            self.__testMap = {}
+
+    def getRunIds(self):
+
+        return list(self.__runIdList)
+
+    def hasRun(self, runId):
+
+        return runId in self.__runIdList
+
+    def getTrend(self, origin, luString):
+
+        return self.__testMap.get(getTestKey(origin, luString))
+
+    # Add a run's outcomes. A run that is already in the index gets its outcomes replaced.
+    def addRun(self, runId, resultXMLObj):
+
+        if runId in self.__runIdList:
+
+            pos = self.__runIdList.index(runId)
+        else:
+            # Runs get added in order, a run older than the newest one means the index has to be rebuilt
+            if self.__runIdList and runId < self.__runIdList[-1]:
+                raise ValueError(runId)
+
+            pos = len(self.__runIdList)
+            self.__runIdList.append(runId)
+
+            for trend in self.__testMap.values():
+
+                trend.outcomes += NOT_RUN
+
+        runOutcomeMap = {}
+
+        for testbed in resultXMLObj.getFLExTransTestbedXMLObjectList():
+
+            for test in testbed.getTestXMLObjectList():
+
+                origin = test.getOrigin()
+                luString = test.getLUString()
+                key = getTestKey(origin, luString)
+
+                if key not in self.__testMap:
+
+                    self.__testMap[key] = TestTrend(key, origin, luString, NOT_RUN * len(self.__runIdList))
+
+                runOutcomeMap[key] = getOutcome(test)
+
+        for key, trend in self.__testMap.items():
+
+            outcome = runOutcomeMap.get(key, NOT_RUN)
+            trend.outcomes = trend.outcomes[:pos] + outcome + trend.outcomes[pos+1:]
+
+    # Add the finished runs in the store that aren't in the index yet. Runs in knownRunMap (run id -> result object)
+    # are already in memory, the others get read from the store.
+    def addMissingRuns(self, resultsStore, knownRunMap=None):
+
+        knownRunMap = knownRunMap or {}
+        runIdList = [summary['id'] for summary in reversed(resultsStore.getRunSummaries()) if summary['end'] or summary['id'] in knownRunMap]
+        missingList = [runId for runId in runIdList if runId not in self.__runIdList]
+
+        if not missingList:
+            return
+
+        # Runs can only be added to the end, so if an older run is missing, start over
+        if self.__runIdList and missingList[0] < self.__runIdList[-1]:
+
+            self.__runIdList = []
+            self.__testMap = {}
+            missingList = runIdList
+
+        for runId in missingList:
+
+            resultXMLObj = knownRunMap.get(runId) or Testbed.TestbedResultXMLObject(None, resultsStore.loadRunNode(runId))
+            self.addRun(runId, resultXMLObj)
+
+    # Compare two runs. Tests that went back and forth in the runs from the first run to the second are flapping.
+    def diffRuns(self, fromRunId, toRunId):
+
+        fromPos = self.__runIdList.index(fromRunId)
+        toPos = self.__runIdList.index(toRunId)
+        myDiff = RunDiff(fromRunId, toRunId)
+
+        for trend in sorted(self.__testMap.values(), key=lambda trend: (trend.origin, trend.luString)):
+
+            fromOutcome = trend.outcomes[fromPos]
+            toOutcome = trend.outcomes[toPos]
+
+            if fromOutcome == NOT_RUN and toOutcome == NOT_RUN:
+                continue
+
+            if fromOutcome == NOT_RUN:
+                myDiff.added.append(trend)
+
+            elif toOutcome == NOT_RUN:
+                myDiff.removed.append(trend)
+
+            elif fromOutcome == PASSED and toOutcome == FAILED:
+                myDiff.newlyFailing.append(trend)
+
+            elif fromOutcome == FAILED and toOutcome == PASSED:
+                myDiff.newlyPassing.append(trend)
+
+            elif countChanges(trend.outcomes[min(fromPos, toPos):max(fromPos, toPos)+1]) >= FLAP_MIN_CHANGES:
+                myDiff.flapping.append(trend)
+
+        return myDiff
+
+    def save(self):
+
+        with Utils.openFileAtomically(self.__path) as f:
+
+            json.dump({'version': TRENDS_FORMAT_VERSION, 'runs': self.__runIdList,
+                       'tests': {key: [trend.origin, trend.luString, trend.outcomes] for key, trend in self.__testMap.items()}}, f, ensure_ascii=False)
+
+# Add a run that was just saved to the store to the trend index. Usually this is the only run that is
+# missing from the index. The first time, the runs from before there was an index get added too.
+def addRunToTrends(resultsStore, runId, resultXMLObj):
+
+    trendIndex = TrendIndex(resultsStore.getStoreDir())
+
+    if trendIndex.hasRun(runId):
+        trendIndex.addRun(runId, resultXMLObj)
+    else:
+        trendIndex.addMissingRuns(resultsStore, {runId: resultXMLObj})
+
+    trendIndex.save()
+
+    return trendIndex
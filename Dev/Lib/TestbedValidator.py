@@ -5,6 +5,13 @@
 #   SIL International
 #   6/6/2018
 #
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Keep the validator cache in an sqlite file. Each entry's guid and modification stamp
+#    are saved with the word senses and affix glosses it gives, so only entries that
+#    changed get read again. Each change to the set of valid values gets a new snapshot
+#    version. Test results are saved by LU string and snapshot version so a test only
+#    gets validated again if one of its values changed.
+#
 #   Version 3.14 - 5/29/25 - Ron Lockwood
 #    Added localization capability.
 #
@@ -50,10 +57,20 @@
 #    Initial Version
 #
 #   A Class to validate if a lexical unit is good by checking against the FLEx database.
+#
+#   The valid word senses, categories and tags are cached in an sqlite file in the temp folder.
+#   Tables:
+#    meta     - name/value pairs: the snapshot version, the FLEx last modified date and the morphnames
+#    entries  - guid, modification stamp and the word senses and affix glosses for each entry
+#    snapshot - the current set of valid values (kind, name)
+#    changes  - the values that were added or removed in each snapshot version
+#    results  - test results by LU string hash and the snapshot version they are good for
 
 import re
-import tempfile
 import os
+import sqlite3
+import hashlib
+import tempfile
 from datetime import datetime
 
 import ReadConfig
@@ -72,29 +89,59 @@ from SIL.LCModel import (  # type: ignore
     )
 from SIL.LCModel.Core.KernelInterfaces import ITsString    # type: ignore
 
-GRAM_CATS = 'Grammatical Categories:'
-TAGS = 'Tags:'
-WORD_SENSES = 'Word Senses:'
+# Kinds of values in the cache
+WORD_SENSE_KIND = 's'
+GRAM_CAT_KIND = 'c'
+TAG_KIND = 't'
+
+# Names in the meta table
+VERSION_KEY = 'version'
+DB_MODIFIED_KEY = 'dbModified'
+MORPHNAMES_KEY = 'morphNames'
+
+# When more changes than this have been saved, drop them and the test results and start over
+MAX_CHANGE_ROWS = 100000
+
+CACHE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS entries (guid TEXT PRIMARY KEY, stamp TEXT, senses TEXT, tags TEXT);
+CREATE TABLE IF NOT EXISTS snapshot (kind TEXT, name TEXT, PRIMARY KEY (kind, name));
+CREATE TABLE IF NOT EXISTS changes (version INTEGER, kind TEXT, name TEXT);
+CREATE INDEX IF NOT EXISTS changesVersion ON changes (version);
+CREATE TABLE IF NOT EXISTS results (luHash TEXT PRIMARY KEY, version INTEGER, valid INTEGER, reason TEXT);
+'''
 
 class TestbedValidator():
-    def __init__(self, database, report):
+    def __init__(self, database, report, cachePath=None):
         
         self.db = database
         self.report = report
-        self.mapWordSenses = {}
-        self.mapTags = {}
-        self.mapCats = {}
-        
-        # If the validator cache file exists
-        if self.cacheExists():
-            # check if it's out of date
-            if self.isCacheOutOfDate() == False:
-                
-                self.loadFromCache()
-                return
-                
-        self.readDatabaseValues()
-        self.saveToCache()
+        self.mapWordSenses = set()
+        self.mapTags = set()
+        self.mapCats = set()
+        self.numEntriesRead = 0
+        self.__invalidReason = ''
+        self.__resultMap = None # LU string hash -> (version, valid, reason), loaded the first time it's needed
+        self.__newResultMap = {}
+        self.__changesSinceMap = {} # version -> set of (kind, name) changed since that version
+        
+        if cachePath is None:
+            cachePath = self.getCacheFilePath()
+            
+        self.__conn = openCache(cachePath)
+        metaMap = dict(self.__conn.execute('SELECT name, value FROM meta'))
+        self.__version = int(metaMap.get(VERSION_KEY, 0))
+        
+        morphNames = self.getMorphNames()
+        morphNamesStr = '\n'.join(morphNames) if morphNames else ''
+        dbModified = self.getDBModified()
+        
+        # If nothing changed in FLEx since the cache was saved, use it as is
+        if metaMap.get(DB_MODIFIED_KEY) == dbModified and metaMap.get(MORPHNAMES_KEY) == morphNamesStr:
+            
+            self.loadSnapshot()
+        else:
+            self.updateSnapshot(morphNames, metaMap.get(MORPHNAMES_KEY) != morphNamesStr, dbModified, morphNamesStr)
     
     def isWordSenseValid(self, wordSense):
         # Change spaces to underscores. Phrases and the like are stored with underscores
@@ -145,150 +192,231 @@ class TestbedValidator():
     def getInvalidReason(self):
         return self.__invalidReason
     
-    def isCacheOutOfDate(self):
+    # The values the validity of a lexical unit depends on
+    def getLexUnitValues(self, lexUnit):
         
-        # Build a DateTime object with the FLEx DB last modified date
-        flexDate = self.db.GetDateLastModified()
-        dbDateTime = datetime(flexDate.get_Year(),flexDate.get_Month(),flexDate.get_Day(),flexDate.get_Hour(),flexDate.get_Minute(),flexDate.get_Second())
+        if lexUnit.getGramCat() == Testbed.SENT:
+            return []
         
-        # Get the date of the cache file
-        try:
-            mtime = os.path.getmtime(self.getCacheFilePath())
-        except OSError:
-            mtime = 0
-        cacheFileDateTime = datetime.fromtimestamp(mtime)
+        wordSense = re.sub(' ', '_', lexUnit.getHeadWord() + '.' + lexUnit.getSenseNum())
+        valueList = [(WORD_SENSE_KIND, wordSense), (WORD_SENSE_KIND, wordSense.lower()), (GRAM_CAT_KIND, lexUnit.getGramCat())]
+        valueList.extend((TAG_KIND, tag) for tag in lexUnit.getOtherTags())
         
-        if dbDateTime > cacheFileDateTime: # FLEx DB is newer
-            return True 
-        else: # cache file is newer
-            return False
-
-    def saveToCache(self):
-        f = open(self.getCacheFilePath(), 'w', encoding='utf-8')
+        return valueList
+    
+    # Get the valid flag and invalid reason saved for a test with this LU string. A saved result is only
+    # used if none of the values its lexical units depend on changed since then. None if the test needs validating.
+    def getSavedResult(self, luString, luList):
         
-        f.write(GRAM_CATS+'\n')
-        for cat in sorted(self.mapCats.keys()):
-            f.write(cat+'\n')
-            
-        f.write(TAGS+'\n')
-        for tag in sorted(self.mapTags.keys()):
-            f.write(tag+'\n')
-            
-        f.write(WORD_SENSES+'\n')
-        for wordSense in sorted(self.mapWordSenses.keys()):
-            f.write(wordSense+'\n')
+        if self.__resultMap is None:
+            self.__resultMap = {luHash: (version, valid, reason) for luHash, version, valid, reason in self.__conn.execute('SELECT luHash, version, valid, reason FROM results')}
         
-        f.close()
-            
-    def loadFromCache(self):
-        f = open(self.getCacheFilePath(), encoding='utf-8')
+        luHash = hashLUString(luString)
+        savedResult = self.__resultMap.get(luHash)
         
-        # start with grammatical categories
-        myMap = self.mapCats
+        if savedResult is None:
+            return None
         
-        # Read each section of the cache file
-        for i,line in enumerate(f):
+        version, valid, reason = savedResult
+        
+        if version != self.__version:
             
-            # Skip the first line
-            if i == 0:
-                continue
+            changedSet = self.getChangesSince(version)
             
-            # Next tags. Skip this line
-            if line.rstrip() == TAGS:
-                myMap = self.mapTags
-                continue
+            for lu in luList:
+                if not changedSet.isdisjoint(self.getLexUnitValues(lu)):
+                    return None
             
-            # Next word senses. Skip this line
-            if line.rstrip() == WORD_SENSES:
-                myMap = self.mapWordSenses
-                continue
+            # Nothing it depends on changed, so the result is good for this version too
+            self.__newResultMap[luHash] = (self.__version, valid, reason)
             
-            myMap[line.rstrip()] = 7 # dummy value
-         
-        f.close()
-           
-    def getCacheFilePath(self):
-        # build the path in the temp dir using project name + testbed_cache.txt
-        return os.path.join(tempfile.gettempdir(), str(self.db.lp)+'_'+MyUtils.TESTBED_CACHE_FILE)
-    def cacheExists(self):
-        return os.path.exists(self.getCacheFilePath())
-    def readDatabaseValues(self):
-        # Go through the lexicon and save word senses and affixes
-        self.readLexicalInfo()
+        return bool(valid), reason
+    
+    def saveResult(self, luString, valid, reason):
         
-        # Save all the categories for the database
-        self.readCategoryInfo()
+        self.__newResultMap[hashLUString(luString)] = (self.__version, int(valid), reason)
+    
+    # Write the new test results to the cache and close it
+    def saveResults(self):
         
-        # Save features abbreviations
-        self.readOtherInfo()
+        try:
+            with self.__conn:
+                self.__conn.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', 
+                                        [(luHash,) + result for luHash, result in self.__newResultMap.items()])
+        except sqlite3.Error:
+            pass # the tests just get validated again next time
         
-    def readLexicalInfo(self):
+        self.__newResultMap = {}
+        self.__conn.close()
+        
+    def getVersion(self):
+        return self.__version
+    
+    def getChangesSince(self, version):
+        
+        if version not in self.__changesSinceMap:
+            self.__changesSinceMap[version] = set(self.__conn.execute('SELECT kind, name FROM changes WHERE version > ?', (version,)))
+            
+        return self.__changesSinceMap[version]
+    
+    def getDBModified(self):
+        
+        # Build a DateTime object with the FLEx DB last modified date
+        flexDate = self.db.GetDateLastModified()
+        dbDateTime = datetime(flexDate.get_Year(),flexDate.get_Month(),flexDate.get_Day(),flexDate.get_Hour(),flexDate.get_Minute(),flexDate.get_Second())
+        
+        return dbDateTime.isoformat()
+    
+    def getMorphNames(self):
         
         configMap = ReadConfig.readConfig(self.report)
 
-        morphNames = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_MORPHNAMES, self.report)
+        return ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_MORPHNAMES, self.report)
+        
+    def getCacheFilePath(self):
+        # build the path in the temp dir using project name + testbed_cache.sqlite
+        return os.path.join(tempfile.gettempdir(), str(self.db.lp)+'_'+MyUtils.TESTBED_CACHE_FILE)
+    
+    def loadSnapshot(self):
+        
+        mapByKind = {WORD_SENSE_KIND: self.mapWordSenses, GRAM_CAT_KIND: self.mapCats, TAG_KIND: self.mapTags}
+        
+        for kind, name in self.__conn.execute('SELECT kind, name FROM snapshot'):
+            mapByKind[kind].add(name)
+            
+    # Read what changed in the database and save it to the cache as a new snapshot version
+    def updateSnapshot(self, morphNames, morphNamesChanged, dbModified, morphNamesStr):
+        
+        conn = self.__conn
+        
+        # What we saved for each entry. If the morphnames changed they all have to be read again.
+        if morphNamesChanged:
+            entryMap = {}
+        else:
+            entryMap = {guid: (stamp, senses, tags) for guid, stamp, senses, tags in conn.execute('SELECT guid, stamp, senses, tags FROM entries')}
+        
+        changedEntryList = []
         
         if not morphNames: 
             self.report.Warning(_translate('TestbedValidator', 'Configuration File Problem. Morphnames not found.'))
-            return 
-
-        # Loop through all the entries
-        for i,e in enumerate(self.db.LexiconAllEntries()):
-            
-            # See if we have the right morph type
-            morphType = MyUtils.as_string(e.LexemeFormOA.MorphTypeRA.Name)
-            
-            # If no senses, skip it
-            if e.SensesOS.Count == 0:
-                continue
+        else:
+            # Loop through all the entries and only read the ones that changed
+            for e in self.db.LexiconAllEntries():
                 
-            else: # Entry with senses
-                # Loop through senses
-                for i, mySense in enumerate(e.SensesOS):
+                guid = str(e.Guid)
+                stamp = self.getEntryStamp(e)
+                record = entryMap.pop(guid, None)
+                
+                if record is None or record[0] != stamp:
                     
-                    gloss = MyUtils.as_string(mySense.Gloss)
+                    senseList, tagList = self.readEntry(e, morphNames)
+                    record = (stamp, '\n'.join(senseList), '\n'.join(tagList))
+                    changedEntryList.append((guid,) + record)
+                    self.numEntriesRead += 1
+                
+                if record[1]:
+                    self.mapWordSenses.update(record[1].split('\n'))
+                if record[2]:
+                    self.mapTags.update(record[2].split('\n'))
+        
+        # Save all the categories for the database
+        self.readCategoryInfo()
+        
+        # Save features abbreviations
+        self.readOtherInfo()
+        
+        newSet = {(WORD_SENSE_KIND, name) for name in self.mapWordSenses} | {(GRAM_CAT_KIND, name) for name in self.mapCats} | {(TAG_KIND, name) for name in self.mapTags}
+        oldSet = set(conn.execute('SELECT kind, name FROM snapshot'))
+        changedSet = newSet ^ oldSet
+        
+        try:
+            with conn:
+                if morphNamesChanged:
+                    conn.execute('DELETE FROM entries')
+                
+                # What's left in the entry map got deleted from the lexicon
+                conn.executemany('DELETE FROM entries WHERE guid = ?', [(guid,) for guid in entryMap])
+                conn.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)', changedEntryList)
+                
+                if changedSet:
+                    self.__version += 1
+                    conn.executemany('DELETE FROM snapshot WHERE kind = ? AND name = ?', oldSet - newSet)
+                    conn.executemany('INSERT INTO snapshot VALUES (?, ?)', newSet - oldSet)
                     
-                    # Process roots
-                    # Don't process clitics in this block
-                    if e.LexemeFormOA and e.LexemeFormOA.ClassName == 'MoStemAllomorph' and e.LexemeFormOA.MorphTypeRA and morphType in morphNames:
+                    # The changes are only needed to check saved test results
+                    if conn.execute('SELECT 1 FROM results LIMIT 1').fetchone():
+                        conn.executemany('INSERT INTO changes VALUES (?, ?, ?)', [(self.__version, kind, name) for kind, name in changedSet])
                     
-                        # Set the headword value and the homograph #, if necessary
-                        headWord = ITsString(e.HeadWord).Text
-                        headWord = MyUtils.add_one(headWord)
+                    # Don't let the changes grow forever. Without them no saved result can be trusted.
+                    if conn.execute('SELECT COUNT(*) FROM changes').fetchone()[0] > MAX_CHANGE_ROWS:
+                        conn.execute('DELETE FROM changes')
+                        conn.execute('DELETE FROM results')
+                
+                conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [(VERSION_KEY, str(self.__version)), (DB_MODIFIED_KEY, dbModified), (MORPHNAMES_KEY, morphNamesStr)])
+        except sqlite3.Error:
+            # Can't save the cache, so don't use saved test results either
+            conn.close()
+            self.__conn = openCache(':memory:')
+    
+    # The modification stamp of an entry. The morph type name comes from another object so it's included.
+    def getEntryStamp(self, e):
+        
+        return str(e.DateModified.Ticks) + ' ' + str(MyUtils.as_string(e.LexemeFormOA.MorphTypeRA.Name))
     
-                        # Only take word senses that have a grammatical category set.
-                        if mySense.MorphoSyntaxAnalysisRA and mySense.MorphoSyntaxAnalysisRA.ClassName == 'MoStemMsa':
-                            msa = IMoStemMsa(mySense.MorphoSyntaxAnalysisRA)
-                            if msa.PartOfSpeechRA:            
-                                                      
-                                # build the word sense and add it to the map
-                                wordSense = headWord+'.'+str(i+1)
-                                wordSense = re.sub(' ', '_', wordSense) # change spaces to underscores
-                                self.mapWordSenses[wordSense] = 7 # dummy value
+    # Get the word senses and affix glosses that an entry gives
+    def readEntry(self, e, morphNames):
+        
+        senseList = []
+        tagList = []
+        
+        # See if we have the right morph type
+        morphType = MyUtils.as_string(e.LexemeFormOA.MorphTypeRA.Name)
+        
+        # Loop through senses
+        for i, mySense in enumerate(e.SensesOS):
+            
+            gloss = MyUtils.as_string(mySense.Gloss)
+            
+            # Process roots
+            # Don't process clitics in this block
+            if e.LexemeFormOA and e.LexemeFormOA.ClassName == 'MoStemAllomorph' and e.LexemeFormOA.MorphTypeRA and morphType in morphNames:
+            
+                # Set the headword value and the homograph #, if necessary
+                headWord = ITsString(e.HeadWord).Text
+                headWord = MyUtils.add_one(headWord)
 
-                    # Now process non-roots
-                    else:
-                        if gloss == None:
-                            continue
-                        elif e.LexemeFormOA == None:
-                            continue
-                        elif e.LexemeFormOA.MorphTypeRA == None:
-                            continue
-                        elif e.LexemeFormOA.ClassName != 'MoStemAllomorph':
-                            if e.LexemeFormOA.ClassName == 'MoAffixAllomorph':
-                                gloss = re.sub(r'\.', '_', gloss)
-                                self.__saveAffixGloss(gloss)
-                            else:
-                                continue 
-                        elif morphType not in morphNames:
-                            if morphType == 'proclitic' or morphType == 'enclitic':
-                                gloss = re.sub(r'\.', '_', gloss)
-                                self.__saveAffixGloss(gloss)
-                            else:
-                                continue 
+                # Only take word senses that have a grammatical category set.
+                if mySense.MorphoSyntaxAnalysisRA and mySense.MorphoSyntaxAnalysisRA.ClassName == 'MoStemMsa':
+                    msa = IMoStemMsa(mySense.MorphoSyntaxAnalysisRA)
+                    if msa.PartOfSpeechRA:            
+                                              
+                        # build the word sense and add it to the list
+                        wordSense = headWord+'.'+str(i+1)
+                        wordSense = re.sub(' ', '_', wordSense) # change spaces to underscores
+                        senseList.append(wordSense)
 
-    def __saveAffixGloss(self, gloss):
-        self.mapTags[gloss] = 7 # dummy value
+            # Now process non-roots
+            else:
+                if gloss == None:
+                    continue
+                elif e.LexemeFormOA == None:
+                    continue
+                elif e.LexemeFormOA.MorphTypeRA == None:
+                    continue
+                elif e.LexemeFormOA.ClassName != 'MoStemAllomorph':
+                    if e.LexemeFormOA.ClassName == 'MoAffixAllomorph':
+                        gloss = re.sub(r'\.', '_', gloss)
+                        tagList.append(gloss)
+                    else:
+                        continue 
+                elif morphType not in morphNames:
+                    if morphType == 'proclitic' or morphType == 'enclitic':
+                        gloss = re.sub(r'\.', '_', gloss)
+                        tagList.append(gloss)
+                    else:
+                        continue 
+        
+        return senseList, tagList
                 
     def readCategoryInfo(self):
         # loop through all categories
@@ -297,7 +425,7 @@ class TestbedValidator():
             # save abbreviation
             posAbbr = MyUtils.as_string(pos.Abbreviation)
             posAbbr = re.sub(' ', '_', posAbbr)
-            self.mapCats[posAbbr] = 7
+            self.mapCats.add(posAbbr)
             
     def readOtherInfo(self): 
         
@@ -306,10 +434,39 @@ class TestbedValidator():
             for value in feature.ValuesOC:
                 abbr = MyUtils.as_string(value.Abbreviation)
                 abbr = re.sub(r'\.', '_', abbr)
-                self.mapTags[abbr] = 7
+                self.mapTags.add(abbr)
 
         # Get all the inflection class abbreviations
         for inflClass in self.db.ObjectsIn(IMoInflClassRepository):
             abbr = MyUtils.as_string(inflClass.Abbreviation)
             abbr = re.sub(r'\.', '_', abbr)
-            self.mapTags[abbr] = 7
+            self.mapTags.add(abbr)
+
+def hashLUString(luString):
+    
+    return hashlib.sha1(luString.encode('utf-8')).hexdigest()
+
+# Open the cache, making the tables if needed. If the file can't be used, start a new one or use one in memory.
+def openCache(cachePath):
+    
+    for i in range(2):
+        
+        conn = None
+        try:
+            conn = sqlite3.connect(cachePath)
+            conn.executescript(CACHE_SCHEMA)
+            return conn
+        except sqlite3.Error:
+            if conn:
+                conn.close()
+        
+        # The file isn't a cache we can use, remove it and try once more
+        try:
+            os.remove(cachePath)
+        except OSError:
+            break
+    
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(CACHE_SCHEMA)
+    
+    return conn
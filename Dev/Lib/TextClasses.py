@@ -5,6 +5,9 @@
 #   SIL International
 #   12/24/2022
 #
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Allow a paragraph to release sentences that have already been written out.
+#
 #   Version 3.14.2 - 12/8/25 - Ron Lockwood
 #    Don't save complex form map items that have a zero-length list. This was 
 #    causing problems for phrasal verbs with inflection on the last element. The items
@@ -182,6 +185,7 @@ class TextEntirety():
 class TextParagraph():
     def __init__(self):
         self.__sentList = []
+        self.__releasedCount = 0
     def addSentence(self, textSent):
         self.__sentList.append(textSent)
     def createGuidMaps(self, insertList):
@@ -195,11 +199,15 @@ class TextParagraph():
             return None
         return self.__sentList[sentNum]
     def getSentCount(self):
-        return len(self.__sentList)
+        return len(self.__sentList) + self.__releasedCount
     def getWordCount(self):
         return sum([x.getWordCount() for x in self.__sentList])
     def getSentences(self):
         return self.__sentList
+    # Drop a sentence that has already been written out, but keep counting it
+    def releaseSentence(self, textSent):
+        self.__sentList.remove(textSent)
+        self.__releasedCount += 1
     def getSurfaceAndDataTupleListBySent(self, tupBySentList):
         for sent in self.__sentList:
             tupList = []
@@ -5,6 +5,38 @@
 #   SIL International
 #   7/1/24
 #
+#   Version 3.15.10 - 10/18/26 - Ron Lockwood
+#    Count the rules applied with numRules() again like before the rules were compiled.
+#
+#   Version 3.15.9 - 10/18/26 - Ron Lockwood
+#    Merge runs of 12 or more literal rules instead of 30 or more. 30 hardly ever happens in real rule files.
+#
+#   Version 3.15.8 - 10/18/26 - Ron Lockwood
+#    Removed the unused profile parameter from applying a rule set. The rules window does its own profiling.
+#    Move a rule's test results with it when it gets moved up or down.
+#
+#   Version 3.15.7 - 10/18/26 - Ron Lockwood
+#    Normalize the chunks of big texts with the WildebeestWorker script instead of a process pool,
+#    so the worker processes don't load PyQt and the FLEx libraries again.
+#
+#   Version 3.15.6 - 10/18/26 - Ron Lockwood
+#    Don't normalize the output of the last rule. It gets normalized before each rule like before.
+#
+#   Version 3.15.5 - 10/18/26 - Ron Lockwood
+#    Added a profiling mode that records the matches, characters replaced and time for each rule.
+#    Testing in the rules window shows this for each rule and saves it in the Build folder.
+#
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Merge runs of literal rules that can't affect each other into one pass over the text.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Keep the Wildebeest normalizer and its step table for each set of steps instead of building them 
+#    each time. Normalize big texts in chunks of paragraphs in parallel processes.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Added a compiled rule set that reads the rules, normalizes the search strings and compiles
+#    the regular expressions once. They are cached by the contents of the rules.
+#
 #   Version 3.15.1 - 2/11/26 - Ron Lockwood
 #    Fixes #1073. Automatically apply search/replace rules on the text coming out of synthesis.
 #
@@ -64,8 +96,11 @@ import regex
 import os
 import shutil
 import json
+import hashlib
+import time
+import weakref
 import xml.etree.ElementTree as ET
-from wildebeest.wb_normalize import Wildebeest
+import WildebeestWorker
 
 from PyQt5 import QtCore, QtGui
 from PyQt5.QtCore import QCoreApplication
@@ -102,6 +137,18 @@ WB_BASE_NONE = 'NONE'
 WB_LANG_CODE_ATTRIB = 'LangCode'
 WB_ADD_STEP_ATTRIB = 'AddStep'
 WB_SKIP_STEP_ATTRIB = 'SkipStep'
+WB_PARALLEL_MIN_SIZE_ATTRIB = 'ParallelMinSize'
+
+# Texts with at least this many characters get normalized by Wildebeest in parallel chunks. 
+# This can be changed with the ParallelMinSize attribute of the Wildebeest settings in the rules file. 0 turns it off.
+WB_PARALLEL_MIN_SIZE_DEFAULT = 10000000
+
+# Runs of at least this many literal rules get done in one pass. From benchmarks/bench_mergeLiteralRules.py, this is
+# where one pass is as fast or faster than one rule at a time unless nearly every line has several matches.
+MIN_MERGED_RUN_LENGTH = 12
+
+TEXT_IN_RULES_PROFILE_FILE = 'text_in_rules_profile.json'
+TEXT_OUT_RULES_PROFILE_FILE = 'text_out_rules_profile.json'
 
 TEXTOUT_MODULENAME = "Text Out Rules"
 
@@ -242,84 +289,331 @@ def numRules(tree):
     else:
         return 0
 
-def applySearchReplaceRules(inputStr, tree):
-    
-    errorMsg = ""
-    newStr = inputStr
+# A set of search/replace rules that is ready to apply. The rules XML gets read once, the search strings
+# get converted to decomposed unicode once and the regular expressions get compiled once.
+# Use getCompiledRuleSet() to get one since they are cached by the contents of the rules.
+class CompiledRuleSet():
 
-    # Get the parent element where the rules are listed.
-    root = tree.getroot()
-    searchReplaceRulesElement = root.find(SEARCH_REPLACE_RULES_ELEM)
+    def __init__(self, root):
+
+        self.wildebeestSettings = None
+        self.wildebeestParallelMinSize = getWildebeestParallelMinSize(root)
+        self.ruleList = [] # tuples of (compiled regex or None, NFD search string, replace string, rule string, compile failed)
 
-    # See if we have Wildebeest to run, if so run it
-    wildebeestStr = root.get(APPLY_WILDEBEEST_ATTRIB)
+        # See if we have Wildebeest to run
+        if root.get(APPLY_WILDEBEEST_ATTRIB) == 'yes':
 
-    if wildebeestStr == 'yes':
+            self.wildebeestSettings = getWildebeestSettings(root)
 
-       newStr = runWildebeest(root, newStr)
+        searchReplaceRulesElement = root.find(SEARCH_REPLACE_RULES_ELEM)
 
-    # Loop through each rule
-    for ruleEl in searchReplaceRulesElement:
+        if searchReplaceRulesElement is None:
+            return
 
-        searchReplObj = getRuleFromElement(ruleEl)
+        for ruleEl in searchReplaceRulesElement:
 
-        # Skip a rule if it is marked inactive
-        if searchReplObj.isInactive == False:
+            searchReplObj = getRuleFromElement(ruleEl)
+
+            # Skip a rule if it is marked inactive
+            if searchReplObj.isInactive:
+                continue
 
-            # Convert the search string and the string to replace to decomposed unicode. 
+            # Convert the search string to decomposed unicode.
             # FLEx stores things as decomposed, but the user may not be inputting decomposed unicode.
-            newStr = unicodedata.normalize('NFD', newStr)
             newSearch = unicodedata.normalize('NFD', searchReplObj.searchStr)
+            compiledRegEx = None
+            compileFailed = False
+
+            if searchReplObj.isRegEx:
+                try:
+                    compiledRegEx = regex.compile(newSearch)
+                except:
+                    compileFailed = True
+
+            self.ruleList.append((compiledRegEx, newSearch, searchReplObj.replStr, buildRuleString(searchReplObj), compileFailed))
+
+        self.stepList = mergeLiteralRules(self.ruleList)
+
+    def numRules(self):
+
+        return len(self.ruleList)
+
+    # Apply the rules to the given string. Returns the new string and an error message.
+    # The new string is None if a rule failed.
+    def apply(self, inputStr):
+
+        newStr = inputStr
+
+        if self.wildebeestSettings:
+
+            newStr = runWildebeestWithSettings(newStr, *self.wildebeestSettings, parallelMinSize=self.wildebeestParallelMinSize)
+
+        # The string to be searched has to be decomposed too. It gets normalized before each rule, but only
+        # again if the rule before changed something. The output of the last rule is left as it is.
+        needsNormalizing = True
+
+        for compiledRegEx, newSearch, replStr, ruleStr, compileFailed in self.stepList:
+
+            if needsNormalizing:
+
+                newStr = unicodedata.normalize('NFD', newStr)
+
+            prevStr = newStr
 
             try:
-                if searchReplObj.isRegEx:
+                if compileFailed:
+                    raise regex.error(ruleStr)
 
-                    newStr = regex.sub(newSearch, searchReplObj.replStr, newStr)
+                if compiledRegEx:
+
+                    newStr = compiledRegEx.sub(replStr, newStr)
                 else:
-                    newStr = newStr.replace(newSearch, searchReplObj.replStr)
+                    newStr = newStr.replace(newSearch, replStr)
             except:
-                newStr = None
-                errorMsg = _translate("TextInOutUtils", "Test stopped on failure of rule: {ruleString}").format(ruleString=buildRuleStringFromElement(ruleEl))
-                break
+                return None, _translate("TextInOutUtils", "Test stopped on failure of rule: {ruleString}").format(ruleString=ruleStr)
 
-    return newStr, errorMsg
+            needsNormalizing = newStr is not prevStr and newStr != prevStr
 
-def runWildebeest(root, inputStr):
+        return newStr, ""
+
+# Apply one rule and count what it did. Returns the new string, the number of matches and the number of characters matched.
+def applyRuleAndCount(compiledRegEx, searchStr, replStr, inputStr):
+
+    if compiledRegEx:
+
+        matchedLen = 0
+
+        def expandMatch(matchObj):
+
+            nonlocal matchedLen
+            matchedLen += len(matchObj.group())
+            return matchObj.expand(replStr)
+
+        newStr, hits = compiledRegEx.subn(expandMatch, inputStr)
+
+        return newStr, hits, matchedLen
+
+    hits = inputStr.count(searchStr)
+
+    return inputStr.replace(searchStr, replStr), hits, hits * len(searchStr)
+
+# What each rule did while profiling: the number of matches, the characters that got replaced and the time it took.
+# Results for the same rule add up if the rules get applied more than once, e.g. to each line of a file.
+class RuleProfile():
+
+    def __init__(self):
+
+        self.statsMap = {} # by rule number
+
+    def record(self, ruleNum, ruleStr, hits, charsChanged, seconds):
+
+        if ruleNum not in self.statsMap:
+
+            self.statsMap[ruleNum] = {'rule': ruleNum, 'ruleString': ruleStr, 'hits': 0, 'charsChanged': 0, 'seconds': 0.0}
+
+        stats = self.statsMap[ruleNum]
+        stats['hits'] += hits
+        stats['charsChanged'] += charsChanged
+        stats['seconds'] += seconds
+
+    def getStats(self, ruleNum):
+
+        return self.statsMap.get(ruleNum)
+
+    def getSlowestFirst(self):
+
+        return sorted(self.statsMap.values(), key=lambda stats: stats['seconds'], reverse=True)
+
+    def save(self, filePath):
+
+        try:
+            with open(filePath, 'w', encoding='utf-8') as f:
+
+                json.dump({'rules': self.getSlowestFirst()}, f, ensure_ascii=False, indent=4)
+        except:
+            return False
+
+        return True
+
+# Check if two strings could overlap in some text, i.e. one is inside the other or the end of one is the start of the other.
+def stringsCanOverlap(str1, str2):
+
+    if not str1 or not str2:
+        return False
+
+    if str1 in str2 or str2 in str1:
+        return True
+
+    for i in range(1, min(len(str1), len(str2))):
+
+        if str1.endswith(str2[:i]) or str2.endswith(str1[:i]):
+            return True
+
+    return False
+
+# A literal rule can be done in the same pass as other ones if putting its replacement string in the text
+# can't change the normalization of the text around it, i.e. the replacement is decomposed and starts and 
+# ends with a character that isn't a combining mark. An empty replacement joins the text around it, so it can't.
+def canMergeLiteralRule(rule):
+
+    compiledRegEx, searchStr, replStr, ruleStr, compileFailed = rule
+
+    if compiledRegEx or compileFailed or not searchStr or not replStr:
+        return False
+
+    return unicodedata.is_normalized('NFD', replStr) and unicodedata.combining(replStr[0]) == 0 and unicodedata.combining(replStr[-1]) == 0
+
+# Doing the later literal rule in the same pass as the earlier one only gives the same result as doing them one
+# after the other if their search strings can't overlap and the earlier replacement can't make a new match for the later rule.
+def literalRulesInteract(earlierRule, laterRule):
+
+    _, earlierSearch, earlierRepl, _, _ = earlierRule
+    _, laterSearch, _, _, _ = laterRule
+
+    return stringsCanOverlap(earlierSearch, laterSearch) or stringsCanOverlap(earlierRepl, laterSearch)
+
+# Turn a run of literal rules into one step that replaces all of their search strings in one pass.
+def makeMergedStep(ruleRun):
+
+    replMap = {searchStr: replStr for _, searchStr, replStr, _, _ in ruleRun}
+
+    # None of the search strings contain each other, but put the longest first anyway
+    pattern = regex.compile('|'.join(regex.escape(searchStr) for searchStr in sorted(replMap, key=len, reverse=True)))
+
+    return (pattern, None, lambda matchObj: replMap[matchObj.group()], '; '.join(rule[3] for rule in ruleRun), False)
+
+# Go through the rules and merge runs of literal rules that can't affect each other. Other rules are kept as they are.
+# The result is a list of steps that has the same form as the rule list. Python's replace is so fast that one pass 
+# with a callback for each match only pays off when there are quite a few rules in the run.
+def mergeLiteralRules(ruleList, minRunLength=MIN_MERGED_RUN_LENGTH):
+
+    stepList = []
+    ruleRun = []
+
+    def endRun():
+
+        if len(ruleRun) >= max(minRunLength, 2):
+            stepList.append(makeMergedStep(ruleRun))
+        else:
+            stepList.extend(ruleRun)
+
+        ruleRun.clear()
+
+    for rule in ruleList:
+
+        if not canMergeLiteralRule(rule):
+
+            endRun()
+            stepList.append(rule)
+            continue
+
+        # If this rule could interact with one already in the run, start a new run with it
+        if any(literalRulesInteract(earlierRule, rule) for earlierRule in ruleRun):
+
+            endRun()
+
+        ruleRun.append(rule)
+
+    endRun()
+
+    return stepList
+
+# Compiled rule sets by a hash of the rules contents
+compiledRuleSetCache = {}
+MAX_CACHED_RULE_SETS = 16
+
+def getCompiledRuleSet(tree):
+
+    root = tree.getroot()
+    rulesHash = hashlib.sha1(ET.tostring(root, encoding='utf-8')).hexdigest()
+
+    if rulesHash not in compiledRuleSetCache:
+
+        # Don't let the cache grow forever when rules get edited over and over
+        if len(compiledRuleSetCache) >= MAX_CACHED_RULE_SETS:
+            compiledRuleSetCache.clear()
+
+        compiledRuleSetCache[rulesHash] = CompiledRuleSet(root)
+
+    return compiledRuleSetCache[rulesHash]
+
+# Rule sets for the trees we have already seen. Callers parse the rules file into a tree and don't change it
+# after that, so this saves working out the hash for every call, e.g. for each line of a file.
+ruleSetByTree = weakref.WeakKeyDictionary()
+
+def applySearchReplaceRules(inputStr, tree):
+
+    ruleSet = ruleSetByTree.get(tree)
+
+    if ruleSet is None:
+
+        ruleSet = ruleSetByTree[tree] = getCompiledRuleSet(tree)
+
+    return ruleSet.apply(inputStr)
+
+# Get the Wildebeest base, skip steps, add steps and language code from the rules XML. None if there are no settings.
+def getWildebeestSettings(root):
 
-    newStr = inputStr
     addList = []
     skipList = []
 
     WBelem = root.find(WB_SETTINGS_ELEM)
 
-    if WBelem:
+    if not WBelem:
+        return None
+
+    # Get base string
+    baseStr = WBelem.get(WB_BASE_ATTRIB)
+
+    # Get add and skip steps
+    addStepsElem = WBelem.find(WB_ADD_STEPS_ELEM)
+    skipStepsElem = WBelem.find(WB_SKIP_STEPS_ELEM)
+
+    if addStepsElem is not None and addStepsElem.text:
+
+        addStr = addStepsElem.text
+        addList = addStr.split()
 
-        # Get base string
-        baseStr = WBelem.get(WB_BASE_ATTRIB)
+    if skipStepsElem is not None and skipStepsElem.text:
 
-        # Get add and skip steps
-        addStepsElem = WBelem.find(WB_ADD_STEPS_ELEM)
-        skipStepsElem = WBelem.find(WB_SKIP_STEPS_ELEM)
+        skipStr = skipStepsElem.text
+        skipList = skipStr.split()
 
-        if addStepsElem is not None and addStepsElem.text:
+    # Get language code
+    langCode = WBelem.get(WB_LANG_CODE_ATTRIB)
 
-            addStr = addStepsElem.text
-            addList = addStr.split()
+    return (baseStr, tuple(skipList), tuple(addList), langCode)
 
-        if skipStepsElem is not None and skipStepsElem.text:
+def getWildebeestParallelMinSize(root):
 
-            skipStr = skipStepsElem.text
-            skipList = skipStr.split()
+    WBelem = root.find(WB_SETTINGS_ELEM)
+
+    try:
+        return int(WBelem.get(WB_PARALLEL_MIN_SIZE_ATTRIB))
+    except:
+        return WB_PARALLEL_MIN_SIZE_DEFAULT
+
+def runWildebeestWithSettings(inputStr, baseStr, skipList, addList, langCode, parallelMinSize=0):
+
+    # Big texts get done in chunks in parallel
+    if parallelMinSize and len(inputStr) >= parallelMinSize:
+
+        newStr = WildebeestWorker.normalizeInParallel(inputStr, baseStr, skipList, addList, langCode)
 
-        # Get language code
-        langCode = WBelem.get(WB_LANG_CODE_ATTRIB)
+        if newStr is not None:
+            return newStr
+
+    # clean the string with Wildebeest
+    return WildebeestWorker.normalize(inputStr, baseStr, skipList, addList, langCode)
+
+def runWildebeest(root, inputStr):
 
-        # clean the string with Wildebeest
-        wb = Wildebeest()
-        ht = wb.build_norm_step_dict(base=baseStr, skip=skipList, add=addList)
-        newStr = wb.norm_clean_string(newStr, ht, lang_code=langCode)
+    settings = getWildebeestSettings(root)
 
-    return newStr
+    if settings is None:
+        return inputStr
+
+    return runWildebeestWithSettings(inputStr, *settings, parallelMinSize=getWildebeestParallelMinSize(root))
 
 def applyTextOutRulesFromConfig(inputStr, configMap, report, textOutModuleName):
     """Load the TEXT_OUT_RULES_FILE from config, apply rules if present.
@@ -345,7 +639,8 @@ def applyTextOutRulesFromConfig(inputStr, configMap, report, textOutModuleName):
     # Do user-defined search/replace rules if needed
     if tree:
 
-        newStr, errMsg = applySearchReplaceRules(inputStr, tree)
+        ruleSet = getCompiledRuleSet(tree)
+        newStr, errMsg = ruleSet.apply(inputStr)
 
         if newStr is None:
             report.Error(errMsg)
@@ -985,6 +1280,13 @@ class TextInOutRulesWindow(QMainWindow):
             othStr = self.rulesModel.item(defaultRowNum-1).text()
             self.rulesModel.item(defaultRowNum).setText(othStr)
             self.rulesModel.item(defaultRowNum-1).setText(currStr)
+
+            # copy the last test results from one row to the other, the rule numbers in the status bar are out of date now
+            currTip = self.rulesModel.item(defaultRowNum).toolTip()
+            othTip = self.rulesModel.item(defaultRowNum-1).toolTip()
+            self.rulesModel.item(defaultRowNum).setToolTip(othTip)
+            self.rulesModel.item(defaultRowNum-1).setToolTip(currTip)
+            self.statusBar().clearMessage()
             
             myIndex = self.rulesModel.index(defaultRowNum-1, self.ruleIndex.column())
             self.ui.rulesList.setCurrentIndex(myIndex)
@@ -1038,6 +1340,13 @@ class TextInOutRulesWindow(QMainWindow):
             othStr = self.rulesModel.item(defaultRowNum+1).text()
             self.rulesModel.item(defaultRowNum).setText(othStr)
             self.rulesModel.item(defaultRowNum+1).setText(currStr)
+
+            # copy the last test results from one row to the other, the rule numbers in the status bar are out of date now
+            currTip = self.rulesModel.item(defaultRowNum).toolTip()
+            othTip = self.rulesModel.item(defaultRowNum+1).toolTip()
+            self.rulesModel.item(defaultRowNum).setToolTip(othTip)
+            self.rulesModel.item(defaultRowNum+1).setToolTip(currTip)
+            self.statusBar().clearMessage()
             
             myIndex = self.rulesModel.index(defaultRowNum+1, self.ruleIndex.column())
             self.ui.rulesList.setCurrentIndex(myIndex)
@@ -1146,9 +1455,14 @@ class TextInOutRulesWindow(QMainWindow):
 
             newStr = runWildebeest(self.defaultRoot, newStr)
 
+        # Keep track of the matches and time for each rule so slow rules can be found
+        profile = RuleProfile()
+
         # Loop through the rules and apply each checked one in turn
         for ind, ruleEl in enumerate(self.xmlParentObjList[0]):
 
+            self.rulesModel.item(ind).setToolTip('')
+
             # Process the rule if it is checked
             if self.rulesModel.item(ind).checkState():
 
@@ -1157,12 +1471,11 @@ class TextInOutRulesWindow(QMainWindow):
                 if searchReplDataObj.isInactive == False:
 
                     try:
-                        if searchReplDataObj.isRegEx:
+                        compiledRegEx = regex.compile(searchReplDataObj.searchStr) if searchReplDataObj.isRegEx else None
 
-                            newStr = regex.sub(searchReplDataObj.searchStr, searchReplDataObj.replStr, newStr)
-
-                        else:
-                            newStr = newStr.replace(searchReplDataObj.searchStr, searchReplDataObj.replStr)
+                        startTime = time.perf_counter()
+                        newStr, hits, charsChanged = applyRuleAndCount(compiledRegEx, searchReplDataObj.searchStr, searchReplDataObj.replStr, newStr)
+                        profile.record(ind + 1, buildRuleString(searchReplDataObj), hits, charsChanged, time.perf_counter() - startTime)
                     except:
                         self.ui.errorTextBox.setText(_translate(
                                 "TextInOutUtils",
@@ -1172,8 +1485,30 @@ class TextInOutRulesWindow(QMainWindow):
                         break
 
         self.ui.outputText.setText(newStr)
+        self.showProfile(profile)
         return
 
+    # Show what each rule did in the last test in its tool tip and the slowest rule in the status bar. Also save it all in the Build folder.
+    def showProfile(self, profile):
+
+        for ruleNum, stats in profile.statsMap.items():
+
+            self.rulesModel.item(ruleNum - 1).setToolTip(_translate("TextInOutUtils", "Last test: {hits} matches, {chars} characters replaced, {msecs:.2f} ms").format(
+                                                                    hits=stats['hits'], chars=stats['charsChanged'], msecs=stats['seconds'] * 1000))
+
+        slowestList = profile.getSlowestFirst()
+
+        if not slowestList:
+
+            self.statusBar().clearMessage()
+            return
+
+        profilePath = os.path.join(FTPaths.BUILD_DIR, TEXT_IN_RULES_PROFILE_FILE if self.textIn else TEXT_OUT_RULES_PROFILE_FILE)
+        profile.save(profilePath)
+
+        self.statusBar().showMessage(_translate("TextInOutUtils", "Slowest rule: {ruleNumber} ({msecs:.2f} ms). Hover over a rule to see its results.").format(
+                                                ruleNumber=slowestList[0]['rule'], msecs=slowestList[0]['seconds'] * 1000))
+
     def appendError(self, errorStr):
 
         # Append the error to the error text box
@@ -1389,14 +1724,22 @@ class TextInOutRulesWindow(QMainWindow):
         # Find the Wildebeest section
         self.WBelem = xmlRoot.find(WB_SETTINGS_ELEM)
 
+        parallelMinSize = None
+
         # Delete an existing wildebeest subelement if needed
         if self.WBelem:
 
+            parallelMinSize = self.WBelem.get(WB_PARALLEL_MIN_SIZE_ATTRIB)
             xmlRoot.remove(self.WBelem)
 
         ## Now rebuild the wildebeest subelement
         self.WBelem = ET.SubElement(xmlRoot, WB_SETTINGS_ELEM)
 
+        # Keep the parallel size if the user set one in the file
+        if parallelMinSize is not None:
+
+            self.WBelem.attrib[WB_PARALLEL_MIN_SIZE_ATTRIB] = parallelMinSize
+
         # Set the base value
         if self.ui.WBstepsDefaultRadio.isChecked():
 
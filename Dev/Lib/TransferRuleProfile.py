@@ -0,0 +1,184 @@
+#
+#   TransferRuleProfile
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   Count how often each transfer rule fires. The Makefile runs apertium-transfer, interchunk
+#   and postchunk with -t, so the Apertium log already has an "Applied rule N" line each time
+#   a rule fires. After Run Apertium, the log is read and the counts are saved in the Build
+#   folder with the rule names. This is done for a text or for the whole testbed, since a
+#   testbed run is a transfer of all the tests. There is a JSON file for the Live Rule Tester
+#   and an HTML report listing the rules that fire the most and the rules that never fired.
+
+import os
+import re
+import json
+import html
+import xml.etree.ElementTree as ET
+
+import Utils
+
+PROFILE_FILE = 'transfer_rules_profile.json'
+PROFILE_HTML_FILE = 'transfer_rules_profile.html'
+PROFILE_FORMAT_VERSION = 1
+
+TRANSFER_STAGE = 'transfer'
+INTERCHUNK_STAGE = 'interchunk'
+POSTCHUNK_STAGE = 'postchunk'
+STAGE_LIST = [TRANSFER_STAGE, INTERCHUNK_STAGE, POSTCHUNK_STAGE]
+
+# How many of the rules that fire the most to list in the report
+NUM_HOT_RULES = 10
+
+# e.g. apertium-transfer: Applied rule 19 line 2 cat1.1<n><m><ez_pl>/gato1.1<n><m>
+traceLinePattern = re.compile(r'^apertium-(transfer|interchunk|postchunk): Applied rule (\d+) ')
+
+# Count the rules that fired in each stage. Returns a map of stage -> {rule # -> count}. The logs of
+# all the testbed shards can be given. A log that doesn't exist (e.g. transfer failed) is skipped.
+def countRuleFirings(logPathList):
+
+    countMap = {stage: {} for stage in STAGE_LIST}
+
+    for logPath in logPathList:
+
+        try:
+            with open(logPath, encoding='utf-8') as f:
+
+                for line in f:
+
+                    if matchObj := traceLinePattern.match(line):
+
+                        stageCounts = countMap[matchObj.group(1)]
+                        ruleNum = int(matchObj.group(2))
+                        stageCounts[ruleNum] = stageCounts.get(ruleNum, 0) + 1
+        except OSError:
+            pass
+
+    return countMap
+
+# Get the rule names (comments) in the order the rules are in the file. Apertium numbers the rules from 1 in this order.
+def getRuleNames(rulesPath):
+
+    sectionRules = ET.parse(rulesPath).getroot().find('section-rules')
+
+    if sectionRules is None:
+        return []
+
+    return [rule.get('comment', '') for rule in sectionRules.findall('rule')]
+
+class TransferRuleProfile():
+
+    def __init__(self, source='', stageMap=None):
+
+        self.source = source # the file that was transferred
+        self.stageMap = stageMap or {} # stage -> list of {'rule': #, 'name': comment, 'count': times fired}
+
+    def addStage(self, stage, ruleNameList, ruleCountMap):
+
+        self.stageMap[stage] = [{'rule': num, 'name': name, 'count': ruleCountMap.get(num, 0)} for num, name in enumerate(ruleNameList, 1)]
+
+    def getStages(self):
+
+        return [stage for stage in STAGE_LIST if stage in self.stageMap]
+
+    def getRules(self, stage):
+
+        return self.stageMap.get(stage, [])
+
+    # The rules that fired the most, most first
+    def getHotRules(self, stage, maxRules=NUM_HOT_RULES):
+
+        return sorted([rule for rule in self.getRules(stage) if rule['count']], key=lambda rule: rule['count'], reverse=True)[:maxRules]
+
+    def getNeverFired(self, stage):
+
+        return [rule for rule in self.getRules(stage) if rule['count'] == 0]
+
+    # Rule name -> list of counts for the rules with that name in file order. Rules get matched by name
+    # since the Live Rule Tester leaves out the sample rule and lets the user move rules around.
+    def getCountsByName(self, stage):
+
+        countsMap = {}
+
+        for rule in self.getRules(stage):
+
+            countsMap.setdefault(rule['name'], []).append(rule['count'])
+
+        return countsMap
+
+    def toHtml(self):
+
+        htmlList = ['<!DOCTYPE html>', '<html><head><meta charset="utf-8"><title>Transfer Rule Profile</title>',
+                    '<style>body {font-family: sans-serif;} table {border-collapse: collapse;} td, th {border: 1px solid #ccc; padding: 2px 8px;} '
+                    'td.count {text-align: right;} .never {color: #b00;}</style></head><body>',
+                    f'<h1>Transfer Rule Profile</h1><p>{html.escape(self.source)}</p>']
+
+        for stage in self.getStages():
+
+            ruleList = self.getRules(stage)
+            neverList = self.getNeverFired(stage)
+
+            htmlList.append(f'<h2>{html.escape(stage.capitalize())} rules</h2>')
+            htmlList.append(f'<p>{len(ruleList) - len(neverList)} of {len(ruleList)} rules fired, '
+                            f'{sum(rule["count"] for rule in ruleList)} times in all.</p>')
+
+            htmlList.append('<h3>Rules that fired the most</h3><table><tr><th>Rule</th><th>Name</th><th>Times fired</th></tr>')
+            htmlList.extend(f'<tr><td>{rule["rule"]}</td><td>{html.escape(rule["name"])}</td><td class="count">{rule["count"]}</td></tr>'
+                            for rule in self.getHotRules(stage))
+            htmlList.append('</table>')
+
+            htmlList.append('<h3>Rules that never fired</h3><ul class="never">')
+            htmlList.extend(f'<li>{rule["rule"]}: {html.escape(rule["name"])}</li>' for rule in neverList)
+            htmlList.append('</ul>')
+
+            htmlList.append('<h3>All rules</h3><table><tr><th>Rule</th><th>Name</th><th>Times fired</th></tr>')
+            htmlList.extend(f'<tr{" class=never" if not rule["count"] else ""}><td>{rule["rule"]}</td><td>{html.escape(rule["name"])}</td>'
+                            f'<td class="count">{rule["count"]}</td></tr>' for rule in ruleList)
+            htmlList.append('</table>')
+
+        htmlList.append('</body></html>')
+
+        return '\n'.join(htmlList)
+
+    def save(self, folder):
+
+        Utils.writeFileAtomically(os.path.join(folder, PROFILE_FILE), json.dumps({'version': PROFILE_FORMAT_VERSION, 'source': self.source,
+                                                                                   'stages': self.stageMap}, ensure_ascii=False, indent=1))
+        Utils.writeFileAtomically(os.path.join(folder, PROFILE_HTML_FILE), self.toHtml())
+
+# Make a profile from the rules files (stage -> path) and the Apertium logs and save it in the given folder
+def profileRun(folder, rulesPathMap, logPathList, source=''):
+
+    countMap = countRuleFirings(logPathList)
+    profile = TransferRuleProfile(source)
+
+    for stage in STAGE_LIST:
+
+        if stage in rulesPathMap:
+
+            profile.addStage(stage, getRuleNames(rulesPathMap[stage]), countMap[stage])
+
+    profile.save(folder)
+
+    return profile
+
+# Load the saved profile from the folder, None if there isn't one
+def loadProfile(folder):
+
+    try:
+        with open(os.path.join(folder, PROFILE_FILE), encoding='utf-8') as f:
+
+            data = json.load(f)
+
+        if data['version'] == PROFILE_FORMAT_VERSION:
+
+            return TransferRuleProfile(data['source'], data['stages'])
+    except:
+        pass
+
+    return None
@@ -0,0 +1,89 @@
+#
+#   TreeTranSentenceCache
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version. Moved from RunTreeTran so Clean Files can remove the cache without loading
+#    that module. The key for the cache now uses the contents of the TreeTran program, not its path.
+#
+#   TreeTran results for single sentences from earlier runs. TreeTran changes each sentence on its own,
+#   so a sentence with exactly the same XML run through the same rules gives the same result. The
+#   cache gets thrown away when the rules file or the TreeTran program changes.
+
+import os
+import json
+import hashlib
+
+import FTPaths
+import BuildManifest
+
+SENTENCE_CACHE_FILE = 'treetran_sentence_cache.json'
+MAX_CACHED_SENTENCES = 20000
+
+# A hash of what makes TreeTran give a different result for the same sentence
+def getRulesHash(rulesFilePath, treeTranExe):
+
+    return BuildManifest.hashValues([BuildManifest.hashFile(rulesFilePath), BuildManifest.hashFile(treeTranExe)])
+
+def hashSentence(sentXML):
+
+    return hashlib.sha1(sentXML.encode('utf-8')).hexdigest()
+
+class TreeTranSentenceCache():
+
+    def __init__(self, rulesHash, cachePath=None):
+
+        if cachePath is None:
+
+            cachePath = os.path.join(FTPaths.BUILD_DIR, SENTENCE_CACHE_FILE)
+
+        self.__path = cachePath
+        self.rulesHash = rulesHash
+        self.rootTag = None
+        self.rootAttrib = {}
+        self.resultMap = {} # sentence hash -> TreeTran result XML for the sentence
+        self.usedSet = set()
+
+        try:
+            with open(self.__path, encoding='utf-8') as f:
+
+                data = json.load(f)
+
+            if data.get('rulesHash') == rulesHash:
+
+                self.rootTag = data['rootTag']
+                self.rootAttrib = data['rootAttrib']
+                self.resultMap = data['sentences']
+        except:
+            pass # no cache yet or it is corrupt, start over
+
+    def contains(self, sentHash):
+
+        return sentHash in self.resultMap
+
+    def getResult(self, sentHash):
+
+        self.usedSet.add(sentHash)
+        return self.resultMap[sentHash]
+
+    def addResult(self, sentHash, resultXML):
+
+        self.usedSet.add(sentHash)
+        self.resultMap[sentHash] = resultXML
+
+    def save(self):
+
+        # Don't let the cache grow forever, keep what was used this time if it gets too big
+        if len(self.resultMap) > MAX_CACHED_SENTENCES:
+
+            self.resultMap = {sentHash: resultXML for sentHash, resultXML in self.resultMap.items() if sentHash in self.usedSet}
+
+        try:
+            with open(self.__path, 'w', encoding='utf-8') as f:
+
+                json.dump({'rulesHash': self.rulesHash, 'rootTag': self.rootTag, 'rootAttrib': self.rootAttrib, 'sentences': self.resultMap}, f, ensure_ascii=False)
+        except:
+            pass # not being able to save the cache just means the sentences get rerun next time
@@ -5,6 +5,21 @@
 #   SIL International
 #   7/23/2014
 #
+#   Version 3.15.5 - 10/18/26 - Ron Lockwood
+#    A project session closes all its projects even if closing one fails, and never closes one twice.
+#
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    The testbed validator cache is now an sqlite file.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Added openFileAtomically for writing a file a piece at a time.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Added writeFileAtomically.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Added a project session class so that modules can share an open target project.
+#
 #   Version 3.14.4 - 7/31/25 - Ron Lockwood
 #    Fixes #1033. Don't escape <> in literal strings in the rule file.
 #
@@ -194,6 +209,7 @@ import os
 import unicodedata
 import itertools
 from collections import defaultdict
+from contextlib import contextmanager
 
 from PyQt5.QtCore import QCoreApplication, QTranslator, QLibraryInfo, QLocale
 
@@ -253,7 +269,7 @@ STYLE_HYPERLINK = 'Hyperlink'
 STYLE_NOT_SET = 'NotSet'
 
 CONVERSION_TO_STAMP_CACHE_FILE = 'conversion_to_STAMP_cache2.txt'
-TESTBED_CACHE_FILE = 'testbed_cache.txt'
+TESTBED_CACHE_FILE = 'testbed_cache.sqlite'
 STRIPPED_RULES = 'tr.t1x'
 
 ## For TreeTran
@@ -608,9 +624,62 @@ def openProject(report, DBname):
 
     return myDB
 
-def openTargetProject(configMap, report):
+# A pool of open FLEx projects keyed by project name and read/write mode. Several modules can share
+# the same open project this way, e.g. during one Translate Text run, so a big project only gets opened once.
+# Use it as a context manager. The projects get closed when the with block is done.
+class ProjectSession():
+    def __init__(self):
+        self.__projectMap = {}
+    def __enter__(self):
+        return self
+    def __exit__(self, excType, excValue, traceback):
+        self.closeAll()
+        return False
+    # Close each project once. Keep closing the rest if one fails, then pass on the first error.
+    def closeAll(self):
+        projectList = list(self.__projectMap.values())
+        self.__projectMap = {}
+        firstError = None
+        for myDB in projectList:
+            try:
+                myDB.CloseProject()
+            except Exception as e:
+                firstError = firstError or e
+        if firstError:
+            raise firstError
+    # Get the project from the pool or open it if needed. Opening errors are not caught here.
+    def openProject(self, projectName, writeEnabled=True):
+        # A project that is open for writing can be used for reading too
+        if (projectName, True) in self.__projectMap:
+            return SharedProject(self.__projectMap[(projectName, True)])
+        if (projectName, writeEnabled) not in self.__projectMap:
+            myDB = FLExProject()
+            myDB.OpenProject(projectName, writeEnabled)
+            self.__projectMap[(projectName, writeEnabled)] = myDB
+        return SharedProject(self.__projectMap[(projectName, writeEnabled)])
+
+# A project handed out by a ProjectSession. It works just like the project except that closing it does 
+# nothing, since other modules may still use it. The session closes it at the end.
+class SharedProject():
+    def __init__(self, myDB):
+        self.__DB = myDB
+    def __getattr__(self, name):
+        return getattr(self.__DB, name)
+    def CloseProject(self):
+        pass
+
+# Open the given project. If a session is given, get the project from it.
+def openFLExProject(projectName, session=None, writeEnabled=True):
+
+    if session:
+        return session.openProject(projectName, writeEnabled)
+
+    myDB = FLExProject()
+    myDB.OpenProject(projectName, writeEnabled)
+
+    return myDB
 
-    TargetDB = FLExProject()
+def openTargetProject(configMap, report, session=None):
 
     # Open the target database
     targetProj = MyReadConfig.getConfigVal(configMap, MyReadConfig.TARGET_PROJECT, report)
@@ -624,7 +693,7 @@ def openTargetProject(configMap, report):
         return
     
     try:
-        TargetDB.OpenProject(targetProj, True)
+        TargetDB = openFLExProject(targetProj, session)
     except:
         if report:
             report.Error(_translate("Utils", "There was an error opening target project: {targetProj}. Perhaps the project is open and the sharing option under FieldWorks Project Properties has not been clicked.").format(targetProj=targetProj))
@@ -1390,3 +1459,27 @@ class LocalizedDateTimeFormatter:
 def getInterfaceLangCode():
 
     return FTConfig.UILanguage 
+
+# Open a temporary file in the same folder for writing and when done move it over the given file.
+# This way the file is either completely the old contents or completely the new contents, even if something fails part way.
+@contextmanager
+def openFileAtomically(filePath, encoding='utf-8'):
+
+    fd, tempPath = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filePath)), suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+
+            yield f
+
+        os.replace(tempPath, filePath)
+    except:
+        if os.path.exists(tempPath):
+            os.remove(tempPath)
+        raise
+
+def writeFileAtomically(filePath, text, encoding='utf-8'):
+
+    with openFileAtomically(filePath, encoding) as f:
+
+        f.write(text)
@@ -0,0 +1,121 @@
+#
+#   WildebeestWorker
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+#   Clean up text with Wildebeest. Big texts get split into chunks of paragraphs that are
+#   normalized at the same time in separate Python processes. Each process runs this file as
+#   a script and gets its chunk on stdin, so all it imports is Wildebeest, not PyQt or the
+#   FLEx libraries that FlexTools has loaded. It works like the testbed shards: a thread for
+#   each chunk starts the program and waits for it. If a process can't be started or fails,
+#   the caller gets None back and can normalize the text in its own process.
+
+import os
+import sys
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from wildebeest.wb_normalize import Wildebeest
+
+# Chunks are about this many characters
+CHUNK_SIZE = 500000
+
+# Wildebeest normalizers and their step tables by base, skip steps and add steps
+normalizerCache = {}
+
+def getNormalizer(baseStr, skipList, addList):
+
+    key = (baseStr, tuple(skipList), tuple(addList))
+
+    if key not in normalizerCache:
+
+        wb = Wildebeest()
+        ht = wb.build_norm_step_dict(base=baseStr, skip=list(skipList), add=list(addList))
+        normalizerCache[key] = (wb, ht)
+
+    return normalizerCache[key]
+
+# Clean the string with Wildebeest in this process
+def normalize(inputStr, baseStr, skipList, addList, langCode):
+
+    wb, ht = getNormalizer(baseStr, skipList, addList)
+
+    return wb.norm_clean_string(inputStr, ht, lang_code=langCode)
+
+# Split the text into chunks of about the given size. Chunks only end after a newline, so paragraphs stay together.
+def splitIntoParagraphChunks(inputStr, chunkSize):
+
+    chunkList = []
+    start = 0
+
+    while start < len(inputStr):
+
+        end = inputStr.find('\n', start + chunkSize)
+
+        if end == -1:
+            end = len(inputStr)
+        else:
+            end += 1
+
+        chunkList.append(inputStr[start:end])
+        start = end
+
+    return chunkList
+
+# FlexTools may be running inside another program. Then there is no Python to run the worker script with.
+def canStartWorkers():
+
+    return bool(sys.executable) and os.path.basename(sys.executable).lower().startswith('python')
+
+# Normalize one chunk in a worker process. Raises an error if the worker fails.
+def runWorker(chunk, baseStr, skipList, addList, langCode):
+
+    request = json.dumps({'base': baseStr, 'skip': list(skipList), 'add': list(addList), 'langCode': langCode, 'text': chunk}, ensure_ascii=False)
+
+    # Don't pop up a console window for each worker
+    creationFlags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+
+    result = subprocess.run([sys.executable, os.path.abspath(__file__)], input=request.encode('utf-8'), capture_output=True,
+                            check=True, creationflags=creationFlags)
+
+    return result.stdout.decode('utf-8')
+
+# Normalize the text in chunks in separate processes. Returns None if it couldn't be done, so the caller can do it the normal way.
+def normalizeInParallel(inputStr, baseStr, skipList, addList, langCode, chunkSize=CHUNK_SIZE, maxWorkers=None):
+
+    chunkList = splitIntoParagraphChunks(inputStr, chunkSize)
+
+    if len(chunkList) < 2 or not canStartWorkers():
+        return None
+
+    numWorkers = min(len(chunkList), maxWorkers or os.cpu_count() or 1)
+
+    if numWorkers < 2:
+        return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=numWorkers) as executor:
+
+            resultList = list(executor.map(lambda chunk: runWorker(chunk, baseStr, skipList, addList, langCode), chunkList))
+    except:
+        return None
+
+    return ''.join(resultList)
+
+# Run as a worker: read the settings and the text from stdin and write the cleaned text to stdout
+def main():
+
+    request = json.loads(sys.stdin.buffer.read().decode('utf-8'))
+
+    newStr = normalize(request['text'], request['base'], request['skip'], request['add'], request['langCode'])
+
+    sys.stdout.buffer.write(newStr.encode('utf-8'))
+
+if __name__ == '__main__':
+    main()
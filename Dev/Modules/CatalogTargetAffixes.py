@@ -5,6 +5,9 @@
 #   University of Washington, SIL International
 #   12/5/14
 #
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Use a shared target project session when one is passed in, e.g. from Translate Text.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -94,7 +97,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel']
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("CatalogTargetAffixes", "Catalog Target Affixes"),
-        FTM_Version    : "3.15",        
+        FTM_Version    : "3.15.1",        
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("CatalogTargetAffixes", "Creates a list of all the affix glosses and morpheme types in the target project."),
         FTM_Help  : "",
@@ -137,7 +140,7 @@ def is_affix_file_out_of_date(DB, affixFile):
     else: # affix file is newer
         return False
 
-def catalog_affixes(DB, configMap, filePath, report=None, useCacheIfAvailable=False):
+def catalog_affixes(DB, configMap, filePath, report=None, useCacheIfAvailable=False, session=None):
     
     error_list = []
     
@@ -147,15 +150,13 @@ def catalog_affixes(DB, configMap, filePath, report=None, useCacheIfAvailable=Fa
         error_list.append((_translate("CatalogTargetAffixes", "Problem reading the configuration file for the property: {property}").format(property=ReadConfig.TARGET_MORPHNAMES), 2))
         return error_list
     
-    TargetDB = FLExProject()
-
     try:
         # Open the target database
         targetProj = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_PROJECT, report)
         if not targetProj:
             error_list.append((_translate("CatalogTargetAffixes", "Problem accessing the target project."), 2))
             return error_list
-        TargetDB.OpenProject(targetProj, True)
+        TargetDB = Utils.openFLExProject(targetProj, session)
     except: 
         error_list.append((_translate("CatalogTargetAffixes", "Problem opening the target project."), 2))
         raise
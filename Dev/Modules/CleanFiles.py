@@ -7,6 +7,12 @@
 #
 #   Remove generated files to force each FLExTrans module to regenerate everything.
 #
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Remove the TreeTran sentence cache.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Remove the Translate Text pipeline manifest.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -63,6 +69,8 @@ import Mixpanel
 import ReadConfig
 import Utils
 import FTPaths
+import BuildManifest
+import TreeTranSentenceCache
 
 # Define _translate for convenience
 _translate = QCoreApplication.translate
@@ -83,7 +91,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel']
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("CleanFiles", "Clean Files"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.2",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("CleanFiles", "Remove generated files to force each FLExTrans module to regenerate everything"),
         FTM_Help       : "",  
@@ -292,6 +300,18 @@ def MainFunction(DB, report, modify=True):
     except:
         pass # ignore errors
 
+    # Translate Text pipeline manifest
+    try:
+        os.remove(os.path.join(buildFolder, BuildManifest.MANIFEST_FILE))
+    except:
+        pass # ignore errors
+
+    # TreeTran results for each sentence from earlier runs
+    try:
+        os.remove(os.path.join(buildFolder, TreeTranSentenceCache.SENTENCE_CACHE_FILE))
+    except:
+        pass # ignore errors
+
     # GUI input file for Rule Assistant
     try:
         os.remove(os.path.join(buildFolder, Utils.RA_GUI_INPUT_FILE))
@@ -5,6 +5,12 @@
 #   University of Washington, SIL International
 #   12/5/14
 #
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Time the conversion loop when Translate Text is recording a performance report.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Use a shared target project session when one is passed in, e.g. from Translate Text.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -122,6 +128,7 @@ from PyQt5.QtCore import QCoreApplication, QTranslator
 import Mixpanel
 import ReadConfig
 import Utils
+import PerfReport
 from RunApertium import docs as RunApertDocs
 
 # Define _translate for convenience
@@ -144,7 +151,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel']
 # Documentation that the user sees:
 
 docs = {FTM_Name       : _translate("ConvertTextToSTAMPformat", "Convert Text to Synthesizer Format"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.2",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("ConvertTextToSTAMPformat", "Convert the file produced by {runApert} into a text file in a Synthesizer format").format(runApert=RunApertDocs[FTM_Name]),
         FTM_Help  : "", 
@@ -373,7 +380,7 @@ class ANAInfo(object):
         
 class ConversionData():
     
-    def __init__(self, errorList, configMap, report, complexFormTypeMap):
+    def __init__(self, errorList, configMap, report, complexFormTypeMap, session=None):
         
         self.errorList = errorList
         self.configMap = configMap
@@ -430,10 +437,8 @@ class ConversionData():
                 else:
                     return
                 
-        TargetDB = FLExProject()
-    
         try:
-            TargetDB.OpenProject(targetProj, True)
+            TargetDB = Utils.openFLExProject(targetProj, session)
         except: #FDA_DatabaseError, e:
             report.Error(_translate("ConvertTextToSTAMPformat", 'Failed to open the target project.'))
             raise
@@ -1154,6 +1159,8 @@ def convertIt(pfxName, outName, report, sentPunct):
     # Pair up the tokens. The first is the punctuation, the second is the LU
     tokenPairs = list(zip(tokens[::2], tokens[1::2]))
 
+    luSpan = PerfReport.startSpan('convertIt')
+
     # Initialize the progress counter
     if report is not None:
         
@@ -1200,6 +1207,8 @@ def convertIt(pfxName, outName, report, sentPunct):
 
         anaObj.setAfterPunc(re.sub(r'^ ', '', tokens[-1])) # remove preceding space
 
+    PerfReport.endSpan(luSpan, LUs=len(tokenPairs))
+
     return errorList, wordAnaInfoList
 
 def calculatePrePostPunctuation(puncStr):
@@ -1292,7 +1301,7 @@ def processLU(lexUnitStr, affixMap):
 
     return wordAnaInfo, morphs
 
-def convert_to_STAMP(DB, configMap, targetANAFile, affixFile, transferResultsFile, doHermitCrabSynthesis=False, HCmasterFile=None, report=None):
+def convert_to_STAMP(DB, configMap, targetANAFile, affixFile, transferResultsFile, doHermitCrabSynthesis=False, HCmasterFile=None, report=None, session=None):
     
     errorList = []
     
@@ -1338,7 +1347,7 @@ def convert_to_STAMP(DB, configMap, targetANAFile, affixFile, transferResultsFil
 
     # Get the complex forms and inflectional variants
     # This may be slow if the data is not in the cache
-    convData = ConversionData(errorList, configMap, report, complexFormTypeMap)
+    convData = ConversionData(errorList, configMap, report, complexFormTypeMap, session)
     
     if convData.haveError:
         
@@ -1400,7 +1409,7 @@ def convert_to_STAMP(DB, configMap, targetANAFile, affixFile, transferResultsFil
     
     return errorList
 
-def convertToSynthesizerFormat(DB, configMap, report):
+def convertToSynthesizerFormat(DB, configMap, report, session=None):
     
     targetANAFile = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_ANA_FILE, report)
     affixFile = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_AFFIX_GLOSS_FILE, report, giveError=False) # don't give error yet
@@ -1432,7 +1441,7 @@ def convertToSynthesizerFormat(DB, configMap, report):
             report.Error(_translate("ConvertTextToSTAMPformat", "Configuration file problem with: {fileType}.").format(fileType=ReadConfig.HERMIT_CRAB_MASTER_FILE))
             return None 
     
-    errorList = convert_to_STAMP(DB, configMap, targetANAFile, affixFile, transferResultsFile, doHermitCrabSynthesis, HCmasterFile, report)
+    errorList = convert_to_STAMP(DB, configMap, targetANAFile, affixFile, transferResultsFile, doHermitCrabSynthesis, HCmasterFile, report, session)
 
     # output info, warnings, errors and url links
     Utils.processErrorList(errorList, report)
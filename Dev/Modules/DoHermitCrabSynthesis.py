@@ -5,6 +5,19 @@
 #   SIL International
 #   3/8/23
 #
+#   Version 3.15.5 - 10/18/26 - Ron Lockwood
+#    Get the cancel token and running programs from ProcessUtils instead of BackgroundTask.
+#
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Synthesis can be given a cancel token. The HermitCrab program gets stopped when the token
+#    gets cancelled. With the DLL the token gets checked before and after it runs.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Time the surface form loop when Translate Text is recording a performance report.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Use a shared target project session when one is passed in, e.g. from Translate Text.
+#
 #   Version 3.15.1 - 2/11/26 - Ron Lockwood
 #    Fixes #1199. Add error handling around the call to produce the synthesis file 
 #    so if there is an error we can report it instead of crashing.
@@ -110,6 +123,7 @@
 import os
 import re 
 import subprocess
+import tempfile
 from datetime import datetime
 import xml.etree.ElementTree as ET
 
@@ -124,7 +138,9 @@ from PyQt5.QtWidgets import QApplication
 import Mixpanel
 import ReadConfig
 import Utils
+import PerfReport
 import FTPaths
+import ProcessUtils
 from RunApertium import docs as RunApertDocs
 
 # Define _translate for convenience
@@ -146,7 +162,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel']
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("DoHermitCrabSynthesis", "Synthesize Text with HermitCrab"),
-        FTM_Version    : "3.15.1",
+        FTM_Version    : "3.15.5",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("DoHermitCrabSynthesis", "Synthesizes the target text with the tool HermitCrab."),
         FTM_Help       :"",
@@ -194,7 +210,7 @@ def configFileOutOfDate(targetDB, HCconfigPath):
 
         return False
 
-def extractHermitCrabConfig(DB, configMap, HCconfigPath, report=None, useCacheIfAvailable=False, DLLobj=None):
+def extractHermitCrabConfig(DB, configMap, HCconfigPath, report=None, useCacheIfAvailable=False, DLLobj=None, session=None):
 
     errorList = []
 
@@ -205,11 +221,9 @@ def extractHermitCrabConfig(DB, configMap, HCconfigPath, report=None, useCacheIf
         errorList.append((_translate("DoHermitCrabSynthesis", "Configuration file problem with TargetProject."), 2))
         return errorList
     
-    TargetDB = FLExProject()
-
     try:
         # Open the target database
-        TargetDB.OpenProject(targetProj, True)
+        TargetDB = Utils.openFLExProject(targetProj, session)
 
     except: #FDA_DatabaseError, e:
 
@@ -357,6 +371,8 @@ def produceSynthesisFile(luInfoList, surfaceFormsFile, transferResultsFile, synF
         errorList.append((_translate("DoHermitCrabSynthesis", 'The number of surface forms does not match the number of Lexical Units.'), 2))
         return errorList
 
+    luSpan = PerfReport.startSpan('produceSynthesisFile')
+
     # Loop through the surface forms file. Some lines will have multiple surface forms
     for i, line in enumerate(surfaceFormsList):
 
@@ -400,6 +416,8 @@ def produceSynthesisFile(luInfoList, surfaceFormsFile, transferResultsFile, synF
     # some of the words may not have synthesized and the error string in the form of %0%^iba1.1<n><PC.1Sg>$% may be there so we don't want to start the string
     # to replace with the ^ that's right after the % in the error string. Also there might be an error string right before the sentence punc. so allow $%^.
     resultsFileStr = re.sub(r'([^%]|^|\$%)\^(.+?)<sent>\$', r'\1\2', resultsFileStr)
+
+    PerfReport.endSpan(luSpan, LUs=len(luInfoList))
             
     # Open the synthesis file
     try:
@@ -636,7 +654,8 @@ def getCapitalLemmas(HCconfigPath):
 
     return HCcapitalLemmasMap
 
-def synthesizeWithHermitCrab(configMap, HCconfigPath, synFile, parsesFile, masterFile, surfaceFormsFile, transferResultsFile, report=None, trace=False, DLLobj=None, overrideClean=False):
+# If a cancel token is given and it gets cancelled, ProcessUtils.CancelledError is raised.
+def synthesizeWithHermitCrab(configMap, HCconfigPath, synFile, parsesFile, masterFile, surfaceFormsFile, transferResultsFile, report=None, trace=False, DLLobj=None, overrideClean=False, cancelToken=None):
     
     errorList = []
     luInfoList = []
@@ -657,59 +676,61 @@ def synthesizeWithHermitCrab(configMap, HCconfigPath, synFile, parsesFile, maste
             return errorList
 
     # Call HCSynthesis to produce surface forms. 
-    try:
-        # Do the operation with a dll differently than with the normal exe.
-        if DLLobj:
-
-            if trace:
-                DLLobj.DoTracing = True
-                DLLobj.ShowTracing = True
-            else:
-                DLLobj.DoTracing = False
-                DLLobj.ShowTracing = False
+    # Do the operation with a dll differently than with the normal exe.
+    if DLLobj:
 
-            try:
-                if (ret := DLLobj.SetGlossFile(parsesFile)) != SUCCESS:
+        # The DLL runs in this process and can't be stopped part way, so only check for a cancel around it
+        if cancelToken:
+            cancelToken.check()
 
-                    errorList.append((_translate("DoHermitCrabSynthesis", 'An error happened when setting the gloss file for the HermitCrab Synthesize By Gloss tool (DLL).'), 2))
-                    return errorList
+        if trace:
+            DLLobj.DoTracing = True
+            DLLobj.ShowTracing = True
+        else:
+            DLLobj.DoTracing = False
+            DLLobj.ShowTracing = False
 
-            except Exception as e:
+        try:
+            if (ret := DLLobj.SetGlossFile(parsesFile)) != SUCCESS:
 
-                errorList.append((_translate("DoHermitCrabSynthesis", 'An exception happened when trying to set the gloss file for the HermitCrab Synthesize By Gloss tool (DLL). Error: {e}').format(e=e), 2))
+                errorList.append((_translate("DoHermitCrabSynthesis", 'An error happened when setting the gloss file for the HermitCrab Synthesize By Gloss tool (DLL).'), 2))
                 return errorList
-            
-            try:
-                if (ret := DLLobj.Process()) != SUCCESS:
 
-                    errorList.append((_translate("DoHermitCrabSynthesis", 'An error happened when running the HermitCrab Synthesize By Gloss tool (DLL).'), 2))
-                    return errorList
-            
-            except Exception as e:
+        except Exception as e:
+
+            errorList.append((_translate("DoHermitCrabSynthesis", 'An exception happened when trying to set the gloss file for the HermitCrab Synthesize By Gloss tool (DLL). Error: {e}').format(e=e), 2))
+            return errorList
+        
+        try:
+            if (ret := DLLobj.Process()) != SUCCESS:
 
-                errorList.append((_translate("DoHermitCrabSynthesis", 'An exception happened when trying to run (by calling Process) the HermitCrab Synthesize By Gloss tool (DLL). Error: {e}').format(e=e), 2))
+                errorList.append((_translate("DoHermitCrabSynthesis", 'An error happened when running the HermitCrab Synthesize By Gloss tool (DLL).'), 2))
                 return errorList
-        else:
-            params = [FTPaths.HC_SYNTHESIZE, '-h', HCconfigPath, '-g', parsesFile, '-o', surfaceFormsFile]
+        
+        except Exception as e:
 
-            # We could add a Settings option to allow tracing
-            # If we are to trace the HC synthesis, we need the -t -s parameters
-            if trace:
-                params.extend(['-t', '-s'])
-                
-            result = subprocess.run(params, capture_output=True, check=True)
+            errorList.append((_translate("DoHermitCrabSynthesis", 'An exception happened when trying to run (by calling Process) the HermitCrab Synthesize By Gloss tool (DLL). Error: {e}').format(e=e), 2))
+            return errorList
 
-            if result.returncode != 0:
-                
-                errorList.append((_translate("DoHermitCrabSynthesis", 'An error happened when running the HermitCrab Synthesize By Gloss tool.'), 2))
-                errorList.append((result.stderr.decode(), 2))
-                return errorList
+        if cancelToken:
+            cancelToken.check()
+    else:
+        params = [FTPaths.HC_SYNTHESIZE, '-h', HCconfigPath, '-g', parsesFile, '-o', surfaceFormsFile]
 
-    except subprocess.CalledProcessError as e:
+        # We could add a Settings option to allow tracing
+        # If we are to trace the HC synthesis, we need the -t -s parameters
+        if trace:
+            params.extend(['-t', '-s'])
+            
+        # The error output goes to a file instead of a pipe so the program can't block on a full pipe while it gets waited on
+        with tempfile.TemporaryFile() as errFile:
 
-        errorList.append((_translate("DoHermitCrabSynthesis", 'An error happened when running the HermitCrab Synthesize By Gloss tool.'), 2))
-        errorList.append((e.stderr.decode(), 2))
-        return errorList
+            if ProcessUtils.runProcess(params, cancelToken, stdout=subprocess.DEVNULL, stderr=errFile) != 0:
+
+                errFile.seek(0)
+                errorList.append((_translate("DoHermitCrabSynthesis", 'An error happened when running the HermitCrab Synthesize By Gloss tool.'), 2))
+                errorList.append((errFile.read().decode(), 2))
+                return errorList
 
     # Count the # of lexical units
     try:
@@ -758,7 +779,7 @@ def synthesizeWithHermitCrab(configMap, HCconfigPath, synFile, parsesFile, maste
     
     return errorList
 
-def doHermitCrab(DB, report, configMap=None):
+def doHermitCrab(DB, report, configMap=None, session=None):
 
     # Read the configuration file.
     if not configMap:
@@ -776,7 +797,7 @@ def doHermitCrab(DB, report, configMap=None):
         return None 
 
     # Extract the target lexicon
-    errorList = extractHermitCrabConfig(DB, configMap, HCconfigPath, report, useCacheIfAvailable=True)
+    errorList = extractHermitCrabConfig(DB, configMap, HCconfigPath, report, useCacheIfAvailable=True, session=session)
  
     # check for fatal errors
     fatal, _ = Utils.checkForFatalError(errorList, report)
@@ -5,6 +5,19 @@
 #   University of Washington, SIL International
 #   12/5/14
 #
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Get the cancel token and running programs from ProcessUtils instead of BackgroundTask.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Synthesis can be given a cancel token. STAMP gets stopped when the token gets cancelled.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Split synthesize into preparing the STAMP control files and running STAMP so that
+#    STAMP can be run on several ANA files at once for testbed shards.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Use a shared target project session when one is passed in, e.g. from Translate Text.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -117,7 +130,6 @@
 
 import os
 import re 
-from subprocess import call
 from datetime import datetime
 import winreg
 import xml.etree.ElementTree as ET
@@ -147,6 +159,7 @@ import Mixpanel
 import ReadConfig
 import Utils
 import FTPaths
+import ProcessUtils
 
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import QCoreApplication, QTranslator
@@ -179,7 +192,7 @@ This is typically called target_text-syn.txt and is usually in the Output folder
 NOTE: Messages will say the source project is being used. Actually the target project is being used.""")
 
 docs = {FTM_Name       : _translate("DoStampSynthesis", "Synthesize Text with STAMP"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.4",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("DoStampSynthesis", "Synthesizes the target text with the tool STAMP."),
         FTM_Help       : "",
@@ -1187,7 +1200,7 @@ def outputAllAffixes(allAffixesList, TargetDB, err_list, f_pf, f_if, f_sf, pf_cn
 
     return pf_cnt, sf_cnt, if_cnt
 
-def extract_target_lex(DB, configMap, report=None, useCacheIfAvailable=False):
+def extract_target_lex(DB, configMap, report=None, useCacheIfAvailable=False, session=None):
     error_list = []
         
     morphNames = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_MORPHNAMES, report)
@@ -1221,8 +1234,6 @@ def extract_target_lex(DB, configMap, report=None, useCacheIfAvailable=False):
         error_list.append((_translate("DoStampSynthesis", "Configuration file problem with {cacheData}.").format(cacheData=ReadConfig.CACHE_DATA), 2))
         return error_list
 
-    TargetDB = FLExProject()
-
     # See if the target project is a valid database name.
     if targetProj not in AllProjectNames():
         error_list.append((_translate("DoStampSynthesis", "The target project does not exist. Please check the configuration file."), 2))
@@ -1232,7 +1243,7 @@ def extract_target_lex(DB, configMap, report=None, useCacheIfAvailable=False):
         if not targetProj:
             error_list.append((_translate("DoStampSynthesis", 'Problem accessing the target project.'), 2))
             return error_list
-        TargetDB.OpenProject(targetProj, True)
+        TargetDB = Utils.openFLExProject(targetProj, session)
     except: #FDA_DatabaseError, e:
         if report:
             report.Error(_translate("DoStampSynthesis", 'Failed to open the target project.'))
@@ -1343,9 +1354,24 @@ def fix_up_text(synFile, cleanUpText):
         f_s.write(line)
     f_s.close()
 
-def synthesize(configMap, anaFile, synFile, report=None, overrideClean=False):
+# If a cancel token is given and it gets cancelled, STAMP gets stopped and ProcessUtils.CancelledError is raised.
+def synthesize(configMap, anaFile, synFile, report=None, overrideClean=False, cancelToken=None):
     error_list = []
 
+    cmdFileName, cleanUpText = prepareSynthesis(configMap, error_list, report, overrideClean)
+
+    if not cmdFileName:
+        return error_list
+
+    runStamp(cmdFileName, anaFile, synFile, cleanUpText, cancelToken)
+
+    error_list.append((_translate("DoStampSynthesis", "The synthesized target text is in the file: {filePath}.").format(filePath=Utils.getPathRelativeToWorkProjectsDir(synFile)), 0))
+    error_list.append((_translate("DoStampSynthesis", "Synthesis complete."), 0))
+    return error_list
+
+# Create the STAMP control files. Returns the command file name (None if there was an error) and whether to clean up the text.
+def prepareSynthesis(configMap, error_list, report=None, overrideClean=False):
+
     global stemNameList
     global reqFeaturesMap
     stemNameList = []
@@ -1356,7 +1382,7 @@ def synthesize(configMap, anaFile, synFile, report=None, overrideClean=False):
     clean = ReadConfig.getConfigVal(configMap, ReadConfig.CLEANUP_UNKNOWN_WORDS, report)
     if not (targetProject and clean):
         error_list.append((_translate("DoStampSynthesis", "Configuration file problem."), 2))
-        return error_list
+        return None, False
     
     if clean[0].lower() == 'y':
         cleanUpText = True
@@ -1371,32 +1397,31 @@ def synthesize(configMap, anaFile, synFile, report=None, overrideClean=False):
     lexFolder = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_LEXICON_FILES_FOLDER, report)
     if not lexFolder:
         error_list.append((_translate("DoStampSynthesis", "Configuration file problem with {folder}.").format(folder=ReadConfig.TARGET_LEXICON_FILES_FOLDER), 2))
-        return error_list
+        return None, False
     
     # Check that we have a valid folder
     if os.path.isdir(lexFolder) == False:
         error_list.append((_translate("DoStampSynthesis", "Lexicon files folder: {folder} does not exist.").format(folder=ReadConfig.TARGET_LEXICON_FILES_FOLDER), 2))
-        return error_list
+        return None, False
 
     # Have all files start with targetProject
     partPath = os.path.join(lexFolder, targetProject)
     
     # Create other files we need for STAMP
-    cmdFileName = create_synthesis_files(partPath)
+    return create_synthesis_files(partPath), cleanUpText
+
+def runStamp(cmdFileName, anaFile, synFile, cleanUpText, cancelToken=None):
 
     # run STAMP to synthesize the results. E.g. stamp32" -f ggg-Thesis_ctrl_files. txt -i ppp_verbs.ana -o ppp_verbs.syn
     # this assumes stamp32.exe is in the current working directory.
     
-    call([FTPaths.STAMP_EXE, '-f', cmdFileName, '-i', anaFile, '-o', synFile])
+    ProcessUtils.runProcess([FTPaths.STAMP_EXE, '-f', cmdFileName, '-i', anaFile, '-o', synFile], cancelToken)
 
     # Replace underscores with spaces in the Synthesized file
     # Underscores were added for multiword entries that contained a space
     fix_up_text(synFile, cleanUpText)
-    error_list.append((_translate("DoStampSynthesis", "The synthesized target text is in the file: {filePath}.").format(filePath=Utils.getPathRelativeToWorkProjectsDir(synFile)), 0))
-    error_list.append((_translate("DoStampSynthesis", "Synthesis complete."), 0))
-    return error_list
 
-def doStamp(DB, report, configMap=None):
+def doStamp(DB, report, configMap=None, session=None):
 
     # Read the configuration file.
     if not configMap:
@@ -1421,7 +1446,7 @@ def doStamp(DB, report, configMap=None):
 
     anaFile = Utils.build_path_default_to_temp(targetANA)
     synFile = Utils.build_path_default_to_temp(targetSynthesis)
-    error_list = extract_target_lex(DB, configMap, report, useCacheIfAvailable=True)
+    error_list = extract_target_lex(DB, configMap, report, useCacheIfAvailable=True, session=session)
     err_list = synthesize(configMap, anaFile, synFile, report)
     error_list.extend(err_list)
 
@@ -5,6 +5,15 @@
 #   SIL International
 #   6/15/2018
 #
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Add the run to the testbed trend index.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Moved the work into endTestbed so Run Testbed can call it.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Only load and save the latest testbed run.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -48,6 +57,7 @@ from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import QCoreApplication
 
 from Testbed import *
+import TestbedTrends
 import Mixpanel
 import ReadConfig
 import Utils
@@ -71,7 +81,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Testbed', 'TestbedValidator', 'M
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("EndTestbed", "End Testbed"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.3",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("EndTestbed", "Conclude a testbed log result."),
         FTM_Help       : "",
@@ -102,21 +112,26 @@ def MainFunction(DB, report, modifyAllowed):
     # Log the start of this module on the analytics server if the user allows logging.
     Mixpanel.LogModuleStarted(configMap, report, docs[FTM_Name], docs[FTM_Version])
 
+    endTestbed(configMap, report)
+
+# Put the results from the synthesis file into the latest testbed run. Returns the number of results extracted or None.
+def endTestbed(configMap, report):
+
     # Get the synthesis file name
     outFileVal = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_SYNTHESIS_FILE, report)
     if not outFileVal:
-        return
+        return None
     
     # Open the synthesis file
     try:
         f_out = open(outFileVal, encoding='utf-8')
     except IOError:
         report.Error(_translate("EndTestbed", "There is a problem with the Synthesis Output File path: {outFileVal}. Please check the configuration file setting.").format(outFileVal=outFileVal))
-        return
+        return None
     
     # Create an object for the testbed results file and get the associated
     # XML object
-    resultsFileObj = FlexTransTestbedResultsFile(report)
+    resultsFileObj = FlexTransTestbedResultsFile(report, latestOnly=True)
     resultsXMLObj = resultsFileObj.getResultsXMLObj()
     
     # Extract the results from the myText.syn file
@@ -126,11 +141,16 @@ def MainFunction(DB, report, modifyAllowed):
     # If we were successful write the end date-time and save the file
     if count > 0:
         resultsXMLObj.endTest()
-        resultsFileObj.write()
+        runId = resultsFileObj.write()
+
+        # Add how each test came out to the trend index
+        TestbedTrends.addRunToTrends(resultsFileObj.getStore(), runId, resultsXMLObj.getTestbedResultXMLObjectList()[0])
     
     # Let the user know how many valid/invalid test were dumped
     report.Info(_translate("EndTestbed", "{count} results extracted.").format(count=count))
 
+    return count
+
 
 
 #----------------------------------------------------------------
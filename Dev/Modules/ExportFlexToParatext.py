@@ -5,6 +5,9 @@
 #   SIL International
 #   1/20/2025
 #
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Group the selected texts by book and export each book with one read and one write.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -82,7 +85,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'ParatextChapSelectio
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("ExportFlexToParatext", "Export Text from Target FLEx to Paratext"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.1",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("ExportFlexToParatext", "Export one or more texts that contain scripture from the target FLEx project to Paratext."),
         FTM_Help       : "",
@@ -194,47 +197,40 @@ def exportAllSelectedTitles(myDB, report, window, proj, ptxAbbrev=None):
 
     matchingContentsObjList = []
     textTitles = Utils.getSourceTextList(myDB, matchingContentsObjList)
+    contentsMap = {}
+    bookTitlesMap = {} # book abbreviation -> list of (title, text string) in the order selected
+
+    for title, contents in zip(textTitles, matchingContentsObjList):
+
+        contentsMap.setdefault(title, contents)
 
+    # Group the selected texts by book so that each book only gets read and written once
     for title in window.selectedTitles:
 
-        try:
-            contents = matchingContentsObjList[textTitles.index(title)]
+        if title not in contentsMap:
 
-        except ValueError:
             report.Error(_translate("ExportFlexToParatext", "{title} not found in the {proj} project.").format(title=title, proj=proj))
             continue
 
-        textStr = makeTextStr(contents)
-
         ## Get the book abbreviation
         # First get the book string at the start of the title. It could be full name or abbrev.
         matchObj = ChapterSelection.bookChapterPattern.match(title)
-        bookStr = matchObj.group('book')
-        bookAbbrev = ''
-
-        # if we have an abbrev. already, done
-        if bookStr in ChapterSelection.bookMap:
-                    
-            bookAbbrev = bookStr 
+        bookAbbrev = ChapterSelection.getBookAbbrev(matchObj.group('book'))
 
-        # Otherwise find the abbreviation for the full name
-        else:
-            for key, val in ChapterSelection.bookMap.items():
-                
-                if bookStr == val:
-                    bookAbbrev = key
-                    break
-        
-        window.chapSel.bookAbbrev = bookAbbrev
+        bookTitlesMap.setdefault(bookAbbrev, []).append((title, makeTextStr(contentsMap[title])))
         
-        if ptxAbbrev:
+    if ptxAbbrev:
 
-            window.chapSel.exportProjectAbbrev = ptxAbbrev
+        window.chapSel.exportProjectAbbrev = ptxAbbrev
 
-        if not ChapterSelection.doExport(textStr, report, window.chapSel, window):
+    for bookAbbrev, titleList in bookTitlesMap.items():
+
+        window.chapSel.bookAbbrev = bookAbbrev
+        
+        if not ChapterSelection.doExportMultiple([textStr for _, textStr in titleList], report, window.chapSel, window):
            
             report.Error(_translate("ExportFlexToParatext", "There was a problem exporting {title} from the {proj} project to {exportProjectAbbrev}.").format(
-                title=title, proj=proj, exportProjectAbbrev=window.chapSel.exportProjectAbbrev)) 
+                title=', '.join(title for title, _ in titleList), proj=proj, exportProjectAbbrev=window.chapSel.exportProjectAbbrev)) 
             break
 
 def makeTextStr(contentsObj):
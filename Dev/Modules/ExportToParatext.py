@@ -5,6 +5,9 @@
 #   SIL International
 #   5/3/22
 #
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Look up the book abbreviation by name with the book name map.
+#
 #   Version 3.15.1 - 2/11/26 - Ron Lockwood
 #    Fixes #1073. Automatically apply search/replace rules on the text coming out of synthesis.
 #
@@ -114,7 +117,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'ParatextChapSelectio
 # Documentation that the user sees:
 
 docs = {FTM_Name       : _translate("ExportToParatext", "Export FLExTrans Draft to Paratext"),
-        FTM_Version    : "3.15.1",
+        FTM_Version    : "3.15.2",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("ExportToParatext", "Export the draft that has been translated with FLExTrans to Paratext."),
         FTM_Help       : "",
@@ -184,11 +187,7 @@ def parseSourceTextName(report, sourceText, infoMap):
     if book.upper() not in ChapterSelection.bookMap:
         
         # If it is not an abbreviation, then we need to find the abbreviation
-        for key, val in ChapterSelection.bookMap.items():
-            
-            if book == val:
-                bookAbbrev = key
-                break
+        bookAbbrev = ChapterSelection.bookNameMap.get(book, book)
         
         # If we didn't find it (bookAbbrev didn't change), then the book is not valid
         if bookAbbrev == book:
@@ -5,6 +5,12 @@
 #   University of Washington, SIL International
 #   12/4/14
 #
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Time the entry loop when Translate Text is recording a performance report.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Use a shared target project session when one is passed in, e.g. from Translate Text.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -105,6 +111,7 @@ from flextoolslib import *
 import Mixpanel
 import ReadConfig
 import Utils
+import PerfReport
 from ReplacementEditor import docs as ReplEditorDocs
 
 DONT_CACHE = True
@@ -130,7 +137,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel']
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("ExtractBilingualLexicon", "Build Bilingual Lexicon"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.2",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("ExtractBilingualLexicon", "Builds an Apertium-style bilingual lexicon."),
         FTM_Help   : "",
@@ -242,7 +249,7 @@ def addFeatureStringsToMap(myDB, myMap):
                 featName = Utils.as_string(val.Name)
                 myMap[Utils.underscores(featAbbr)] = featName
 
-def extract_bilingual_lex(DB, configMap, report=None, useCacheIfAvailable=False):
+def extract_bilingual_lex(DB, configMap, report=None, useCacheIfAvailable=False, session=None):
 
     errorList = []
     catSub           = ReadConfig.getConfigVal(configMap, ReadConfig.CATEGORY_ABBREV_SUB_LIST, report)
@@ -292,7 +299,7 @@ def extract_bilingual_lex(DB, configMap, report=None, useCacheIfAvailable=False)
         errorList.append((_translate("ExtractBilingualLexicon", "A value for {key} not found in the configuration file.").format(key=ReadConfig.BILINGUAL_DICT_REPLACEMENT_FILE), 2))
         return errorList
 
-    TargetDB = Utils.openTargetProject(configMap, report)
+    TargetDB = Utils.openTargetProject(configMap, report, session)
 
     cacheData = ReadConfig.getConfigVal(configMap, ReadConfig.CACHE_DATA, report)
     if not cacheData:
@@ -340,6 +347,7 @@ def extract_bilingual_lex(DB, configMap, report=None, useCacheIfAvailable=False)
             report.ProgressStart(DB.LexiconNumberOfEntries())
 
         duplicateHeadwordPOSmap = {}
+        entrySpan = PerfReport.startSpan('entries')
 
         # Loop through all the entries
         for entryCount, sourceEntry in enumerate(DB.LexiconAllEntries()):
@@ -496,6 +504,8 @@ def extract_bilingual_lex(DB, configMap, report=None, useCacheIfAvailable=False)
 
                     errorList.append((_translate("ExtractBilingualLexicon", "No Morph Type. Skipping. {rawHeadWord} Best Vern: {vernString}").format(rawHeadWord=rawHeadWord, vernString=Utils.as_vern_string(sourceEntry.LexemeFormOA.Form)), 1, sourceURL))
 
+        PerfReport.endSpan(entrySpan, entries=DB.LexiconNumberOfEntries(), bilingualEntries=recordsDumpedCount)
+
         mainSection.append(ET.Comment(' SECTION: Punctuation '))
 
         # Create a regular expression string for the punctuation characters
@@ -5,6 +5,18 @@
 #   University of Washington, SIL International
 #   12/4/14
 #
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Moved the batch helpers to SourceTextBatch. Texts whose names give the same output file now get
+#    a number added to the file name instead of overwriting each other.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Batch mode. Extract all the texts given in the Source Text Batch List setting (titles or wildcard
+#    patterns) in one go. Each text gets its own analyzed text file and a manifest lists them all.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    When not using TreeTran and no complex form substitution is needed, stream each sentence
+#    to the output file as it is finished instead of building the whole text first.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -62,6 +74,8 @@
 #   used by the Apertium transfer engine.
 #
 
+import dataclasses
+
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import QCoreApplication
 
@@ -72,6 +86,7 @@ from flextoolslib import *
 import Mixpanel
 import ReadConfig
 import Utils
+import SourceTextBatch
 
 NGRAM_SIZE = 5
 
@@ -93,7 +108,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'InterlinData', 'Text
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("ExtractSourceText", "Extract Source Text"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.3",
         FTM_ModifiesDB: False,
         FTM_Synopsis   : _translate("ExtractSourceText", "Exports an Analyzed FLEx text into Apertium format."),
         FTM_Help : '',
@@ -109,7 +124,10 @@ as head_word<pos><feat1>...<featN><class1>...<classN>. Where feat1 to featN are
 inflection features that may be present for the root/stem 
 and class1 to classN are inflection classes that may be present on the stem.
 The exported sentences will be stored in the file specified by the Analyzed Text Output File setting.
-This is typically called source_text-aper.txt and is usually in the Build folder.""")}
+This is typically called source_text-aper.txt and is usually in the Build folder.
+If the Source Texts to Extract in a Batch setting has a list of texts, each of those texts will be 
+exported to its own file instead, e.g. source_text-aper_Matthew 01.txt, and a list of the files will be 
+put in source_text-aper_manifest.json.""")}
 
 #app.quit()
 #del app
@@ -254,6 +272,87 @@ def setUpOrigSentMaps(sentObj, befAftMap, wrdGramMap):
                     wrdGramMap[hash(tuple(keyList))] = 1
                     
 
+# Write the analyzed text in Apertium format to f_out. Without complex form substitution we don't need 
+# the whole text at once, so each sentence gets written as soon as it is finished.
+def writeAnalyzedText(DB, report, interlinParams, f_out):
+
+    if not interlinParams.typesInfl1stList and not interlinParams.typesInfl2ndList:
+
+        return InterlinData.writeInterlinData(DB, report, interlinParams, f_out)
+
+    # Get interlinear data. A complex text object is returned.
+    myText = InterlinData.getInterlinData(DB, report, interlinParams)
+    myText.write(f_out)
+
+    return myText
+
+# Extract many texts in one go. Each text gets written to its own analyzed text file and a manifest 
+# listing the texts and their files gets written next to them. The list of texts, the settings and the 
+# interlinear parameters are gathered once and shared for all the texts. Returns the manifest path or None.
+def doExtractSourceTexts(DB, configMap, report, textPatternList):
+
+    fullPathTextOutputFile = ReadConfig.getConfigVal(configMap, ReadConfig.ANALYZED_TEXT_FILE, report)
+    if not fullPathTextOutputFile:
+        return None
+    
+    # TreeTran results belong to one text, so they don't apply here
+    if ReadConfig.getConfigVal(configMap, ReadConfig.ANALYZED_TREETRAN_TEXT_FILE, report, giveError=False):
+
+        report.Warning(_translate("ExtractSourceText", "TreeTran results are not used when extracting multiple texts."))
+
+    matchingContentsObjList = []
+    textObjList = []
+
+    # Create a list of source text names
+    sourceTextList = Utils.getSourceTextList(DB, matchingContentsObjList, textObjList)
+
+    # Find the texts that match, keeping the order of the patterns and not repeating a text
+    indexList, unmatchedList = SourceTextBatch.selectBatchTexts(sourceTextList, textPatternList)
+
+    for pattern in unmatchedList:
+
+        report.Warning(_translate("ExtractSourceText", "No text found matching: {textName}").format(textName=pattern))
+
+    if not indexList:
+
+        report.Error(_translate("ExtractSourceText", "No texts found to extract."))
+        return None
+
+    # Get various bits of data for the get interlinear function. The contents get filled in for each text.
+    interlinParams = InterlinData.initInterlinParams(configMap, report, None)
+
+    # Check for an error
+    if interlinParams == None:
+        return None
+
+    manifestList = []
+    outputPathList = SourceTextBatch.getBatchOutputPaths(fullPathTextOutputFile, [sourceTextList[i] for i in indexList])
+
+    for i, outputPath in zip(indexList, outputPathList):
+
+        textName = sourceTextList[i]
+
+        try:
+            f_out = open(outputPath, 'w', encoding='utf-8')
+        except IOError:
+            report.Error(_translate("ExtractSourceText", "There is a problem with the Analyzed Text Output File path: {path}. Please check the configuration file setting.").format(path=outputPath))
+            return None
+        
+        myText = writeAnalyzedText(DB, report, dataclasses.replace(interlinParams, contents=matchingContentsObjList[i]), f_out)
+        f_out.close()
+
+        report.Info(_translate("ExtractSourceText", "Exported {count} sentence(s) to {path}.").format(count=str(myText.getSentCount()), 
+                                                    path=Utils.getPathRelativeToWorkProjectsDir(outputPath)), DB.BuildGotoURL(textObjList[i]))
+
+        manifestList.append((textName, outputPath, myText.getSentCount()))
+
+    # Write the manifest
+    manifestPath = SourceTextBatch.writeBatchManifest(fullPathTextOutputFile, manifestList)
+
+    report.Info(_translate("ExtractSourceText", "Export of {count} text(s) complete. The list of files is in {path}.").format(count=str(len(manifestList)), 
+                                                    path=Utils.getPathRelativeToWorkProjectsDir(manifestPath)))
+    return manifestPath
+
 def doExtractSourceText(DB, configMap, report):
 
     # Build an output path using the system temp directory.
@@ -336,10 +435,15 @@ def doExtractSourceText(DB, configMap, report):
     if interlinParams == None:
         return None
 
-    # Get interlinear data. A complex text object is returned.
-    myText = InterlinData.getInterlinData(DB, report, interlinParams)
-        
-    if TreeTranSort:
+    if not TreeTranSort:
+
+        # Write out all the words
+        myText = writeAnalyzedText(DB, report, interlinParams, f_out)
+        report.Info(_translate("ExtractSourceText", "Exported {count} sentence(s) to {path}.").format(count=str(myText.getSentCount()), path=abbrPath))
+
+    else:
+        # Get interlinear data. A complex text object is returned.
+        myText = InterlinData.getInterlinData(DB, report, interlinParams)
         
         # If we are using an Insert Words file, add the words to the text object
         if insertWordsFile == True:
@@ -462,13 +566,6 @@ def doExtractSourceText(DB, configMap, report):
         if noParseSentCount > 0:
             report.Warning(_translate("ExtractSourceText", "No parses found for {count} sentence(s).").format(count=str(noParseSentCount)))
 
-    else:
-        # Write out all the words
-        myText.write(f_out)
-        totalStr = str(myText.getSentCount())
-        #endstr = 's' if totalStr != '1' else ''
-        report.Info(_translate("ExtractSourceText", "Exported {count} sentence(s) to {path}.").format(count=totalStr, path=abbrPath))
-        
     f_out.close()
 
     report.Info(_translate("ExtractSourceText", "Export of {textName} complete.").format(textName=sourceTextName), DB.BuildGotoURL(textObj))
@@ -493,7 +590,12 @@ def MainFunction(DB, report, modifyAllowed):
     # Log the start of this module on the analytics server if the user allows logging.
     Mixpanel.LogModuleStarted(configMap, report, docs[FTM_Name], docs[FTM_Version])
 
-    doExtractSourceText(DB, configMap, report)
+    # If there is a list of texts to extract, do them all instead of the Source Text Name.
+    if textPatternList := SourceTextBatch.getBatchTextPatterns(configMap, report):
+
+        doExtractSourceTexts(DB, configMap, report, textPatternList)
+    else:
+        doExtractSourceText(DB, configMap, report)
 
 
 #----------------------------------------------------------------
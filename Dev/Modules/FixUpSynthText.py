@@ -5,6 +5,24 @@
 #   SIL International
 #   7/1/24
 #
+#   Version 3.15.6 - 10/18/26 - Ron Lockwood
+#    Count the rules applied with numRules() again like before the rules were compiled.
+#
+#   Version 3.15.5 - 10/18/26 - Ron Lockwood
+#    Apply the rules to the whole synthesis text at once if the Apply Text Out Rules to the Whole File
+#    setting is on.
+#
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Go back to applying the rules line by line. Applying them to the whole text changes what ^, $, . and \s
+#    match for rules people have already written.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Apply each rule once to the whole synthesis text like Insert Target Text does, instead of line by line.
+#    Write the file through a temporary file so it doesn't get truncated if something fails.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Compile the rules once instead of for every line.
+#
 #   Version 3.15.1 - 2/11/26 - Ron Lockwood
 #    Fixes #1073. Automatically apply search/replace rules on the text coming out of synthesis.
 #
@@ -48,6 +66,7 @@
 #   synthesis. Regular expression can be used if desired.
 #
 
+import io
 import os
 import xml.etree.ElementTree as ET
 
@@ -80,7 +99,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'TextInOut', 'TextInO
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("FixUpSynthText", "Fix Up Synthesis Text"),
-        FTM_Version    : "3.15.1",
+        FTM_Version    : "3.15.6",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("FixUpSynthText", 'Run a set of post-synthesis search and replace operations.') ,
         FTM_Help   : "",
@@ -92,6 +111,30 @@ Fix Up Synthesis Text Rules File as specified in the Settings.""").format(textOu
 #app.quit()
 #del app
 
+# Apply the rules to the synthesis text. The rules are applied to each line, so ^ and $ match at the start and end
+# of a line and a rule can't match across lines. With wholeFile (the Apply Text Out Rules to the Whole File setting) the
+# rules are applied once to the whole text, which is faster, but only gives the same result for rules that don't depend
+# on the line breaks.
+# Returns the new text and an error message. The new text is None if a rule failed.
+def fixUpText(synthText, ruleSet, wholeFile=False):
+
+    if wholeFile:
+
+        return ruleSet.apply(synthText)
+
+    newLines = []
+
+    for line in io.StringIO(synthText):
+
+        newStr, errMsg = ruleSet.apply(line)
+
+        if newStr is None:
+            return None, errMsg
+
+        newLines.append(newStr)
+
+    return ''.join(newLines), ''
+
 #----------------------------------------------------------------
 # The main processing function
 def MainFunction(DB, report, modify=True):
@@ -141,30 +184,27 @@ def MainFunction(DB, report, modify=True):
     try:
         with open(synthFile, encoding='utf-8') as f:
         
-            lines = f.readlines()
+            synthText = f.read()
     except:
         report.Error(_translate("FixUpSynthText", "The Synthesize Text module must be run before this one. Could not open the synthesis file: '{synthFile}'.").format(synthFile=synthFile))
         return
     
-    newLines = []
+    ruleSet = TextInOutUtils.getCompiledRuleSet(tree)
+    wholeFile = ReadConfig.getConfigVal(configMap, ReadConfig.TEXT_OUT_RULES_WHOLE_FILE, report, giveError=False) == 'y'
 
-    newStr = ""
-    
-    for line in lines:
-
-        # Do user-defined search/replace rules
-        newStr, errMsg = TextInOutUtils.applySearchReplaceRules(line, tree)
+    # Do user-defined search/replace rules
+    newStr, errMsg = fixUpText(synthText, ruleSet, wholeFile)
 
-        if newStr is None:
+    if newStr is None:
 
-            report.Error(errMsg)
-            break            
-
-        newLines.append(newStr)
+        report.Error(errMsg)
+        return
 
-    f = open(synthFile, 'w', encoding='utf-8')
-    f.writelines(newLines)
-    f.close()
+    try:
+        Utils.writeFileAtomically(synthFile, newStr)
+    except:
+        report.Error(_translate("FixUpSynthText", "Could not write the synthesis file: '{synthFile}'.").format(synthFile=synthFile))
+        return
     
     if newStr:
         report.Info(_translate("FixUpSynthText", "The synthesis file was fixed using {numRules} 'Text Out' rules.").format(numRules=str(TextInOutUtils.numRules(tree))))
@@ -5,6 +5,18 @@
 #   SIL International
 #   10/30/21
 #
+#   Version 3.15.7 - 10/18/26 - Ron Lockwood
+#    Count the rules applied with numRules() again like before the rules were compiled.
+#
+#   Version 3.15.6 - 10/18/26 - Ron Lockwood
+#    Take the chapters out of the book by slicing at the positions from the Paratext book index.
+#
+#   Version 3.15.5 - 10/18/26 - Ron Lockwood
+#    Show progress while inserting paragraphs.
+#
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Use the compiled Text In rules.
+#
 #   Version 3.15.3 - 2/11/26 - Ron Lockwood
 #    Fixes #1231. Link the report message for the created text to the text in FLEx so the user can double click to go to it.
 #
@@ -155,6 +167,7 @@ import FTPaths
 import Utils
 from ParatextChapSelectionDlg import Ui_ParatextChapSelectionWindow
 import ChapterSelection
+import ParatextBookIndex
 import TextInOutUtils
 
 # Define _translate for convenience
@@ -177,7 +190,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'ParatextChapSelectio
 # Documentation that the user sees:
 
 docs = {FTM_Name       : _translate("ImportFromParatext", "Import Text From Paratext"),
-        FTM_Version    : "3.15.2",
+        FTM_Version    : "3.15.7",
         FTM_ModifiesDB : True,
         FTM_Synopsis   : _translate("ImportFromParatext", "Import chapters from Paratext."),
         FTM_Help       : "",
@@ -346,13 +359,13 @@ def do_import(DB, report, chapSelectObj, tree):
         report.Error(_translate("ImportFromParatext", "Could not find the book file: {bookPath}").format(bookPath=bookPath))
         return
     
-    # Open the Paratext file and read the contents
-    with open(bookPath, encoding='utf-8') as f:
-
-        bookContents = f.read()
+    # Read the Paratext file. The book index tells us where the chapters are.
+    bookIndex = ParatextBookIndex.getBookIndex()
+    bookContents, bookEntry = bookIndex.readBook(bookPath)
+    bookIndex.save()
     
     # Find all the chapter #s
-    chapList = re.findall(r'\\c (\d+)', bookContents, flags=re.RegexFlag.DOTALL)
+    chapList = [str(chapNum) for chapNum in bookEntry.getChapterNums()]
     
     # Give error if we can't find the starting chapter
     if str(chapSelectObj.fromChap) not in chapList:
@@ -383,41 +396,41 @@ def do_import(DB, report, chapSelectObj, tree):
     # See if we should include intro material
     if chapSelectObj.includeIntro:
 
-        # Build the search regex. It starts the search at \mt. This will work if the first title is \mt2 or \mt1, etc.
-        reStr = fr'(\\mt.+?)'
+        # Start at \mt. This will work if the first title is \mt2 or \mt1, etc.
+        start = bookEntry.mainTitleOffset
 
-        if not re.search(reStr, bookContents):
+        if start < 0:
 
             report.Error(_translate("ImportFromParatext", "Cannot find main title (\\mt or \\mtN). This is needed for importing introductory material."))
             return
     else:
-        # Build the search regex. It starts the search at the fromChapter
-        reStr = fr'(\\c {str(chapSelectObj.fromChap)}\s.+?)'
+        # Start at the fromChapter
+        start = bookEntry.getChapterStart(chapSelectObj.fromChap)
     
-    # The expression ends with the end of the book contents if we need to
+    # End with the end of the book contents if we need to, otherwise end at the toChapter
     if copyUntilEnd:
         
-        reStr += '$'
+        end = bookEntry.length
 
-    # Otherwise the expression ends at the toChapter # TODO: don't assume \s immediately follows the chapter number
+        # Leave off the final newline of the book
+        if bookContents.endswith('\n'):
+            end -= 1
     else:
-        reStr += fr'\\c {str(chapSelectObj.toChap+1)}\s'
-
-    # Get the results
-    matchObj = re.search(reStr, bookContents, flags=re.RegexFlag.DOTALL)
+        end = bookEntry.getChapterStart(chapSelectObj.toChap+1)
 
     # Check for nothing found
-    if not matchObj:
+    if start >= end:
 
         report.Error(_translate("ImportFromParatext", "Cannot find the range of chapters specified."))
         return
 
-    importText = matchObj.group(1)
+    importText = bookContents[start:end]
     
     # Do user-defined search/replace rules if needed
     if tree:
 
-        importText, errMsg = TextInOutUtils.applySearchReplaceRules(importText, tree)
+        ruleSet = TextInOutUtils.getCompiledRuleSet(tree)
+        importText, errMsg = ruleSet.apply(importText)
 
         if importText is None:
 
@@ -473,7 +486,7 @@ def do_import(DB, report, chapSelectObj, tree):
         # Set StText object as the Text contents
         text.ContentsOA = stText  
     
-        ChapterSelection.insertParagraphs(DB, chapterContent, m_stTxtParaFactory, stText)
+        ChapterSelection.insertParagraphs(DB, chapterContent, m_stTxtParaFactory, stText, report)
 
         # Build the title string from book abbreviation and chapter.
         title = "{bibleBook} {chapter}".format(bibleBook=bibleBook, chapter=str(titleChapNum).zfill(2))
@@ -5,6 +5,12 @@
 #   University of Washington, SIL International
 #   12/5/14
 #
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Insert the paragraphs in batches and show progress.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Use a shared target project session when one is passed in, e.g. from Translate Text.
+#
 #   Version 3.15.1 - 2/11/26 - Ron Lockwood
 #    Fixes #1073. Automatically apply search/replace rules on the text coming out of synthesis.
 #
@@ -105,7 +111,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'ChapterSelection']
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("InsertTargetText", "Insert Target Text"),
-        FTM_Version    : "3.15.1",
+        FTM_Version    : "3.15.3",
         FTM_ModifiesDB : True,
         FTM_Synopsis   : _translate("InsertTargetText", "Insert a translated text into the target FLEx project."),
         FTM_Help       : "",
@@ -122,9 +128,8 @@ same name will not be overwritten. A copy will be created.""").format(doSynthMod
 #----------------------------------------------------------------
 # The main processing function
 
-def insertTargetText(DB, configMap, report):
+def insertTargetText(DB, configMap, report, session=None):
 
-    TargetDB = FLExProject()
     tree = None
 
     try:
@@ -132,7 +137,7 @@ def insertTargetText(DB, configMap, report):
         targetProj = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_PROJECT, report)
         if not targetProj:
             return None
-        TargetDB.OpenProject(targetProj, True)
+        TargetDB = Utils.openFLExProject(targetProj, session)
     except: 
         report.Error(_translate("InsertTargetText", 'Failed to open the target project.'))
         raise
@@ -181,7 +186,7 @@ def insertTargetText(DB, configMap, report):
     text.ContentsOA = stText  
 
     # Insert text into the target DB while marking sfms as analysis writing system
-    ChapterSelection.insertParagraphs(TargetDB, fullText, m_stTxtParaFactory, stText)
+    ChapterSelection.insertParagraphs(TargetDB, fullText, m_stTxtParaFactory, stText, report)
 
     # Set the title of the text
     tss = TsStringUtils.MakeString(sourceTextName, TargetDB.project.DefaultAnalWs)
@@ -5,6 +5,29 @@
 #   SIL International
 #   7/2/16
 #
+#   Version 3.15.6 - 10/18/26 - Ron Lockwood
+#    Get the cancelled error from ProcessUtils instead of BackgroundTask.
+#
+#   Version 3.15.5 - 10/18/26 - Ron Lockwood
+#    Write the rules file again on the next transfer if a transfer gets cancelled. Stop STAMP or
+#    HermitCrab when a synthesis gets cancelled so a new synthesis doesn't wait for the old one.
+#
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Show how often each rule fired the last time Run Apertium was run next to the rule.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Use a compact index of the bilingual lexicon for the word tooltips instead of keeping
+#    the XML elements of every entry. The index is saved next to the .dix file and only
+#    rebuilt when the file changes.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Run transfer and synthesis in the background so the window doesn't freeze. A busy bar
+#    shows while they run. Clicking Transfer or Synthesize again cancels what is running
+#    (the Apertium tools get killed) and only the newest results are shown.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Check for testbed results in the results store as well as the old results file.
+#
 #   Version 3.15 - 2/4/26 - Ron Lockwood
 #    Fixes #1204. Do a delayed scroll to the selected source sentence in the list box 
 #    so it gets centered in the viewable area. This is needed because the scroll was 
@@ -212,6 +235,7 @@ import re
 import regex
 import unicodedata
 import copy
+import time
 import xml.etree.ElementTree as ET
 import shutil
 from subprocess import call
@@ -225,13 +249,17 @@ from flexlibs import FLExProject
 from PyQt5 import QtCore, QtGui
 from PyQt5.QtGui import QStandardItem, QStandardItemModel
 from PyQt5.QtCore import QCoreApplication
-from PyQt5.QtWidgets import QMessageBox, QMainWindow, QApplication, QCheckBox, QDialogButtonBox, QToolTip, QWidget, QLayout, QAbstractItemView
+from PyQt5.QtWidgets import QMessageBox, QMainWindow, QApplication, QCheckBox, QDialogButtonBox, QToolTip, QWidget, QLayout, QAbstractItemView, QProgressBar
 
 import Mixpanel
 import InterlinData
 import TextInOutUtils
 from Testbed import *
 import RunApertium
+import BackgroundTask
+import ProcessUtils
+import BilingualIndex
+import TransferRuleProfile
 import Utils
 import ReadConfig
 import CatalogTargetAffixes
@@ -264,7 +292,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'LiveRuleTester', 'Te
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("LiveRuleTesterTool", "Live Rule Tester Tool"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.6",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("LiveRuleTesterTool", "Test transfer rules and synthesis live against specific words."),
         FTM_Help       : "", 
@@ -311,6 +339,23 @@ LOG_FILE3 = 'apertium_log3.txt'
 BILING_FILE_IN_TESTER_FOLDER = 'bilingual.dix'
 SENT_TAG = '<sent>'
 
+# What a transfer in the background was run for and what it gave back
+class TransferJob():
+
+    def __init__(self, tabIndex, ruleFile, targetFile, logFile, unfixRules):
+
+        self.tabIndex = tabIndex
+        self.ruleFile = ruleFile
+        self.targetFile = targetFile
+        self.logFile = logFile
+        self.unfixRules = unfixRules
+        self.prevSourceHtml = ''
+        self.prevSourceLUs = ''
+        self.transferResultsPath = None
+        self.targetOutput = ''
+        self.logLines = []
+        self.errorMsg = None
+
 def firstLower(myStr):
 
     if myStr:
@@ -480,7 +525,7 @@ class Main(QMainWindow):
         self.__doCatalog = True
         self.rulesChanged = True
         self.fixBilingLex = True
-        self.__bilingMap = {}
+        self.__bilingIndex = BilingualIndex.BilingualIndex({})
         self.nothingSelectedMsg = _translate('LiveRuleTesterTool', 'Nothing selected. Select at least one word or sentence.')
 
         self.setWindowIcon(QtGui.QIcon(os.path.join(FTPaths.TOOLS_DIR, 'FLExTransWindowIcon.ico')))
@@ -591,6 +636,16 @@ class Main(QMainWindow):
         self.ui.selectAllCheckBox.clicked.connect(self.SelectAllCheckBoxClicked)
         self.ui.refreshSourceLexiconButton.clicked.connect(self.sourceTextComboChanged)
 
+        # Transfer and synthesis run in the background so the window doesn't freeze. Show a busy bar while they run.
+        self.backgroundRunner = BackgroundTask.LatestRequestRunner(self)
+        self.backgroundRunner.busyChanged.connect(self.showBusy)
+        self.backgroundRunner.errorOccurred.connect(self.showBackgroundError)
+        self.busyBar = QProgressBar()
+        self.busyBar.setRange(0, 0)
+        self.busyBar.setMaximumWidth(150)
+        self.busyBar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.busyBar)
+
         # Align selectAllCheckBox to the bottom
         self.ui.horizontalLayout_9.setAlignment(self.ui.selectAllCheckBox, QtCore.Qt.AlignBottom)
 
@@ -841,7 +896,7 @@ class Main(QMainWindow):
             self.close()
             return
 
-        if os.path.exists(testbedLog) == False:
+        if testbedResultsExist(testbedLog) == False:
             self.ui.viewTestbedLogButton.setEnabled(False)
 
         # See if we are doing HermitCrab synthesis
@@ -1026,12 +1081,9 @@ class Main(QMainWindow):
     # Read the bilingual lexicon and make a map from source entries to one or more target entries
     def ReadBilingualLexicon(self):
 
-        # Clear the map
-        self.__bilingMap.clear()
-
-        # Read the XML file
+        # Load the index of the bilingual lexicon. It only gets rebuilt if the file changed.
         try:
-            bilingEtree = ET.parse(self.__biling_file)
+            self.__bilingIndex = BilingualIndex.loadIndex(self.__biling_file)
 
         except:
 
@@ -1039,51 +1091,14 @@ class Main(QMainWindow):
             if self.ExtractBilingLex() == False:
                 return False
 
-        # try to read the XML file again
-        try:
-            bilingEtree = ET.parse(self.__biling_file)
-
-        except IOError:
-
-            QMessageBox.warning(self, _translate('LiveRuleTesterTool', 'Read Error'), _translate('LiveRuleTesterTool', 'Bilingual file: {0} could not be read.').format(self.__biling_file))
-            return False
-
-        # Get the root node
-        bilingRoot = bilingEtree.getroot()
-
-        def tagSequence(node):
-            return [s.attrib['n'] for s in node.iter('s')]
-
-        # Loop through all the bilingual entries
-        for entry in bilingRoot.iter('e'):
-
-            ## <e> (entry) should either have <p><l>abc</l><r>xyz</r></p>) or <i> (p = pair, l = left, r = right)
-
-            # Get the left part
-            left = entry.find('p/l')
-
-            # If we can't find it, it must be an <i> (identity), skip it
-            if left == None:
-                continue
-
-            # Get the right part
-            right = entry.find('p/r')
-
-            # Get just the text part of the left entry. Note: it's not as easy as left.text
-            key = getXMLEntryText(left)
+            # try to read the XML file again
+            try:
+                self.__bilingIndex = BilingualIndex.loadIndex(self.__biling_file)
 
-            # See if we have the source entry already
-            if key not in self.__bilingMap:
+            except IOError:
 
-                self.__bilingMap[key] = [(left, right)]
-            else:
-                if tagSequence(left) == tagSequence(self.__bilingMap[key][0][0]):
-                    # The current entry has the same source language tags
-                    # as the first entry with this lemma in the file,
-                    # so it's a replacement, and we should use the later one.
-                    self.__bilingMap[key][0] = (left, right)
-                else:
-                    self.__bilingMap[key].append((left, right))
+                QMessageBox.warning(self, _translate('LiveRuleTesterTool', 'Read Error'), _translate('LiveRuleTesterTool', 'Bilingual file: {0} could not be read.').format(self.__biling_file))
+                return False
 
         return True
 
@@ -1174,10 +1189,26 @@ class Main(QMainWindow):
         self.__report.Info(_translate('LiveRuleTesterTool', 'Built the bilingual lexicon.'))
         return True
 
+    def showBusy(self, isBusy):
+
+        self.busyBar.setVisible(isBusy)
+
+        if isBusy:
+            self.statusBar().showMessage(_translate('LiveRuleTesterTool', 'Running...'))
+        else:
+            self.statusBar().clearMessage()
+
+    def showBackgroundError(self, errMsg):
+
+        QMessageBox.warning(self, _translate('LiveRuleTesterTool', 'Error'), errMsg)
+
     def RebuildBilingLexButtonClicked(self):
 
         self.setCursor(QtCore.Qt.WaitCursor)
 
+        # The bilingual lexicon is going to be replaced, stop any transfer that is using it
+        self.backgroundRunner.cancelAndWait()
+
         self.fixBilingLex = True
 
         # Save the last sentence number
@@ -1508,6 +1539,10 @@ class Main(QMainWindow):
         self.ui.TestsAddedLabel.setText('')
         errorList = []
 
+        # Synthesis uses the transfer results, so stop a transfer or synthesis that is still running.
+        # If a transfer got stopped, the target text box is empty and the user gets told to do the transfer.
+        self.backgroundRunner.cancelAndWait()
+
         # Check if the target text is empty give a warning
         if not self.ui.TargetTextEdit.toPlainText().strip() or self.ui.TargetTextEdit.toPlainText() == self.nothingSelectedMsg:
 
@@ -1524,6 +1559,7 @@ class Main(QMainWindow):
 
         # Make the text box blank to start out.
         self.ui.SynthTextEdit.setPlainText('')
+        HCconfigPath = None
 
         if self.doHermitCrabSynthesisBool:
 
@@ -1659,40 +1695,55 @@ class Main(QMainWindow):
                     return
 
         ## SYNTHESIZE
-        # We have two possible syntheses, one for STAMP and one for HermitCrab
-        if self.doHermitCrabSynthesisBool:
+        # Get the settings now, the user could change them while synthesis runs in the background
+        traceIt = self.ui.traceHermitCrabSynthesisCheckBox.isChecked()
+        overrideClean = self.ui.DoNotCleanupCheckbox.isChecked()
+        hermitCrab = self.doHermitCrabSynthesisBool
+
+        self.unsetCursor()
 
-            # Check if the user wants to do a trace which will bring up a web page.
-            traceIt = self.ui.traceHermitCrabSynthesisCheckBox.isChecked()
+        self.backgroundRunner.submit(lambda cancelToken: self.runSynthesis(hermitCrab, HCconfigPath, traceIt, overrideClean, cancelToken), self.showSynthesisResults)
 
+    # This runs in the background thread, so no widgets get used here.
+    def runSynthesis(self, hermitCrab, HCconfigPath, traceIt, overrideClean, cancelToken):
+
+        # We have two possible syntheses, one for STAMP and one for HermitCrab
+        if hermitCrab:
+
+            # If the user wants to do a trace, it will bring up a web page.
             errorList = DoHermitCrabSynthesis.synthesizeWithHermitCrab(self.__configMap, HCconfigPath, self.synthesisFilePath, self.parsesFile, self.HCmasterFile, self.surfaceFormsFile, self.transferResultsPath,\
-                                                                       report=None, trace=traceIt, DLLobj=self.HCdllObj, overrideClean=self.ui.DoNotCleanupCheckbox.isChecked())
+                                                                       report=None, trace=traceIt, DLLobj=self.HCdllObj, overrideClean=overrideClean, cancelToken=cancelToken)
+        else:
+            errorList = DoStampSynthesis.synthesize(self.__configMap, self.targetAnaPath, self.synthesisFilePath, report=None, overrideClean=overrideClean, cancelToken=cancelToken)
 
-            # check for fatal errors
-            fatal, msg = Utils.checkForFatalError(errorList, None)
+        # check for fatal errors
+        fatal, msg = Utils.checkForFatalError(errorList, None)
 
-            if fatal:
+        if fatal:
+            return hermitCrab, msg, None
+
+        # Load the synthesized result
+        with open(self.synthesisFilePath, encoding='utf-8') as synf:
+
+            synthText = synf.read()
+
+        return hermitCrab, None, synthText
+
+    # This runs in the GUI thread when the newest synthesis is done.
+    def showSynthesisResults(self, results):
+
+        hermitCrab, msg, synthText = results
+
+        if msg:
+            if hermitCrab:
                 errorStr = msg
                 if not self.HCdllObj:
                     errorStr += _translate('LiveRuleTesterTool', '\nRun the {0} module separately for more details.').format(DoHermitCrabSynthesis.docs[FTM_Name])
                 QMessageBox.warning(self, _translate('LiveRuleTesterTool', '{0} Error').format(DoHermitCrabSynthesis.docs[FTM_Name]), errorStr)
-                self.unsetCursor()
-                return
-        else:
-            errorList = DoStampSynthesis.synthesize(self.__configMap, self.targetAnaPath, self.synthesisFilePath, report=None, overrideClean=self.ui.DoNotCleanupCheckbox.isChecked())
-
-            # check for fatal errors
-            fatal, msg = Utils.checkForFatalError(errorList, None)
-
-            if fatal:
+            else:
                 QMessageBox.warning(self, _translate('LiveRuleTesterTool', '{moduleName} Error').format(moduleName=DoStampSynthesis.docs[FTM_Name]), 
                      _translate('LiveRuleTesterTool', f'{msg}\n' + 'Run the {moduleName} module separately for more details.').format(moduleName=DoStampSynthesis.docs[FTM_Name]))
-                self.unsetCursor()
-                return
-
-        # Load the synthesized result into the text box
-        synf = open(self.synthesisFilePath, encoding='utf-8')
-        synthText = synf.read()
+            return
 
         # Apply Text Out Rules if desired
         if self.ui.applyTextOutRulesCheckbox.isChecked() and self.textOutElemTree and len(synthText) > 0:
@@ -1718,8 +1769,6 @@ class Main(QMainWindow):
 
         self.ui.SynthTextEdit.setPlainText(synthText)
 
-        synf.close()
-
         # Set a flag so that we don't extract the dictionary next time
         self.__extractIt = False
 
@@ -1737,9 +1786,6 @@ class Main(QMainWindow):
             self.ui.addToTestbedButton.setEnabled(False)
             self.ui.addMultipleCheckBox.setEnabled(False)
 
-        self.unsetCursor()
-        return
-
     def UpButtonClicked(self):
         if self.TRIndex and self.TRIndex.row() > 0:
 
@@ -2185,17 +2231,16 @@ class Main(QMainWindow):
                 toks = re.split('<', aper_tok)
                 lemma = toks[0]
 
-                if lemma in self.__bilingMap:
-
-                    return self.__bilingMap[lemma]
-
                 # try lowercasing the first letter if we don't find it at first
-                else:
-                    lowerLemma = firstLower(lemma)
+                if lemma not in self.__bilingIndex:
+                    lemma = firstLower(lemma)
+
+                targetList = self.__bilingIndex.getTargets(lemma)
 
-                    if lowerLemma in self.__bilingMap:
+                if targetList:
 
-                        return self.__bilingMap[lowerLemma]
+                    # Put the source lemma with each target
+                    return [(lemma,) + target for target in targetList]
 
                 # If we found <>, stop looking
                 break
@@ -2215,15 +2260,15 @@ class Main(QMainWindow):
             arrowStr = '⭢'
 
         # Go through all pairs and add them to the tool tip
-        for source, target in srcTrgtPairsList:
+        for sourceLemma, sourceTags, targetLemma, targetTags in srcTrgtPairsList:
 
             # Combine source and target into one paragraph html string
-            tipStr += convertXMLEntryToColoredString(source, isRtl)[:-4] # remove </p> at end
+            tipStr += convertEntryToColoredString(sourceLemma, sourceTags, isRtl)[:-4] # remove </p> at end
             tipStr += f'&nbsp;{arrowStr}&nbsp;'
 
             # If the target is mapped to nothing (which happens if the user chose **None** in the linker),
             # set the right side of the tooltip to **None**
-            if target.text is None:
+            if targetLemma is None:
 
                 # If we have RTL orientation, prepend the RTL marker character
                 if isRtl:
@@ -2231,12 +2276,15 @@ class Main(QMainWindow):
                 else:
                     tipStr += Utils.NONE_HEADWORD
             else:
-                tipStr += convertXMLEntryToColoredString(target, isRtl)[3:] # remove <p> at beginning
+                tipStr += convertEntryToColoredString(targetLemma, targetTags, isRtl)[3:] # remove <p> at beginning
 
         return tipStr.strip()
 
     def closeEvent(self, event):
 
+        # Don't leave the Apertium tools running
+        self.backgroundRunner.cancelAndWait()
+
         rulesTab = self.ui.tabRules.currentIndex()
         sourceTab = self.ui.tabSource.currentIndex()
 
@@ -2290,6 +2338,10 @@ class Main(QMainWindow):
 
     def loadTransferRules(self):
 
+        # How often each rule fired the last time Run Apertium was run (None if it hasn't been run)
+        self.ruleProfile = TransferRuleProfile.loadProfile(self.buildFolder)
+        self.ruleCountMap = {} # rule element -> count
+
         # Escape some characters and write as NFD unicode.
         if RunApertium.stripRulesFile(self.__report, self.testerFolder, self.__transfer_rules_file, RULE_FILE1) == True:
             return True
@@ -2305,7 +2357,7 @@ class Main(QMainWindow):
 
             self.__transferRuleFileXMLtree = test_tree
             self.__transferModel = QStandardItemModel ()
-            self.displayRules(self.__transferRulesElement, self.__transferModel)
+            self.displayRules(self.__transferRulesElement, self.__transferModel, TransferRuleProfile.TRANSFER_STAGE)
 
             # Initialize the model for the rule list control
             self.ui.listTransferRules.setModel(self.__transferModel)
@@ -2331,7 +2383,7 @@ class Main(QMainWindow):
             if self.__interchunkRulesElement is not None:
                 self.__interChunkRuleFileXMLtree = interchunk_tree
                 self.__interChunkModel = QStandardItemModel()
-                self.displayRules(self.__interchunkRulesElement, self.__interChunkModel)
+                self.displayRules(self.__interchunkRulesElement, self.__interChunkModel, TransferRuleProfile.INTERCHUNK_STAGE)
                 # Initialize the model for the rule list control
                 self.ui.listInterChunkRules.setModel(self.__interChunkModel)
             else:
@@ -2355,7 +2407,7 @@ class Main(QMainWindow):
                 if self.__postchunkRulesElement is not None:
                     self.__postChunkRuleFileXMLtree = postchunk_tree
                     self.__postChunkModel = QStandardItemModel()
-                    self.displayRules(self.__postchunkRulesElement, self.__postChunkModel)
+                    self.displayRules(self.__postchunkRulesElement, self.__postChunkModel, TransferRuleProfile.POSTCHUNK_STAGE)
                     # Initialize the model for the rule list control
                     self.ui.listPostChunkRules.setModel(self.__postChunkModel)
                 else:
@@ -2400,10 +2452,7 @@ class Main(QMainWindow):
         self.rulesChanged = True
 
         for i, el in enumerate(self.__rulesElement):
-            ruleText = el.get('comment')
-
-            if ruleText == None:
-                ruleText = _translate('LiveRuleTesterTool', 'missing comment')
+            ruleText = self.getRuleText(el)
 
             # If active add text with the active rule #
             if self.__ruleModel.item(i).checkState():
@@ -2429,23 +2478,49 @@ class Main(QMainWindow):
             self.ui.selectAllCheckBox.setCheckState(QtCore.Qt.Unchecked)
             self.lastSelectAllState = QtCore.Qt.Unchecked
 
-    def displayRules(self, rules_element, ruleModel):
+    def displayRules(self, rules_element, ruleModel, stage):
+
+        # Get how often each rule fired the last time Run Apertium was run, if we know
+        self.setRuleCounts(rules_element, stage)
 
         # Loop through each rule
         for rule_el in rules_element:
 
-            # Get the comment for the rule
-            comment = rule_el.get('comment')
-
-            if comment == None:
-                comment = _translate('LiveRuleTesterTool', 'missing comment')
-
             # Create an item object
-            item = QStandardItem(comment)
+            item = QStandardItem(self.getRuleText(rule_el))
             item.setCheckable(True)
             item.setCheckState(False)
             ruleModel.appendRow(item)
 
+    # Match up the rules with the counts from the rule profile. Rules are matched by name because the sample
+    # rule is left out here and the user can move rules. If there are rules with the same name they go in order.
+    def setRuleCounts(self, rules_element, stage):
+
+        if not self.ruleProfile:
+            return
+
+        countsMap = self.ruleProfile.getCountsByName(stage)
+
+        for rule_el in rules_element:
+
+            countList = countsMap.get(rule_el.get('comment', ''))
+
+            if countList:
+                self.ruleCountMap[rule_el] = countList.pop(0)
+
+    # The rule's comment plus how often it fired in the last Run Apertium
+    def getRuleText(self, rule_el):
+
+        ruleText = rule_el.get('comment')
+
+        if ruleText == None:
+            ruleText = _translate('LiveRuleTesterTool', 'missing comment')
+
+        if rule_el in self.ruleCountMap:
+            ruleText += _translate('LiveRuleTesterTool', ' (fired {0})').format(self.ruleCountMap[rule_el])
+
+        return ruleText
+
     def escapeDataStreamsLemmas(self, inputString):
 
         # Define the substitution function
@@ -2465,6 +2540,9 @@ class Main(QMainWindow):
 
         self.setCursor(QtCore.Qt.WaitCursor)
 
+        # A transfer that is still running is for an older request. Stop it before its files get rewritten.
+        self.backgroundRunner.cancelAndWait()
+
         if self.ui.tabRules.currentIndex() == 0: # 'tab_transfer_rules'
             self.__interchunkHtmlResult = ''
             self.__interchunkLexicalUnitsResult = ''
@@ -2611,23 +2689,63 @@ class Main(QMainWindow):
                 else:
                     self.ui.warningTextEdit.setPlainText(self.ui.warningTextEdit.toPlainText()+'\n'+triplet[0])
 
+        # Remember what this transfer is for. The user could change tabs or the selection before the results come back.
+        transferJob = TransferJob(self.ui.tabRules.currentIndex(), tr_file, tgt_file, log_file, self.rulesChanged)
+        transferJob.prevSourceHtml = self.getActiveSrcTextEditVal()
+        transferJob.prevSourceLUs = self.getActiveLexicalUnits()
+
+        # The rules file has been written, it doesn't need to be written again until the rules change
+        self.rulesChanged = False
+        self.unsetCursor()
+
+        # Run the Apertium tools in the background. A newer transfer or synthesis cancels this one.
+        self.backgroundRunner.submit(lambda cancelToken: self.runTransfer(transferJob, cancelToken), self.showTransferResults, self.transferCancelled)
+
+    # This runs in the GUI thread when a transfer gets cancelled. Its compiled rules got removed, so write the rules file again next time.
+    def transferCancelled(self):
+
+        self.rulesChanged = True
+
+    # This runs in the background thread, so no widgets get used here.
+    def runTransfer(self, transferJob, cancelToken):
+
         # Run the makefile to run Apertium tools to do the transfer
         # component of FLExTrans. Pass in the folder of the bash
         # file to run. The current directory is FlexTools
-        ret = RunApertium.run_makefile(self.buildFolder+'\\LiveRuleTester', self.__report)
+        startTime = time.time()
 
-        if ret:
-            self.ui.TargetTextEdit.setPlainText(_translate('LiveRuleTesterTool', 'An error happened when running the Apertium tools.'))
-            self.unsetCursor()
-            return
+        try:
+            ret = RunApertium.run_makefile(self.buildFolder+'\\LiveRuleTester', self.__report, cancelToken=cancelToken)
 
-        # Only rewrite the transfer rules file if there was a change
-        if self.rulesChanged:
+        except ProcessUtils.CancelledError:
+
+            # make got killed. A compiled file it was writing would look up to date next time, so remove it.
+            for fileName in os.listdir(self.testerFolder):
+
+                binPath = os.path.join(self.testerFolder, fileName)
+
+                try:
+                    if fileName.endswith('.bin') and os.path.getmtime(binPath) >= startTime - 1:
+                        os.remove(binPath)
+                except OSError:
+                    pass
+            raise
 
-            # Convert back the problem characters in the transfer results file back to what they were. Restore the backup biling. file
-            RunApertium.unfixProblemCharsRuleFile(os.path.join(tr_file))
+        finally:
+            # Only rewrite the transfer rules file if there was a change
+            if transferJob.unfixRules:
+
+                # Convert back the problem characters in the transfer results file back to what they were. Restore the backup biling. file
+                RunApertium.unfixProblemCharsRuleFile(transferJob.ruleFile)
+
+        if ret:
+            transferJob.errorMsg = _translate('LiveRuleTesterTool', 'An error happened when running the Apertium tools.')
+            return transferJob
+
+        # Load the target text contents
+        tgt_file = transferJob.targetFile
+        err_msg = _translate('LiveRuleTesterTool', 'Cannot find file: {tgt_file}.').format(tgt_file=tgt_file)
 
-        # Load the target text contents into the results edit box
         try:
             tgtf = open(tgt_file, encoding='utf-8')
 
@@ -2640,18 +2758,37 @@ class Main(QMainWindow):
                 tgtf = open(tgt_file, encoding='utf-8')
 
                 # Set this for use in Convert2Stamp
-                self.transferResultsPath = self.testerFolder + '\\' + os.path.basename(tgt_file)
+                transferJob.transferResultsPath = self.testerFolder + '\\' + os.path.basename(tgt_file)
 
             except FileNotFoundError:
-                self.ui.TargetTextEdit.setPlainText(err_msg)
-                self.unsetCursor()
-                return
+                transferJob.errorMsg = err_msg
+                return transferJob
         except:
-            self.ui.TargetTextEdit.setPlainText(err_msg)
-            self.unsetCursor()
+            transferJob.errorMsg = err_msg
+            return transferJob
+
+        transferJob.targetOutput = tgtf.read()
+        tgtf.close()
+
+        # Load the log file
+        with open(transferJob.logFile, encoding='utf-8') as lf:
+
+            transferJob.logLines = lf.readlines()
+
+        return transferJob
+
+    # This runs in the GUI thread when the newest transfer is done.
+    def showTransferResults(self, transferJob):
+
+        if transferJob.errorMsg:
+
+            self.ui.TargetTextEdit.setPlainText(transferJob.errorMsg)
             return
 
-        targetOutput = tgtf.read()
+        if transferJob.transferResultsPath:
+            self.transferResultsPath = transferJob.transferResultsPath
+
+        targetOutput = transferJob.targetOutput
 
         # Create a <p> html element
         pElem = ET.Element('p')
@@ -2659,7 +2796,7 @@ class Main(QMainWindow):
         RTLflag = self.hasRTLdata(targetOutput[:len(targetOutput)//2])
 
         # Process advanced results differently (which doesn't apply to post chunk, because we get normal data stream in that case)
-        if self.advancedTransfer and self.ui.tabRules.currentIndex() != 2: # 'tab_postchunk_rules'
+        if self.advancedTransfer and transferJob.tabIndex != 2: # 'tab_postchunk_rules'
 
             # Testbed.py function
             processAdvancedResults(targetOutput, pElem, RTLflag, dummy=True, punctuationPresent=True)
@@ -2687,43 +2824,33 @@ class Main(QMainWindow):
 
         self.ui.TargetTextEdit.setText(htmlVal)
 
-        tgtf.close()
-
         # Store the actual data stream in __lexicalUnits for use elsewhere when in advanced mode
         # Store the html in another member
         if self.advancedTransfer:
-            if self.ui.tabRules.currentIndex() == 0: # 'tab_transfer_rules':
+            if transferJob.tabIndex == 0: # 'tab_transfer_rules':
                 self.__transferHtmlResult = htmlVal
                 self.__transferLexicalUnitsResult = targetOutput
-                self.__tranferPrevSourceHtml = self.getActiveSrcTextEditVal()
-                self.__tranferPrevSourceLUs = self.getActiveLexicalUnits()
-            elif self.ui.tabRules.currentIndex() == 1: # 'tab_interchunk_rules':
+                self.__tranferPrevSourceHtml = transferJob.prevSourceHtml
+                self.__tranferPrevSourceLUs = transferJob.prevSourceLUs
+            elif transferJob.tabIndex == 1: # 'tab_interchunk_rules':
                 self.__interchunkHtmlResult = htmlVal
                 self.__interchunkLexicalUnitsResult = targetOutput
-                self.__interchunkPrevSource = self.getActiveSrcTextEditVal()
-                self.__interchunkPrevSourceLUs = self.getActiveLexicalUnits()
+                self.__interchunkPrevSource = transferJob.prevSourceHtml
+                self.__interchunkPrevSourceLUs = transferJob.prevSourceLUs
             else: # 'tab_postchunk_rules':
-                self.__postchunkPrevSource = self.getActiveSrcTextEditVal()
-                self.__postchunkPrevSourceLUs = self.getActiveLexicalUnits()
-
-        # Load the log file
-        lf = open(log_file, encoding='utf-8')
+                self.__postchunkPrevSource = transferJob.prevSourceHtml
+                self.__postchunkPrevSourceLUs = transferJob.prevSourceLUs
 
         # fix up the output of the log file to colorize it and remove unneeded stuff
-        myLines = lf.readlines()
-        newText = self.processLogLines(myLines)
+        newText = self.processLogLines(transferJob.logLines, transferJob.tabIndex)
         self.ui.LogEdit.setText(newText)
 
-        lf.close()
-        self.rulesChanged = False
-        self.unsetCursor()
-
-    def processLogLines(self, inputLines):
+    def processLogLines(self, inputLines, tabIndex):
 
         retStr = ''
 
         # Process advanced (chunk) data differently. Interchunk and Postchunk phases have the chunk format
-        if self.advancedTransfer and self.ui.tabRules.currentIndex() != 0: # transfer tab
+        if self.advancedTransfer and tabIndex != 0: # transfer tab
 
             delimeter = '} '
             processFunc = processAdvancedResults
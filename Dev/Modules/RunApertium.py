@@ -5,6 +5,21 @@
 #   SIL International
 #   1/1/17
 #
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Get the cancel token and running programs from ProcessUtils instead of BackgroundTask.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Count how often each transfer rule fired from the Apertium trace and save a report
+#    in the Build folder listing the rules that fire the most and the ones that never fired.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    The makefile can be run with a cancel token. The make process gets killed if the
+#    token is cancelled. This is for the Live Rule Tester which runs transfer in the background.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Transfer can be run for testbed shards. The Makefile gets run once in the Build folder
+#    to compile the dictionary and rules and then in each shard's folder at the same time.
+#
 #   Version 3.15 - 2/5/26 - Ron Lockwood
 #    Fixes #1071. Change drives before the cd command in the make batch file.
 #
@@ -71,6 +86,9 @@ import Mixpanel
 import Utils
 import ReadConfig
 import FTPaths
+import TestbedRunner
+import ProcessUtils
+import TransferRuleProfile
 from ExtractBilingualLexicon import docs as ExtrBilingDocs
 from ExtractSourceText import docs as ExtrSourceDocs
 
@@ -99,7 +117,7 @@ The results of this module are found in the file you specified in the Target Tra
 This is typically called target_text-aper.txt and is usually in the Build folder.""")
 
 docs = {FTM_Name       : _translate("RunApertium", "Run Apertium"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.4",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("RunApertium", "Run the Apertium transfer engine."),
         FTM_Help       : "",  
@@ -111,6 +129,10 @@ docs = {FTM_Name       : _translate("RunApertium", "Run Apertium"),
 STRIPPED_RULES  = 'tr.t1x'
 STRIPPED_RULES2 = 'tr.t2x'
 STRIPPED_RULES3 = 'tr.t3x'
+COMPILED_DICTIONARY = 'bilingual.bin'
+COMPILED_RULES = 'transfer_rules.t1x.bin'
+COMPILED_RULES2 = 'transfer_rules.t2x.bin'
+COMPILED_RULES3 = 'transfer_rules.t3x.bin'
 APERTIUM_ERROR_FILE = 'apertium_error.txt'
 DO_MAKE_SCRIPT_FILE = 'do_make.bat'
 MAKEFILE_DICT_VARIABLE = 'DICTIONARY_PATH'
@@ -339,11 +361,14 @@ def turnPathIntoEnvironPath(absPathToBuildFolder, myPath):
 # component of FLExTrans. The makefile is run by invoking a
 # bash file. Absolute paths seem to be necessary.
 # relPathToBashFile is expected to be with Windows backslashes
-def run_makefile(absPathToBuildFolder, report):
+# The analyzed text and transfer results paths come from the config file unless they are given.
+# makeTarget can name what to make instead of the transfer results.
+def run_makefile(absPathToBuildFolder, report, configMap=None, analyzedPath=None, transferResultsPath=None, makeTarget='', cancelToken=None):
 
-    configMap = ReadConfig.readConfig(report)
     if not configMap:
-        return True
+        configMap = ReadConfig.readConfig(report)
+        if not configMap:
+            return True
 
     # Get the path to the dictionary file
     dictionaryPath = ReadConfig.getConfigVal(configMap, ReadConfig.BILINGUAL_DICTIONARY_FILE, report)
@@ -353,16 +378,18 @@ def run_makefile(absPathToBuildFolder, report):
     dictionaryPath = turnPathIntoEnvironPath(absPathToBuildFolder, dictionaryPath)
 
     # Get the path to the source apertium file
-    analyzedPath = ReadConfig.getConfigVal(configMap, ReadConfig.ANALYZED_TEXT_FILE, report)
     if not analyzedPath:
-        return True
+        analyzedPath = ReadConfig.getConfigVal(configMap, ReadConfig.ANALYZED_TEXT_FILE, report)
+        if not analyzedPath:
+            return True
 
     analyzedPath = turnPathIntoEnvironPath(absPathToBuildFolder, analyzedPath)
 
     # Get the path to the target apertium file
-    transferResultsPath = ReadConfig.getConfigVal(configMap, ReadConfig.TRANSFER_RESULTS_FILE, report)
     if not transferResultsPath:
-        return True
+        transferResultsPath = ReadConfig.getConfigVal(configMap, ReadConfig.TRANSFER_RESULTS_FILE, report)
+        if not transferResultsPath:
+            return True
 
     transferResultsPath = turnPathIntoEnvironPath(absPathToBuildFolder, transferResultsPath)
 
@@ -399,16 +426,37 @@ def run_makefile(absPathToBuildFolder, report):
     # Put quotes around the path in case there's a space
     outStr += f'cd "{absPathToBuildFolder}"\n'
 
-    outStr += f'"{FTPaths.MAKE_EXE}" 2>"{APERTIUM_ERROR_FILE}"\n'
+    outStr += f'"{FTPaths.MAKE_EXE}" {makeTarget} 2>"{APERTIUM_ERROR_FILE}"\n'
 
     f.write(outStr)
     f.close()
 
-    retVal = subprocess.call([fullPathMake])
+    retVal = ProcessUtils.runProcess([fullPathMake], cancelToken)
 
     return retVal
 
-def runApertium(DB, configMap, report):
+# Compile the dictionary and rules in the build folder, then run the rest of the makefile in each shard's folder at the same time.
+# Returns a non-zero value and the folders that had errors if something went wrong.
+def runShardedMakefile(buildFolder, configMap, shardList, report):
+
+    # Only make the compiled rules files for the rules files we have
+    makeTargetList = [COMPILED_DICTIONARY] + [binFile for rulesFile, binFile in [(STRIPPED_RULES, COMPILED_RULES), (STRIPPED_RULES2, COMPILED_RULES2), (STRIPPED_RULES3, COMPILED_RULES3)]
+                                              if os.path.exists(os.path.join(buildFolder, rulesFile))]
+
+    if ret := run_makefile(buildFolder, report, configMap, makeTarget=' '.join(makeTargetList)):
+        return ret, [buildFolder]
+
+    for shard in shardList:
+        TestbedRunner.prepareShardBuildFolder(shard, buildFolder)
+
+    # The shards don't report anything themselves, errors are reported after they are all done
+    retList = TestbedRunner.runShardStep(shardList, 'transfer', lambda shard: run_makefile(shard.folder, None, configMap, shard.sourcePath, shard.transferResultsPath))
+    errorFolderList = [shard.folder for shard, ret in zip(shardList, retList) if ret]
+
+    return (1 if errorFolderList else 0), errorFolderList
+
+# Run transfer. If a list of testbed shards is given, transfer is run for each shard's source text into its transfer results file.
+def runApertium(DB, configMap, report, shardList=None):
 
     # Get parent folder of the folder flextools.ini is in and add \Build to it
     buildFolder = FTPaths.BUILD_DIR
@@ -489,19 +537,47 @@ def runApertium(DB, configMap, report):
     os.utime(os.path.join(buildFolder, STRIPPED_RULES), times=None, ns=(statResult.st_atime_ns, statResult.st_mtime_ns))
 
     # Run the makefile to run Apertium tools to do the transfer component of FLExTrans. 
-    ret = run_makefile(buildFolder, report)
+    if shardList:
+
+        ret, errorFolderList = runShardedMakefile(buildFolder, configMap, shardList, report)
+        resultsPathList = [shard.transferResultsPath for shard in shardList]
+    else:
+        ret = run_makefile(buildFolder, report)
+        errorFolderList = [buildFolder]
+        resultsPathList = [transferResultsPath]
     
     if ret:
         report.Error(_translate("RunApertium", 'An error happened when running the Apertium tools. The contents of apertium_error.txt is:'))
+
+        for errorFolder in errorFolderList:
+            try:
+                f = open(os.path.join(errorFolder, APERTIUM_ERROR_FILE), encoding='utf-8')
+                lines = f.readlines()
+                [report.Error(line) for line in lines]
+            except:
+                pass
+
+    else:
+        # Count how often each rule fired using the trace in the Apertium log(s)
+        logPathList = [shard.logPath for shard in shardList] if shardList else [os.path.join(buildFolder, TestbedRunner.APERTIUM_LOG_FILE)]
+        rulesPathMap = {stage: rulesPath for stage, rulesPath in zip(TransferRuleProfile.STAGE_LIST, [tranferRulePath, tranferRulePath2, tranferRulePath3]) if rulesPath}
+
         try:
-            f = open(os.path.join(buildFolder, APERTIUM_ERROR_FILE), encoding='utf-8')
-            lines = f.readlines()
-            [report.Error(line) for line in lines]
-        except:
-            pass
+            profile = TransferRuleProfile.profileRun(buildFolder, rulesPathMap, logPathList, Utils.getPathRelativeToWorkProjectsDir(analyzedTextPath))
+
+            numRules = sum(len(profile.getRules(stage)) for stage in profile.getStages())
+            numNeverFired = sum(len(profile.getNeverFired(stage)) for stage in profile.getStages())
+
+            report.Info(_translate("RunApertium", 'Rule firing counts put in the file: {file}. {never} of {total} rules never fired.').format(
+                        file=Utils.getPathRelativeToWorkProjectsDir(os.path.join(buildFolder, TransferRuleProfile.PROFILE_HTML_FILE)), never=numNeverFired, total=numRules))
+
+        except (OSError, ET.ParseError):
+            pass # the counts are just for information, don't stop for them
 
     # Convert back the problem characters in the transfer results file back to what they were. Restore the backup biling. file
-    unfixProblemCharsRuleFile(transferResultsPath)
+    for resultsPath in resultsPathList:
+        unfixProblemCharsRuleFile(resultsPath)
+
     unfixProblemCharsDict(dictionaryPath)
     report.Info(_translate("RunApertium", 'Transferred text put in the file: {file}.').format(file=Utils.getPathRelativeToWorkProjectsDir(transferResultsPath)))
     report.Info(_translate("RunApertium", 'Apertium transfer complete.'))
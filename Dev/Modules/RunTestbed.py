@@ -0,0 +1,389 @@
+#
+#   RunTestbed
+#
+#   Ron Lockwood
+#   SIL International
+#   10/18/26
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    The Run Testbed collection now uses this module instead of the separate step modules.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    When data is cached, only run the tests affected by changes to the rules or the bilingual
+#    lexicon. The other tests use their last result. A setting can force all tests to be run.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Initial version.
+#
+# This module does all the testbed steps in one go, Start Testbed through End Testbed. When there are enough
+# tests, they get split into shards and transfer and synthesis get run for all the shards at
+# the same time, each in its own folder. The results get joined back together in test order
+# before they are put in the testbed log.
+#
+# If the user wants data cached, we keep track of which rules and bilingual lexicon entries each
+# test used (see TestbedImpact) and only run the tests that something they use has changed for.
+
+import os
+import time
+import tempfile
+
+from PyQt5.QtCore import QCoreApplication
+from PyQt5.QtWidgets import QApplication
+
+from flextoolslib import *
+
+import Mixpanel
+import StartTestbed
+import EndTestbed
+import ExtractBilingualLexicon
+import CatalogTargetAffixes
+import RunApertium
+import ConvertTextToSTAMPformat
+import DoStampSynthesis
+import DoHermitCrabSynthesis
+import TranslateText
+import TestbedRunner
+import TestbedImpact
+import BuildManifest
+import Testbed
+import ReadConfig
+import FTPaths
+import Utils
+
+# Define _translate for convenience
+_translate = QCoreApplication.translate
+TRANSL_TS_NAME = 'RunTestbed'
+
+translators = []
+app = QApplication.instance()
+
+if app is None:
+    app = QApplication([])
+
+# This is just for translating the docs dictionary below
+Utils.loadTranslations([TRANSL_TS_NAME], translators)
+
+# libraries that we will load down in the main function
+librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'Testbed', 'TestbedValidator', 'StartTestbed', 'EndTestbed', 'ExtractBilingualLexicon',
+                        'CatalogTargetAffixes', 'RunApertium', 'ConvertTextToSTAMPformat', 'DoStampSynthesis', 'DoHermitCrabSynthesis', 'TranslateText']
+
+#----------------------------------------------------------------
+# Documentation that the user sees:
+docs = {FTM_Name       : _translate("RunTestbed", "Run Testbed"),
+        FTM_Version    : "3.15.3",
+        FTM_ModifiesDB : False,
+        FTM_Synopsis   : _translate("RunTestbed", "Run all the tests in the testbed and log the results."),
+        FTM_Help       : "",
+        FTM_Description: _translate("RunTestbed",
+"""Run all the tests in the testbed and log the results. This does the same steps as running the modules from Start Testbed to End Testbed.
+When there are a lot of tests, they are split up and transfer and synthesis are run on the parts at the same time.
+If data is cached, only the tests affected by changes to the transfer rules or the bilingual lexicon are run.""")}
+
+SHARDS_FOLDER_PREFIX = 'TestbedShards_'
+
+# Settings that can change the results of any test
+IMPACT_SETTINGS = TranslateText.CONVERT_SETTINGS + TranslateText.SYNTHESIS_SETTINGS + [ReadConfig.TRANSFER_RULES_FILE, ReadConfig.TRANSFER_RULES_FILE2,
+                                                                                     ReadConfig.TRANSFER_RULES_FILE3]
+
+# Report the warnings and errors in an error list, but not the info messages. Returns None if there was an error.
+def reportProblems(errorList, report):
+
+    return Utils.processErrorList([msg for msg in errorList if msg[1] > 0], report)
+
+# Run transfer and synthesis on the whole analyzed text file like the collection does
+def runSerially(DB, configMap, report, session):
+
+    hermitCrab = ReadConfig.getConfigVal(configMap, ReadConfig.HERMIT_CRAB_SYNTHESIS, report, giveError=False) == 'y'
+
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Running the Apertium transfer engine...'))
+
+    if not RunApertium.runApertium(DB, configMap, report):
+        return False
+
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Converting target words to synthesizer format...'))
+
+    if not ConvertTextToSTAMPformat.convertToSynthesizerFormat(DB, configMap, report, session):
+        return False
+
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Synthesizing target text...'))
+
+    if hermitCrab:
+        return DoHermitCrabSynthesis.doHermitCrab(DB, report, configMap, session)
+    else:
+        return DoStampSynthesis.doStamp(DB, report, configMap, session)
+
+# Split the tests into shards and run transfer and synthesis on all of them at once
+def runSharded(DB, configMap, report, session, numShards, shardsFolder):
+
+    analyzedTextPath = ReadConfig.getConfigVal(configMap, ReadConfig.ANALYZED_TEXT_FILE, report)
+    transferResultsPath = ReadConfig.getConfigVal(configMap, ReadConfig.TRANSFER_RESULTS_FILE, report)
+    synthesisPath = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_SYNTHESIS_FILE, report)
+    affixFile = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_AFFIX_GLOSS_FILE, report)
+    hermitCrab = ReadConfig.getConfigVal(configMap, ReadConfig.HERMIT_CRAB_SYNTHESIS, report, giveError=False) == 'y'
+
+    if not (analyzedTextPath and transferResultsPath and synthesisPath and affixFile):
+        return False
+
+    shardList = TestbedRunner.splitDumpFile(analyzedTextPath, numShards, shardsFolder)
+
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Running the tests in {numShards} parts at the same time.').format(numShards=numShards))
+
+    ## Transfer
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Running the Apertium transfer engine...'))
+
+    if not RunApertium.runApertium(DB, configMap, report, shardList):
+        return False
+
+    # Put the whole transfer results file together so it can be looked at like after a normal run
+    TestbedRunner.mergeShardFiles(shardList, 'transferResultsPath', transferResultsPath)
+
+    # Same for the logs, this way the transfer trace covers all the tests
+    if all(os.path.exists(shard.logPath) for shard in shardList):
+
+        TestbedRunner.mergeShardFiles(shardList, 'logPath', os.path.join(FTPaths.BUILD_DIR, TestbedRunner.APERTIUM_LOG_FILE))
+
+    ## Convert to synthesizer format. This uses the target project, so it's done one shard at a time.
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Converting target words to synthesizer format...'))
+
+    for shard in shardList:
+
+        startTime = time.perf_counter()
+        errorList = ConvertTextToSTAMPformat.convert_to_STAMP(DB, configMap, shard.anaPath, affixFile, shard.transferResultsPath, hermitCrab, shard.masterPath, report, session)
+        shard.stepTimes['conversion'] = time.perf_counter() - startTime
+
+        if not reportProblems(errorList, report):
+            return False
+
+    ## Synthesis
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Synthesizing target text...'))
+
+    if hermitCrab:
+
+        HCconfigPath = ReadConfig.getConfigVal(configMap, ReadConfig.HERMIT_CRAB_CONFIG_FILE, report)
+
+        if not HCconfigPath:
+            return False
+
+        if not reportProblems(DoHermitCrabSynthesis.extractHermitCrabConfig(DB, configMap, HCconfigPath, report, useCacheIfAvailable=True, session=session), report):
+            return False
+
+        synthFunc = lambda shard: DoHermitCrabSynthesis.synthesizeWithHermitCrab(configMap, HCconfigPath, shard.synthesisPath, shard.parsesPath, shard.masterPath,
+                                                                                 shard.surfaceFormsPath, shard.transferResultsPath)
+    else:
+        errorList = DoStampSynthesis.extract_target_lex(DB, configMap, report, useCacheIfAvailable=True, session=session)
+        cmdFileName, cleanUpText = DoStampSynthesis.prepareSynthesis(configMap, errorList, report)
+
+        if not reportProblems(errorList, report) or not cmdFileName:
+            return False
+
+        synthFunc = lambda shard: DoStampSynthesis.runStamp(cmdFileName, shard.anaPath, shard.synthesisPath, cleanUpText) or []
+
+    # The shards don't report anything themselves, the problems get reported here in shard order
+    for errorList in TestbedRunner.runShardStep(shardList, 'synthesis', synthFunc):
+
+        if not reportProblems(errorList, report):
+            return False
+
+    TestbedRunner.mergeShardFiles(shardList, 'synthesisPath', synthesisPath)
+
+    # Let the user know how long each shard took
+    report.Blank()
+
+    for shard in shardList:
+
+        report.Info(_translate("RunTestbed", 'Part {timing}').format(timing=shard.getTimingStr()))
+
+    return True
+
+# Run transfer and synthesis on the tests in the analyzed text file, in shards if there are enough tests
+def runTransferAndSynthesis(DB, configMap, report, session, numTests, maxShards):
+
+    numShards = TestbedRunner.getNumShards(numTests, maxShards)
+
+    if numShards == 1:
+
+        return runSerially(DB, configMap, report, session)
+
+    with tempfile.TemporaryDirectory(prefix=SHARDS_FOLDER_PREFIX, dir=FTPaths.BUILD_DIR) as shardsFolder:
+
+        return runSharded(DB, configMap, report, session, numShards, shardsFolder)
+
+# Get ready to find the tests affected by changes. Returns None if there was a problem.
+def getImpact(configMap, report, session):
+
+    resultsPath = ReadConfig.getConfigVal(configMap, ReadConfig.TESTBED_RESULTS_FILE, report)
+    rulesPath = ReadConfig.getConfigVal(configMap, ReadConfig.TRANSFER_RULES_FILE, report)
+    dictionaryPath = ReadConfig.getConfigVal(configMap, ReadConfig.BILINGUAL_DICTIONARY_FILE, report)
+
+    if not (resultsPath and rulesPath and dictionaryPath):
+        return None
+
+    if not (targetFingerprint := TranslateText.getTargetFingerprint(configMap, report, session)):
+        return None
+
+    otherRulesPathList = [ReadConfig.getConfigVal(configMap, key, report, giveError=False) for key in [ReadConfig.TRANSFER_RULES_FILE2, ReadConfig.TRANSFER_RULES_FILE3]]
+
+    impact = TestbedImpact.TestbedImpact(Testbed.getResultsStoreDir(resultsPath))
+    impact.hashInputs(rulesPath, otherRulesPathList, dictionaryPath, [targetFingerprint, BuildManifest.hashConfigValues(configMap, IMPACT_SETTINGS)])
+
+    return impact
+
+# Only run the tests affected by what changed since they were last run. The other tests get their last result.
+def runAffectedTests(DB, configMap, report, session, impact, forceAll, maxShards):
+
+    analyzedTextPath = ReadConfig.getConfigVal(configMap, ReadConfig.ANALYZED_TEXT_FILE, report)
+    synthesisPath = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_SYNTHESIS_FILE, report)
+
+    if not (analyzedTextPath and synthesisPath):
+        return False
+
+    with open(analyzedTextPath, encoding='utf-8') as f:
+
+        dumpLineList = f.readlines()
+
+    selection = impact.selectTests(dumpLineList, forceAll)
+    rerunIndexList = selection.getRerunIndexes()
+    rerunLineList = [dumpLineList[i] for i in rerunIndexList]
+    resultMap = {i: impact.getSavedResult(dumpLineList[i]) for i in selection.carriedList}
+
+    report.Blank()
+    report.Info(_translate("RunTestbed", '{numRun} of {numTests} tests need to be run. {numSkipped} tests are not affected by any changes and will use their last result.')\
+                .format(numRun=len(rerunLineList), numTests=len(dumpLineList), numSkipped=len(selection.carriedList)))
+
+    if rerunLineList:
+
+        # Only the tests to be run go in the analyzed text file. The whole testbed gets put back afterwards.
+        try:
+            Utils.writeFileAtomically(analyzedTextPath, ''.join(rerunLineList))
+
+            if not runTransferAndSynthesis(DB, configMap, report, session, len(rerunLineList), maxShards):
+                return False
+        finally:
+            Utils.writeFileAtomically(analyzedTextPath, ''.join(dumpLineList))
+
+        # One line per test, missing lines give an empty result
+        with open(synthesisPath, encoding='utf-8') as f:
+
+            resultList = f.read().split('\n')
+
+        resultList = (resultList + [''] * len(rerunLineList))[:len(rerunLineList)]
+
+        # See which rules fired for each test. If there is no trace, the tests depend on all the rules.
+        traceList = TestbedImpact.readTransferTrace(os.path.join(FTPaths.BUILD_DIR, TestbedRunner.APERTIUM_LOG_FILE))
+
+        if traceList is None:
+            testRulesList = [None] * len(rerunLineList)
+        else:
+            testRulesList = TestbedImpact.alignRulesToTests(rerunLineList, traceList)
+
+        impact.recordTests(rerunLineList, testRulesList, resultList)
+        resultMap.update(zip(rerunIndexList, resultList))
+
+    # Put the results for all the tests in the synthesis file in test order like a normal run would
+    Utils.writeFileAtomically(synthesisPath, ''.join(resultMap[i] + '\n' for i in range(len(dumpLineList))))
+    impact.save(dumpLineList)
+
+    reportPath = os.path.join(FTPaths.BUILD_DIR, TestbedImpact.IMPACT_REPORT_FILE)
+    TestbedImpact.writeReport(reportPath, dumpLineList, selection)
+
+    report.Info(_translate("RunTestbed", 'The list of tests that were run and skipped is in {reportPath}.').format(reportPath=Utils.getPathRelativeToWorkProjectsDir(reportPath)))
+
+    return True
+
+# Run all the steps. maxShards can limit how many shards get used, 1 means run everything the normal way.
+# forceAll runs all the tests even if data is cached and they aren't affected by any changes.
+def runTestbed(DB, configMap, report, session, maxShards=None, forceAll=False):
+
+    ## Start the testbed run
+    report.Info(_translate("RunTestbed", 'Starting the testbed...'))
+
+    numTests = StartTestbed.startTestbed(DB, configMap, report)
+
+    if not numTests:
+        return None
+
+    ## Build the bilingual lexicon
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Building the bilingual lexicon...'))
+
+    if not Utils.processErrorList(ExtractBilingualLexicon.extract_bilingual_lex(DB, configMap, report, useCacheIfAvailable=True, session=session), report):
+        return None
+
+    ## Catalog Target Affixes
+    affixFile = ReadConfig.getConfigVal(configMap, ReadConfig.TARGET_AFFIX_GLOSS_FILE, report)
+
+    if not affixFile:
+        return None
+
+    report.Blank()
+    report.Info(_translate("RunTestbed", 'Cataloging target affixes...'))
+
+    if not Utils.processErrorList(CatalogTargetAffixes.catalog_affixes(DB, configMap, affixFile, report, useCacheIfAvailable=True, session=session), report):
+        return None
+
+    ## Transfer and synthesis. If the user wants data cached, only the tests affected by changes get run.
+    if ReadConfig.getConfigVal(configMap, ReadConfig.CACHE_DATA, report, giveError=False) == 'y':
+
+        forceAll = forceAll or ReadConfig.getConfigVal(configMap, ReadConfig.TESTBED_RUN_ALL_TESTS, report, giveError=False) == 'y'
+
+        if not (impact := getImpact(configMap, report, session)):
+            return None
+
+        if not runAffectedTests(DB, configMap, report, session, impact, forceAll, maxShards):
+            return None
+
+    elif not runTransferAndSynthesis(DB, configMap, report, session, numTests, maxShards):
+        return None
+
+    ## Put the results in the testbed log
+    report.Blank()
+
+    return EndTestbed.endTestbed(configMap, report)
+
+#----------------------------------------------------------------
+# The main processing function
+def MainFunction(DB, report, modify=True):
+
+    translators = []
+    app = QApplication.instance()
+
+    if app is None:
+        app = QApplication([])
+
+    Utils.loadTranslations(librariesToTranslate + [TRANSL_TS_NAME],
+                           translators, loadBase=True)
+
+    # Read the configuration file which we assume is in the current directory.
+    configMap = ReadConfig.readConfig(report)
+
+    if not configMap:
+        return
+
+    # Log the start of this module on the analytics server if the user allows logging.
+    Mixpanel.LogModuleStarted(configMap, report, docs[FTM_Name], docs[FTM_Version])
+
+    startTime = time.perf_counter()
+
+    # Open the target project only once for all the steps that need it. It gets closed at the end.
+    with Utils.ProjectSession() as session:
+
+        count = runTestbed(DB, configMap, report, session)
+
+    if count:
+        report.Info(_translate("RunTestbed", 'Testbed run complete in {seconds:.1f} seconds.').format(seconds=time.perf_counter() - startTime))
+
+#----------------------------------------------------------------
+# The name 'FlexToolsModule' must be defined like this:
+FlexToolsModule = FlexToolsModuleClass(runFunction = MainFunction,
+                                       docs = docs)
+
+#----------------------------------------------------------------
+if __name__ == '__main__':
+    FlexToolsModule.Help()
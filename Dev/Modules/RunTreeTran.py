@@ -5,6 +5,22 @@
 #   SIL International
 #   6/10/19
 #
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Removed the check that the filtered file exists. Filtering always writes it or raises an error.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Moved the sentence cache to its own library module. It now gets thrown away when the
+#    contents of the TreeTran program change, not just its path.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Skip running TreeTran when the invoker file, the rules file and the TreeTran program
+#    haven't changed. Otherwise only run TreeTran on sentences that are new or changed and
+#    take the results for the others from a cache in the Build folder.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Filter the invoker file as a stream, writing sentences that parsed straight to the
+#    filtered file. Memory is now bounded by the longest sentence and time is linear.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -55,6 +71,7 @@
 
 import os
 import xml.etree.ElementTree as ET
+from xml.sax.saxutils import quoteattr
 import tempfile
 from subprocess import call
 
@@ -67,6 +84,8 @@ import Mixpanel
 import Utils
 import ReadConfig
 import FTPaths
+import BuildManifest
+from TreeTranSentenceCache import TreeTranSentenceCache, getRulesHash, hashSentence
 from ExtractSourceText import docs as ExtractSourceTextDocs
 
 # Define _translate for convenience
@@ -88,7 +107,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel']
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("RunTreeTran", "Run TreeTran"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.4",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("RunTreeTran", "Run the TreeTran Tool."),
         FTM_Help       : "",
@@ -106,64 +125,180 @@ button is used. """).format(extractSourceTextModule=ExtractSourceTextDocs[FTM_Na
 
 INVOKER_FILE = 'Invoker.xml'   
 VALID_PARSES_FILE = 'valid_parses_for_tree_tran.xml'
+PARTIAL_RESULT_FILE = 'tree_tran_new_sentences_result.xml'
+STAGE_NAME = 'RunTreeTran'
+
+def makeStartTag(tag, attrib):
+
+    return '<' + tag + ''.join(f' {name}={quoteattr(value)}' for name, value in attrib.items()) + '>\n'
+
+# Serialize the records of a sentence. Every record goes on its own line so that the same sentence
+# always comes out the same no matter where it was in the file.
+def sentenceToXML(recList):
+
+    xmlList = []
+
+    for anaRec in recList:
+
+        anaRec.tail = '\n'
+        xmlList.append(ET.tostring(anaRec, encoding='unicode'))
+
+    return ''.join(xmlList)
+
+# Go through a file of anaRec's as a stream and call the given function with the root element and the
+# records of each sentence. A sentence ends with a record that has an Analysis element. Records after
+# the last one of those get passed at the end with None for the analysis node.
+def processSentences(inputFilename, sentenceFunc, startFunc=None):
 
-# Filter the invoker file down to just the sentences that have a syntax parse
-def filterAndLogInvokerParses(inputFilename):
-    
     recsInSent = []
-    deleteList = []
-    wordCount = 0
-    f = open(os.path.join(tempfile.gettempdir(), Utils.GOOD_PARSES_LOG), 'w')
-    
-    try:
-        myETree = ET.parse(inputFilename)
-    except:
-        raise ValueError(_translate("RunTreeTran", 'The Tree Tran Result File has invalid XML content.') + ' (' + inputFilename + ')')
-    
-    myRoot = myETree.getroot()
-    
-    sentCount = 0
-    
-    # Loop through the anaRec's 
-    for anaRec in myRoot:
-        
-        wordCount += 1
-        
-        recsInSent.append(anaRec)
+    depth = 0
+    myRoot = None
+
+    for event, elem in ET.iterparse(inputFilename, events=('start', 'end')):
+
+        if event == 'start':
+
+            if depth == 0:
+
+                myRoot = elem
+
+                if startFunc:
+                    startFunc(myRoot)
+
+            depth += 1
+            continue
+
+        depth -= 1
+
+        # We only care about the anaRec's, i.e. the children of the root
+        if depth != 1:
+            continue
+
+        # Take it out of the tree so memory doesn't grow. The root only ever has this one child so this is quick.
+        myRoot.remove(elem)
+        recsInSent.append(elem)
 
         # get the analysis node if it exists
-        analysisNode = anaRec.find('Analysis')
+        analysisNode = elem.find('Analysis')
         if analysisNode != None:
-            # Set parsed flag.
-            if analysisNode.attrib['count'] == '0':
-                # add this list of records (the whole sentence) to the deletion list
-                deleteList.extend(recsInSent)
-                
-                parsedFlag = '0'
-            else:
-                parsedFlag = '1'
-                
-            # Log the # words and whether it parsed
-            f.write(str(wordCount)+','+parsedFlag+'\n')
-                
+
+            sentenceFunc(recsInSent, analysisNode)
+
             # reset the sentence list
             recsInSent = []
-            wordCount = 0
-            sentCount += 1
 
-    # Remove records if there's no analysis, i.e. no syntax parse
-    for rec in deleteList:
-        myRoot.remove(rec)
-                
-    f.close()
+    if recsInSent:
+
+        sentenceFunc(recsInSent, None)
+
+    return myRoot
+
+# Filter the invoker file down to just the sentences that have a syntax parse. The file gets read
+# as a stream and the records of each sentence are held only until we know if the sentence parsed.
+# Sentences that parsed get written to the filtered file right away, unless they are in the given cache.
+# Returns the filtered file name, the number of sentences and the hashes of the sentences that parsed.
+def filterAndLogInvokerParses(inputFilename, sentenceCache=None):
     
+    sentCount = 0
+    keptHashList = []
+
     # Get a path to the new file in the temp folder        
     filteredFileName = os.path.join(tempfile.gettempdir(), VALID_PARSES_FILE)
+
+    f = open(os.path.join(tempfile.gettempdir(), Utils.GOOD_PARSES_LOG), 'w')
+    fOut = open(filteredFileName, 'w', encoding='utf-8')
     
-    # Write the new filter file
-    myETree.write(filteredFileName, encoding='utf-8', xml_declaration=True)
+    def writeStart(myRoot):
+
+        fOut.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        fOut.write(makeStartTag(myRoot.tag, myRoot.attrib))
+
+    def keepSentence(recsInSent):
+
+        sentXML = sentenceToXML(recsInSent)
+        sentHash = hashSentence(sentXML)
+        keptHashList.append(sentHash)
+
+        if sentenceCache is None or not sentenceCache.contains(sentHash):
+
+            fOut.write(sentXML)
+
+    def filterSentence(recsInSent, analysisNode):
+
+        nonlocal sentCount
+
+        # Records after the last analysis don't belong to a sentence that failed, so keep them
+        if analysisNode is None:
+
+            keepSentence(recsInSent)
+            return
+
+        # Set parsed flag.
+        if analysisNode.attrib['count'] == '0':
+            # drop this list of records (the whole sentence)
+            parsedFlag = '0'
+        else:
+            # write this list of records (the whole sentence)
+            keepSentence(recsInSent)
+            parsedFlag = '1'
+            
+        # Log the # words and whether it parsed
+        f.write(str(len(recsInSent))+','+parsedFlag+'\n')
+        sentCount += 1
+
+    try:
+        myRoot = processSentences(inputFilename, filterSentence, writeStart)
+    except:
+        f.close()
+        fOut.close()
+        os.remove(filteredFileName)
+        raise ValueError(_translate("RunTreeTran", 'The Tree Tran Result File has invalid XML content.') + ' (' + inputFilename + ')')
+
+    fOut.write('</' + myRoot.tag + '>')
+    fOut.close()
+    f.close()
         
-    return filteredFileName, sentCount
+    return filteredFileName, sentCount, keptHashList
+
+# Run TreeTran on just the sentences that aren't in the cache and put the results in the cache.
+# Returns False if TreeTran didn't give back one result for each sentence it was given.
+def runTreeTranOnNewSentences(rulesFilePath, filteredFile, newHashList, sentenceCache):
+
+    partialResultFile = os.path.join(tempfile.gettempdir(), PARTIAL_RESULT_FILE)
+    resultList = []
+
+    if os.path.exists(partialResultFile):
+        os.remove(partialResultFile)
+
+    call([FTPaths.TREETRAN_EXE, rulesFilePath, filteredFile, partialResultFile])
+
+    def saveStart(myRoot):
+
+        sentenceCache.rootTag = myRoot.tag
+        sentenceCache.rootAttrib = dict(myRoot.attrib)
+
+    try:
+        processSentences(partialResultFile, lambda recsInSent, analysisNode: resultList.append(sentenceToXML(recsInSent)), saveStart)
+    except:
+        return False
+
+    if len(resultList) != len(newHashList):
+        return False
+
+    for sentHash, resultXML in zip(newHashList, resultList):
+
+        sentenceCache.addResult(sentHash, resultXML)
+
+    return True
+
+# Put together the result file from the cached results of each sentence in order
+def writeResultFileFromCache(treeTranResultFile, keptHashList, sentenceCache):
+
+    xmlList = ["<?xml version='1.0' encoding='utf-8'?>\n", makeStartTag(sentenceCache.rootTag, sentenceCache.rootAttrib)]
+    xmlList.extend(sentenceCache.getResult(sentHash) for sentHash in keptHashList)
+    xmlList.append('</' + sentenceCache.rootTag + '>')
+
+    Utils.writeFileAtomically(treeTranResultFile, ''.join(xmlList))
 
 #----------------------------------------------------------------
 # The main processing function
@@ -198,14 +333,6 @@ def MainFunction(DB, report, modify=True):
     # Create a path to the temporary folder + invoker file
     invokerFile = os.path.join(tempfile.gettempdir(), INVOKER_FILE)
     
-    # Filter the invoker file down to just the sentences that have a syntax parse
-    filteredFile, sentCount = filterAndLogInvokerParses(invokerFile)
-    
-    # verify the filtered file exists
-    if os.path.exists(filteredFile) == False:
-        report.Error(_translate("RunTreeTran", 'There is a problem with the TreeTran input file: {filteredFile}. Has the PC-PATR with FLEx program been run correctly?').format(filteredFile=filteredFile))
-        return
-    
     # Get the TreeTran rules file path
     treeTranRules = ReadConfig.getConfigVal(configMap, ReadConfig.TREETRAN_RULES_FILE, report)
     if not treeTranRules:
@@ -221,10 +348,42 @@ def MainFunction(DB, report, modify=True):
         report.Error(_translate("RunTreeTran", 'Can\'t find the TreeTran rules file: {rulesFilePath}.').format(rulesFilePath=rulesFilePath))
         return
     
-    # run TreeTran
-    call([FTPaths.TREETRAN_EXE, rulesFilePath, filteredFile, treeTranResultFile])
+    # If the invoker file, the rules and the TreeTran program are the same as last time and the results
+    # haven't been touched, there's nothing to do.
+    rulesHash = getRulesHash(rulesFilePath, FTPaths.TREETRAN_EXE)
+    inputMap = {'invoker': BuildManifest.hashFile(invokerFile), 'rules': rulesHash}
+    outputList = [treeTranResultFile, os.path.join(tempfile.gettempdir(), Utils.GOOD_PARSES_LOG)]
+    manifest = BuildManifest.BuildManifest()
+
+    if manifest.isUpToDate(STAGE_NAME, inputMap, outputList):
+
+        report.Info(_translate("RunTreeTran", 'The invoker file and the TreeTran rules have not changed. Using the results from last time.'))
+        return
+
+    manifest.forgetStage(STAGE_NAME)
+    sentenceCache = TreeTranSentenceCache(rulesHash)
+
+    # Filter the invoker file down to just the sentences that have a syntax parse and that aren't in the cache
+    filteredFile, sentCount, keptHashList = filterAndLogInvokerParses(invokerFile, sentenceCache)
+    
+    # run TreeTran on the new or changed sentences and put the results together with the cached ones
+    newHashList = [sentHash for sentHash in keptHashList if not sentenceCache.contains(sentHash)]
     
+    if (newHashList or sentenceCache.rootTag is None) and not runTreeTranOnNewSentences(rulesFilePath, filteredFile, newHashList, sentenceCache):
+
+        # The results couldn't be matched up with the sentences, run TreeTran on everything
+        filteredFile, sentCount, keptHashList = filterAndLogInvokerParses(invokerFile)
+        call([FTPaths.TREETRAN_EXE, rulesFilePath, filteredFile, treeTranResultFile])
+        newHashList = keptHashList
+    else:
+        writeResultFileFromCache(treeTranResultFile, keptHashList, sentenceCache)
+        sentenceCache.save()
+    
+    manifest.recordStage(STAGE_NAME, inputMap, outputList)
+    manifest.save()
+
     report.Info(_translate("RunTreeTran", '{num} sentence(s) processed.').format(num=str(sentCount)))
+    report.Info(_translate("RunTreeTran", '{num} new or changed sentence(s) were run through TreeTran.').format(num=str(len(newHashList))))
     
 #----------------------------------------------------------------
 # The name 'FlexToolsModule' must be defined like this:
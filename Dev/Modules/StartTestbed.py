@@ -5,6 +5,12 @@
 #   SIL International
 #   6/9/2018
 #
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Moved the work into startTestbed so Run Testbed can call it.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Only load the latest testbed run. The new run gets added to the results store.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -52,7 +58,7 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Testbed', 'TestbedValidator', 'M
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name: _translate("StartTestbed", "Start Testbed"),
-        FTM_Version: "3.15",
+        FTM_Version: "3.15.2",
         FTM_ModifiesDB: False,
         FTM_Synopsis: _translate("StartTestbed", "Initialize the testbed log and create source text from the testbed."),
         FTM_Help: "",
@@ -85,7 +91,7 @@ def init_new_result(DB, report):
     testbedXMLObj = testbedFileObj.getFLExTransTestbedXMLObject()
 
     # Create an object for the testbed results file
-    resultsFileObj = FlexTransTestbedResultsFile(report)
+    resultsFileObj = FlexTransTestbedResultsFile(report, latestOnly=True)
 
     # Initialize the testbed run
     resultsXMLObj = resultsFileObj.getResultsXMLObj()
@@ -113,13 +119,18 @@ def MainFunction(DB, report, modifyAllowed):
     if not configMap:
         return
 
+    # Log the start of this module on the analytics server if the user allows logging.
+    Mixpanel.LogModuleStarted(configMap, report, docs[FTM_Name], docs[FTM_Version])
+
+    startTestbed(DB, configMap, report)
+
+# Start a new testbed run and dump the tests into the analyzed text file. Returns the number of tests or None.
+def startTestbed(DB, configMap, report):
+
     # Get the output file name
     outFileVal = ReadConfig.getConfigVal(configMap, ReadConfig.ANALYZED_TEXT_FILE, report)
     if not outFileVal:
-        return
-
-    # Log the start of this module on the analytics server if the user allows logging.
-    Mixpanel.LogModuleStarted(configMap, report, docs[FTM_Name], docs[FTM_Version])
+        return None
 
     # Open the output file
     try:
@@ -131,12 +142,13 @@ def MainFunction(DB, report, modifyAllowed):
                 "There is a problem with the Analyzed Text Output File path: {outFileVal}. Please check the configuration file setting."
             ).format(outFileVal=outFileVal)
         )
-        return
+        return None
 
     # Initialize a new test in the test log XML file
     resultsXMLObj = init_new_result(DB, report)
     if resultsXMLObj == None:
-        return
+        f_out.close()
+        return None
 
     # Dump testbed source lexical units into the source_text.aper file
     count = resultsXMLObj.dump(f_out)
@@ -147,6 +159,8 @@ def MainFunction(DB, report, modifyAllowed):
         _translate("StartTestbed", "{count} tests prepared for testing.").format(count=count)
     )
 
+    return count
+
 
 
 #----------------------------------------------------------------
@@ -5,6 +5,22 @@
 #   SIL International
 #   6/22/18
 #
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Don't check for rows to fill in on every repaint. Do it when the scroll range changes or the
+#    window is resized instead.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Make the widgets for the rows that come into view when a run is collapsed or the font size changes.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Right-click on a run to see which tests started failing, started passing or went back and
+#    forth since the run before or up to the newest run. This uses the testbed trend index.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Fill in the tree as it's needed. Runs come from the results store index and are added 25 at
+#    a time as the user scrolls. A run's tests are only loaded when the run is expanded. The html
+#    for a test is made the first time it's shown and kept in a cache of limited size.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -51,6 +67,7 @@ import os
 import re
 import sys
 import unicodedata
+from collections import OrderedDict
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from subprocess import call
@@ -68,6 +85,7 @@ import FTPaths
 import Utils
 import ReadConfig
 from Testbed import *
+import TestbedTrends
 from TestbedLog import Ui_TestbedLogWindow
 
 # Define _translate for convenience
@@ -89,12 +107,13 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'TestbedLog', 'Testbe
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("TestbedLogViewer", "Testbed Log Viewer"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.4",
         FTM_ModifiesDB : False,
         FTM_Synopsis   : _translate("TestbedLogViewer", "View testbed run results."),
         FTM_Help       : "", 
         FTM_Description: _translate("TestbedLogViewer", 
-"""View testbed run results. The number of results to display is set by default to 25. Change MAX_RESULTS_TO_DISPLAY to a different value as needed.""")}
+"""View testbed run results. The newest 25 results are shown first, more are added as you scroll down. Change MAX_RESULTS_TO_DISPLAY to a different value as needed.
+Right-click on a result to see which tests changed since the result before it or up to the newest result.""")}
                  
 #app.quit()
 #del app
@@ -102,7 +121,8 @@ docs = {FTM_Name       : _translate("TestbedLogViewer", "Testbed Log Viewer"),
 GREEN_CHECK =     'Light_green_check.png'        
 RED_X =           'Red_x.png'
 YELLOW_TRIANGLE = 'Yellow_triangle.png'
-MAX_RESULTS_TO_DISPLAY = 25
+MAX_RESULTS_TO_DISPLAY = 25 # how many runs get added at a time
+HTML_CACHE_SIZE = 5000
 
 color_re = re.compile('color:#......')
 colorNumPunc = 'color:#'+PUNC_COLOR
@@ -124,6 +144,10 @@ class Stats():
             return 0
         
         return startDT.secsTo(endDT)
+
+    @classmethod
+    def fromRunSummary(cls, summary):
+        return cls(summary['start'], summary['end'], summary['numTests'], summary['failed'], summary['invalid'])
         
     def getTestResultSummary(self):
         if self.numFailed > 0:
@@ -139,7 +163,34 @@ class Stats():
         outputLUSpan(p, myColor, myStr, False) #rtl
         return ET.tostring(p, encoding='unicode')
 
-    
+
+# Keeps the html of the most recently shown cells. The same test is often in many runs, so
+# its html only gets made once. The least recently used html is dropped when the cache is full.
+class HtmlCache():
+    def __init__(self, maxSize=HTML_CACHE_SIZE):
+        self.__maxSize = maxSize
+        self.__htmlMap = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, makeHtmlFunc):
+        if key in self.__htmlMap:
+            self.hits += 1
+            self.__htmlMap.move_to_end(key)
+            return self.__htmlMap[key]
+
+        self.misses += 1
+        html = makeHtmlFunc()
+        self.__htmlMap[key] = html
+
+        if len(self.__htmlMap) > self.__maxSize:
+            self.__htmlMap.popitem(last=False)
+
+        return html
+
+    def __len__(self):
+        return len(self.__htmlMap)
+
 # An item that can be used to populate a tree view, knowing it's place in the model
 class BaseTreeItem(object):
     
@@ -147,13 +198,14 @@ class BaseTreeItem(object):
         self.parent = inParentItem
         self.rtl = rtl
         self.children = []
-        self.index = None
         self.widget = [None, None, None]
+        self.row = 0
     
     def isRTL(self):
         return self.rtl
     
     def AddChild(self, inChild):
+        inChild.row = len(self.children)
         self.children.append(inChild)
     
     def GetChildCount(self):
@@ -175,9 +227,11 @@ class BaseTreeItem(object):
         return self.parent
     
     def Row(self):
-        if self.parent:
-            return self.parent.children.index(self)
-        return 0
+        return self.row
+
+    # Items that have children that haven't been loaded yet say so here
+    def HasChildren(self):
+        return self.GetChildCount() > 0
     def createTheWidget(self, col):
         return QtWidgets.QLabel()
     
@@ -200,14 +254,19 @@ class RootTreeItem(BaseTreeItem):
         return ""
     
 class TestStatsItem(BaseTreeItem):
-    def __init__(self, inParent, rtl, statsObj):
+    def __init__(self, inParent, rtl, statsObj, runId, localizedDTformatter):
         
         super(TestStatsItem, self).__init__(inParent, rtl)
         self.statsObj = statsObj
-        self.localizedDTformatter = Utils.LocalizedDateTimeFormatter()
+        self.runId = runId
+        self.testsLoaded = False
+        self.localizedDTformatter = localizedDTformatter
         
     def ColumnCount(self):
         return 3
+
+    def HasChildren(self):
+        return self.statsObj.totalTests > 0
     
     def Data(self, inColumn):
         # Date and time of the test
@@ -246,15 +305,16 @@ class TestStatsItem(BaseTreeItem):
 
 class TestResultItem(BaseTreeItem):
     
-    def __init__(self, inParent, rtl, LUString, formattedLexicalUnitsString, expectedStr, actualStr, valid, origin, invalidReason, greenCheck, redX, yellowTriangle):
+    # The html for the test is made when it's needed and kept in the html cache
+    def __init__(self, inParent, rtl, test, htmlCache, greenCheck, redX, yellowTriangle):
         super(TestResultItem, self).__init__(inParent, rtl)
-        self.unformattedLexicalUnitsString = LUString
-        self.formattedLexicalUnitsString = formattedLexicalUnitsString
-        self.expectedStr = expectedStr
-        self.actualStr = actualStr
-        self.invalid = not valid
-        self.origin = origin
-        self.invalidReason = invalidReason
+        self.test = test
+        self.htmlCache = htmlCache
+        self.expectedStr = test.getExpectedResult()
+        self.actualStr = test.getActualResult()
+        self.invalid = not test.isValid()
+        self.origin = test.getOrigin()
+        self.invalidReason = test.getInvalidReason()
         self.greenCheck = greenCheck
         self.redX = redX
         self.yellowTriangle = yellowTriangle
@@ -269,27 +329,38 @@ class TestResultItem(BaseTreeItem):
         return self.invalid
     
     def getFormattedLUString(self):
-        return self.formattedLexicalUnitsString
+        return self.htmlCache.get(('lu', self.getLUString(), self.isRTL(), self.isInvalid()), self.makeFormattedLUString)
     
     def getLUString(self):
-        return self.unformattedLexicalUnitsString
+        return self.test.getLUString()
     
+    def makeFormattedLUString(self):
+        myStr = self.test.getFormattedLUString(self.isRTL())
+
+        # Change the colors to orange when it's invalid
+        if self.isInvalid():
+            myStr = color_re.sub(colorNumPunc, myStr) 
+
+        return myStr
+
+    def makeResultString(self):
+        if self.testFailed():
+            p = ET.Element('p')
+            outputLUSpan(p, NOT_FOUND_COLOR, self.actualStr, False) #rtl
+            return ET.tostring(p, encoding='unicode')
+        else:
+            # Repeate the expected result in the actual result column
+            p = ET.Element('p')
+            outputLUSpan(p, SUCCESS_COLOR, self.expectedStr, False) #rtl
+            return ET.tostring(p, encoding='unicode')
+
     def ColumnCount(self):
         return 3
     
     def Data(self, inColumn):
         # Lexical units
         if inColumn == 0:
-            if self.isInvalid():
-                
-                myStr = self.getFormattedLUString()
-                
-                # Change the colors to orange when it's invalid
-                myStr = color_re.sub(colorNumPunc, myStr) 
-                
-                return myStr
-            else:
-                return self.getFormattedLUString() 
+            return self.getFormattedLUString()
             
         # Expected results
         elif inColumn == 1:
@@ -299,15 +370,7 @@ class TestResultItem(BaseTreeItem):
         elif inColumn == 2:
             if self.isInvalid():
                 return 'n/a'
-            elif self.testFailed():
-                p = ET.Element('p')
-                outputLUSpan(p, NOT_FOUND_COLOR, self.actualStr, False) #rtl
-                return ET.tostring(p, encoding='unicode')
-            else:
-                # Repeate the expected result in the actual result column
-                p = ET.Element('p')
-                outputLUSpan(p, SUCCESS_COLOR, self.expectedStr, False) #rtl
-                return ET.tostring(p, encoding='unicode')
+            return self.htmlCache.get(('result', self.expectedStr, self.actualStr), self.makeResultString)
         return ''
     
     def createTheWidget(self, col):
@@ -373,27 +436,32 @@ class ITWidget(QtWidgets.QWidget):
     def setToolTip(self, myTip):
         self.textLabel.setToolTip(myTip)
         
+# The runs come from the results store index, MAX_RESULTS_TO_DISPLAY at a time as the view asks for more.
+# A run's tests are read from its segment the first time the run is expanded.
 class TestbedLogModel(QtCore.QAbstractItemModel):
     
-    def __init__(self, resultsXMLObj, parent = None):
+    def __init__(self, resultsStore, parent = None):
 
         self.__view = None
-        self.rtl = resultsXMLObj.isRTL()
+        self.resultsStore = resultsStore
+
+        # Only finished runs get shown
+        self.runSummaries = [summary for summary in resultsStore.getRunSummaries() if summary['end']]
+        self.rtl = any(summary.get('rtl', False) for summary in self.runSummaries)
         self.greenCheck = QtGui.QPixmap(os.path.join(FTPaths.TOOLS_DIR, GREEN_CHECK)) 
         self.redX = QtGui.QPixmap(os.path.join(FTPaths.TOOLS_DIR, RED_X))
         self.yellowTriangle = QtGui.QPixmap(os.path.join(FTPaths.TOOLS_DIR, YELLOW_TRIANGLE))
-        self.__cache = {}
+        self.htmlCache = HtmlCache()
+        self.localizedDTformatter = Utils.LocalizedDateTimeFormatter()
         
         # initialize base class
         super(TestbedLogModel, self).__init__(parent)
         
-        self.resultsXMLObj = resultsXMLObj
-        
         # set the root item to add other items to
         self.rootItem = RootTreeItem()
         
-        # setup the data
-        self.SetupModelData()
+        # setup the first runs
+        self.fetchMore(QtCore.QModelIndex())
     
     def getRTL(self):
         return self.rtl
@@ -401,100 +469,103 @@ class TestbedLogModel(QtCore.QAbstractItemModel):
     def setView(self, view):
         self.__view = view
 
-    def getStats(self, resultObj):
-        
-        dateTimeStart = resultObj.getStartDateTime()
-        dateTimeEnd = resultObj.getEndDateTime()
-        
-        totalTests = resultObj.getNumTests()
-        
-        (numFailed, numInvalid) = resultObj.getFailedAndInvalid()
-        
-        # Create a statistics object with the data from this result
-        statsObj = Stats(dateTimeStart, dateTimeEnd, totalTests, numFailed, numInvalid)
-        
-        return statsObj
-        
-    def SetupModelData(self):
-        
-        objList = self.resultsXMLObj.getTestbedResultXMLObjectList()
-        maxResults = len(objList)
-        
-        # Set max test results to display
-        if maxResults > MAX_RESULTS_TO_DISPLAY:
-            maxResults = MAX_RESULTS_TO_DISPLAY
+    # Run ids of the finished runs, newest first
+    def getRunIds(self):
+        return [summary['id'] for summary in self.runSummaries]
 
-        resultsCount = 1
-        
-        # Loop through the test results
-        for resultObj in objList: # Just show the last X
-            
-            if resultsCount > maxResults:
-                break
-            
-            # If this is an incomplete test (no end date-time), skip it
-            if resultObj.isIncomplete():
-                continue
-            
-            resultsCount += 1
-            
-            # Set the stats branch of the tree
-            statsObj = self.getStats(resultObj)
-            statsItem = TestStatsItem(self.rootItem, self.getRTL(), statsObj)
-            
-            ## Set the leaves on this branch -- each individual test result
-            # Loop through the testbeds
-            for testbed in resultObj.getFLExTransTestbedXMLObjectList():
-                # Loop through the tests
-                for i, test in enumerate(testbed.getTestXMLObjectList()):
-                    
-                    # Use the dump of the test XML node as the hash key
-                    testNodeStr = ET.tostring(test.getTestNode(), encoding='unicode')
+    def getRunDateStr(self, runId):
+        summary = next(summary for summary in self.runSummaries if summary['id'] == runId)
+        return self.localizedDTformatter.formatDateTime(QDateTime.fromString(summary['start'], XML_DATETIME_FORMAT_QT))
 
-                    # But remove the unique id in the string
-                    myHash = 1 # hash(Utils.removeTestID(testNodeStr))
-                    
-                    # Check if we have cached this test object and use it if we have
-                    if myHash in self.__cache:
-                        
-                        resultItem = self.__cache[myHash]
-                    # Otherwise build the TestResultItem object and then add it to the cache
-                    else:
-                        resultItem = TestResultItem(statsItem,  self.getRTL(), test.getLUString(), test.getFormattedLUString(self.getRTL()), test.getExpectedResult(), \
-                                  test.getActualResult(), test.isValid(), test.getOrigin(), test.getInvalidReason(), self.greenCheck, self.redX, self.yellowTriangle)
-                        
-                        #self.__cache[myHash] = resultItem
-                                     
-                    # Add the result item to the current stats item
-                    statsItem.AddChild(resultItem)
-            
-            # Add to the root
+    # Compare two runs using the trend index. Runs that aren't in the index yet get added.
+    def diffRuns(self, fromRunId, toRunId):
+        trendIndex = TestbedTrends.TrendIndex(self.resultsStore.getStoreDir())
+
+        if not (trendIndex.hasRun(fromRunId) and trendIndex.hasRun(toRunId)):
+            trendIndex.addMissingRuns(self.resultsStore)
+            trendIndex.save()
+
+        return trendIndex.diffRuns(fromRunId, toRunId)
+
+    def __getItem(self, parentindex):
+        if parentindex.isValid():
+            return parentindex.internalPointer()
+        return self.rootItem
+
+    def hasChildren(self, parentindex):
+        if parentindex.column() > 0:
+            return False
+        return self.__getItem(parentindex).HasChildren()
+
+    def canFetchMore(self, parentindex):
+        item = self.__getItem(parentindex)
+
+        if item == self.rootItem:
+            return item.GetChildCount() < len(self.runSummaries)
+
+        if isinstance(item, TestStatsItem):
+            return not item.testsLoaded
+
+        return False
+
+    def fetchMore(self, parentindex):
+        item = self.__getItem(parentindex)
+
+        if item == self.rootItem:
+            self.__addRuns()
+
+        elif isinstance(item, TestStatsItem) and not item.testsLoaded:
+            self.__addTests(parentindex, item)
+
+    # Add the next bunch of runs from the index, no run gets read yet
+    def __addRuns(self):
+        start = self.rootItem.GetChildCount()
+        summaryList = self.runSummaries[start:start+MAX_RESULTS_TO_DISPLAY]
+
+        if not summaryList:
+            return
+
+        self.beginInsertRows(QtCore.QModelIndex(), start, start+len(summaryList)-1)
+
+        for summary in summaryList:
+            statsItem = TestStatsItem(self.rootItem, self.getRTL(), Stats.fromRunSummary(summary), summary['id'], self.localizedDTformatter)
             self.rootItem.AddChild(statsItem)
 
+        self.endInsertRows()
+
+    # Read the run's segment and add a leaf for each test result
+    def __addTests(self, parentindex, statsItem):
+        statsItem.testsLoaded = True
+        resultObj = TestbedResultXMLObject(None, self.resultsStore.loadRunNode(statsItem.runId))
+        testList = [test for testbed in resultObj.getFLExTransTestbedXMLObjectList() for test in testbed.getTestXMLObjectList()]
+
+        if not testList:
+            return
+
+        self.beginInsertRows(parentindex, 0, len(testList)-1)
+
+        for test in testList:
+            statsItem.AddChild(TestResultItem(statsItem, self.getRTL(), test, self.htmlCache, self.greenCheck, self.redX, self.yellowTriangle))
+
+        self.endInsertRows()
+
     def index(self, row, column, parentindex): 
         
-        if parentindex.isValid():
-            nodeS = parentindex.internalPointer()
-            nodeX = nodeS.GetChild(row)
-            index = self.__createIndex(row, column, nodeX)
-        else:
-            nodeS = self.rootItem
-            nodeX = nodeS.GetChild(row)
-            index = self.__createIndex(row, column, nodeX)
-        return index
+        return self.createIndex(row, column, self.__getItem(parentindex).GetChild(row))
+
+    # Make the widgets for the row of the given index. This is only done for rows that can be seen
+    # since having a lot of index widgets in the view makes it slow.
+    def createWidgets(self, rowindex):
 
+        node = rowindex.internalPointer()
 
-    def __createIndex(self, row, column, node):
-        if node.index == None:
-            index = self.createIndex(row, column, node)
-            node.index = index
-        if node.widget[column] is None:
-            # Create the needed widget depending on item type
-            widget = node.createTheWidget(column)
-            node.widget[column] = widget
-            self.__view.setIndexWidget(self.createIndex(row, column, node), widget)
+        for column in range(node.ColumnCount()):
 
-        return node.index
+            if node.widget[column] is None:
+                # Create the needed widget depending on item type
+                widget = node.createTheWidget(column)
+                node.widget[column] = widget
+                self.__view.setIndexWidget(rowindex.siblingAtColumn(column), widget)
 
     def parent(self, childindex):
 
@@ -517,13 +588,7 @@ class TestbedLogModel(QtCore.QAbstractItemModel):
         if parentindex.column() > 0:
             return 0
         
-        item = None
-        if not parentindex.isValid():
-            item = self.rootItem
-        else:
-            item = parentindex.internalPointer()
-            
-        return item.GetChildCount()
+        return self.__getItem(parentindex).GetChildCount()
 
     def columnCount(self, parentindex):
         
@@ -551,9 +616,53 @@ class TestbedLogModel(QtCore.QAbstractItemModel):
         
         return QtCore.QVariant()
                 
+# Shows the tests that changed between two runs
+class RunDiffDialog(QtWidgets.QDialog):
+
+    def __init__(self, parent, myDiff, fromDateStr, toDateStr, rtl):
+        super(RunDiffDialog, self).__init__(parent)
+        self.setWindowTitle(_translate("TestbedLogViewer", "Changes from {fromDate} to {toDate}").format(fromDate=fromDateStr, toDate=toDateStr))
+        self.resize(800, 600)
+
+        textBrowser = QtWidgets.QTextBrowser()
+        textBrowser.setHtml(self.makeHtml(myDiff, rtl))
+
+        buttonBox = QDialogButtonBox(QDialogButtonBox.Ok)
+        buttonBox.accepted.connect(self.accept)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(textBrowser)
+        layout.addWidget(buttonBox)
+        self.setLayout(layout)
+
+    def makeHtml(self, myDiff, rtl):
+        body = ET.Element('div')
+
+        if not myDiff.hasChanges():
+            ET.SubElement(body, 'p').text = _translate("TestbedLogViewer", "No tests changed.")
+
+        for heading, color, trendList in [(_translate("TestbedLogViewer", "Newly failing"), NOT_FOUND_COLOR, myDiff.newlyFailing),
+                                          (_translate("TestbedLogViewer", "Newly passing"), SUCCESS_COLOR, myDiff.newlyPassing),
+                                          (_translate("TestbedLogViewer", "Flapping"), PUNC_COLOR, myDiff.flapping),
+                                          (_translate("TestbedLogViewer", "Added"), LEMMA_COLOR, myDiff.added),
+                                          (_translate("TestbedLogViewer", "Removed"), LEMMA_COLOR, myDiff.removed)]:
+            if not trendList:
+                continue
+
+            headingElem = ET.SubElement(body, 'h3')
+            outputLUSpan(headingElem, color, f'{heading} ({len(trendList)})', rtl)
+
+            listElem = ET.SubElement(body, 'ul')
+
+            for trend in trendList:
+                # The outcomes are P for passed, F for failed, I for invalid and - for not run, oldest first
+                ET.SubElement(listElem, 'li').text = f'{trend.luString} [{trend.outcomes}] - {trend.origin}'
+
+        return ET.tostring(body, encoding='unicode')
+
 class LogViewerMain(QMainWindow):
 
-    def __init__(self, resultsXMLObj, testbedPath):
+    def __init__(self, resultsStore, testbedPath):
         QMainWindow.__init__(self)
         self.ui = Ui_TestbedLogWindow()
         self.ui.setupUi(self)
@@ -561,7 +670,7 @@ class LogViewerMain(QMainWindow):
         self.setWindowIcon(QtGui.QIcon(os.path.join(FTPaths.TOOLS_DIR, 'FLExTransWindowIcon.ico')))
         
         self.testbedPath = testbedPath
-        self.__model = TestbedLogModel(resultsXMLObj)
+        self.__model = TestbedLogModel(resultsStore)
         self.ui.logTreeView.setModel(self.__model)
         self.__model.setView(self.ui.logTreeView)
 
@@ -573,6 +682,23 @@ class LogViewerMain(QMainWindow):
         self.ui.editTestbedButton.clicked.connect(self.EditTestbedClicked)
         self.ui.fontSizeSpinBox.valueChanged.connect(self.FontSizeSpinBoxClicked)
 
+        # Right-click on a run to see what changed
+        self.ui.logTreeView.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.ui.logTreeView.customContextMenuRequested.connect(self.showRunMenu)
+
+        # Widgets get made for the rows as they come into view. Anything that moves rows into view without
+        # scrolling (expanding, collapsing, new rows, a new font size, resizing) lays out the rows later, so
+        # the widgets get made after that. The scroll range changes once the new layout is done.
+        self.showRowsTimer = QtCore.QTimer(self)
+        self.showRowsTimer.setSingleShot(True)
+        self.showRowsTimer.timeout.connect(self.showVisibleRows)
+
+        self.ui.logTreeView.verticalScrollBar().valueChanged.connect(self.showVisibleRows)
+        self.ui.logTreeView.expanded.connect(self.scheduleShowVisibleRows)
+        self.ui.logTreeView.collapsed.connect(self.scheduleShowVisibleRows)
+        self.__model.rowsInserted.connect(self.scheduleShowVisibleRows)
+        self.ui.logTreeView.verticalScrollBar().rangeChanged.connect(self.scheduleShowVisibleRows)
+
         # Start the font size at 12
         self.ui.fontSizeSpinBox.setValue(12)
         
@@ -586,9 +712,53 @@ class LogViewerMain(QMainWindow):
         currentSize = self.ui.fontSizeSpinBox.value()
         myFont.setPointSize(currentSize)
         self.ui.logTreeView.setFont(myFont)
+        self.scheduleShowVisibleRows()
         
     def getModel(self):
         return self.__model
+
+    def showRunMenu(self, pos):
+        rowIndex = self.ui.logTreeView.indexAt(pos)
+
+        if not rowIndex.isValid() or not isinstance(rowIndex.internalPointer(), TestStatsItem):
+            return
+
+        runIdList = self.__model.getRunIds()
+        runId = rowIndex.internalPointer().runId
+        runPos = runIdList.index(runId)
+
+        myMenu = QtWidgets.QMenu(self)
+        beforeAction = myMenu.addAction(_translate("TestbedLogViewer", "Show Changes Since the Result Before"))
+        newestAction = myMenu.addAction(_translate("TestbedLogViewer", "Show Changes Up to the Newest Result"))
+        beforeAction.setEnabled(runPos+1 < len(runIdList))
+        newestAction.setEnabled(runPos > 0)
+
+        action = myMenu.exec_(self.ui.logTreeView.viewport().mapToGlobal(pos))
+
+        if action == beforeAction:
+            self.showRunDiff(runIdList[runPos+1], runId)
+
+        elif action == newestAction:
+            self.showRunDiff(runId, runIdList[0])
+
+    def showRunDiff(self, fromRunId, toRunId):
+        myDiff = self.__model.diffRuns(fromRunId, toRunId)
+        dialog = RunDiffDialog(self, myDiff, self.__model.getRunDateStr(fromRunId), self.__model.getRunDateStr(toRunId), self.__model.getRTL())
+        dialog.exec_()
+
+    # Make the widgets for the rows in view once the view has been laid out
+    def scheduleShowVisibleRows(self, *args):
+        self.showRowsTimer.start(0)
+
+    # Make the widgets for the rows that are in view
+    def showVisibleRows(self):
+        view = self.ui.logTreeView
+        bottom = view.viewport().height()
+        rowIndex = view.indexAt(QtCore.QPoint(0, 0))
+
+        while rowIndex.isValid() and view.visualRect(rowIndex).top() < bottom:
+            self.__model.createWidgets(rowIndex)
+            rowIndex = view.indexBelow(rowIndex)
     
     def okClicked(self):
         self.retValue = QDialogButtonBox.Ok
@@ -604,6 +774,7 @@ class LogViewerMain(QMainWindow):
     def resizeEvent(self, event):
         QMainWindow.resizeEvent(self, event)
         self.myResize()
+        self.scheduleShowVisibleRows()
         
     def myResize(self):    
         myWidth = self.ui.logTreeView.width()
@@ -615,6 +786,15 @@ class LogViewerMain(QMainWindow):
         self.ui.logTreeView.setColumnWidth(1, myWidth*3//10-colWidthReduction) 
         self.ui.logTreeView.setColumnWidth(2, myWidth*2//10-colWidthReduction)
     
+# Expand the newest run
+def showFirstRun(window):
+
+    myModel = window.getModel()
+
+    if myModel.rowCount(QtCore.QModelIndex()) > 0:
+
+        window.ui.logTreeView.expand(myModel.index(0, 0, QtCore.QModelIndex()))
+
 def RunTestbedLogViewer(report):
         
     translators = []
@@ -644,22 +824,23 @@ def RunTestbedLogViewer(report):
         report.Error(_translate("TestbedLogViewer", 'Testbed file: {testbedPath} does not exist. Please add tests to the testbed.').format(testbedPath=testbedPath))
         return None
     
-    ## Load the testbed results
-    
-    # Create an object for the testbed results file
-    resultsFileObj = FlexTransTestbedResultsFile(report)
-    
-    # Get previous results
-    resultsXMLObj = resultsFileObj.getResultsXMLObj()
+    resultsPath = ReadConfig.getConfigVal(configMap, ReadConfig.TESTBED_RESULTS_FILE, report)
+
+    if not resultsPath:
+        return
 
-    window = LogViewerMain(resultsXMLObj, testbedPath)
+    ## Open the testbed results. Only the index gets read here, the runs are read when they are expanded.
+    try:
+        resultsStore = TestbedResultsStore(resultsPath)
+    except ValueError as e:
+        report.Error(str(e))
+        return
+
+    window = LogViewerMain(resultsStore, testbedPath)
     
     window.show()
     window.myResize()
-    if len(window.getModel().rootItem.children) > 0:
-        
-        firstIndex = window.getModel().rootItem.children[0].index
-        window.ui.logTreeView.expand(firstIndex)
+    showFirstRun(window)
         
     app.exec_()
 
@@ -5,6 +5,16 @@
 #   SIL International
 #   12/31/24
 #
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Time each step and save a performance report in the Build folder.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Open the target project once and share it across all the steps.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Keep a manifest in the Build folder of the inputs and outputs of each step. When caching
+#    is on, skip steps whose inputs haven't changed and report which steps were reused.
+#
 #   Version 3.15 - 2/6/26 - Ron Lockwood
 #    Bumped to 3.15.
 #
@@ -42,6 +52,8 @@ import CatalogTargetAffixes
 import RunApertium
 import ExtractSourceText
 import ConvertTextToSTAMPformat
+import BuildManifest
+import PerfReport
 import ReadConfig
 import Utils
 
@@ -65,13 +77,96 @@ librariesToTranslate = ['ReadConfig', 'Utils', 'Mixpanel', 'DoHermitCrabSynthesi
 #----------------------------------------------------------------
 # Documentation that the user sees:
 docs = {FTM_Name       : _translate("TranslateText", "Translate Text"),
-        FTM_Version    : "3.15",
+        FTM_Version    : "3.15.3",
         FTM_ModifiesDB : True,
         FTM_Synopsis   : _translate("TranslateText", "Translate the current source text."),
         FTM_Help       : "",
         FTM_Description: _translate("TranslateText",
 """Translate the current source text.""")}
 
+# Settings each stage depends on. If one of these changes, the stage gets rerun.
+EXTRACT_SOURCE_SETTINGS = [ReadConfig.SOURCE_TEXT_NAME, ReadConfig.SENTENCE_PUNCTUATION, ReadConfig.SOURCE_FORMS_INFLECTION_1ST, 
+                           ReadConfig.SOURCE_COMPLEX_TYPES, ReadConfig.SOURCE_DISCONTIG_TYPES, ReadConfig.SOURCE_DISCONTIG_SKIPPED, 
+                           ReadConfig.NO_PROPER_NOUN_WARNING, ReadConfig.ANALYZED_TREETRAN_TEXT_FILE, ReadConfig.TREETRAN_INSERT_WORDS_FILE]
+BILING_LEX_SETTINGS = [ReadConfig.TARGET_PROJECT, ReadConfig.SOURCE_CUSTOM_FIELD_ENTRY, ReadConfig.SOURCE_CUSTOM_FIELD_SENSE_NUM, 
+                       ReadConfig.CATEGORY_ABBREV_SUB_LIST, ReadConfig.SOURCE_MORPHNAMES, ReadConfig.SENTENCE_PUNCTUATION]
+APERTIUM_SETTINGS = [ReadConfig.TRANSFER_RULES_FILE, ReadConfig.TRANSFER_RULES_FILE2, ReadConfig.TRANSFER_RULES_FILE3]
+CATALOG_AFFIXES_SETTINGS = [ReadConfig.TARGET_PROJECT, ReadConfig.TARGET_MORPHNAMES]
+CONVERT_SETTINGS = [ReadConfig.TARGET_PROJECT, ReadConfig.TARGET_MORPHNAMES, ReadConfig.HERMIT_CRAB_SYNTHESIS, ReadConfig.SENTENCE_PUNCTUATION,
+                    ReadConfig.TARGET_FORMS_INFLECTION_1ST, ReadConfig.TARGET_FORMS_INFLECTION_2ND, ReadConfig.TARGET_LEXICON_FILES_FOLDER]
+SYNTHESIS_SETTINGS = [ReadConfig.TARGET_PROJECT, ReadConfig.TARGET_MORPHNAMES, ReadConfig.HERMIT_CRAB_SYNTHESIS, ReadConfig.CLEANUP_UNKNOWN_WORDS, 
+                      ReadConfig.TARGET_LEXICON_FILES_FOLDER, ReadConfig.TARGET_XAMPLE_CUSTOM_ENTRY_FIELD, ReadConfig.TARGET_XAMPLE_CUSTOM_ALLOMORPH_FIELD,
+                      ReadConfig.HERMIT_CRAB_CONFIG_FILE, ReadConfig.HERMIT_CRAB_PARSES_FILE, ReadConfig.HERMIT_CRAB_SURFACE_FORMS_FILE]
+
+# Get the full path for a file setting, or '' if it isn't set
+def getFilePath(configMap, key, report):
+
+    path = ReadConfig.getConfigVal(configMap, key, report, giveError=False)
+
+    return path if path else ''
+
+# Build the map of inputs for a stage from settings, files and project fingerprints
+def getStageInputs(configMap, report, settingsList, fileKeyList, fingerprintMap):
+
+    inputMap = {'settings': BuildManifest.hashConfigValues(configMap, settingsList)}
+
+    for key in fileKeyList:
+
+        inputMap[key] = BuildManifest.hashFile(getFilePath(configMap, key, report))
+
+    inputMap.update(fingerprintMap)
+
+    return inputMap
+
+# Run one stage of the pipeline unless the manifest shows that nothing it depends on has changed.
+# Returns False if the stage failed.
+def runStage(manifest, stageName, inputMap, outputPathList, stageFunc, report, reusedList):
+
+    if manifest and manifest.isUpToDate(stageName, inputMap, outputPathList):
+
+        report.Info(_translate("TranslateText", "Nothing has changed for this step. Using the existing results."))
+        reusedList.append(stageName)
+        return True
+
+    if manifest:
+        manifest.forgetStage(stageName)
+
+    # Time the stage and note the size of what it produced
+    with PerfReport.span(stageName):
+
+        stageSucceeded = stageFunc()
+
+        for path in outputPathList:
+            PerfReport.addFile(path)
+
+    if not stageSucceeded:
+        return False
+
+    if manifest:
+        manifest.recordStage(stageName, inputMap, outputPathList)
+        manifest.save()
+
+    return True
+
+def getTargetFingerprint(configMap, report, session=None):
+
+    TargetDB = Utils.openTargetProject(configMap, report, session)
+
+    if not TargetDB:
+        return None
+
+    fingerprint = BuildManifest.projectFingerprint(TargetDB)
+    TargetDB.CloseProject()
+
+    return fingerprint
+
+def catalogAffixesStage(DB, configMap, report, outFileVal, session=None):
+
+    errorList = CatalogTargetAffixes.catalog_affixes(DB, configMap, outFileVal, report, useCacheIfAvailable=True, session=session)
+    
+    # output info, warnings, errors and url links
+    return Utils.processErrorList(errorList, report)
+
 # The main processing function
 def MainFunction(DB, report, modify=True):
     
@@ -93,27 +188,76 @@ def MainFunction(DB, report, modify=True):
     # Log the start of this module on the analytics server if the user allows logging.
     Mixpanel.LogModuleStarted(configMap, report, docs[FTM_Name], docs[FTM_Version])
 
+    # Time each step so we can see where a run spends its time
+    perfReport = PerfReport.PerfReport(docs[FTM_Name], docs[FTM_Version])
+    perfReport.start()
+
+    try:
+        # Open the target project only once for all the steps that need it. It gets closed at the end.
+        with Utils.ProjectSession() as session:
+
+            translateText(DB, configMap, report, session)
+    finally:
+        perfReport.stop()
+        reportPath = perfReport.save()
+
+    report.Blank()
+    report.Info(_translate("TranslateText", 'Timing: {summary}').format(summary=perfReport.summary()))
+
+    if reportPath:
+        report.Info(_translate("TranslateText", 'The full timing report is in {reportPath}.').format(reportPath=reportPath))
+
+# Run all the steps, the target project gets opened through the given session.
+def translateText(DB, configMap, report, session):
+
+    # If the user wants data cached, use a manifest in the Build folder to skip steps whose inputs haven't changed.
+    manifest = None
+    reusedList = []
+    sourceFingerprint = targetFingerprint = None
+
+    if ReadConfig.getConfigVal(configMap, ReadConfig.CACHE_DATA, report, giveError=False) == 'y':
+
+        manifest = BuildManifest.BuildManifest()
+        sourceFingerprint = BuildManifest.projectFingerprint(DB)
+        
+        if not (targetFingerprint := getTargetFingerprint(configMap, report, session)):
+            return
+
+    sourceFpMap = {'sourceProject': sourceFingerprint}
+    targetFpMap = {'targetProject': targetFingerprint}
+    bothFpMap = {**sourceFpMap, **targetFpMap}
+    hermitCrab = ReadConfig.getConfigVal(configMap, ReadConfig.HERMIT_CRAB_SYNTHESIS, report, giveError=True) == 'y'
+
     ## Extract the source text
     report.Blank()
     report.Info(_translate("TranslateText", 'Exporting source text...'))
 
-    if not ExtractSourceText.doExtractSourceText(DB, configMap, report):
+    if not runStage(manifest, 'ExtractSourceText', 
+                    getStageInputs(configMap, report, EXTRACT_SOURCE_SETTINGS, [ReadConfig.ANALYZED_TREETRAN_TEXT_FILE, ReadConfig.TREETRAN_INSERT_WORDS_FILE], sourceFpMap),
+                    [getFilePath(configMap, ReadConfig.ANALYZED_TEXT_FILE, report)],
+                    lambda: ExtractSourceText.doExtractSourceText(DB, configMap, report), report, reusedList):
         return
 
     ## Build the bilingual lexicon
     report.Blank()
     report.Info(_translate("TranslateText", 'Building the bilingual lexicon...'))
-    errorList = ExtractBilingualLexicon.extract_bilingual_lex(DB, configMap, report, useCacheIfAvailable=True)
 
-    # output info, warnings, errors and url links
-    if not Utils.processErrorList(errorList, report):
+    if not runStage(manifest, 'ExtractBilingualLexicon',
+                    getStageInputs(configMap, report, BILING_LEX_SETTINGS, [ReadConfig.BILINGUAL_DICT_REPLACEMENT_FILE], bothFpMap),
+                    [getFilePath(configMap, ReadConfig.BILINGUAL_DICTIONARY_FILE, report)],
+                    lambda: Utils.processErrorList(ExtractBilingualLexicon.extract_bilingual_lex(DB, configMap, report, useCacheIfAvailable=True, session=session), report), 
+                    report, reusedList):
         return
 
     ## Run Apertium
     report.Blank()
     report.Info(_translate("TranslateText", 'Running the Apertium transfer engine...'))
 
-    if not RunApertium.runApertium(DB, configMap, report):
+    if not runStage(manifest, 'RunApertium',
+                    getStageInputs(configMap, report, APERTIUM_SETTINGS, [ReadConfig.ANALYZED_TEXT_FILE, ReadConfig.BILINGUAL_DICTIONARY_FILE, ReadConfig.TRANSFER_RULES_FILE, 
+                                                                          ReadConfig.TRANSFER_RULES_FILE2, ReadConfig.TRANSFER_RULES_FILE3], {}),
+                    [getFilePath(configMap, ReadConfig.TRANSFER_RESULTS_FILE, report)],
+                    lambda: RunApertium.runApertium(DB, configMap, report), report, reusedList):
         return
     
     ## Catalog Target Affixes
@@ -126,34 +270,42 @@ def MainFunction(DB, report, modify=True):
     
     report.Blank()
     report.Info(_translate("TranslateText", 'Cataloging target affixes...'))
-    errorList = CatalogTargetAffixes.catalog_affixes(DB, configMap, outFileVal, report, useCacheIfAvailable=True)
-    
-    # output info, warnings, errors and url links
-    if not Utils.processErrorList(errorList, report):
+
+    if not runStage(manifest, 'CatalogTargetAffixes',
+                    getStageInputs(configMap, report, CATALOG_AFFIXES_SETTINGS, [], targetFpMap),
+                    [outFileVal],
+                    lambda: catalogAffixesStage(DB, configMap, report, outFileVal, session), report, reusedList):
         return
     
     ## Convert to Synthesizer Format
     report.Blank()
     report.Info(_translate("TranslateText", 'Converting target words to synthesizer format...'))
 
-    if not ConvertTextToSTAMPformat.convertToSynthesizerFormat(DB, configMap, report):
+    synthInputFileKey = ReadConfig.HERMIT_CRAB_MASTER_FILE if hermitCrab else ReadConfig.TARGET_ANA_FILE
+
+    if not runStage(manifest, 'ConvertTextToSTAMPformat',
+                    getStageInputs(configMap, report, CONVERT_SETTINGS, [ReadConfig.TRANSFER_RESULTS_FILE, ReadConfig.TARGET_AFFIX_GLOSS_FILE], targetFpMap),
+                    [getFilePath(configMap, synthInputFileKey, report)],
+                    lambda: ConvertTextToSTAMPformat.convertToSynthesizerFormat(DB, configMap, report, session), report, reusedList):
         return
     
     ## Synthesize Text
-    hermitCrabSynthesisYesNo = ReadConfig.getConfigVal(configMap, ReadConfig.HERMIT_CRAB_SYNTHESIS, report, giveError=True)
-
     report.Blank()
     report.Info(_translate("TranslateText", 'Synthesizing target text...'))
 
-    if hermitCrabSynthesisYesNo == 'y':
+    if hermitCrab:
 
         report.Info(_translate("TranslateText", 'Using HermitCrab for synthesis.'))
-        if not DoHermitCrabSynthesis.doHermitCrab(DB, report, configMap):
-            return
+        synthFunc = lambda: DoHermitCrabSynthesis.doHermitCrab(DB, report, configMap, session)
     else:
         report.Info(_translate("TranslateText", 'Using STAMP for synthesis.'))
-        if not DoStampSynthesis.doStamp(DB, report, configMap):
-            return
+        synthFunc = lambda: DoStampSynthesis.doStamp(DB, report, configMap, session)
+
+    if not runStage(manifest, 'Synthesis',
+                    getStageInputs(configMap, report, SYNTHESIS_SETTINGS, [synthInputFileKey, ReadConfig.TRANSFER_RESULTS_FILE], targetFpMap),
+                    [getFilePath(configMap, ReadConfig.TARGET_SYNTHESIS_FILE, report)],
+                    synthFunc, report, reusedList):
+        return
     
     prodModeOutputToFlex = ReadConfig.getConfigVal(configMap, ReadConfig.PROD_MODE_OUTPUT_FLEX, report, giveError=True)
 
@@ -163,16 +315,31 @@ def MainFunction(DB, report, modify=True):
         report.Blank()
         report.Info(_translate("TranslateText", 'Exporting to Paratext...'))
 
-        if not ExportToParatext.doExportToParatext(DB, configMap, report):
-            return
+        with PerfReport.span('ExportToParatext'):
+
+            if not ExportToParatext.doExportToParatext(DB, configMap, report):
+                return
     else:
         ## Insert Target Text
         report.Blank()
         report.Info(_translate("TranslateText", 'Inserting text into the target project...'))
 
-        if not InsertTargetText.insertTargetText(DB, configMap, report):
-            return
+        with PerfReport.span('InsertTargetText'):
+
+            if not InsertTargetText.insertTargetText(DB, configMap, report, session):
+                return
+        
+        # Inserting the text changed the target project, but not in a way that matters to the earlier steps.
+        if manifest and (newFingerprint := getTargetFingerprint(configMap, report, session)):
+
+            manifest.updateFingerprint(targetFingerprint, newFingerprint)
+            manifest.save()
     
+    if reusedList:
+
+        report.Blank()
+        report.Info(_translate("TranslateText", 'These steps were skipped because nothing they depend on changed: {steps}.').format(steps=', '.join(reusedList)))
+
     report.Blank()
     report.Info(_translate("TranslateText", 'Translation complete.'))
 
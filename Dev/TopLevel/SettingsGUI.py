@@ -3,6 +3,18 @@
 #   Lærke Roager Christensen 
 #   3/28/22
 #
+#   Version 3.15.4 - 10/18/26 - Ron Lockwood
+#    Added the Apply Text Out Rules to the Whole File setting.
+#
+#   Version 3.15.3 - 10/18/26 - Ron Lockwood
+#    Added the Write Single Testbed Results File setting.
+#
+#   Version 3.15.2 - 10/18/26 - Ron Lockwood
+#    Added the Run All Testbed Tests setting.
+#
+#   Version 3.15.1 - 10/18/26 - Ron Lockwood
+#    Added the Source Texts to Extract in a Batch setting.
+#
 #   Version 3.15 - 2/11/26 - Ron Lockwood
 #    Fixes #1149. Support alternate Paratext folder setting. 
 #
@@ -1601,6 +1613,9 @@ widgetList = [
    #                          tooltip text 
     _translate("SettingsGUI", "The name of the text (in the first analysis writing system)\nin the source FLEx project to be translated."), GIVE_ERROR, MINI_VIEW],\
    
+   [_translate("SettingsGUI", "Source Texts to Extract in a Batch"), "source_text_batch", "", TEXT_BOX, object, object, object, loadTextBox, ReadConfig.SOURCE_TEXT_BATCH_LIST,\
+    _translate("SettingsGUI", "A comma separated list of text names to extract all at once with the Extract Source Text module,\ne.g. Matthew 01, Matthew 02 or Matthew*. Each text is written to its own file.\nLeave blank to extract only the Source Text Name."), DONT_GIVE_ERROR, FULL_VIEW],\
+   
    [_translate("SettingsGUI", "Target Project"), "choose_target_project", "", COMBO_BOX, object, object, object, loadTargetProjects, ReadConfig.TARGET_PROJECT,\
     _translate("SettingsGUI", "The name of the target FLEx project."), GIVE_ERROR, MINI_VIEW],\
 
@@ -1734,6 +1749,9 @@ widgetList = [
    [_translate("SettingsGUI", "Text Out Rules File"), "fixup_synth_rules_filename", "", FILE, object, object, object, loadFile, ReadConfig.TEXT_OUT_RULES_FILE, \
     _translate("SettingsGUI", "The file that holds the search/replace rules to fix up the synthesis result text."), DONT_GIVE_ERROR, FULL_VIEW],\
 
+   [_translate("SettingsGUI", "Apply Text Out rules to the whole file?"), "fixup_synth_whole_file_yes", "fixup_synth_whole_file_no", YES_NO, object, object, object, loadYesNo, ReadConfig.TEXT_OUT_RULES_WHOLE_FILE, \
+    _translate("SettingsGUI", "If Yes, the Fix Up Synthesis Text module applies each Text Out rule once to the whole synthesis file\ninstead of to each line, which is faster. Then ^ and $ only match at the start and end of the file,\nand . and \\s can match across lines. Only use this if your rules don't depend on line breaks."), DONT_GIVE_ERROR, FULL_VIEW],\
+
    [_translate("SettingsGUI", "Text In Rules File"), "fixup_ptx_rules_filename", "", FILE, object, object, object, loadFile, ReadConfig.TEXT_IN_RULES_FILE, \
     _translate("SettingsGUI", "The file that holds the search/replace rules to fix up the Paratext import text."), DONT_GIVE_ERROR, FULL_VIEW],\
 
@@ -1776,6 +1794,12 @@ widgetList = [
    [_translate("SettingsGUI", "Testbed Results Log File"), "testbed_result_filename", "", FILE, object, object, object, loadFile, ReadConfig.TESTBED_RESULTS_FILE, \
     _translate("SettingsGUI", "The path and name of the testbed results log file."), GIVE_ERROR, FULL_VIEW],\
 
+   [_translate("SettingsGUI", "Run all testbed tests?"), "testbed_run_all_yes", "testbed_run_all_no", YES_NO, object, object, object, loadYesNo, ReadConfig.TESTBED_RUN_ALL_TESTS, \
+    _translate("SettingsGUI", "When data is cached, the Run Testbed module only runs the tests affected by changes to the\ntransfer rules or the bilingual lexicon. If Yes, all the tests are run every time."), DONT_GIVE_ERROR, FULL_VIEW],\
+
+   [_translate("SettingsGUI", "Write single testbed results file?"), "testbed_single_file_yes", "testbed_single_file_no", YES_NO, object, object, object, loadYesNo, ReadConfig.TESTBED_WRITE_SINGLE_RESULTS_FILE, \
+    _translate("SettingsGUI", "Testbed results are kept with one file per run. If Yes, all the runs are also written to the\ntestbed results log file in the old single-file format after each run. This gets slower as the history grows."), DONT_GIVE_ERROR, FULL_VIEW],\
+
 
 
    [_translate("SettingsGUI", "Import Settings"), "sec_title", "", SECTION_TITLE, object, object, object, None, None,\
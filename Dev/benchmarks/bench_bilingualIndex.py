@@ -0,0 +1,94 @@
+#
+#   bench_bilingualIndex.py
+#
+#   Measure how long the Live Rule Tester takes to read the bilingual lexicon for the word
+#   tooltips and how much memory the result takes. The old way parsed the whole .dix file and
+#   kept the <l> and <r> elements of every entry. The index is built with iterparse the first
+#   time and loaded from the saved index after that.
+#
+#   Run from the Dev folder in the FlexTools Python environment:
+#       py benchmarks/bench_bilingualIndex.py [number of entries]
+#
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path[0:0] = [os.path.abspath(os.path.join(os.path.dirname(__file__), folder)) for folder in ('../Lib', '../Lib/Windows')]
+
+import BilingualIndex
+from Testbed import getXMLEntryText
+
+def makeDixFile(dixPath, numEntries):
+
+    with open(dixPath, 'w', encoding='utf-8') as f:
+
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<dictionary><sdefs><sdef n="n"/><sdef n="v"/><sdef n="pl"/></sdefs><section id="main" type="standard">\n')
+
+        for num in range(numEntries):
+
+            cat = 'n' if num % 3 else 'v'
+            f.write(f'<e><p><l>palabra{num}1.1<s n="{cat}"/></l><r>word{num}1.1<s n="{cat}"/></r></p></e>\n')
+
+        f.write('</section></dictionary>\n')
+
+# What the Live Rule Tester did before
+def oldRead(dixPath):
+
+    bilingMap = {}
+
+    for entry in ET.parse(dixPath).getroot().iter('e'):
+
+        left = entry.find('p/l')
+
+        if left is not None:
+            bilingMap.setdefault(getXMLEntryText(left), []).append((left, entry.find('p/r')))
+
+    return bilingMap
+
+def timeIt(func, *args):
+
+    startTime = time.perf_counter()
+    result = func(*args)
+
+    return result, time.perf_counter() - startTime
+
+# MB of memory still used by what func returns
+def memoryKept(func, *args):
+
+    tracemalloc.start()
+    result = func(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+
+    return size / (1024*1024)
+
+def main():
+
+    numEntries = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    with tempfile.TemporaryDirectory() as tempDir:
+
+        dixPath = os.path.join(tempDir, 'bilingual.dix')
+        makeDixFile(dixPath, numEntries)
+
+        _, oldTime = timeIt(oldRead, dixPath)
+        _, buildTime = timeIt(BilingualIndex.loadIndex, dixPath)
+        bilingIndex, loadTime = timeIt(BilingualIndex.loadIndex, dixPath)
+        assert bilingIndex.loadedFromFile
+        del bilingIndex
+
+        oldMB = memoryKept(oldRead, dixPath)
+        indexMB = memoryKept(BilingualIndex.loadIndex, dixPath)
+
+    print(f'{numEntries} entries')
+    print(f'old: {oldTime:.3f}s, {oldMB:.1f} MB kept')
+    print(f'index built with iterparse and saved: {buildTime:.3f}s')
+    print(f'saved index loaded: {loadTime:.3f}s ({oldTime / loadTime:.1f}x faster than old), {indexMB:.1f} MB kept')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#
+#   bench_fixUpSynthText.py
+#
+#   Compare applying Text Out rules to a synthesis file line by line (what Fix Up Synthesis Text
+#   does by default) with applying them once to the whole file (what it does when the Apply Text Out
+#   Rules to the Whole File setting is on). The rules used are line-local so both ways have to give
+#   the same output.
+#
+#   Run from the Dev folder in the FlexTools Python environment:
+#       py benchmarks/bench_fixUpSynthText.py [number of lines]
+#
+
+import os
+import sys
+import time
+import tempfile
+import xml.etree.ElementTree as ET
+
+sys.path[0:0] = [os.path.abspath(os.path.join(os.path.dirname(__file__), folder)) for folder in ('../Lib', '../Lib/Windows', '../Modules')]
+
+import TextInOutUtils
+import FixUpSynthText
+import Utils
+
+RULES_XML = '''<FLExTransSearchReplace>
+<SearchReplaceRules>
+<SearchReplaceRule RegEx="no"><SearchString>e\u0301</SearchString><ReplaceString>é</ReplaceString></SearchReplaceRule>
+<SearchReplaceRule RegEx="no"><SearchString>-</SearchString><ReplaceString> </ReplaceString></SearchReplaceRule>
+<SearchReplaceRule RegEx="no"><SearchString> ,</SearchString><ReplaceString>,</ReplaceString></SearchReplaceRule>
+<SearchReplaceRule RegEx="yes"><SearchString>\\s+([.;:!?])</SearchString><ReplaceString>\\1</ReplaceString></SearchReplaceRule>
+<SearchReplaceRule RegEx="no" Inactive="yes"><SearchString>a</SearchString><ReplaceString>b</ReplaceString></SearchReplaceRule>
+<SearchReplaceRule RegEx="no"><SearchString>%0%</SearchString><ReplaceString>*</ReplaceString></SearchReplaceRule>
+</SearchReplaceRules>
+</FLExTransSearchReplace>'''
+
+def makeSynthText(numLines):
+
+    lineList = []
+
+    for i in range(numLines):
+
+        lineList.append(f'\\v {i} Cafe\u0301 kana-miti %0%^xx1.1<n>$% sentence number {i} , with more words .\n')
+
+    return ''.join(lineList)
+
+def main():
+
+    numLines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    ruleSet = TextInOutUtils.CompiledRuleSet(ET.fromstring(RULES_XML))
+    synthText = makeSynthText(numLines)
+
+    startTime = time.perf_counter()
+    lineResult, errMsg = FixUpSynthText.fixUpText(synthText, ruleSet, wholeFile=False)
+    lineTime = time.perf_counter() - startTime
+
+    startTime = time.perf_counter()
+    wholeResult, errMsg = FixUpSynthText.fixUpText(synthText, ruleSet, wholeFile=True)
+    wholeTime = time.perf_counter() - startTime
+
+    with tempfile.TemporaryDirectory() as tempDir:
+
+        synthFile = os.path.join(tempDir, 'target_text-syn.txt')
+
+        startTime = time.perf_counter()
+        Utils.writeFileAtomically(synthFile, wholeResult)
+        writeTime = time.perf_counter() - startTime
+
+    print(f'{numLines} lines, {ruleSet.numRules()} active rules')
+    print(f'line by line: {lineTime:.3f}s')
+    print(f'whole file:   {wholeTime:.3f}s ({lineTime / wholeTime:.1f}x faster)')
+    print(f'atomic write: {writeTime:.3f}s')
+    print('identical output' if lineResult == wholeResult else 'OUTPUT DIFFERS')
+
+if __name__ == '__main__':
+    main()
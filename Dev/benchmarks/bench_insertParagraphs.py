@@ -0,0 +1,206 @@
+#
+#   bench_insertParagraphs.py
+#
+#   Measure how many paragraphs per second ChapterSelection.insertParagraphs can insert.
+#   The LCModel string and paragraph objects are replaced by light Python stand-ins so that
+#   what gets measured is our own work and the number of calls we make into LCModel. The old
+#   way of building each paragraph segment by segment is run too and the paragraphs from the
+#   two ways get compared.
+#
+#   Run from the Dev folder in the FlexTools Python environment:
+#       py benchmarks/bench_insertParagraphs.py [number of verses]
+#
+
+import os
+import sys
+import re
+import time
+
+sys.path[0:0] = [os.path.abspath(os.path.join(os.path.dirname(__file__), folder)) for folder in ('../Lib', '../Lib/Windows', '../Modules')]
+
+import ChapterSelection
+
+ANAL_WS = 1
+VERN_WS = 2
+
+class StandInTsString():
+
+    def __init__(self, runList):
+
+        self.runList = runList
+        self.Length = sum(len(text) for text, ws in runList)
+
+class StandInStrBldr():
+
+    def __init__(self):
+
+        self.runList = []
+        self.Length = 0
+
+    def add(self, text, ws):
+
+        StandInTsStringUtils.numCalls += 1
+
+        if not text:
+            return
+
+        # Runs with the same props get joined like LCModel does
+        if self.runList and self.runList[-1][1] == ws:
+
+            self.runList[-1] = (self.runList[-1][0] + text, ws)
+        else:
+            self.runList.append((text, ws))
+
+        self.Length += len(text)
+
+    def ReplaceTsString(self, ichMin, ichLim, tss):
+
+        for text, ws in tss.runList:
+
+            self.add(text, ws)
+
+    def Replace(self, ichMin, ichLim, text, props):
+
+        self.add(text, props)
+
+    def GetString(self):
+
+        return StandInTsString(list(self.runList))
+
+class StandInTsStringUtils():
+
+    numCalls = 0
+
+    @staticmethod
+    def MakeString(text, ws):
+
+        StandInTsStringUtils.numCalls += 1
+        return StandInTsString([(text, ws)] if text else [])
+
+    @staticmethod
+    def EmptyString(ws):
+
+        return StandInTsString([])
+
+    @staticmethod
+    def MakeProps(style, ws):
+
+        return ws
+
+    @staticmethod
+    def MakeStrBldr():
+
+        return StandInStrBldr()
+
+class StandInPara():
+
+    Contents = None
+
+class StandInParaFactory():
+
+    def Create(self):
+
+        return StandInPara()
+
+class StandInParagraphList(list):
+
+    def Add(self, para):
+
+        self.append(para)
+
+class StandInStText():
+
+    def __init__(self):
+
+        self.ParagraphsOS = StandInParagraphList()
+
+class StandInDB():
+
+    class project():
+
+        DefaultAnalWs = ANAL_WS
+        DefaultVernWs = VERN_WS
+
+class StandInReport():
+
+    def ProgressStart(self, maxValue):
+
+        self.maxValue = maxValue
+
+    def ProgressUpdate(self, value):
+
+        self.value = value
+
+# The way paragraphs used to be built, one TsString per segment
+def insertParagraphsBySegment(DB, inputStr, m_stTxtParaFactory, stText):
+
+    inputStr = re.sub(r'\\\n', r'\n\\', inputStr)
+    segs = ChapterSelection.splitSFMs(inputStr)
+    TsStringUtils = StandInTsStringUtils
+
+    stTxtPara = m_stTxtParaFactory.Create()
+    stText.ParagraphsOS.Add(stTxtPara)
+    bldr = TsStringUtils.MakeStrBldr()
+
+    for seg in segs:
+
+        if not (seg is None or len(seg) == 0 or seg == '\n'):
+
+            if re.search(r'\\|\d+[.:]\d+', seg):
+
+                tss = TsStringUtils.MakeString(re.sub(r'\n','', seg), DB.project.DefaultAnalWs)
+            else:
+                tss = TsStringUtils.MakeString(re.sub(r'\n','', seg), DB.project.DefaultVernWs)
+
+            bldr.ReplaceTsString(bldr.Length, bldr.Length, tss)
+
+        if seg and re.search(r'\n', seg):
+
+            stTxtPara.Contents = bldr.GetString()
+            stTxtPara = m_stTxtParaFactory.Create()
+            stText.ParagraphsOS.Add(stTxtPara)
+            bldr = TsStringUtils.MakeStrBldr()
+
+    stTxtPara.Contents = bldr.GetString()
+
+def makeBookText(numVerses):
+
+    lineList = ['\\id GEN\n', '\\mt Kallpa\n', '\\c 1\n', '\\p\n']
+
+    for i in range(1, numVerses+1):
+
+        lineList.append(f'\\v {i} Chaypita Tayta Diosqa 1:{i} ninqa \\f + \\fr 1:{i} \\ft willakuy\\f* rurarqan.\n')
+
+        if i % 5 == 0:
+            lineList.append('\\s Tayta Diosta Abraham cäsukunqan\n\\p\n')
+
+    return ''.join(lineList)
+
+def insertWith(insertFunc, text, *extraArgs):
+
+    stText = StandInStText()
+    StandInTsStringUtils.numCalls = 0
+
+    startTime = time.perf_counter()
+    insertFunc(StandInDB, text, StandInParaFactory(), stText, *extraArgs)
+    elapsed = time.perf_counter() - startTime
+
+    return [para.Contents.runList for para in stText.ParagraphsOS], elapsed, StandInTsStringUtils.numCalls
+
+def main():
+
+    numVerses = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = makeBookText(numVerses)
+
+    ChapterSelection.TsStringUtils = StandInTsStringUtils
+
+    oldParList, oldTime, oldCalls = insertWith(insertParagraphsBySegment, text)
+    newParList, newTime, newCalls = insertWith(ChapterSelection.insertParagraphs, text, StandInReport())
+
+    print(f'{len(newParList)} paragraphs from {numVerses} verses')
+    print(f'segment by segment: {oldTime:.3f}s, {len(oldParList) / oldTime:,.0f} paragraphs/s, {oldCalls} string calls')
+    print(f'bulk:               {newTime:.3f}s, {len(newParList) / newTime:,.0f} paragraphs/s, {newCalls} string calls ({oldTime / newTime:.1f}x faster)')
+    print('identical paragraphs' if oldParList == newParList else 'PARAGRAPHS DIFFER')
+
+if __name__ == '__main__':
+    main()
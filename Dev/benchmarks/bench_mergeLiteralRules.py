@@ -0,0 +1,92 @@
+#
+#   bench_mergeLiteralRules.py
+#
+#   Find how many literal Text In/Out rules in a row it takes for doing them in one pass to beat
+#   doing them one after the other. For each run length, the rules are applied to each line of a
+#   generated text (like Fix Up Synthesis Text does) and to the whole text at once (like Insert
+#   Target Text does), with the rules merged and not merged. Both ways have to give the same output.
+#
+#   Run from the Dev folder in the FlexTools Python environment:
+#       py benchmarks/bench_mergeLiteralRules.py [number of lines]
+#
+
+import os
+import sys
+import time
+import io
+
+sys.path[0:0] = [os.path.abspath(os.path.join(os.path.dirname(__file__), folder)) for folder in ('../Lib', '../Lib/Windows')]
+
+import TextInOutUtils
+
+RUN_LENGTHS = [2, 3, 4, 6, 8, 12, 16, 24, 32]
+MATCHES_PER_TEN_LINES = [1, 10, 40]
+
+# Literal rules like the ones people write to fix up spelling. None of them can affect another one.
+def makeRuleList(numRules):
+
+    return [(None, f'ka{i:02d}ti', f'KA{i}', f'ka{i:02d}ti -> KA{i}', False) for i in range(numRules)]
+
+# Lines of words with the given number of matches in every ten lines
+def makeText(numLines, numRules, matchesPerTenLines):
+
+    lineList = []
+
+    for i in range(numLines):
+
+        matchList = [f'ka{(i + k) % numRules:02d}ti' for k in range(matchesPerTenLines // 10 + (i % 10 < matchesPerTenLines % 10))]
+        lineList.append(f'\\v {i} kana matika ' + ' '.join(matchList) + f' sentence number {i} with some more words in it.\n')
+
+    return ''.join(lineList)
+
+def applySteps(stepList, inputStr):
+
+    ruleSet = TextInOutUtils.CompiledRuleSet.__new__(TextInOutUtils.CompiledRuleSet)
+    ruleSet.wildebeestSettings = None
+    ruleSet.stepList = stepList
+
+    return ruleSet.apply(inputStr)[0]
+
+def timeIt(func, repeat=3):
+
+    bestTime = None
+
+    for _ in range(repeat):
+
+        startTime = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - startTime
+        bestTime = elapsed if bestTime is None else min(bestTime, elapsed)
+
+    return bestTime, result
+
+def main():
+
+    numLines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    for matchesPerTenLines in MATCHES_PER_TEN_LINES:
+
+        print(f'{numLines} lines, {matchesPerTenLines} matches every ten lines')
+        print(f'{"rules":>6} {"by line":>10} {"merged":>10} {"whole text":>12} {"merged":>10}')
+
+        for numRules in RUN_LENGTHS:
+
+            ruleList = makeRuleList(numRules)
+            mergedList = TextInOutUtils.mergeLiteralRules(ruleList, minRunLength=2)
+            text = makeText(numLines, numRules, matchesPerTenLines)
+            lineList = list(io.StringIO(text))
+
+            lineTime, lineResult = timeIt(lambda: ''.join(applySteps(ruleList, line) for line in lineList))
+            mergedLineTime, mergedLineResult = timeIt(lambda: ''.join(applySteps(mergedList, line) for line in lineList))
+            wholeTime, wholeResult = timeIt(lambda: applySteps(ruleList, text))
+            mergedWholeTime, mergedWholeResult = timeIt(lambda: applySteps(mergedList, text))
+
+            if lineResult != mergedLineResult or wholeResult != mergedWholeResult:
+                print('OUTPUT DIFFERS')
+
+            print(f'{numRules:>6} {lineTime:>9.3f}s {mergedLineTime:>9.3f}s {wholeTime:>11.3f}s {mergedWholeTime:>9.3f}s')
+
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#
+#   bench_testbedFile.py
+#
+#   Compare reading and writing a testbed file the old way with the way Testbed does it now.
+#   The old way rewrote the file when reading it and went over the file three times when
+#   writing it. Now reading happens in memory and writing is one normalizing pass to a
+#   temporary file. Both ways have to give the same tree and the same file.
+#
+#   Run from the Dev folder in the FlexTools Python environment:
+#       py benchmarks/bench_testbedFile.py [number of tests]
+#
+
+import os
+import sys
+import time
+import tempfile
+import unicodedata
+import xml.etree.ElementTree as ET
+
+sys.path[0:0] = [os.path.abspath(os.path.join(os.path.dirname(__file__), folder)) for folder in ('../Lib', '../Lib/Windows', '../Modules')]
+
+import Testbed
+
+def makeTestbedTree(numTests):
+
+    testbedXMLObj = Testbed.FLExTransTestbedXMLObject(None, Testbed.LTR)
+
+    for i in range(numTests):
+
+        luList = [Testbed.LexicalUnit(f'^café{i % 500}1.1<n><pl>$'), Testbed.LexicalUnit('^ñandú1.2<v><3sg><pst>$'), Testbed.LexicalUnit('^.<sent>$')]
+        testbedXMLObj.addToTestbed(Testbed.TestbedTestXMLObject(luList, 'bench', f'cafés{i} ñandú comió.'))
+
+    return ET.ElementTree(testbedXMLObj.getRoot())
+
+def oldRead(testbedPath):
+
+    with open(testbedPath, encoding='utf-8') as f:
+        lines = f.readlines()
+
+    lines = [unicodedata.normalize('NFD', line) for line in lines]
+
+    with open(testbedPath, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+
+    return ET.parse(testbedPath)
+
+def oldWrite(testbedTree, testbedPath, composed):
+
+    testbedTree.write(testbedPath, encoding='utf-8', xml_declaration=True)
+
+    with open(testbedPath, encoding='utf-8') as f:
+        lines = f.readlines()
+
+    lines = [unicodedata.normalize('NFC' if composed else 'NFD', line) for line in lines]
+    lines.insert(1, Testbed.TESTBED_DOCTYPE)
+
+    with open(testbedPath, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+
+def timeIt(func, *args):
+
+    startTime = time.perf_counter()
+    result = func(*args)
+
+    return result, time.perf_counter() - startTime
+
+def main():
+
+    numTests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    testbedTree = makeTestbedTree(numTests)
+
+    with tempfile.TemporaryDirectory() as tempDir:
+
+        oldPath = os.path.join(tempDir, 'old_testbed.xml')
+        newPath = os.path.join(tempDir, 'new_testbed.xml')
+
+        _, oldWriteTime = timeIt(oldWrite, testbedTree, oldPath, True)
+        _, newWriteTime = timeIt(Testbed.writeTestbedTree, testbedTree, newPath, True)
+
+        with open(oldPath, 'rb') as f1, open(newPath, 'rb') as f2:
+            sameFile = f1.read() == f2.read()
+
+        fileSize = os.path.getsize(newPath)
+
+        oldTree, oldReadTime = timeIt(oldRead, oldPath)
+        newTree, newReadTime = timeIt(Testbed.readTestbedTree, newPath)
+
+        sameTree = ET.tostring(oldTree.getroot()) == ET.tostring(newTree.getroot())
+
+    print(f'{numTests} tests, {fileSize / (1024*1024):.1f} MB')
+    print(f'read:  old {oldReadTime:.3f}s, new {newReadTime:.3f}s ({oldReadTime / newReadTime:.1f}x faster)')
+    print(f'write: old {oldWriteTime:.3f}s, new {newWriteTime:.3f}s ({oldWriteTime / newWriteTime:.1f}x faster)')
+    print(f'file I/O for a read and a write: old {5 * fileSize / (1024*1024):.1f} MB, new {2 * fileSize / (1024*1024):.1f} MB')
+    print('identical file' if sameFile else 'FILES DIFFER')
+    print('identical tree' if sameTree else 'TREES DIFFER')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#
+#   bench_testbedLogViewer.py
+#
+#   Measure how long the Testbed Log Viewer takes to open a long results history. The old
+#   viewer read every run and built a tree item with html for every test in the newest 25
+#   runs before showing anything. This is timed from a results file with the same runs. The
+#   viewer now reads the results store index and only the newest run, which gets expanded.
+#   The viewer is opened on the Qt offscreen platform so no window is shown.
+#
+#   Run from the Dev folder in the FlexTools Python environment:
+#       py benchmarks/bench_testbedLogViewer.py [number of runs] [tests per run]
+#
+
+import os
+import sys
+import time
+import tempfile
+import xml.etree.ElementTree as ET
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+sys.path[0:0] = [os.path.abspath(os.path.join(os.path.dirname(__file__), folder)) for folder in ('../Lib', '../Lib/Windows', '../Modules')]
+
+from PyQt5.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication([])
+
+import Testbed
+import TestbedLogViewer
+
+OLD_RESULTS_TO_DISPLAY = 25
+
+TEST_XML = ('<test id="t{num}" is_valid="yes"><sourceInput origin="Los perros comieron."><lexicalUnits>'
+            '<lexicalUnit><headWord>perro{word}</headWord><senseNum>1</senseNum><grammaticalCategoryTag>n</grammaticalCategoryTag><otherTags><tag>pl</tag></otherTags></lexicalUnit>'
+            '<lexicalUnit><headWord>comer1</headWord><senseNum>2</senseNum><grammaticalCategoryTag>v</grammaticalCategoryTag><otherTags><tag>3pl</tag><tag>pst</tag></otherTags></lexicalUnit>'
+            '</lexicalUnits></sourceInput><targetOutput><expectedResult>the dogs{word} ate</expectedResult><actualResult>{actual}</actualResult></targetOutput></test>')
+
+def makeResultsFile(resultsPath, numRuns, numTests):
+
+    with open(resultsPath, 'w', encoding='utf-8') as f:
+
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n<FLExTransTestbedResults>")
+
+        # Newest run first
+        for run in range(numRuns, 0, -1):
+
+            f.write(f'<testbedResult startDateTime="2026-01-01 10:{run % 60:02d}:00" endDateTime="2026-01-01 10:{run % 60:02d}:30">'
+                    '<FLExTransTestbed source_direction="ltr"><testbeds><testbed n="default"><tests>')
+
+            for num in range(numTests):
+
+                actual = f'the dogs{num % 300} ate' if (num + run) % 7 else 'the dog ate'
+                f.write(TEST_XML.format(num=num, word=num % 300, actual=actual))
+
+            f.write('</tests></testbed></testbeds></FLExTransTestbed></testbedResult>')
+
+        f.write('</FLExTransTestbedResults>')
+
+# What the old viewer did before it could show anything
+def oldOpen(resultsPath):
+
+    resultsXMLObj = Testbed.FLExTransTestbedResultsXMLObject(ET.parse(resultsPath).getroot())
+    numItems = 0
+
+    for resultObj in resultsXMLObj.getTestbedResultXMLObjectList()[:OLD_RESULTS_TO_DISPLAY]:
+
+        resultObj.getFailedAndInvalid()
+
+        for testbed in resultObj.getFLExTransTestbedXMLObjectList():
+
+            for test in testbed.getTestXMLObjectList():
+
+                ET.tostring(test.getTestNode(), encoding='unicode')
+                test.getLUString()
+                test.getFormattedLUString(False)
+                numItems += 1
+
+    return numItems
+
+def newOpen(resultsPath, testbedPath):
+
+    window = TestbedLogViewer.LogViewerMain(Testbed.TestbedResultsStore(resultsPath), testbedPath)
+    window.show()
+    window.myResize()
+    TestbedLogViewer.showFirstRun(window)
+    app.processEvents()
+
+    return window
+
+def timeIt(func, *args):
+
+    startTime = time.perf_counter()
+    result = func(*args)
+
+    return result, time.perf_counter() - startTime
+
+def main():
+
+    numRuns = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    numTests = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tempDir:
+
+        resultsPath = os.path.join(tempDir, 'testbed_results.xml')
+        makeResultsFile(resultsPath, numRuns, numTests)
+        fileSize = os.path.getsize(resultsPath)
+
+        numOldItems, oldTime = timeIt(oldOpen, resultsPath)
+
+        # Importing the results file into a results store happens once, it isn't part of opening the viewer
+        _, importTime = timeIt(Testbed.TestbedResultsStore, resultsPath)
+        window, newTime = timeIt(newOpen, resultsPath, os.path.join(tempDir, 'testbed.xml'))
+
+        myModel = window.getModel()
+        numRunsToExpand = min(myModel.rowCount(TestbedLogViewer.QtCore.QModelIndex()), OLD_RESULTS_TO_DISPLAY)
+
+        # Expand the rest of the runs the old viewer had. Only the rows in view get widgets and html.
+        startTime = time.perf_counter()
+
+        for row in range(1, numRunsToExpand):
+
+            window.ui.logTreeView.expand(myModel.index(row, 0, TestbedLogViewer.QtCore.QModelIndex()))
+
+        app.processEvents()
+        expandTime = time.perf_counter() - startTime
+
+        window.close()
+
+    print(f'{numRuns} runs of {numTests} tests, {fileSize / (1024*1024):.1f} MB of results')
+    print(f'open: old {oldTime:.3f}s ({numOldItems} test items built), new {newTime:.3f}s ({oldTime / newTime:.1f}x faster)')
+    print(f'one time import into the results store: {importTime:.3f}s')
+    print(f'expanding {numRunsToExpand - 1} more runs: {expandTime:.3f}s, html cache {myModel.htmlCache.hits} hits, {myModel.htmlCache.misses} misses')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import ProcessUtils
+
+from PyQt5 import QtCore
+
+HAVE_QT = hasattr(QtCore, 'QThreadPool')
+
+if HAVE_QT:
+    import BackgroundTask
+
+# A stand-in for the Apertium tools. It says it started, waits and writes its output.
+STUB_PROGRAM = '''import sys, time
+open(sys.argv[1] + '.started', 'w').close()
+time.sleep(float(sys.argv[2]))
+with open(sys.argv[1], 'w') as f:
+    f.write(sys.argv[3])
+'''
+
+@unittest.skipUnless(HAVE_QT, 'needs PyQt5')
+class TestBackgroundTask(unittest.TestCase):
+
+    def setUp(self):
+        self.app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.stubPath = os.path.join(self.tempDir.name, 'stub_transfer.py')
+        with open(self.stubPath, 'w') as f:
+            f.write(STUB_PROGRAM)
+        self.runner = BackgroundTask.LatestRequestRunner()
+        self.resultList = []
+        self.errorList = []
+        self.busyList = []
+        self.runner.errorOccurred.connect(self.errorList.append)
+        self.runner.busyChanged.connect(self.busyList.append)
+
+    def tearDown(self):
+        self.runner.cancelAndWait()
+        self.tempDir.cleanup()
+
+    def makeTransferFunc(self, outName, seconds):
+        outPath = os.path.join(self.tempDir.name, outName)
+        def transferFunc(cancelToken):
+            ret = ProcessUtils.runProcess([sys.executable, self.stubPath, outPath, str(seconds), outName], cancelToken)
+            with open(outPath) as f:
+                return ret, f.read()
+        return transferFunc
+
+    def waitUntilIdle(self, seconds=20):
+        deadline = time.time() + seconds
+        while self.runner.isBusy() and time.time() < deadline:
+            self.app.processEvents()
+            time.sleep(0.01)
+        self.assertFalse(self.runner.isBusy())
+
+    def test_newer_request_supersedes(self):
+        startTime = time.time()
+        self.runner.submit(self.makeTransferFunc('slow', 30), self.resultList.append)
+
+        # Wait for the slow program to be running before making the next request
+        while not os.path.exists(os.path.join(self.tempDir.name, 'slow.started')):
+            time.sleep(0.01)
+
+        self.runner.submit(self.makeTransferFunc('fast', 0), self.resultList.append)
+        self.waitUntilIdle()
+
+        # The slow program got killed and only the newest result came back
+        self.assertLess(time.time() - startTime, 20)
+        self.assertFalse(os.path.exists(os.path.join(self.tempDir.name, 'slow')))
+        self.assertEqual(self.resultList, [(0, 'fast')])
+        self.assertEqual(self.runner.numCancelled, 1)
+        self.assertEqual(self.busyList, [True, False])
+
+    def test_cancel_func_called_before_next_request(self):
+        cancelList = []
+        self.runner.submit(self.makeTransferFunc('slow', 30), self.resultList.append, lambda: cancelList.append('slow'))
+
+        while not os.path.exists(os.path.join(self.tempDir.name, 'slow.started')):
+            time.sleep(0.01)
+
+        # The cancelled request has been told before the next one is made, without waiting for it to stop
+        self.runner.cancel()
+        self.assertEqual(cancelList, ['slow'])
+
+        self.runner.submit(self.makeTransferFunc('fast', 0), self.resultList.append, lambda: cancelList.append('fast'))
+        self.waitUntilIdle()
+
+        # A request whose result was shown doesn't get told it was cancelled
+        self.runner.cancel()
+        self.assertEqual(cancelList, ['slow'])
+        self.assertEqual(self.resultList, [(0, 'fast')])
+
+    def test_errors_come_back(self):
+        def failFunc(cancelToken):
+            raise ValueError('no rules file')
+
+        self.runner.submit(failFunc, self.resultList.append)
+        self.waitUntilIdle()
+        self.assertEqual(self.errorList, ['no rules file'])
+        self.assertEqual(self.resultList, [])
+
+if __name__ == '__main__':
+    unittest.main()
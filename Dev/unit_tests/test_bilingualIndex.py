@@ -0,0 +1,90 @@
+import unittest
+import sys
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from unittest import mock
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import BilingualIndex
+
+DICT = '''<?xml version="1.0" encoding="utf-8"?>
+<dictionary>
+  <sdefs><sdef n="n"/><sdef n="v"/><sdef n="m"/></sdefs>
+  <section id="main" type="standard">
+    <e><p><l>perro1.1<s n="n"/></l><r>dog1.1<s n="n"/></r></p></e>
+    <e><p><l>perro1.1<s n="n"/></l><r>hound1.1<s n="n"/></r></p></e>
+    <e><p><l>perro1.1<s n="v"/></l><r>tail1.1<s n="v"/></r></p></e>
+    <e><p><l>casa<b/>blanca1.1<s n="n"/><s n="m"/></l><r>white<b/>house1.1<s n="n"/></r></p></e>
+    <e><p><l>nada1.1<s n="n"/></l><r><s n="n"/></r></p></e>
+    <e><i>.<s n="sent"/></i></e>
+  </section>
+</dictionary>
+'''
+
+class TestBilingualIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.dixPath = os.path.join(self.tempDir.name, 'bilingual.dix')
+        with open(self.dixPath, 'w', encoding='utf-8') as f:
+            f.write(DICT)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_entries(self):
+        bilingIndex = BilingualIndex.buildIndex(self.dixPath)
+        self.assertEqual(len(bilingIndex), 3)
+
+        # A later entry with the same source tags replaces the first one
+        self.assertEqual(bilingIndex.getTargets('perro1.1'), [(('n',), 'hound1.1', ('n',)), (('v',), 'tail1.1', ('v',))])
+        self.assertEqual(bilingIndex.getTargets('casa blanca1.1'), [(('n', 'm'), 'white house1.1', ('n',))])
+        self.assertEqual(bilingIndex.getTargets('nada1.1'), [(('n',), None, ('n',))])
+        self.assertIsNone(bilingIndex.getTargets('.'))
+
+    def test_later_entry_with_same_source_tags_replaces_earlier(self):
+        with open(self.dixPath, 'w', encoding='utf-8') as f:
+            f.write(DICT.replace('<e><i>', '''<e><p><l>perro1.1<s n="n"/></l><r>canine1.1<s n="n"/></r></p></e>
+    <e><p><l>gato1.1<s n="n"/></l><r>cat1.1<s n="n"/></r></p></e>
+    <e><i>'''))
+
+        # Replaced even when an entry with other tags comes in between, and the other entry keeps its place
+        bilingIndex = BilingualIndex.buildIndex(self.dixPath)
+        self.assertEqual(bilingIndex.getTargets('perro1.1'), [(('n',), 'canine1.1', ('n',)), (('v',), 'tail1.1', ('v',))])
+        self.assertEqual(bilingIndex.getTargets('gato1.1'), [(('n',), 'cat1.1', ('n',))])
+
+    def test_entries_removed_from_section_after_reading(self):
+        elemList = []
+        iterparse = ET.iterparse
+
+        def recordingIterparse(*args, **kwargs):
+            for event, elem in iterparse(*args, **kwargs):
+                elemList.append(elem)
+                yield event, elem
+
+        with mock.patch.object(BilingualIndex.ET, 'iterparse', recordingIterparse):
+            bilingIndex = BilingualIndex.buildIndex(self.dixPath)
+
+        self.assertEqual(len(bilingIndex), 3)
+        section = next(elem for elem in elemList if elem.tag == 'section')
+        self.assertEqual(len(section), 0)
+
+    def test_saved_index_used_until_file_changes(self):
+        self.assertFalse(BilingualIndex.loadIndex(self.dixPath).loadedFromFile)
+
+        bilingIndex = BilingualIndex.loadIndex(self.dixPath)
+        self.assertTrue(bilingIndex.loadedFromFile)
+        self.assertEqual(bilingIndex.getTargets('perro1.1'), BilingualIndex.buildIndex(self.dixPath).getTargets('perro1.1'))
+
+        with open(self.dixPath, 'w', encoding='utf-8') as f:
+            f.write(DICT.replace('hound1.1', 'canine1.1'))
+
+        bilingIndex = BilingualIndex.loadIndex(self.dixPath)
+        self.assertFalse(bilingIndex.loadedFromFile)
+        self.assertEqual(bilingIndex.getTargets('perro1.1')[0][1], 'canine1.1')
+
+if __name__ == '__main__':
+    unittest.main()
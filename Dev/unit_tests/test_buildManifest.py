@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import BuildManifest
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.manifestPath = os.path.join(self.tempDir.name, BuildManifest.MANIFEST_FILE)
+        self.outPath = os.path.join(self.tempDir.name, 'out.txt')
+        with open(self.outPath, 'w', encoding='utf-8') as f:
+            f.write('^word<n>$')
+        self.inputs = {'settings': BuildManifest.hashValues(['a', 'b']), 'sourceProject': 'fp1'}
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_unknown_stage_is_not_up_to_date(self):
+        manifest = BuildManifest.BuildManifest(self.manifestPath)
+        self.assertFalse(manifest.isUpToDate('ExtractSourceText', self.inputs, [self.outPath]))
+
+    def test_recorded_stage_is_up_to_date_after_reload(self):
+        manifest = BuildManifest.BuildManifest(self.manifestPath)
+        manifest.recordStage('ExtractSourceText', self.inputs, [self.outPath])
+        manifest.save()
+        manifest = BuildManifest.BuildManifest(self.manifestPath)
+        self.assertTrue(manifest.isUpToDate('ExtractSourceText', self.inputs, [self.outPath]))
+
+    def test_changed_input(self):
+        manifest = BuildManifest.BuildManifest(self.manifestPath)
+        manifest.recordStage('ExtractSourceText', self.inputs, [self.outPath])
+        changedInputs = dict(self.inputs, sourceProject='fp2')
+        self.assertFalse(manifest.isUpToDate('ExtractSourceText', changedInputs, [self.outPath]))
+
+    def test_changed_output(self):
+        manifest = BuildManifest.BuildManifest(self.manifestPath)
+        manifest.recordStage('ExtractSourceText', self.inputs, [self.outPath])
+        with open(self.outPath, 'w', encoding='utf-8') as f:
+            f.write('^other<v>$')
+        self.assertFalse(manifest.isUpToDate('ExtractSourceText', self.inputs, [self.outPath]))
+
+    def test_missing_output(self):
+        manifest = BuildManifest.BuildManifest(self.manifestPath)
+        manifest.recordStage('ExtractSourceText', self.inputs, [self.outPath])
+        os.remove(self.outPath)
+        self.assertFalse(manifest.isUpToDate('ExtractSourceText', self.inputs, [self.outPath]))
+
+    def test_update_fingerprint(self):
+        manifest = BuildManifest.BuildManifest(self.manifestPath)
+        manifest.recordStage('ExtractSourceText', self.inputs, [self.outPath])
+        manifest.updateFingerprint('fp1', 'fp2')
+        changedInputs = dict(self.inputs, sourceProject='fp2')
+        self.assertTrue(manifest.isUpToDate('ExtractSourceText', changedInputs, [self.outPath]))
+
+    def test_corrupt_manifest(self):
+        with open(self.manifestPath, 'w', encoding='utf-8') as f:
+            f.write('{not json')
+        manifest = BuildManifest.BuildManifest(self.manifestPath)
+        self.assertFalse(manifest.isUpToDate('ExtractSourceText', self.inputs, [self.outPath]))
+
+if __name__ == '__main__':
+    unittest.main()
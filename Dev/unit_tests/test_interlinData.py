@@ -0,0 +1,157 @@
+import unittest
+import sys
+import os
+import io
+from types import SimpleNamespace
+from unittest import mock
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+try:
+    import InterlinData
+    HAVE_INTERLIN_DATA = True
+except ImportError:
+    HAVE_INTERLIN_DATA = False
+
+class FakeReport():
+
+    def __init__(self):
+        self.warningList = []
+        self.errorList = []
+
+    def Warning(self, msg, url=None):
+        self.warningList.append(msg)
+
+    def Error(self, msg, url=None):
+        self.errorList.append(msg)
+
+    def ProgressStart(self, maxVal):
+        pass
+
+    def ProgressUpdate(self, val):
+        pass
+
+# An analysis that stops processing because its affix gloss is checked and found invalid
+BAD_ANALYSIS = SimpleNamespace(ClassName=InterlinData.WFI_ANALYSIS if HAVE_INTERLIN_DATA else '',
+                               MorphBundlesOS=[SimpleNamespace(SenseRA=SimpleNamespace(Gloss='bad<gloss>'),
+                                                               MsaRA=SimpleNamespace(ClassName='MoInflAffMsa'),
+                                                               MorphRA=SimpleNamespace(Owner='entry'))])
+
+# Make analysis occurrences like the FLEx text navigator gives. Each paragraph is a list of segments and
+# each segment is a list of words and punctuation. A punctuation item starts with '#'. A word that is
+# 'BAD' gets an analysis that stops processing, the other words have no analysis.
+def makeOccurrences(parList):
+
+    occurrenceList = []
+    segNum = 0
+
+    for segList in parList:
+
+        contents = ' '.join(' '.join(item.lstrip('#') for item in seg) for seg in segList)
+        paragraph = SimpleNamespace(Contents=contents)
+        offset = 0
+
+        for seg in segList:
+
+            segNum += 1
+            segment = SimpleNamespace(Hvo=segNum, FreeTranslation=None)
+
+            for item in seg:
+
+                itemStr = item.lstrip('#')
+
+                if item.startswith('#'):
+                    analysis = SimpleNamespace(ClassName=InterlinData.PUNCTUATION_FORM, Form=itemStr)
+                elif item == 'BAD':
+                    analysis = BAD_ANALYSIS
+                else:
+                    analysis = SimpleNamespace(ClassName=InterlinData.WFI_WORD_FORM)
+
+                occurrenceList.append(SimpleNamespace(Analysis=analysis, Segment=segment, Paragraph=paragraph, BaselineText=itemStr,
+                                                      GetMyBeginOffsetInPara=lambda beg=offset: beg,
+                                                      GetMyEndOffsetInPara=lambda end=offset+len(itemStr): end))
+                offset += len(itemStr) + 1
+
+    return occurrenceList
+
+@unittest.skipUnless(HAVE_INTERLIN_DATA, 'needs the FLEx libraries')
+class TestWriteInterlinData(unittest.TestCase):
+
+    def setUp(self):
+        self.occurrenceList = []
+        navigator = SimpleNamespace(GetAnalysisOccurrencesAdvancingInStText=lambda: iter(self.occurrenceList))
+
+        for name, value in [('SegmentServices', SimpleNamespace(StTextAnnotationNavigator=lambda contents: navigator)),
+                            ('ITsString', lambda myStr: SimpleNamespace(Text=myStr)),
+                            ('IPunctuationForm', lambda analysis: analysis),
+                            ('IWfiAnalysis', lambda analysis: analysis),
+                            ('ILexEntry', lambda entry: entry)]:
+
+            patcher = mock.patch.object(InterlinData, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        for name, value in [('GetEntryWithSensePlusFeat', lambda entry, inflFeatAbbrevs: entry),
+                            ('as_string', lambda gloss: gloss)]:
+
+            patcher = mock.patch.object(InterlinData.Utils, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.DB = SimpleNamespace(BuildGotoURL=lambda obj: '')
+        self.params = InterlinData.interlinParamsClass(sentPunct='.?!', contents=None, typesInfl1stList=[], typesInfl2ndList=[],
+                                                       discontigTypesList=[], discontigPOSList=[], noWarningProperNoun=False)
+
+    # Write the text both ways and check that the output and the warnings are the same
+    def assertSameBothWays(self, parList):
+        self.occurrenceList = makeOccurrences(parList)
+
+        inMemoryReport = FakeReport()
+        inMemoryOut = io.StringIO()
+        myText = InterlinData.getInterlinData(self.DB, inMemoryReport, self.params)
+        myText.write(inMemoryOut)
+
+        streamedReport = FakeReport()
+        streamedOut = io.StringIO()
+        streamedText = InterlinData.writeInterlinData(self.DB, streamedReport, self.params, streamedOut)
+
+        self.assertEqual(streamedOut.getvalue(), inMemoryOut.getvalue())
+        self.assertEqual(streamedReport.warningList, inMemoryReport.warningList)
+        self.assertEqual(streamedText.getSentCount(), myText.getSentCount())
+        return streamedOut.getvalue(), streamedReport
+
+    def test_sentences_and_paragraphs(self):
+        output, _ = self.assertSameBothWays([[['\\p', 'uno', 'dos', '#.'], ['tres', '#?']],
+                                             [['cuatro', '#,', 'cinco', '#!']]])
+        self.assertEqual(output.count('\n'), 2)
+
+    def test_empty_first_paragraph(self):
+        # A first paragraph of punctuation only doesn't get its own paragraph
+        self.assertSameBothWays([[['#***']], [['uno', 'dos', '#.']], [['tres']]])
+        self.assertSameBothWays([[['#***']], [['#---']], [['uno', '#.'], ['dos']]])
+
+    def test_no_words(self):
+        output, report = self.assertSameBothWays([])
+        self.assertEqual(output, '\n')
+        self.assertEqual(len(report.warningList), 1)
+
+    def test_unknown_word_warnings(self):
+        _, report = self.assertSameBothWays([[['\\v', 'uno', 'dos', '#.'], ['uno', '#.']]])
+        self.assertEqual(sum('uno' in msg for msg in report.warningList), 1)
+        self.assertFalse(any('\\v' in msg for msg in report.warningList))
+        self.assertTrue(any('multiple' in msg for msg in report.warningList))
+
+    def test_warnings_given_when_stopped(self):
+        self.occurrenceList = makeOccurrences([[['uno', '#.'], ['uno', 'dos', 'BAD', 'tres']]])
+        report = FakeReport()
+        output = io.StringIO()
+        InterlinData.writeInterlinData(self.DB, report, self.params, output)
+
+        self.assertEqual(len(report.errorList), 1)
+        self.assertFalse(any('tres' in msg for msg in report.warningList))
+        self.assertTrue(any('dos' in msg for msg in report.warningList))
+        self.assertTrue(any('multiple' in msg for msg in report.warningList))
+
+if __name__ == '__main__':
+    unittest.main()
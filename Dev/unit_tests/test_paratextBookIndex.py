@@ -0,0 +1,52 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import ParatextBookIndex
+
+BOOK = "\\id RUT\n\\mt1 Rut\n\\c 1\n\\v 1 one\n\\v 2 two\n\\c 2\n\\v 1 three\n"
+
+class TestParatextBookIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.indexPath = os.path.join(self.tempDir.name, ParatextBookIndex.BOOK_INDEX_FILE)
+        self.bookPath = os.path.join(self.tempDir.name, '08RUTABC.SFM')
+        with open(self.bookPath, 'w', encoding='utf-8') as f:
+            f.write(BOOK)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_chapter_and_verse_offsets(self):
+        bookIndex = ParatextBookIndex.ParatextBookIndex(self.indexPath)
+        bookContents, bookEntry = bookIndex.readBook(self.bookPath)
+        self.assertEqual(bookEntry.getChapterNums(), [1, 2])
+        start, end = bookEntry.getChapterSpan(1)
+        self.assertEqual(bookContents[start:end], "\\c 1\n\\v 1 one\n\\v 2 two\n")
+        self.assertEqual([verse for verse, _ in bookEntry.getVerseOffsets(1)], ['1', '2'])
+        self.assertEqual(bookContents[bookEntry.mainTitleOffset:bookEntry.mainTitleOffset+4], '\\mt1')
+
+    def test_find_book_path_and_reload(self):
+        bookIndex = ParatextBookIndex.ParatextBookIndex(self.indexPath)
+        self.assertEqual(bookIndex.findBookPath(self.tempDir.name, 'RUTABC'), self.bookPath)
+        self.assertEqual(bookIndex.findBookPath(self.tempDir.name, 'GENABC'), '')
+        bookIndex.readBook(self.bookPath)
+        bookIndex.save()
+        bookIndex = ParatextBookIndex.ParatextBookIndex(self.indexPath)
+        self.assertEqual(bookIndex.findBookPath(self.tempDir.name, 'RUTABC'), self.bookPath)
+
+    def test_changed_book_is_reindexed(self):
+        bookIndex = ParatextBookIndex.ParatextBookIndex(self.indexPath)
+        bookIndex.readBook(self.bookPath)
+        with open(self.bookPath, 'w', encoding='utf-8') as f:
+            f.write(BOOK + "\\c 3\n\\v 1 four\n")
+        bookContents, bookEntry = bookIndex.readBook(self.bookPath)
+        self.assertEqual(bookEntry.getChapterNums(), [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import PerfReport
+
+class TestPerfReport(unittest.TestCase):
+
+    def test_no_active_report(self):
+        mySpan = PerfReport.startSpan('entries')
+        self.assertIsNone(mySpan)
+        PerfReport.endSpan(mySpan, entries=5)
+        PerfReport.addCount('entries', 5)
+
+    def test_nested_spans(self):
+        perfReport = PerfReport.PerfReport('Translate Text')
+        perfReport.start()
+        with PerfReport.span('ExtractBilingualLexicon'):
+            entrySpan = PerfReport.startSpan('entries')
+            PerfReport.endSpan(entrySpan, entries=3)
+        perfReport.stop()
+
+        pathList = [mySpan.path for mySpan in perfReport.spanList]
+        self.assertEqual(pathList, ['ExtractBilingualLexicon/entries', 'ExtractBilingualLexicon'])
+        self.assertEqual(perfReport.spanList[0].counts, {'entries': 3})
+        self.assertEqual([mySpan.name for mySpan in perfReport.getStageSpans()], ['ExtractBilingualLexicon'])
+
+    def test_unended_span_is_closed_by_parent(self):
+        perfReport = PerfReport.PerfReport('Translate Text')
+        perfReport.start()
+        with PerfReport.span('Synthesis'):
+            PerfReport.startSpan('produceSynthesisFile') # e.g. an early return
+        perfReport.stop()
+        self.assertEqual(len(perfReport.spanList), 2)
+        self.assertIsNone(PerfReport.startSpan('after'))
+
+    def test_save(self):
+        perfReport = PerfReport.PerfReport('Translate Text', '3.15')
+        perfReport.start()
+        with PerfReport.span('RunApertium'):
+            PerfReport.addFile(__file__)
+        perfReport.stop()
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            reportPath = perfReport.save(os.path.join(tempDir, PerfReport.PERF_REPORT_FILE))
+            with open(reportPath, encoding='utf-8') as f:
+                data = json.load(f)
+        self.assertEqual(data['version'], '3.15')
+        self.assertEqual(data['spans'][0]['fileSizes'][__file__], os.path.getsize(__file__))
+        self.assertIn('RunApertium', perfReport.summary())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import sys
+import os
+import time
+import threading
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import ProcessUtils
+
+class TestProcessUtils(unittest.TestCase):
+
+    def test_exit_code_returned(self):
+        cmdList = [sys.executable, '-c', 'import sys; sys.exit(3)']
+        self.assertEqual(ProcessUtils.runProcess(cmdList), 3)
+        self.assertEqual(ProcessUtils.runProcess(cmdList, ProcessUtils.CancelToken()), 3)
+
+    def test_cancel_kills_program(self):
+        cancelToken = ProcessUtils.CancelToken()
+        timer = threading.Timer(0.5, cancelToken.cancel)
+        timer.start()
+        startTime = time.time()
+
+        with self.assertRaises(ProcessUtils.CancelledError):
+            ProcessUtils.runProcess([sys.executable, '-c', 'import time; time.sleep(30)'], cancelToken)
+
+        timer.join()
+        self.assertLess(time.time() - startTime, 20)
+
+    def test_cancelled_token_does_not_start_program(self):
+        cancelToken = ProcessUtils.CancelToken()
+        cancelToken.cancel()
+
+        with self.assertRaises(ProcessUtils.CancelledError):
+            ProcessUtils.runProcess([sys.executable, '-c', 'raise SystemExit(1)'], cancelToken)
+
+        with self.assertRaises(ProcessUtils.CancelledError):
+            cancelToken.check()
+
+if __name__ == '__main__':
+    unittest.main()
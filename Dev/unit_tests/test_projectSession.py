@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import Utils
+
+# A stand-in for FLExProject that keeps track of what gets opened and closed
+class FakeFLExProject():
+
+    openedList = []
+    closedList = []
+    failClose = set()
+
+    def OpenProject(self, projectName, writeEnabled):
+        self.projectName = projectName
+        self.writeEnabled = writeEnabled
+        FakeFLExProject.openedList.append(self)
+
+    def CloseProject(self):
+        FakeFLExProject.closedList.append(self)
+
+        if self.projectName in FakeFLExProject.failClose:
+            raise RuntimeError('could not close ' + self.projectName)
+
+    def GetProjectName(self):
+        return self.projectName
+
+class TestProjectSession(unittest.TestCase):
+
+    def setUp(self):
+        FakeFLExProject.openedList = []
+        FakeFLExProject.closedList = []
+        FakeFLExProject.failClose = set()
+
+        patcher = mock.patch.object(Utils, 'FLExProject', FakeFLExProject)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_project_opened_once(self):
+        with Utils.ProjectSession() as session:
+            firstDB = session.openProject('Swedish')
+            secondDB = Utils.openFLExProject('Swedish', session)
+
+            self.assertEqual(len(FakeFLExProject.openedList), 1)
+            self.assertEqual(firstDB.GetProjectName(), 'Swedish')
+            self.assertEqual(secondDB.GetProjectName(), 'Swedish')
+
+        self.assertEqual(FakeFLExProject.closedList, FakeFLExProject.openedList)
+
+    def test_read_write_project_used_for_read_only(self):
+        with Utils.ProjectSession() as session:
+            writeDB = session.openProject('Swedish', writeEnabled=True)
+            readDB = session.openProject('Swedish', writeEnabled=False)
+
+            self.assertEqual(len(FakeFLExProject.openedList), 1)
+            self.assertTrue(readDB.writeEnabled)
+            self.assertTrue(writeDB.writeEnabled)
+
+    def test_read_only_project_not_used_for_read_write(self):
+        with Utils.ProjectSession() as session:
+            readDB = session.openProject('Swedish', writeEnabled=False)
+            writeDB = session.openProject('Swedish', writeEnabled=True)
+
+            self.assertEqual(len(FakeFLExProject.openedList), 2)
+            self.assertFalse(readDB.writeEnabled)
+            self.assertTrue(writeDB.writeEnabled)
+
+            # From now on the read/write one gets handed out
+            self.assertTrue(session.openProject('Swedish', writeEnabled=False).writeEnabled)
+            self.assertEqual(len(FakeFLExProject.openedList), 2)
+
+        self.assertEqual(len(FakeFLExProject.closedList), 2)
+
+    def test_shared_project_close_does_nothing(self):
+        with Utils.ProjectSession() as session:
+            myDB = session.openProject('Swedish')
+            myDB.CloseProject()
+
+            self.assertEqual(FakeFLExProject.closedList, [])
+
+            # It's still in the pool
+            session.openProject('Swedish')
+            self.assertEqual(len(FakeFLExProject.openedList), 1)
+
+        self.assertEqual(len(FakeFLExProject.closedList), 1)
+
+    def test_close_all_closes_each_project_once(self):
+        session = Utils.ProjectSession()
+        session.openProject('Swedish')
+        session.openProject('German', writeEnabled=False)
+        session.openProject('Spanish')
+        session.closeAll()
+        session.closeAll()
+
+        self.assertEqual(FakeFLExProject.closedList, FakeFLExProject.openedList)
+
+        # The pool is empty so the next request opens the project again
+        session.openProject('Swedish')
+        self.assertEqual(len(FakeFLExProject.openedList), 4)
+
+    def test_close_all_after_a_failed_close(self):
+        FakeFLExProject.failClose = {'German'}
+
+        with self.assertRaises(RuntimeError):
+            with Utils.ProjectSession() as session:
+                session.openProject('Swedish')
+                session.openProject('German')
+                session.openProject('Spanish')
+
+        self.assertEqual(FakeFLExProject.closedList, FakeFLExProject.openedList)
+
+    def test_closed_when_module_fails(self):
+        with self.assertRaises(ValueError):
+            with Utils.ProjectSession() as session:
+                session.openProject('Swedish')
+                raise ValueError('module failed')
+
+        self.assertEqual(FakeFLExProject.closedList, FakeFLExProject.openedList)
+
+    def test_no_session(self):
+        myDB = Utils.openFLExProject('Swedish', writeEnabled=False)
+
+        self.assertIsInstance(myDB, FakeFLExProject)
+        self.assertFalse(myDB.writeEnabled)
+
+if __name__ == '__main__':
+    unittest.main()
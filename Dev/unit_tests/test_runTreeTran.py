@@ -0,0 +1,188 @@
+import unittest
+import sys
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from unittest import mock
+
+# Add the path to the lib and modules directories to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../Modules')))
+
+try:
+    import RunTreeTran
+    import Utils
+    from TreeTranSentenceCache import TreeTranSentenceCache
+    HAVE_RUN_TREE_TRAN = True
+except ImportError:
+    HAVE_RUN_TREE_TRAN = False
+
+# Four sentences. The second one didn't parse and the last records have no analysis after them.
+INVOKER = '''<?xml version="1.0" encoding="utf-8"?>
+<AnaRecs lang="es">
+  <anaRec id="1"><w>el</w></anaRec>
+  <anaRec id="2"><w>perro</w><Analysis count="1"><Tree>S</Tree></Analysis></anaRec>
+  <anaRec id="3"><w>come</w><Analysis count="0"/></anaRec>
+  <anaRec id="4"><w>la</w></anaRec>
+  <anaRec id="5"><w>casa</w><Analysis count="2"><Tree>NP</Tree></Analysis></anaRec>
+  <anaRec id="6"><w>fin</w></anaRec>
+</AnaRecs>
+'''
+
+# How the invoker file was filtered before it was read as a stream
+def baselineFilter(inputFilename, filteredFileName, logFileName):
+
+    recsInSent = []
+    deleteList = []
+    wordCount = 0
+    myETree = ET.parse(inputFilename)
+    myRoot = myETree.getroot()
+
+    with open(logFileName, 'w') as f:
+
+        for anaRec in myRoot:
+
+            wordCount += 1
+            recsInSent.append(anaRec)
+            analysisNode = anaRec.find('Analysis')
+
+            if analysisNode != None:
+
+                if analysisNode.attrib['count'] == '0':
+                    deleteList.extend(recsInSent)
+                    parsedFlag = '0'
+                else:
+                    parsedFlag = '1'
+
+                f.write(str(wordCount)+','+parsedFlag+'\n')
+                recsInSent = []
+                wordCount = 0
+
+    for rec in deleteList:
+        myRoot.remove(rec)
+
+    myETree.write(filteredFileName, encoding='utf-8', xml_declaration=True)
+
+# The root and its records without the whitespace between them
+def getRecords(filePath):
+
+    root = ET.parse(filePath).getroot()
+    recList = []
+
+    for anaRec in root:
+        anaRec.tail = None
+        recList.append(ET.tostring(anaRec, encoding='unicode'))
+
+    return root.tag, root.attrib, recList
+
+# A stand-in for TreeTran that marks every record it was given
+def fakeTreeTran(cmdList):
+
+    _, rulesFilePath, inputFile, outputFile = cmdList
+    tree = ET.parse(inputFile)
+
+    for anaRec in tree.getroot():
+        anaRec.set('tt', 'done')
+
+    tree.write(outputFile, encoding='utf-8', xml_declaration=True)
+    return 0
+
+@unittest.skipUnless(HAVE_RUN_TREE_TRAN, 'needs the FlexTools modules')
+class TestRunTreeTran(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.invokerPath = os.path.join(self.tempDir.name, RunTreeTran.INVOKER_FILE)
+        self.writeInvoker(INVOKER)
+
+        # The module puts its files in the system temp folder
+        patcher = mock.patch.object(RunTreeTran.tempfile, 'gettempdir', return_value=self.tempDir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeInvoker(self, text):
+        with open(self.invokerPath, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def readFile(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def test_filtered_file_same_as_before(self):
+        baselinePath = os.path.join(self.tempDir.name, 'baseline.xml')
+        baselineLog = os.path.join(self.tempDir.name, 'baseline_log.txt')
+        baselineFilter(self.invokerPath, baselinePath, baselineLog)
+
+        filteredFile, sentCount, keptHashList = RunTreeTran.filterAndLogInvokerParses(self.invokerPath)
+
+        self.assertEqual(getRecords(filteredFile), getRecords(baselinePath))
+        self.assertEqual(self.readFile(os.path.join(self.tempDir.name, Utils.GOOD_PARSES_LOG)), self.readFile(baselineLog))
+        self.assertEqual(sentCount, 3)
+
+        # Two sentences that parsed and the records at the end
+        self.assertEqual(len(keptHashList), 3)
+
+    def test_bad_invoker_file(self):
+        self.writeInvoker('<AnaRecs><anaRec>')
+
+        with self.assertRaises(ValueError):
+            RunTreeTran.filterAndLogInvokerParses(self.invokerPath)
+
+    def test_same_sentence_same_hash(self):
+        _, _, keptHashList = RunTreeTran.filterAndLogInvokerParses(self.invokerPath)
+
+        # The same sentence in a different place in the file, with different whitespace around it
+        self.writeInvoker(INVOKER.replace('<anaRec id="1"><w>el</w></anaRec>', '<anaRec id="0"><w>x</w><Analysis count="1"/></anaRec>\n\n  <anaRec id="1"><w>el</w></anaRec>'))
+        _, _, newHashList = RunTreeTran.filterAndLogInvokerParses(self.invokerPath)
+
+        self.assertEqual(newHashList[1:], keptHashList)
+
+    def runWithCache(self, sentenceCache, resultPath):
+        filteredFile, sentCount, keptHashList = RunTreeTran.filterAndLogInvokerParses(self.invokerPath, sentenceCache)
+        newHashList = [sentHash for sentHash in keptHashList if not sentenceCache.contains(sentHash)]
+        filteredRecList = getRecords(filteredFile)[2]
+
+        with mock.patch.object(RunTreeTran, 'call', side_effect=fakeTreeTran):
+            self.assertTrue(RunTreeTran.runTreeTranOnNewSentences('rules.xml', filteredFile, newHashList, sentenceCache))
+
+        RunTreeTran.writeResultFileFromCache(resultPath, keptHashList, sentenceCache)
+        return filteredRecList
+
+    def fullRun(self, resultPath):
+        filteredFile, _, _ = RunTreeTran.filterAndLogInvokerParses(self.invokerPath)
+        fakeTreeTran(['TreeTran.exe', 'rules.xml', filteredFile, resultPath])
+
+    def test_partial_run_same_as_full_run(self):
+        sentenceCache = TreeTranSentenceCache('rules hash', os.path.join(self.tempDir.name, 'cache.json'))
+        resultPath = os.path.join(self.tempDir.name, 'result.xml')
+        fullResultPath = os.path.join(self.tempDir.name, 'full_result.xml')
+
+        # Nothing cached, everything gets run
+        filteredRecList = self.runWithCache(sentenceCache, resultPath)
+        self.assertEqual(len(filteredRecList), 5)
+        self.fullRun(fullResultPath)
+        self.assertEqual(getRecords(resultPath), getRecords(fullResultPath))
+
+        # Change one sentence, only it gets run
+        self.writeInvoker(INVOKER.replace('casa', 'mesa'))
+        filteredRecList = self.runWithCache(sentenceCache, resultPath)
+        self.assertEqual(len(filteredRecList), 2)
+        self.assertIn('mesa', filteredRecList[1])
+        self.fullRun(fullResultPath)
+        self.assertEqual(getRecords(resultPath), getRecords(fullResultPath))
+
+    def test_partial_run_fails_when_results_dont_match_up(self):
+        sentenceCache = TreeTranSentenceCache('rules hash', os.path.join(self.tempDir.name, 'cache.json'))
+        filteredFile, _, keptHashList = RunTreeTran.filterAndLogInvokerParses(self.invokerPath, sentenceCache)
+
+        # TreeTran gave back one sentence less than it was given
+        with mock.patch.object(RunTreeTran, 'call', side_effect=fakeTreeTran):
+            self.assertFalse(RunTreeTran.runTreeTranOnNewSentences('rules.xml', filteredFile, keptHashList + ['extra'], sentenceCache))
+
+        self.assertFalse(any(sentenceCache.contains(sentHash) for sentHash in keptHashList))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import ReadConfig
+import SourceTextBatch
+
+TEXT_LIST = ['Matthew 02', 'Luke 01', 'matthew 10', 'Matthew 01', 'Mark 01', 'Intro']
+
+class TestSourceTextBatch(unittest.TestCase):
+
+    def getNames(self, patternList):
+        indexList, unmatchedList = SourceTextBatch.selectBatchTexts(TEXT_LIST, patternList)
+        return [TEXT_LIST[i] for i in indexList], unmatchedList
+
+    def test_batch_text_patterns(self):
+        self.assertEqual(SourceTextBatch.getBatchTextPatterns({ReadConfig.SOURCE_TEXT_BATCH_LIST: ' Matthew 01, Mark*,, '}, None), ['Matthew 01', 'Mark*'])
+        self.assertIsNone(SourceTextBatch.getBatchTextPatterns({ReadConfig.SOURCE_TEXT_BATCH_LIST: ' , '}, None))
+        self.assertIsNone(SourceTextBatch.getBatchTextPatterns({}, None))
+
+    def test_select_by_title_and_pattern(self):
+        # Matches of one pattern are sorted, the patterns keep their order
+        self.assertEqual(self.getNames(['Mark 01', 'Matthew*']), (['Mark 01', 'Matthew 01', 'Matthew 02'], []))
+
+        # Matching is case sensitive
+        self.assertEqual(self.getNames(['matthew*']), (['matthew 10'], []))
+        self.assertEqual(self.getNames(['*0[12]']), (['Luke 01', 'Mark 01', 'Matthew 01', 'Matthew 02'], []))
+
+    def test_select_no_repeats_or_matches(self):
+        self.assertEqual(self.getNames(['Matthew 01', 'Matthew*', 'John*', 'Matthew 01']), (['Matthew 01', 'Matthew 02'], ['John*', 'Matthew 01']))
+        self.assertEqual(self.getNames(['John']), ([], ['John']))
+
+    def test_output_path(self):
+        outputFile = os.path.join('Build', 'source_text-aper.txt')
+        self.assertEqual(SourceTextBatch.getBatchOutputPath(outputFile, 'Matthew 01'), os.path.join('Build', 'source_text-aper_Matthew 01.txt'))
+        self.assertEqual(SourceTextBatch.getBatchOutputPath(outputFile, 'Luke 1:1-5 <draft>?'), os.path.join('Build', 'source_text-aper_Luke 1_1-5 _draft__.txt'))
+
+    def test_output_path_collisions(self):
+        outputFile = os.path.join('Build', 'source_text-aper.txt')
+        pathList = SourceTextBatch.getBatchOutputPaths(outputFile, ['Luke 1:1', 'Luke 1/1', 'luke 1_1', 'Luke 1_1 (2)', 'Mark'])
+
+        self.assertEqual([os.path.basename(path) for path in pathList], ['source_text-aper_Luke 1_1.txt', 'source_text-aper_Luke 1_1 (2).txt',
+                                                                         'source_text-aper_luke 1_1 (3).txt', 'source_text-aper_Luke 1_1 (2) (2).txt',
+                                                                         'source_text-aper_Mark.txt'])
+
+    def test_manifest(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+
+            outputFile = os.path.join(tempDir, 'source_text-aper.txt')
+            pathList = SourceTextBatch.getBatchOutputPaths(outputFile, ['Matthew 01', 'Mark 01'])
+            manifestPath = SourceTextBatch.writeBatchManifest(outputFile, [('Matthew 01', pathList[0], 12), ('Mark 01', pathList[1], 0)])
+
+            self.assertEqual(manifestPath, os.path.join(tempDir, 'source_text-aper' + SourceTextBatch.BATCH_MANIFEST_SUFFIX))
+
+            with open(manifestPath, encoding='utf-8') as f:
+                manifest = json.load(f)
+
+        self.assertEqual(manifest, {'texts': [{'text': 'Matthew 01', 'file': pathList[0], 'sentences': 12},
+                                              {'text': 'Mark 01', 'file': pathList[1], 'sentences': 0}]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import sys
+import os
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+sys.path.append('C:\\Program Files\\SIL\\FieldWorks 9\\')
+sys.path.append('C:\\Windows\\Microsoft.NET\\Framework64\\v4.0.30319\\')
+
+# Import and initialize pythonnet
+import clr
+clr.AddReference("System")
+clr.AddReference("SIL.LCModel")
+clr.AddReference("SIL.LCModel.Core")
+
+from ChapterSelection import spliceChapters, splitTextIntoChapters
+
+BOOK = "\\id RUT\n\\mt1 Rut\n\\c 1\n\\v 1 old one\n\\c 3\n\\v 1 old three\n\\c 4\n\\v 1 old four\n"
+
+class TestSpliceChapters(unittest.TestCase):
+
+    def test_replace_middle_and_last_chapter(self):
+        chapterList = splitTextIntoChapters("\\c 3\n\\v 1 new three\n") + splitTextIntoChapters("\\c 4\n\\v 1 new four\n")
+        expected_output = "\\id RUT\n\\mt1 Rut\n\\c 1\n\\v 1 old one\n\\c 3\n\\v 1 new three\n\\c 4\n\\v 1 new four\n"
+        self.assertEqual(spliceChapters(BOOK, chapterList), expected_output)
+
+    def test_insert_missing_chapter_and_append(self):
+        chapterList = splitTextIntoChapters("\\c 2\n\\v 1 new two\n\\c 5\n\\v 1 new five\n")
+        expected_output = "\\id RUT\n\\mt1 Rut\n\\c 1\n\\v 1 old one\n\\c 2\n\\v 1 new two\n\\c 3\n\\v 1 old three\n\\c 4\n\\v 1 old four\n\\c 5\n\\v 1 new five\n"
+        self.assertEqual(spliceChapters(BOOK, chapterList), expected_output)
+
+    def test_intro_replaces_from_main_title(self):
+        chapterList = splitTextIntoChapters("\\mt1 Rut\n\\ip new intro\n\\c 1\n\\v 1 new one\n")
+        expected_output = "\\id RUT\n\\mt1 Rut\n\\ip new intro\n\\c 1\n\\v 1 new one\n\\c 3\n\\v 1 old three\n\\c 4\n\\v 1 old four\n"
+        self.assertEqual(spliceChapters(BOOK, chapterList), expected_output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,7 +13,7 @@ clr.AddReference("System")
 clr.AddReference("SIL.LCModel")
 clr.AddReference("SIL.LCModel.Core")
 
-from ChapterSelection import splitSFMs
+from ChapterSelection import splitSFMs, getParagraphRuns
 
 class TestSplitSFMs(unittest.TestCase):
 
@@ -103,5 +103,15 @@ class TestSplitSFMs(unittest.TestCase):
         expected_output = ['z', '\\f + ', '', '\\fr 1.5—6', ' ', '\\ft', ' z ', '\\xt Hech. 7.14–15\\xt*', ' z.', '\\f*', ' z ', '\\x + ', '', '\\xo 1.1〜5', ' ', '\\xt Gén. 46.8‒27.\\x*', '']
         self.assertEqual(splitSFMs(input_str), expected_output)
 
+    def test_paragraph_runs(self):
+        input_str = "\\c 22\n\\p\n\\v 1 Chaypita 1:2 ninqa\n\\s Tayta"
+        expected_output = [[('\\c 22', True)], [('\\p', True)], [('\\v 1 ', True), ('Chaypita ', False), ('1:2', True), (' ninqa', False)], [('\\s', True), (' Tayta', False)]]
+        self.assertEqual(getParagraphRuns(input_str), expected_output)
+
+    def test_paragraph_runs_empty_lines(self):
+        input_str = "\\p\n\nend\n"
+        expected_output = [[('\\p', True)], [], [('end', False)], []]
+        self.assertEqual(getParagraphRuns(input_str), expected_output)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
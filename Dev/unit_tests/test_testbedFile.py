@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import xml.etree.ElementTree as ET
+from unittest import mock
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import Testbed
+
+MINIMAL_TESTBED = os.path.join(os.path.dirname(__file__), '../../InstallerResources/XXEaddon/FLExTransTestbedXMLmind/templates/minimalTestbed.xml')
+
+COMPOSED = 'caf\u00e9'
+DECOMPOSED = 'cafe\u0301'
+
+TESTBED = '''<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE FLExTransTestbed PUBLIC "-//XMLmind//DTD FLExTransTestbed//EN"
+"FLExTransTestbed.dtd">
+<FLExTransTestbed source_direction="ltr"><testbeds><testbed n="default"><tests>
+<test id="1" is_valid="yes"><sourceInput origin="{word}"><lexicalUnits><lexicalUnit><headWord>{word}</headWord><senseNum>1</senseNum><grammaticalCategoryTag>n</grammaticalCategoryTag><otherTags /></lexicalUnit></lexicalUnits></sourceInput><targetOutput><expectedResult>{word}</expectedResult><actualResult /></targetOutput></test>
+</tests></testbed></testbeds></FLExTransTestbed>
+'''
+
+class TestTestbedFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.testbedPath = os.path.join(self.tempDir.name, 'testbed.xml')
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeFile(self, text):
+        with open(self.testbedPath, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def readFile(self):
+        with open(self.testbedPath, encoding='utf-8') as f:
+            return f.read()
+
+    def test_read_existing_testbed(self):
+        tree = Testbed.readTestbedTree(MINIMAL_TESTBED)
+        self.assertEqual(tree.getroot().tag, 'FLExTransTestbed')
+        self.assertEqual(tree.find('.//headWord').text, 'sample1')
+        self.assertEqual(tree.find('.//expectedResult').text, 'My result.')
+
+        # Composed text in the file is decomposed in the tree
+        self.writeFile(TESTBED.format(word=COMPOSED))
+        tree = Testbed.readTestbedTree(self.testbedPath)
+        self.assertEqual(tree.find('.//headWord').text, DECOMPOSED)
+        self.assertEqual(tree.find('.//sourceInput').get('origin'), DECOMPOSED)
+
+    def test_read_bad_testbed(self):
+        with self.assertRaises(ValueError):
+            Testbed.readTestbedTree(os.path.join(self.tempDir.name, 'missing.xml'))
+
+        self.writeFile('<FLExTransTestbed><testbeds>')
+        with self.assertRaises(ValueError):
+            Testbed.readTestbedTree(self.testbedPath)
+
+    def test_composed_and_decomposed_round_trip(self):
+        self.writeFile(TESTBED.format(word=DECOMPOSED))
+        tree = Testbed.readTestbedTree(self.testbedPath)
+
+        Testbed.writeTestbedTree(tree, self.testbedPath, composed=True)
+        fileStr = self.readFile()
+        self.assertTrue(fileStr.startswith("<?xml version='1.0' encoding='utf-8'?>\n" + Testbed.TESTBED_DOCTYPE))
+        self.assertIn(COMPOSED, fileStr)
+        self.assertNotIn(DECOMPOSED, fileStr)
+
+        newTree = Testbed.readTestbedTree(self.testbedPath)
+        self.assertEqual(ET.tostring(newTree.getroot()), ET.tostring(tree.getroot()))
+
+        Testbed.writeTestbedTree(newTree, self.testbedPath, composed=False)
+        fileStr = self.readFile()
+        self.assertIn(DECOMPOSED, fileStr)
+        self.assertNotIn(COMPOSED, fileStr)
+
+    def test_normalizing_writer_keeps_combining_marks_with_their_character(self):
+        output = io.StringIO()
+
+        # Every piece would end a block if it ended with a tag
+        with mock.patch.object(Testbed, 'NORMALIZE_BLOCK_SIZE', 1):
+            writer = Testbed.NormalizingWriter(output, 'NFC')
+            for piece in ['<a>', 'cafe', '\u0301', '</a>', '<b>', 'e', '\u0301', '</b>']:
+                writer.write(piece)
+            writer.flush()
+
+        self.assertEqual(output.getvalue(), f'<a>{COMPOSED}</a><b>\u00e9</b>')
+
+    def test_failed_write_leaves_testbed_as_it_was(self):
+        self.writeFile(TESTBED.format(word=COMPOSED))
+        tree = Testbed.readTestbedTree(self.testbedPath)
+
+        # Something that can't be serialized part way through the tree
+        tree.find('.//test').set('id', 1)
+
+        with self.assertRaises(TypeError):
+            Testbed.writeTestbedTree(tree, self.testbedPath, composed=True)
+
+        self.assertEqual(self.readFile(), TESTBED.format(word=COMPOSED))
+        self.assertEqual(os.listdir(self.tempDir.name), ['testbed.xml'])
+
+if __name__ == '__main__':
+    unittest.main()
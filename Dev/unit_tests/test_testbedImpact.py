@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import TestbedImpact
+
+RULES_TEMPLATE = '''<?xml version="1.0" encoding="utf-8"?>
+<transfer>
+  <section-def-cats><def-cat n="c_n"><cat-item tags="n.*"/></def-cat><def-cat n="c_v"><cat-item tags="v.*"/></def-cat></section-def-cats>
+  <section-rules>
+    <rule comment="nouns"><pattern><pattern-item n="c_n"/></pattern><action><out><lu><clip pos="1" side="tl" part="lem"/><lit-tag v="{nounTag}"/></lu></out></action></rule>
+    <rule comment="verbs"><pattern><pattern-item n="c_v"/></pattern><action><out><lu><clip pos="1" side="tl" part="lem"/><lit-tag v="v"/></lu></out></action></rule>
+  </section-rules>
+</transfer>
+'''
+
+DICT_TEMPLATE = '''<?xml version="1.0" encoding="utf-8"?>
+<dictionary>
+  <sdefs><sdef n="n"/><sdef n="v"/></sdefs>
+  <section id="main" type="standard">
+    <e><p><l>perro1.1<s n="n"/></l><r>{dogLemma}<s n="n"/></r></p></e>
+    <e><p><l>comer1.1<s n="v"/></l><r>eat1.1<s n="v"/></r></p></e>
+    <e><i>.<s n="sent"/></i></e>
+  </section>
+</dictionary>
+'''
+
+DUMP_LINES = ['^perro1.1<n>$ ^EOL<eol>$\n', '^comer1.1<v>$ ^.<sent>$ ^EOL<eol>$\n']
+
+TRACE = '''apertium-transfer: Applied rule 1 line 1 perro1.1<n>/dog1.1<n>
+apertium-interchunk: Applied rule 1 line 1 n<SN>{^dog1.1<n>$}
+apertium-transfer: Applied rule 2 line 2 comer1.1<v>/eat1.1<v>
+'''
+
+class TestTestbedImpact(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.rulesPath = os.path.join(self.tempDir.name, 'transfer_rules.t1x')
+        self.dictPath = os.path.join(self.tempDir.name, 'bilingual.dix')
+        self.logPath = os.path.join(self.tempDir.name, 'apertium_log.txt')
+        with open(self.logPath, 'w', encoding='utf-8') as f:
+            f.write(TRACE)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def getImpact(self, nounTag='n', dogLemma='dog1.1', extraValue='project'):
+        with open(self.rulesPath, 'w', encoding='utf-8') as f:
+            f.write(RULES_TEMPLATE.format(nounTag=nounTag))
+        with open(self.dictPath, 'w', encoding='utf-8') as f:
+            f.write(DICT_TEMPLATE.format(dogLemma=dogLemma))
+        impact = TestbedImpact.TestbedImpact(self.tempDir.name)
+        impact.hashInputs(self.rulesPath, [''], self.dictPath, [extraValue])
+        return impact
+
+    def runTests(self, impact, forceAll=False):
+        selection = impact.selectTests(DUMP_LINES, forceAll)
+        rerunLineList = [DUMP_LINES[i] for i in selection.getRerunIndexes()]
+        testRulesList = TestbedImpact.alignRulesToTests(rerunLineList, TestbedImpact.readTransferTrace(self.logPath))
+        impact.recordTests(rerunLineList, testRulesList, [f'result {i}' for i in selection.getRerunIndexes()])
+        impact.save(DUMP_LINES)
+        return selection
+
+    def test_align_rules_to_tests(self):
+        traceList = TestbedImpact.readTransferTrace(self.logPath)
+        self.assertEqual(traceList, [('1', ['perro1.1<n>']), ('2', ['comer1.1<v>'])])
+        self.assertEqual(TestbedImpact.alignRulesToTests(DUMP_LINES, traceList), [{'1'}, {'2'}])
+
+        # A rule that can't be found means we don't know what fired from there on
+        self.assertEqual(TestbedImpact.alignRulesToTests(DUMP_LINES, [('2', ['comer1.1<v>']), ('3', ['gato1.1<n>'])]), [set(), None])
+
+    def test_only_affected_tests_rerun(self):
+        self.assertTrue(self.runTests(self.getImpact()).allRerun())
+
+        # Nothing changed
+        selection = self.runTests(self.getImpact())
+        self.assertEqual(selection.carriedList, [0, 1])
+        self.assertEqual(self.getImpact().getSavedResult(DUMP_LINES[1]), 'result 1')
+
+        # Rule 1 only fired for the first test
+        selection = self.runTests(self.getImpact(nounTag='N'))
+        self.assertEqual(selection.rerunList, [(0, TestbedImpact.REASON_RULE.format(rule='1'))])
+        self.assertEqual(selection.carriedList, [1])
+
+        # Only the first test looks up perro
+        selection = self.getImpact(nounTag='N', dogLemma='hound1.1').selectTests(DUMP_LINES)
+        self.assertEqual(selection.rerunList, [(0, TestbedImpact.REASON_ENTRY.format(lemma='perro1.1'))])
+
+        # Something that affects all tests and forcing all tests
+        self.assertTrue(self.getImpact(nounTag='N', extraValue='changed project').selectTests(DUMP_LINES).allRerun())
+        self.assertTrue(self.getImpact(nounTag='N').selectTests(DUMP_LINES, forceAll=True).allRerun())
+
+if __name__ == '__main__':
+    unittest.main()
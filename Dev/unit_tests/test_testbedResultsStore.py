@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from unittest import mock
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import Testbed
+
+LEGACY_RESULTS = """<?xml version='1.0' encoding='utf-8'?>
+<FLExTransTestbedResults><testbedResult startDateTime="2026-01-02 10:00:00" endDateTime="2026-01-02 10:01:00"><FLExTransTestbed source_direction="ltr"><testbeds><testbed n="default"><tests>
+<test id="t1" is_valid="yes"><sourceInput origin="x"><lexicalUnits><lexicalUnit><headWord>perro</headWord><senseNum>1</senseNum><grammaticalCategoryTag>n</grammaticalCategoryTag><otherTags /></lexicalUnit></lexicalUnits></sourceInput><targetOutput><expectedResult>dog</expectedResult><actualResult>cat</actualResult></targetOutput></test>
+</tests></testbed></testbeds></FLExTransTestbed></testbedResult><testbedResult startDateTime="2026-01-01 10:00:00" endDateTime="2026-01-01 10:01:00"><FLExTransTestbed source_direction="ltr"><testbeds><testbed n="default"><tests>
+<test id="t1" is_valid="yes"><sourceInput origin="x"><lexicalUnits><lexicalUnit><headWord>perro</headWord><senseNum>1</senseNum><grammaticalCategoryTag>n</grammaticalCategoryTag><otherTags /></lexicalUnit></lexicalUnits></sourceInput><targetOutput><expectedResult>dog</expectedResult><actualResult>dog</actualResult></targetOutput></test>
+</tests></testbed></testbeds></FLExTransTestbed></testbedResult></FLExTransTestbedResults>"""
+
+class TestTestbedResultsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.resultsPath = os.path.join(self.tempDir.name, 'testbed_results.xml')
+        with open(self.resultsPath, 'w', encoding='utf-8') as f:
+            f.write(LEGACY_RESULTS)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_import_legacy_file(self):
+        store = Testbed.TestbedResultsStore(self.resultsPath)
+        summaryList = store.getRunSummaries()
+        self.assertEqual([summary['start'] for summary in summaryList], ['2026-01-02 10:00:00', '2026-01-01 10:00:00'])
+        self.assertEqual([summary['failed'] for summary in summaryList], [1, 0])
+        self.assertEqual(store.loadRunNode(summaryList[0]['id']).attrib['startDateTime'], '2026-01-02 10:00:00')
+
+    def test_new_run_is_appended(self):
+        store = Testbed.TestbedResultsStore(self.resultsPath)
+        oldRunId = store.getRunIds()[-1]
+        oldSegmentTime = os.path.getmtime(store.getSegmentPath(oldRunId))
+        resultXMLObj = Testbed.TestbedResultXMLObject(None, store.loadRunNode(oldRunId))
+        newRunId = store.saveRun(resultXMLObj)
+        store = Testbed.TestbedResultsStore(self.resultsPath)
+        self.assertEqual(store.getRunIds(), [newRunId, 2, 1])
+        self.assertEqual(os.path.getmtime(store.getSegmentPath(oldRunId)), oldSegmentTime)
+
+    def test_export_legacy_file(self):
+        store = Testbed.TestbedResultsStore(self.resultsPath)
+        exportPath = os.path.join(self.tempDir.name, 'exported.xml')
+        store.exportLegacyFile(exportPath)
+        self.assertEqual(ET.tostring(ET.parse(exportPath).getroot()), ET.tostring(ET.parse(self.resultsPath).getroot()))
+
+    def makeResultsFileObj(self, writeSingleFile):
+        configMap = {'TestbedResultsFile': self.resultsPath, 'TestbedWriteSingleResultsFile': writeSingleFile}
+        with mock.patch.object(Testbed.ReadConfig, 'readConfig', return_value=configMap), \
+             mock.patch.object(Testbed.ReadConfig, 'getConfigVal', side_effect=lambda configMap, key, report, giveError=True: configMap[key]):
+            resultsFileObj = Testbed.FlexTransTestbedResultsFile(mock.Mock(), latestOnly=True)
+
+        resultsFileObj.getResultsXMLObj().getTestbedResultXMLObjectList()[0].getRoot().set('endDateTime', '2026-01-02 11:00:00')
+        return resultsFileObj
+
+    def test_write_updates_legacy_file_when_asked(self):
+        self.makeResultsFileObj('y').write()
+
+        legacyRoot = ET.parse(self.resultsPath).getroot()
+        self.assertEqual([resultNode.get('endDateTime') for resultNode in legacyRoot], ['2026-01-02 11:00:00', '2026-01-01 10:01:00'])
+
+    def test_write_leaves_legacy_file_by_default(self):
+        resultsFileObj = self.makeResultsFileObj('n')
+        resultsFileObj.write()
+
+        # Only the run's segment and its index line were written
+        with open(self.resultsPath, encoding='utf-8') as f:
+            self.assertEqual(f.read(), LEGACY_RESULTS)
+        self.assertEqual(resultsFileObj.getStore().getNumRuns(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
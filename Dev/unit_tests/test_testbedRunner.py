@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import TestbedRunner
+
+class TestTestbedRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.dumpPath = os.path.join(self.tempDir.name, 'source_text.txt')
+        with open(self.dumpPath, 'w', encoding='utf-8') as f:
+            f.writelines(f'^test{i}1.1<n>$ ^EOL<eol>$\n' for i in range(10))
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_num_shards(self):
+        self.assertEqual(TestbedRunner.getNumShards(10, 4), 1)
+        self.assertEqual(TestbedRunner.getNumShards(100, 4), 4)
+        self.assertEqual(TestbedRunner.getNumShards(1000, 4), 4)
+
+    def test_split_and_merge_keep_test_order(self):
+        shardList = TestbedRunner.splitDumpFile(self.dumpPath, 3, self.tempDir.name)
+        self.assertEqual([shard.numTests for shard in shardList], [4, 3, 3])
+        self.assertEqual([shard.startTest for shard in shardList], [0, 4, 7])
+
+        # Each shard's step writes its own output, the last one without a final newline
+        def stepFunc(shard):
+            with open(shard.sourcePath, encoding='utf-8') as f:
+                text = f.read().upper()
+            with open(shard.synthesisPath, 'w', encoding='utf-8') as f:
+                f.write(text.rstrip('\n') if shard.num == 3 else text)
+            return shard.num
+
+        self.assertEqual(TestbedRunner.runShardStep(shardList, 'synthesis', stepFunc), [1, 2, 3])
+        self.assertTrue(all('synthesis' in shard.stepTimes for shard in shardList))
+
+        mergedPath = os.path.join(self.tempDir.name, 'merged.txt')
+        TestbedRunner.mergeShardFiles(shardList, 'synthesisPath', mergedPath)
+        with open(self.dumpPath, encoding='utf-8') as f1, open(mergedPath, encoding='utf-8') as f2:
+            self.assertEqual(f1.read().upper(), f2.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import Testbed
+import TestbedTrends
+
+TEST_XML = ('<test id="t{word}" is_valid="{valid}"><sourceInput origin="x"><lexicalUnits><lexicalUnit><headWord>{word}1</headWord><senseNum>1</senseNum>'
+            '<grammaticalCategoryTag>n</grammaticalCategoryTag><otherTags /></lexicalUnit></lexicalUnits></sourceInput>'
+            '<targetOutput><expectedResult>{word}</expectedResult><actualResult>{actual}</actualResult></targetOutput></test>')
+
+# word -> outcome in each run, oldest first
+RUN_OUTCOMES = {'perro': 'PFF', 'gato': 'FFP', 'casa': 'PFP', 'mesa': 'PPI', 'libro': '-PP'}
+
+def makeRunXML(runNum):
+    testList = []
+    for word, outcomes in RUN_OUTCOMES.items():
+        outcome = outcomes[runNum]
+        if outcome != '-':
+            testList.append(TEST_XML.format(word=word, valid='no' if outcome == 'I' else 'yes', actual=word if outcome == 'P' else 'x'))
+    return (f'<testbedResult startDateTime="2026-01-0{runNum+1} 10:00:00" endDateTime="2026-01-0{runNum+1} 10:01:00"><FLExTransTestbed source_direction="ltr">'
+            f'<testbeds><testbed n="default"><tests>{"".join(testList)}</tests></testbed></testbeds></FLExTransTestbed></testbedResult>')
+
+class TestTestbedTrends(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.resultsPath = os.path.join(self.tempDir.name, 'testbed_results.xml')
+
+        # The first two runs are from before there was a trend index
+        with open(self.resultsPath, 'w', encoding='utf-8') as f:
+            f.write("<?xml version='1.0' encoding='utf-8'?>\n<FLExTransTestbedResults>" + makeRunXML(1) + makeRunXML(0) + '</FLExTransTestbedResults>')
+        self.store = Testbed.TestbedResultsStore(self.resultsPath)
+
+        # The third run gets added like End Testbed does it
+        resultXMLObj = Testbed.FLExTransTestbedResultsXMLObject(Testbed.ET.fromstring('<FLExTransTestbedResults>' + makeRunXML(2) + '</FLExTransTestbedResults>'))\
+                       .getTestbedResultXMLObjectList()[0]
+        self.newRunId = self.store.saveRun(resultXMLObj)
+        TestbedTrends.addRunToTrends(self.store, self.newRunId, resultXMLObj)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_outcome_vectors(self):
+        trendIndex = TestbedTrends.TrendIndex(self.store.getStoreDir())
+        self.assertEqual(trendIndex.getRunIds(), [1, 2, 3])
+        for word, outcomes in RUN_OUTCOMES.items():
+            self.assertEqual(trendIndex.getTrend('x', f'{word}1.1 n').outcomes, outcomes)
+
+    def test_diff_runs(self):
+        myDiff = TestbedTrends.TrendIndex(self.store.getStoreDir()).diffRuns(1, 3)
+        self.assertEqual([trend.luString for trend in myDiff.newlyFailing], ['perro1.1 n'])
+        self.assertEqual([trend.luString for trend in myDiff.newlyPassing], ['gato1.1 n'])
+        self.assertEqual([trend.luString for trend in myDiff.flapping], ['casa1.1 n'])
+        self.assertEqual([trend.luString for trend in myDiff.added], ['libro1.1 n'])
+        self.assertFalse(TestbedTrends.TrendIndex(self.store.getStoreDir()).diffRuns(3, 3).hasChanges())
+
+if __name__ == '__main__':
+    unittest.main()
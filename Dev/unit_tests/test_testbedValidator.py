@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import Testbed
+import TestbedValidator
+
+class FakeEntry():
+
+    def __init__(self, guid, stamp, senseList, tagList):
+        self.Guid = guid
+        self.stamp = stamp
+        self.senseList = senseList
+        self.tagList = tagList
+
+class FakeDB():
+
+    def __init__(self, entryList, modified):
+        self.entryList = entryList
+        self.modified = modified
+
+    def LexiconAllEntries(self):
+        return self.entryList
+
+# A validator that gets its values from fake entries instead of a FLEx project
+class FakeValidator(TestbedValidator.TestbedValidator):
+
+    def __init__(self, database, cachePath):
+        self.numChecked = 0
+        super().__init__(database, None, cachePath)
+
+    def getMorphNames(self):
+        return ['stem', 'root']
+
+    def getDBModified(self):
+        return self.db.modified
+
+    def getEntryStamp(self, e):
+        return e.stamp
+
+    def readEntry(self, e, morphNames):
+        return e.senseList, e.tagList
+
+    def readCategoryInfo(self):
+        self.mapCats.update(['n', 'v'])
+
+    def readOtherInfo(self):
+        self.mapTags.add('pl')
+
+    def isValid(self, lexUnit):
+        self.numChecked += 1
+        return super().isValid(lexUnit)
+
+def makeTest(luStr):
+    return Testbed.TestbedTestXMLObject([Testbed.LexicalUnit(luStr)], 'test', 'result')
+
+class TestTestbedValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.cachePath = os.path.join(self.tempDir.name, 'testbed_cache.sqlite')
+        self.entryList = [FakeEntry('g1', '1', ['perro1.1'], []), FakeEntry('g2', '1', ['gato1.1'], []), FakeEntry('g3', '1', [], ['3sg'])]
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def validate(self, validator, testList):
+        for test in testList:
+            test.validate(validator)
+        validator.saveResults()
+
+    def test_only_changed_entries_are_read(self):
+        FakeValidator(FakeDB(self.entryList, 'day1'), self.cachePath).saveResults()
+        self.entryList[1] = FakeEntry('g2', '2', ['gato1.1', 'gato1.2'], [])
+        validator = FakeValidator(FakeDB(self.entryList, 'day2'), self.cachePath)
+        self.assertEqual(validator.numEntriesRead, 1)
+        self.assertEqual(validator.mapWordSenses, {'perro1.1', 'gato1.1', 'gato1.2'})
+        self.assertEqual(validator.mapTags, {'pl', '3sg'})
+        validator.saveResults()
+        validator = FakeValidator(FakeDB(self.entryList, 'day2'), self.cachePath)
+        self.assertEqual(validator.numEntriesRead, 0)
+        self.assertEqual(validator.mapWordSenses, {'perro1.1', 'gato1.1', 'gato1.2'})
+
+    def test_only_touched_tests_are_validated(self):
+        testList = [makeTest('perro1.1<n><pl>'), makeTest('gato1.2<n>')]
+        validator = FakeValidator(FakeDB(self.entryList, 'day1'), self.cachePath)
+        self.validate(validator, testList)
+        self.assertEqual(validator.numChecked, 2)
+        self.assertFalse(testList[1].isValid())
+
+        # gato gets a second sense, only the gato test gets validated again
+        self.entryList[1] = FakeEntry('g2', '2', ['gato1.1', 'gato1.2'], [])
+        validator = FakeValidator(FakeDB(self.entryList, 'day2'), self.cachePath)
+        self.validate(validator, testList)
+        self.assertEqual(validator.numChecked, 1)
+        self.assertTrue(testList[0].isValid())
+        self.assertTrue(testList[1].isValid())
+
+        # perro gets deleted
+        del self.entryList[0]
+        validator = FakeValidator(FakeDB(self.entryList, 'day3'), self.cachePath)
+        self.validate(validator, testList)
+        self.assertEqual(validator.numChecked, 1)
+        self.assertFalse(testList[0].isValid())
+        self.assertTrue(testList[1].isValid())
+
+if __name__ == '__main__':
+    unittest.main()
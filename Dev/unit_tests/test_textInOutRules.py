@@ -0,0 +1,216 @@
+import unittest
+import sys
+import os
+import unicodedata
+import json
+import tempfile
+import xml.etree.ElementTree as ET
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib/Windows')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../Modules')))
+
+try:
+    import regex
+    import TextInOutUtils
+    HAVE_TEXT_IN_OUT = True
+except ImportError:
+    HAVE_TEXT_IN_OUT = False
+
+try:
+    import FixUpSynthText
+    HAVE_FIX_UP = True
+except ImportError:
+    HAVE_FIX_UP = False
+
+# How the rules were applied before they were compiled: normalize the text before each active rule,
+# apply the rule and stop with None on a failure. The output of the last rule is returned as it is.
+def baselineApply(inputStr, tree):
+
+    newStr = inputStr
+
+    for ruleEl in tree.getroot().find(TextInOutUtils.SEARCH_REPLACE_RULES_ELEM):
+
+        searchReplObj = TextInOutUtils.getRuleFromElement(ruleEl)
+
+        if searchReplObj.isInactive == False:
+
+            newStr = unicodedata.normalize('NFD', newStr)
+            newSearch = unicodedata.normalize('NFD', searchReplObj.searchStr)
+
+            try:
+                if searchReplObj.isRegEx:
+                    newStr = regex.sub(newSearch, searchReplObj.replStr, newStr)
+                else:
+                    newStr = newStr.replace(newSearch, searchReplObj.replStr)
+            except:
+                return None
+
+    return newStr
+
+# Make a rules tree from (search, replace, is regex, is inactive) tuples
+def makeRulesTree(ruleList):
+
+    root = ET.Element(TextInOutUtils.FT_SEARCH_REPLACE_ELEM)
+    rulesEl = ET.SubElement(root, TextInOutUtils.SEARCH_REPLACE_RULES_ELEM)
+
+    for searchStr, replStr, isRegEx, isInactive in ruleList:
+
+        ruleEl = ET.SubElement(rulesEl, TextInOutUtils.SEARCH_REPL_RULE_ELEM, {TextInOutUtils.REGEX_ATTRIB: 'yes' if isRegEx else 'no',
+                                                                               TextInOutUtils.INACTIVE_ATTRIB: 'yes' if isInactive else 'no'})
+        ET.SubElement(ruleEl, TextInOutUtils.SEARCH_STRING_ELEM).text = searchStr
+        ET.SubElement(ruleEl, TextInOutUtils.REPL_STRING_ELEM).text = replStr
+
+    return ET.ElementTree(root)
+
+@unittest.skipUnless(HAVE_TEXT_IN_OUT, 'needs regex, wildebeest and PyQt5')
+class TestCompiledRuleSet(unittest.TestCase):
+
+    def assertSameAsBaseline(self, ruleList, inputStr):
+        tree = makeRulesTree(ruleList)
+        newStr, errorMsg = TextInOutUtils.CompiledRuleSet(tree.getroot()).apply(inputStr)
+        self.assertEqual(newStr, baselineApply(inputStr, tree))
+        return newStr, errorMsg
+
+    def test_composed_replacement_kept(self):
+        # The last rule puts in a composed é, it doesn't get decomposed
+        newStr, _ = self.assertSameAsBaseline([('a', 'b', False, False), ('x', 'é', False, False)], 'ax')
+        self.assertEqual(newStr, 'bé')
+
+        # A composed é from an earlier rule gets decomposed before the next rule, so an NFD search matches it
+        newStr, _ = self.assertSameAsBaseline([('x', 'é', False, False), ('é', 'E', False, False)], 'x')
+        self.assertEqual(newStr, 'E')
+
+        # A regex rule with a composed search string matches decomposed text
+        self.assertSameAsBaseline([('é+', 'è', True, False)], 'céé')
+
+    def test_empty_and_inactive_rules(self):
+        self.assertSameAsBaseline([('', '-', False, False), ('b', '', False, False)], 'abc')
+        self.assertSameAsBaseline([('a', 'é', False, True)], 'aé')
+        self.assertSameAsBaseline([(None, None, True, False)], 'abc')
+
+        # No active rules leaves the text as it is
+        self.assertSameAsBaseline([], 'é')
+
+    def test_failed_rule(self):
+        newStr, errorMsg = self.assertSameAsBaseline([('a', 'b', False, False), ('(a', 'c', True, False), ('b', 'd', False, False)], 'aaa')
+        self.assertIsNone(newStr)
+        self.assertIn('(a', errorMsg)
+
+        # A bad group reference only fails when the rule gets applied
+        newStr, _ = self.assertSameAsBaseline([('a', r'\2', True, False)], 'aaa')
+        self.assertIsNone(newStr)
+
+    def test_num_rules_counts_active_rules(self):
+        tree = makeRulesTree([('a', 'b', False, False), ('c', 'd', False, True), ('(e', 'f', True, False)])
+        self.assertEqual(TextInOutUtils.numRules(tree), 2)
+        self.assertEqual(TextInOutUtils.CompiledRuleSet(tree.getroot()).numRules(), 2)
+        self.assertEqual(TextInOutUtils.numRules(makeRulesTree([])), 0)
+
+@unittest.skipUnless(HAVE_TEXT_IN_OUT, 'needs regex, wildebeest and PyQt5')
+class TestMergeLiteralRules(unittest.TestCase):
+
+    # Apply the rules with runs of 2 or more literal rules merged and check it's the same as one rule at a time
+    def assertMergedSameAsBaseline(self, ruleList, inputStr):
+        tree = makeRulesTree(ruleList)
+        ruleSet = TextInOutUtils.CompiledRuleSet(tree.getroot())
+        ruleSet.stepList = TextInOutUtils.mergeLiteralRules(ruleSet.ruleList, minRunLength=2)
+        newStr, _ = ruleSet.apply(inputStr)
+        self.assertEqual(newStr, baselineApply(inputStr, tree))
+        return ruleSet.stepList
+
+    def test_independent_literals_merged(self):
+        stepList = self.assertMergedSameAsBaseline([('a', 'A', False, False), ('b', 'B', False, False), ('c', 'C', False, False)], 'abcabd')
+        self.assertEqual(len(stepList), 1)
+
+    def test_overlapping_literals(self):
+        # One search string inside another, and the end of one the start of another
+        stepList = self.assertMergedSameAsBaseline([('ab', 'X', False, False), ('bc', 'Y', False, False), ('b', 'Z', False, False)], 'abcbab')
+        self.assertEqual(len(stepList), 3)
+
+        self.assertMergedSameAsBaseline([('aa', 'X', False, False), ('a', 'Y', False, False), ('q', 'Q', False, False)], 'aaaqa')
+
+    def test_rules_that_feed_later_rules(self):
+        self.assertMergedSameAsBaseline([('a', 'b', False, False), ('b', 'c', False, False), ('c', 'd', False, False)], 'abcx')
+
+        # The replacement makes a new match across the edge of the replaced text
+        self.assertMergedSameAsBaseline([('x', 'ab', False, False), ('bc', 'Z', False, False), ('q', 'Q', False, False)], 'xcq')
+
+        # Replacements with combining marks or composed characters are applied one at a time
+        self.assertMergedSameAsBaseline([('x', 'é', False, False), ('é', 'E', False, False), ('y', '\u0301', False, False), ('e\u0301', 'F', False, False)], 'xeyé')
+
+    def test_default_run_length(self):
+        minRunLength = TextInOutUtils.MIN_MERGED_RUN_LENGTH
+        ruleList = [(f'ka{i:02d}ti', f'KA{i}', False, False) for i in range(minRunLength)]
+        inputStr = ' '.join(f'ka{i:02d}ti' for i in range(minRunLength)) + ' kati'
+
+        # A run as long as the default gets merged into one step by the rule set
+        ruleSet = TextInOutUtils.CompiledRuleSet(makeRulesTree(ruleList).getroot())
+        self.assertEqual(len(ruleSet.stepList), 1)
+        self.assertEqual(ruleSet.apply(inputStr)[0], baselineApply(inputStr, makeRulesTree(ruleList)))
+
+        # One rule less and they're done one at a time
+        ruleSet = TextInOutUtils.CompiledRuleSet(makeRulesTree(ruleList[1:]).getroot())
+        self.assertEqual(len(ruleSet.stepList), minRunLength - 1)
+
+    def test_regex_rules_mixed_with_literals(self):
+        ruleList = [('a', 'A', False, False), ('b', 'B', False, False), ('[AB]+', '<\\g<0>>', True, False),
+                    ('<', '[', False, False), ('>', ']', False, False), ('z', 'a', False, True), ('\\[(.)', '{\\1', True, False)]
+        stepList = self.assertMergedSameAsBaseline(ruleList, 'abcbaz')
+        self.assertEqual(len(stepList), 4)
+
+@unittest.skipUnless(HAVE_TEXT_IN_OUT, 'needs regex, wildebeest and PyQt5')
+class TestRuleProfile(unittest.TestCase):
+
+    def test_apply_rule_and_count(self):
+        self.assertEqual(TextInOutUtils.applyRuleAndCount(None, 'ab', 'X', 'abcab'), ('XcX', 2, 4))
+        self.assertEqual(TextInOutUtils.applyRuleAndCount(regex.compile('b+'), 'b+', '<\\g<0>>', 'abbcb'), ('a<bb>c<b>', 2, 3))
+        self.assertEqual(TextInOutUtils.applyRuleAndCount(None, 'z', 'X', 'abc'), ('abc', 0, 0))
+
+    def test_results_add_up_for_each_rule(self):
+        profile = TextInOutUtils.RuleProfile()
+        profile.record(1, 'a -> b', 2, 2, 0.5)
+        profile.record(3, 'c -> d', 1, 1, 2.0)
+        profile.record(1, 'a -> b', 3, 3, 1.0)
+
+        self.assertEqual(profile.getStats(1), {'rule': 1, 'ruleString': 'a -> b', 'hits': 5, 'charsChanged': 5, 'seconds': 1.5})
+        self.assertIsNone(profile.getStats(2))
+        self.assertEqual([stats['rule'] for stats in profile.getSlowestFirst()], [3, 1])
+
+    def test_save(self):
+        profile = TextInOutUtils.RuleProfile()
+        profile.record(1, 'a -> b', 2, 2, 0.5)
+        profile.record(2, 'c -> d', 1, 1, 2.0)
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            profilePath = os.path.join(tempDir, TextInOutUtils.TEXT_OUT_RULES_PROFILE_FILE)
+            self.assertTrue(profile.save(profilePath))
+
+            with open(profilePath, encoding='utf-8') as f:
+                self.assertEqual(json.load(f), {'rules': profile.getSlowestFirst()})
+
+            # A folder that doesn't exist
+            self.assertFalse(profile.save(os.path.join(tempDir, 'missing', 'profile.json')))
+
+@unittest.skipUnless(HAVE_TEXT_IN_OUT and HAVE_FIX_UP, 'needs regex, wildebeest, PyQt5 and flextoolslib')
+class TestFixUpText(unittest.TestCase):
+
+    def fixUp(self, ruleList, synthText, wholeFile):
+        ruleSet = TextInOutUtils.CompiledRuleSet(makeRulesTree(ruleList).getroot())
+        return FixUpSynthText.fixUpText(synthText, ruleSet, wholeFile)[0]
+
+    def test_line_local_rules_same_both_ways(self):
+        ruleList = [('-', ' ', False, False), (r'\s+([.,])', r'\1', True, False)]
+        synthText = 'kana-miti .\nmore-words , here\n'
+        self.assertEqual(self.fixUp(ruleList, synthText, False), 'kana miti.\nmore words, here\n')
+        self.assertEqual(self.fixUp(ruleList, synthText, True), self.fixUp(ruleList, synthText, False))
+
+    def test_line_anchors_only_match_each_line_by_default(self):
+        ruleList = [('^', '> ', True, False)]
+        synthText = 'one\ntwo\n'
+        self.assertEqual(self.fixUp(ruleList, synthText, False), '> one\n> two\n')
+        self.assertEqual(self.fixUp(ruleList, synthText, True), '> one\ntwo\n')
+
+if __name__ == '__main__':
+    unittest.main()
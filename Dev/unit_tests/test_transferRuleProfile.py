@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import TransferRuleProfile
+
+RULES = '''<?xml version="1.0" encoding="utf-8"?>
+<transfer>
+  <section-rules>
+    <rule comment="nouns"><pattern><pattern-item n="c_n"/></pattern><action/></rule>
+    <rule comment="verbs &amp; more"><pattern><pattern-item n="c_v"/></pattern><action/></rule>
+    <rule comment="adjectives"><pattern><pattern-item n="c_adj"/></pattern><action/></rule>
+    <rule comment="nouns"><pattern><pattern-item n="c_n"/><pattern-item n="c_adj"/></pattern><action/></rule>
+  </section-rules>
+</transfer>
+'''
+
+SHARD1_LOG = '''apertium-transfer: Applied rule 1 line 1 perro1.1<n>/dog1.1<n>
+apertium-transfer: Applied rule 2 line 2 comer1.1<v>/eat1.1<v>
+apertium-interchunk: Applied rule 1 line 1 n<SN>{^dog1.1<n>$}
+'''
+
+SHARD2_LOG = '''apertium-transfer: Applied rule 1 line 1 gato1.1<n>/cat1.1<n>
+apertium-transfer: Matched rule 4 line 1 gato1.1<n>/cat1.1<n>
+apertium-transfer: Applied rule 1 line 1 casa1.1<n>/house1.1<n>
+'''
+
+class TestTransferRuleProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.rulesPath = os.path.join(self.tempDir.name, 'transfer_rules.t1x')
+        with open(self.rulesPath, 'w', encoding='utf-8') as f:
+            f.write(RULES)
+        self.logPathList = []
+        for num, log in enumerate([SHARD1_LOG, SHARD2_LOG]):
+            self.logPathList.append(os.path.join(self.tempDir.name, f'apertium_log{num}.txt'))
+            with open(self.logPathList[-1], 'w', encoding='utf-8') as f:
+                f.write(log)
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def test_count_rule_firings(self):
+        countMap = TransferRuleProfile.countRuleFirings(self.logPathList + [os.path.join(self.tempDir.name, 'missing.txt')])
+        self.assertEqual(countMap[TransferRuleProfile.TRANSFER_STAGE], {1: 3, 2: 1})
+        self.assertEqual(countMap[TransferRuleProfile.INTERCHUNK_STAGE], {1: 1})
+        self.assertEqual(countMap[TransferRuleProfile.POSTCHUNK_STAGE], {})
+
+    def test_profile_report(self):
+        TransferRuleProfile.profileRun(self.tempDir.name, {TransferRuleProfile.TRANSFER_STAGE: self.rulesPath}, self.logPathList, 'text.txt')
+        profile = TransferRuleProfile.loadProfile(self.tempDir.name)
+        stage = TransferRuleProfile.TRANSFER_STAGE
+
+        self.assertEqual(profile.getStages(), [stage])
+        self.assertEqual([(rule['rule'], rule['count']) for rule in profile.getHotRules(stage)], [(1, 3), (2, 1)])
+        self.assertEqual([rule['rule'] for rule in profile.getNeverFired(stage)], [3, 4])
+        self.assertEqual(profile.getCountsByName(stage)['nouns'], [3, 0])
+
+        with open(os.path.join(self.tempDir.name, TransferRuleProfile.PROFILE_HTML_FILE), encoding='utf-8') as f:
+            self.assertIn('verbs &amp; more', f.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+import TreeTranSentenceCache
+
+SENTENCE = '<anaRec><w>perro</w></anaRec>\n<anaRec><w>come</w><Analysis/></anaRec>\n'
+
+class TestTreeTranSentenceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+        self.cachePath = os.path.join(self.tempDir.name, TreeTranSentenceCache.SENTENCE_CACHE_FILE)
+        self.rulesPath = os.path.join(self.tempDir.name, 'TreeTranRules.xml')
+        self.exePath = os.path.join(self.tempDir.name, 'TreeTran.exe')
+        self.writeFile(self.rulesPath, '<rules>1</rules>')
+        self.writeFile(self.exePath, 'program 1')
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeFile(self, path, text):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def makeCache(self):
+        return TreeTranSentenceCache.TreeTranSentenceCache(TreeTranSentenceCache.getRulesHash(self.rulesPath, self.exePath), self.cachePath)
+
+    def test_cached_result_used_for_same_input(self):
+        sentenceCache = self.makeCache()
+        sentHash = TreeTranSentenceCache.hashSentence(SENTENCE)
+        sentenceCache.rootTag = 'AnaRecs'
+        sentenceCache.addResult(sentHash, '<anaRec>result</anaRec>\n')
+        sentenceCache.save()
+
+        sentenceCache = self.makeCache()
+        self.assertTrue(sentenceCache.contains(sentHash))
+        self.assertEqual(sentenceCache.getResult(sentHash), '<anaRec>result</anaRec>\n')
+
+        # A changed sentence isn't found
+        self.assertFalse(sentenceCache.contains(TreeTranSentenceCache.hashSentence(SENTENCE.replace('perro', 'gato'))))
+
+    def test_cache_from_old_rules_or_program_thrown_away(self):
+        sentHash = TreeTranSentenceCache.hashSentence(SENTENCE)
+
+        for path, newText in [(self.rulesPath, '<rules>2</rules>'), (self.exePath, 'program 2')]:
+
+            sentenceCache = self.makeCache()
+            sentenceCache.rootTag = 'AnaRecs'
+            sentenceCache.addResult(sentHash, '<anaRec>old result</anaRec>\n')
+            sentenceCache.save()
+
+            self.writeFile(path, newText)
+
+            sentenceCache = self.makeCache()
+            self.assertFalse(sentenceCache.contains(sentHash))
+            self.assertIsNone(sentenceCache.rootTag)
+
+if __name__ == '__main__':
+    unittest.main()
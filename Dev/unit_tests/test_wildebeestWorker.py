@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add the path to the lib directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../lib')))
+
+try:
+    import WildebeestWorker
+    HAVE_WILDEBEEST = True
+except ImportError:
+    HAVE_WILDEBEEST = False
+
+@unittest.skipUnless(HAVE_WILDEBEEST, 'needs wildebeest')
+class TestWildebeestWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.text = ''.join(f'Line {num}: Café  ８ x​ y ﬁ\n' for num in range(200))
+
+    def test_split_into_paragraph_chunks(self):
+        chunkList = WildebeestWorker.splitIntoParagraphChunks(self.text, 1000)
+        self.assertGreater(len(chunkList), 2)
+        self.assertEqual(''.join(chunkList), self.text)
+        self.assertTrue(all(chunk.endswith('\n') for chunk in chunkList))
+
+    @unittest.skipUnless(WildebeestWorker.canStartWorkers() if HAVE_WILDEBEEST else False, 'no Python to start workers with')
+    def test_parallel_same_as_serial(self):
+        serialStr = WildebeestWorker.normalize(self.text, 'ALL', [], [], None)
+        self.assertNotEqual(serialStr, self.text)
+
+        parallelStr = WildebeestWorker.normalizeInParallel(self.text, 'ALL', [], [], None, chunkSize=1000, maxWorkers=2)
+        self.assertEqual(parallelStr, serialStr)
+
+    def test_fall_back_when_workers_fail(self):
+        # A worker that can't start gives None, so the caller does it in its own process
+        with mock.patch.object(WildebeestWorker.sys, 'executable', os.path.join(os.path.dirname(__file__), 'no_such_folder', 'python')):
+            self.assertIsNone(WildebeestWorker.normalizeInParallel(self.text, 'ALL', [], [], None, chunkSize=1000, maxWorkers=2))
+
+        # FlexTools running inside another program
+        with mock.patch.object(WildebeestWorker.sys, 'executable', 'FieldWorks.exe'):
+            self.assertIsNone(WildebeestWorker.normalizeInParallel(self.text, 'ALL', [], [], None, chunkSize=1000, maxWorkers=2))
+
+        # Too small to split
+        self.assertIsNone(WildebeestWorker.normalizeInParallel('short\n', 'ALL', [], [], None, maxWorkers=2))
+
+if __name__ == '__main__':
+    unittest.main()